@@ -409,6 +409,73 @@ export async function getAdminDashboard(): Promise<AdminDashboardData> {
   return fetchAdmin<AdminDashboardData>('/admin/dashboard');
 }
 
+export interface AdminOrderStreamEvent {
+  type: 'order.created' | 'order.status' | 'order.payment' | 'resync';
+  order_id?: number;
+  seller_id?: number;
+  status?: string;
+  old_status?: string;
+  payment_status?: string | null;
+  total_price?: number | null;
+  is_preorder?: boolean;
+  at?: string;
+}
+
+const ORDER_STREAM_RETRY_MS = 3000;
+
+/**
+ * Live order events of all sellers (server-sent events read via fetch, since the stream
+ * needs X-Admin-Token). Reconnects with Last-Event-ID until signal is aborted; after a
+ * reconnect the handler gets a `resync` event. Stops on 401.
+ */
+export async function subscribeAdminOrderEvents(
+  onEvent: (event: AdminOrderStreamEvent) => void,
+  signal: AbortSignal,
+): Promise<void> {
+  let lastEventId: string | null = null;
+  let connectedOnce = false;
+  while (!signal.aborted) {
+    try {
+      const headers: Record<string, string> = { Accept: 'text/event-stream' };
+      const token = getToken();
+      if (token) headers['X-Admin-Token'] = token;
+      if (lastEventId) headers['Last-Event-ID'] = lastEventId;
+      const res = await fetch(`${getApiBase()}/admin/orders/events`, { headers, signal });
+      if (res.status === 401) return;
+      if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+      if (connectedOnce) onEvent({ type: 'resync' });
+      connectedOnce = true;
+
+      const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        let sep: number;
+        while ((sep = buffer.indexOf('\n\n')) >= 0) {
+          const block = buffer.slice(0, sep);
+          buffer = buffer.slice(sep + 2);
+          let id: string | null = null;
+          let type = '';
+          let data = '';
+          for (const line of block.split('\n')) {
+            if (line.startsWith('id: ')) id = line.slice(4);
+            else if (line.startsWith('event: ')) type = line.slice(7);
+            else if (line.startsWith('data: ')) data += line.slice(6);
+          }
+          if (id) lastEventId = id;
+          if (type === 'resync') onEvent({ type: 'resync' });
+          else if (type && data) onEvent(JSON.parse(data) as AdminOrderStreamEvent);
+        }
+      }
+    } catch {
+      if (signal.aborted) return;
+    }
+    await new Promise((resolve) => setTimeout(resolve, ORDER_STREAM_RETRY_MS));
+  }
+}
+
 // ── Orders ──
 export interface AdminOrdersParams {
   status?: string;
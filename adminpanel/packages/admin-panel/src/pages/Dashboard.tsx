@@ -1,14 +1,19 @@
 import { useEffect, useState, useCallback } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
-import { getAdminDashboard } from '../api/adminClient';
+import { getAdminDashboard, subscribeAdminOrderEvents } from '../api/adminClient';
 import type { AdminDashboardData } from '../types';
 import { SalesChart } from '@shared/components/SalesChart';
+import { coalesce } from '@shared/utils/coalesce';
 import {
   TrendingUp, TrendingDown, Clock, AlertTriangle,
   ShoppingBag, Truck, CheckCircle, XCircle, Users, Store, RefreshCw,
 } from 'lucide-react';
 import './Dashboard.css';
 
+/** Order events arriving within this window share one dashboard reload. */
+const ORDER_EVENTS_COALESCE_MS = 2000;
+const ALERTS_REFRESH_MS = 5 * 60_000;
+
 function pctChange(current: number, previous: number): number {
   if (!previous) return current > 0 ? 100 : 0;
   return Math.round(((current - previous) / previous) * 100);
@@ -53,8 +58,17 @@ export function Dashboard() {
 
   useEffect(() => {
     loadData();
-    const interval = setInterval(() => loadData(true), 60_000);
-    return () => clearInterval(interval);
+    // Order counters follow the order event stream; a burst of events becomes one reload
+    const controller = new AbortController();
+    const sync = coalesce(() => loadData(true), ORDER_EVENTS_COALESCE_MS);
+    subscribeAdminOrderEvents(() => sync.trigger(), controller.signal);
+    // Placement/limit alerts change without order events
+    const interval = setInterval(() => loadData(true), ALERTS_REFRESH_MS);
+    return () => {
+      controller.abort();
+      sync.cancel();
+      clearInterval(interval);
+    };
   }, [loadData]);
 
   if (loading) {
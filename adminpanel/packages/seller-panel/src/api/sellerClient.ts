@@ -69,6 +69,11 @@ async function tryRefreshSellerToken(): Promise<boolean> {
 }
 
 async function fetchSeller<T>(endpoint: string, options: RequestInit = {}): Promise<T> {
+  return (await fetchSellerResponse(endpoint, options)).json();
+}
+
+/** fetchSeller that returns the Response (for endpoints that put data in headers). */
+async function fetchSellerResponse(endpoint: string, options: RequestInit = {}): Promise<Response> {
   const url = `${getApiBase()}${endpoint}`;
   const token = getSellerToken();
   const headers: Record<string, string> = {
@@ -87,7 +92,7 @@ async function fetchSeller<T>(endpoint: string, options: RequestInit = {}): Prom
       const newToken = getSellerToken();
       const retryHeaders = { ...headers, 'X-Seller-Token': newToken! };
       const retryRes = await fetch(url, { ...options, headers: retryHeaders });
-      if (retryRes.ok) return retryRes.json();
+      if (retryRes.ok) return retryRes;
     }
     window.dispatchEvent(new CustomEvent('seller-auth-expired'));
     throw new Error('Сессия истекла');
@@ -97,7 +102,7 @@ async function fetchSeller<T>(endpoint: string, options: RequestInit = {}): Prom
     const err = await res.json().catch(() => ({ detail: res.statusText }));
     throw new Error(err.detail || `HTTP ${res.status}`);
   }
-  return res.json();
+  return res;
 }
 
 /** Full URL for a product photo (photo_id from backend, e.g. /static/uploads/products/...). Returns null for Telegram file_id or other non-static paths. */
@@ -396,14 +401,130 @@ export async function updateMe(payload: {
   });
 }
 
-export async function getOrders(params?: { status?: string; date_from?: string; date_to?: string; preorder?: boolean }): Promise<SellerOrder[]> {
+/** Largest page the orders feed serves (server default page is 50). */
+export const ORDERS_PAGE_MAX = 500;
+
+export interface SellerOrdersQuery {
+  status?: string;
+  date_from?: string;
+  date_to?: string;
+  preorder?: boolean;
+  limit?: number;
+  cursor?: string;
+}
+
+export interface SellerOrdersPage {
+  orders: SellerOrder[];
+  /** Pass back as cursor for the next (older) page; null on the last page */
+  nextCursor: string | null;
+}
+
+/** One page of orders, newest first. */
+export async function getOrdersPage(params?: SellerOrdersQuery): Promise<SellerOrdersPage> {
   const sp = new URLSearchParams();
   if (params?.status) sp.set('status', params.status);
   if (params?.date_from) sp.set('date_from', params.date_from);
   if (params?.date_to) sp.set('date_to', params.date_to);
   if (params?.preorder !== undefined) sp.set('preorder', String(params.preorder));
+  if (params?.limit) sp.set('limit', String(params.limit));
+  if (params?.cursor) sp.set('cursor', params.cursor);
   const q = sp.toString() ? `?${sp.toString()}` : '';
-  return fetchSeller<SellerOrder[]>(`/seller-web/orders${q}`);
+  const res = await fetchSellerResponse(`/seller-web/orders${q}`);
+  return { orders: await res.json(), nextCursor: res.headers.get('X-Next-Cursor') };
+}
+
+/** First page of orders only (use getOrdersPage to page further). */
+export async function getOrders(params?: SellerOrdersQuery): Promise<SellerOrder[]> {
+  return (await getOrdersPage(params)).orders;
+}
+
+export interface SellerOrderChanges {
+  orders: SellerOrder[];
+  next_since: string;
+  has_more: boolean;
+}
+
+/** Orders created or changed since the previous poll (pass its next_since back). */
+export async function getOrderChanges(since?: string): Promise<SellerOrderChanges> {
+  const q = since ? `?since=${encodeURIComponent(since)}` : '';
+  return fetchSeller<SellerOrderChanges>(`/seller-web/orders/changes${q}`);
+}
+
+export interface OrderStreamEvent {
+  type: 'order.created' | 'order.status' | 'order.payment' | 'resync';
+  order_id?: number;
+  seller_id?: number;
+  status?: string;
+  old_status?: string;
+  payment_status?: string | null;
+  total_price?: number | null;
+  is_preorder?: boolean;
+  at?: string;
+}
+
+const ORDER_STREAM_RETRY_MS = 3000;
+
+/**
+ * Live order events (server-sent events read via fetch, since the stream needs X-Seller-Token).
+ * Reconnects with Last-Event-ID until signal is aborted; after a reconnect the handler gets
+ * a `resync` event, and should refetch its lists.
+ */
+export async function subscribeOrderEvents(
+  onEvent: (event: OrderStreamEvent) => void,
+  signal: AbortSignal,
+): Promise<void> {
+  let lastEventId: string | null = null;
+  let connectedOnce = false;
+  while (!signal.aborted) {
+    try {
+      let token = getSellerToken();
+      const headers: Record<string, string> = { Accept: 'text/event-stream' };
+      if (token) headers['X-Seller-Token'] = token;
+      if (lastEventId) headers['Last-Event-ID'] = lastEventId;
+      let res = await fetch(`${getApiBase()}/seller-web/orders/events`, { headers, signal });
+      if (res.status === 401 && token && await tryRefreshSellerToken()) {
+        token = getSellerToken();
+        res = await fetch(`${getApiBase()}/seller-web/orders/events`, {
+          headers: { ...headers, 'X-Seller-Token': token! },
+          signal,
+        });
+      }
+      if (res.status === 401) {
+        window.dispatchEvent(new CustomEvent('seller-auth-expired'));
+        return;
+      }
+      if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+      if (connectedOnce) onEvent({ type: 'resync' });
+      connectedOnce = true;
+
+      const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        let sep: number;
+        while ((sep = buffer.indexOf('\n\n')) >= 0) {
+          const block = buffer.slice(0, sep);
+          buffer = buffer.slice(sep + 2);
+          let id: string | null = null;
+          let type = '';
+          let data = '';
+          for (const line of block.split('\n')) {
+            if (line.startsWith('id: ')) id = line.slice(4);
+            else if (line.startsWith('event: ')) type = line.slice(7);
+            else if (line.startsWith('data: ')) data += line.slice(6);
+          }
+          if (id) lastEventId = id;
+          if (type === 'resync') onEvent({ type: 'resync' });
+          else if (type && data) onEvent(JSON.parse(data) as OrderStreamEvent);
+        }
+      }
+    } catch {
+      if (signal.aborted) return;
+    }
+    await new Promise((resolve) => setTimeout(resolve, ORDER_STREAM_RETRY_MS));
+  }
 }
 
 export interface SellerOrderDetail extends SellerOrder {
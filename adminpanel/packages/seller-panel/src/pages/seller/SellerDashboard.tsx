@@ -7,8 +7,9 @@ import {
   Clock, Check, X,
 } from 'lucide-react';
 import {
-  getMe, getStats, getOrders, getDashboardAlerts, getSubscriberCount,
+  getMe, getStats, getOrders, ORDERS_PAGE_MAX, getDashboardAlerts, getSubscriberCount,
   getUpcomingEvents, getDashboardOrderEvents, acceptOrder, rejectOrder,
+  subscribeOrderEvents,
 } from '../../api/sellerClient';
 import type {
   SellerMe, SellerStats, SellerOrder, DashboardAlerts,
@@ -16,11 +17,13 @@ import type {
 } from '../../api/sellerClient';
 import { useSellerAuth } from '../../contexts/SellerAuthContext';
 import { PageHeader, StatCard, StatusBadge, Card, ActionCard } from '@shared/components/ui';
+import { coalesce } from '@shared/utils/coalesce';
 import { MiniSparkline } from '../../components/MiniSparkline';
 import '../Dashboard.css';
 
-const PENDING_POLL_MS = 45_000;
 const NOTIFICATION_TITLE = 'flurai';
+/** Order events arriving within this window share one pending-orders refetch. */
+const ORDER_EVENTS_COALESCE_MS = 500;
 const MAX_INLINE_PENDING = 5;
 
 const CURRENCY = new Intl.NumberFormat('ru-RU', { maximumFractionDigits: 0 });
@@ -144,8 +147,8 @@ export function SellerDashboard() {
           getMe(),
           getStats({ branch: branchParam }),
           getStats({ period: '7d', branch: branchParam }),
-          getOrders({ status: 'pending' }),
-          getOrders({ status: 'accepted,assembling,in_transit,ready_for_pickup' }),
+          getOrders({ status: 'pending', limit: ORDERS_PAGE_MAX }),
+          getOrders({ status: 'accepted,assembling,in_transit,ready_for_pickup', limit: ORDERS_PAGE_MAX }),
           getDashboardAlerts(),
           getSubscriberCount().catch(() => ({ count: 0 })),
           getUpcomingEvents(14).catch(() => []),
@@ -181,11 +184,12 @@ export function SellerDashboard() {
     }
   }, []);
 
-  /* Pending orders polling */
+  /* Pending orders: refetched when the order event stream reports a change */
   useEffect(() => {
-    const tick = async () => {
+    const controller = new AbortController();
+    const refresh = async () => {
       try {
-        const pending = await getOrders({ status: 'pending' });
+        const pending = await getOrders({ status: 'pending', limit: ORDERS_PAGE_MAX });
         const count = pending?.length ?? 0;
         const prev = lastPendingCountRef.current;
         const isHidden = document.visibilityState === 'hidden';
@@ -197,10 +201,19 @@ export function SellerDashboard() {
         }
         lastPendingCountRef.current = count;
         setPendingOrders(pending ?? []);
-      } catch { /* ignore poll errors */ }
+      } catch { /* ignore refresh errors */ }
+    };
+    // A burst of events becomes one refetch
+    const sync = coalesce(refresh, ORDER_EVENTS_COALESCE_MS);
+    subscribeOrderEvents((event) => {
+      if (event.type === 'resync' || event.type === 'order.created' || event.old_status === 'pending') {
+        sync.trigger();
+      }
+    }, controller.signal);
+    return () => {
+      controller.abort();
+      sync.cancel();
     };
-    const id = setInterval(tick, PENDING_POLL_MS);
-    return () => clearInterval(id);
   }, []);
 
   /* Inline accept / reject */
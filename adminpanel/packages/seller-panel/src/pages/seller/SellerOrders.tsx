@@ -1,16 +1,20 @@
 import { useEffect, useState, useCallback, useMemo, useRef } from 'react';
 import { useSearchParams } from 'react-router-dom';
 import { PageHeader, TabBar, EmptyState, FormField, useToast, useConfirm } from '@shared/components/ui';
+import { coalesce } from '@shared/utils/coalesce';
 import {
-  getOrders,
+  getOrdersPage,
+  getOrderChanges,
+  ORDERS_PAGE_MAX,
   acceptOrder,
   rejectOrder,
   updateOrderStatus,
   updateOrderPrice,
   getPreorderSummary,
   getProducts,
+  subscribeOrderEvents,
 } from '../../api/sellerClient';
-import type { SellerOrder, PreorderSummary } from '../../api/sellerClient';
+import type { SellerOrder, SellerOrdersQuery, PreorderSummary } from '../../api/sellerClient';
 import { STATUS_LABELS, STATUS_ACTION_LABELS, isPickup } from './orders/constants';
 import { OrderCardCompact } from './orders/OrderCardCompact';
 import type { CardContext } from './orders/OrderCardCompact';
@@ -19,8 +23,11 @@ import { DateStrip } from './orders/DateStrip';
 import { useTabBadge } from '../../hooks/useTabBadge';
 import './SellerOrders.css';
 
-const POLL_INTERVAL_MS = 15_000;
 const NOTIFICATION_TITLE = 'flurai';
+/** History/cancelled tabs load this many orders per page. */
+const ORDERS_PAGE_SIZE = 50;
+/** Order events arriving within this window share one list refresh. */
+const ORDER_EVENTS_COALESCE_MS = 500;
 
 type MainTab = 'pending' | 'awaiting_payment' | 'active' | 'history' | 'cancelled' | 'preorder';
 type PreorderSubTab = 'requests' | 'waiting' | 'dashboard';
@@ -55,83 +62,115 @@ export function SellerOrders() {
     return `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
   });
   const [newPendingCount, setNewPendingCount] = useState(0);
-  const lastPendingIdsRef = useRef<Set<number> | null>(null);
 
   useTabBadge(newPendingCount);
 
-  const loadOrders = useCallback(async (silent = false) => {
-    if (!silent) setLoading(true);
-    try {
-      let status: string | undefined;
-      let date_from: string | undefined;
-      let date_to: string | undefined;
-      let preorder: boolean | undefined;
-
-      if (activeTab === 'preorder') {
-        preorder = true;
-        if (preorderSubTab === 'requests') {
-          status = 'pending';
-        } else if (preorderSubTab === 'waiting') {
-          status = 'accepted';
-        } else {
-          status = 'pending,accepted,assembling,in_transit,ready_for_pickup,done,completed';
-        }
-      } else if (activeTab === 'pending') {
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // Server-side query of the current tab: history/cancelled are paged, the working tabs load whole
+  const ordersQuery = useMemo<SellerOrdersQuery>(() => {
+    if (activeTab === 'preorder') {
+      let status: string;
+      if (preorderSubTab === 'requests') {
         status = 'pending';
-        preorder = false;
-      } else if (activeTab === 'awaiting_payment') {
+      } else if (preorderSubTab === 'waiting') {
         status = 'accepted';
-      } else if (activeTab === 'active') {
-        // Include done for the kanban "Выполнен" column
-        status = 'accepted,assembling,in_transit,ready_for_pickup,done';
-      } else if (activeTab === 'cancelled') {
-        status = 'cancelled';
-        if (dateFrom) date_from = dateFrom;
-        if (dateTo) date_to = dateTo;
       } else {
-        status = 'done,completed';
-        if (dateFrom) date_from = dateFrom;
-        if (dateTo) date_to = dateTo;
-      }
-      let data = await getOrders({ status, date_from, date_to, preorder });
-      data = data || [];
-
-      // Client-side filtering for payment-related tabs
-      if (activeTab === 'awaiting_payment') {
-        data = data.filter(o => o.payment_id && o.payment_status !== 'succeeded');
-      } else if (activeTab === 'active') {
-        // Exclude accepted orders that are awaiting payment
-        data = data.filter(o =>
-          o.status !== 'accepted' ||
-          !o.payment_id ||
-          o.payment_status === 'succeeded'
-        );
+        status = 'pending,accepted,assembling,in_transit,ready_for_pickup,done,completed';
       }
+      return { status, preorder: true, limit: ORDERS_PAGE_MAX };
+    }
+    if (activeTab === 'pending') return { status: 'pending', preorder: false, limit: ORDERS_PAGE_MAX };
+    if (activeTab === 'awaiting_payment') return { status: 'accepted', limit: ORDERS_PAGE_MAX };
+    // Include done for the kanban "Выполнен" column
+    if (activeTab === 'active') return { status: 'accepted,assembling,in_transit,ready_for_pickup,done', limit: ORDERS_PAGE_MAX };
+    return {
+      status: activeTab === 'cancelled' ? 'cancelled' : 'done,completed',
+      date_from: dateFrom || undefined,
+      date_to: dateTo || undefined,
+      limit: ORDERS_PAGE_SIZE,
+    };
+  }, [activeTab, preorderSubTab, dateFrom, dateTo]);
 
-      // Client-side filtering by delivery type
-      if (deliveryFilter !== 'all') {
-        data = data.filter(o => {
-          const pickup = isPickup(o.delivery_type);
-          return deliveryFilter === 'pickup' ? pickup : !pickup;
-        });
-      }
+  // Client-side filters on top of the server query: payment state and delivery type
+  const matchesTab = useCallback((o: SellerOrder) => {
+    if (activeTab === 'awaiting_payment' && !(o.payment_id && o.payment_status !== 'succeeded')) return false;
+    // Exclude accepted orders that are awaiting payment
+    if (activeTab === 'active' && o.status === 'accepted' && o.payment_id && o.payment_status !== 'succeeded') return false;
+    if (deliveryFilter !== 'all' && isPickup(o.delivery_type) !== (deliveryFilter === 'pickup')) return false;
+    return true;
+  }, [activeTab, deliveryFilter]);
 
-      setOrders(data);
+  const loadOrders = useCallback(async (silent = false) => {
+    if (!silent) setLoading(true);
+    try {
+      const page = await getOrdersPage(ordersQuery);
+      setOrders(page.orders.filter(matchesTab));
+      setNextCursor(page.nextCursor);
     } catch {
       setOrders([]);
+      setNextCursor(null);
     } finally {
       if (!silent) setLoading(false);
     }
-  }, [activeTab, preorderSubTab, dateFrom, dateTo, deliveryFilter]);
+  }, [ordersQuery, matchesTab]);
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await getOrdersPage({ ...ordersQuery, cursor: nextCursor });
+      const seen = new Set(orders.map(o => o.id));
+      setOrders(prev => [...prev, ...page.orders.filter(o => !seen.has(o.id) && matchesTab(o))]);
+      setNextCursor(page.nextCursor);
+    } catch (e) {
+      toast.error(e instanceof Error ? e.message : 'Ошибка');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   useEffect(() => {
     loadOrders();
   }, [loadOrders]);
 
-  // Capture pending order IDs when on the pending tab
+  // Incremental refresh: merge the orders changed since the last poll into the loaded list
+  const changesSinceRef = useRef<string | undefined>(undefined);
+  const applyOrderChanges = useCallback(async () => {
+    const statuses = (ordersQuery.status || '').split(',');
+    const belongs = (o: SellerOrder) => {
+      if (!statuses.includes(o.status)) return false;
+      if (ordersQuery.preorder !== undefined && !!o.is_preorder !== ordersQuery.preorder) return false;
+      const day = (o.created_at || '').slice(0, 10);
+      if (ordersQuery.date_from && day < ordersQuery.date_from) return false;
+      if (ordersQuery.date_to && day > ordersQuery.date_to) return false;
+      return matchesTab(o);
+    };
+    const changed: SellerOrder[] = [];
+    let hasMore = true;
+    while (hasMore) {
+      const batch = await getOrderChanges(changesSinceRef.current);
+      changed.push(...batch.orders);
+      changesSinceRef.current = batch.next_since;
+      hasMore = batch.has_more;
+    }
+    if (changed.length === 0) return;
+    const byId = new Map(changed.map(o => [o.id, o]));
+    setOrders(prev => {
+      // On a partially loaded (paged) list, only orders newer than the last loaded one fit in
+      const oldest = nextCursor && prev.length ? prev[prev.length - 1] : null;
+      const inRange = (o: SellerOrder) => !oldest || (o.created_at || '') > (oldest.created_at || '');
+      const kept = prev.filter(o => !byId.has(o.id));
+      const added = [...byId.values()].filter(o => belongs(o) && (prev.some(p => p.id === o.id) || inRange(o)));
+      return [...kept, ...added].sort((a, b) =>
+        (b.created_at || '').localeCompare(a.created_at || '') || b.id - a.id);
+    });
+  }, [ordersQuery, matchesTab, nextCursor]);
+
+  // Reset the new-orders badge once the pending tab is shown
   useEffect(() => {
     if (activeTab === 'pending' && !loading) {
-      lastPendingIdsRef.current = new Set(orders.map(o => o.id));
       setNewPendingCount(0);
     }
   }, [activeTab, orders, loading]);
@@ -143,45 +182,56 @@ export function SellerOrders() {
     }
   }, []);
 
-  // Poll for new pending orders every 15s
+  // Live order events instead of polling: new pending orders and status/payment changes
+  const activeTabRef = useRef(activeTab);
+  activeTabRef.current = activeTab;
+  const loadOrdersRef = useRef(loadOrders);
+  loadOrdersRef.current = loadOrders;
+  const applyOrderChangesRef = useRef(applyOrderChanges);
+  applyOrderChangesRef.current = applyOrderChanges;
   useEffect(() => {
-    const tick = async () => {
-      try {
-        const pending = await getOrders({ status: 'pending', preorder: false });
-        const freshIds = new Set((pending || []).map(o => o.id));
-        const prevIds = lastPendingIdsRef.current;
-
-        // Always update ref to track current state
-        lastPendingIdsRef.current = freshIds;
-
-        if (prevIds === null) return; // First poll — just save state
-
-        const newIds = [...freshIds].filter(id => !prevIds.has(id));
-
-        if (newIds.length > 0) {
-          if (activeTab === 'pending') {
-            // User is looking at pending tab → silently refresh the list (no spinner)
-            loadOrders(true);
-          } else {
-            // User is on another tab → show badge
-            setNewPendingCount(prev => prev + newIds.length);
-          }
+    const controller = new AbortController();
+    // A burst of events (bulk status change, reconnect) becomes one request
+    let fullReload = false;
+    const sync = coalesce(async () => {
+      if (fullReload) {
+        fullReload = false;
+        changesSinceRef.current = undefined;
+        await loadOrdersRef.current(true);
+        return;
+      }
+      // A failed incremental poll falls back to a full silent reload
+      await applyOrderChangesRef.current().catch(() => loadOrdersRef.current(true));
+    }, ORDER_EVENTS_COALESCE_MS);
+    const refresh = sync.trigger;
+    subscribeOrderEvents((event) => {
+      if (event.type === 'resync') {
+        // Events were missed while reconnecting: refetch the list
+        fullReload = true;
+        sync.trigger();
+      } else if (event.type === 'order.created' && !event.is_preorder) {
+        if (activeTabRef.current === 'pending') {
+          // User is looking at pending tab → merge the new order in (no spinner)
+          refresh();
+        } else {
+          // User is on another tab → show badge
+          setNewPendingCount(prev => prev + 1);
+        }
 
-          // Browser notification when tab is hidden
-          if (document.visibilityState === 'hidden' && Notification.permission === 'granted') {
-            const text = newIds.length === 1
-              ? 'Новый запрос на покупку'
-              : `Новых запросов: ${newIds.length}`;
-            new Notification(NOTIFICATION_TITLE, { body: text });
-          }
+        // Browser notification when tab is hidden
+        if (document.visibilityState === 'hidden' && Notification.permission === 'granted') {
+          new Notification(NOTIFICATION_TITLE, { body: 'Новый запрос на покупку' });
         }
-      } catch {
-        // ignore poll errors
+      } else {
+        // Status/payment change: merge the changed orders into the current list
+        refresh();
       }
+    }, controller.signal);
+    return () => {
+      controller.abort();
+      sync.cancel();
     };
-    const id = setInterval(tick, POLL_INTERVAL_MS);
-    return () => clearInterval(id);
-  }, [activeTab, loadOrders]);
+  }, []);
 
   // --- Action handlers ---
 
@@ -516,6 +566,15 @@ export function SellerOrders() {
                 {...cardProps}
               />
             ))}
+            {nextCursor && (
+              <button
+                className="btn btn-secondary orders-load-more"
+                disabled={loadingMore}
+                onClick={loadMore}
+              >
+                {loadingMore ? 'Загрузка...' : 'Показать ещё'}
+              </button>
+            )}
           </div>
         )
       )}
@@ -38,6 +38,8 @@ export * from './utils/constants';
 export * from './utils/environment';
 export { formatPhoneInput as formatPhoneInputLegacy, phoneToDigits as phoneToDigitsLegacy } from './utils/phone';
 export { getCroppedImg } from './utils/cropImage';
+export { coalesce } from './utils/coalesce';
+export type { Coalesced } from './utils/coalesce';
 
 // Lib
 export { loadYmaps, setYmapsApiKey, getYmapsApiKey } from './lib/ymaps';
@@ -0,0 +1,52 @@
+export interface Coalesced {
+  /** Request a run; triggers within the same window share one run. */
+  trigger: () => void;
+  /** Drop the scheduled run and ignore further triggers. */
+  cancel: () => void;
+}
+
+/**
+ * Coalesce bursts of calls: the first trigger schedules `fn` in `delay` ms and every
+ * trigger until then joins that run. Runs never overlap — a trigger during a run
+ * schedules one more run after it.
+ */
+export function coalesce(fn: () => Promise<unknown> | void, delay = 500): Coalesced {
+  let timer: ReturnType<typeof setTimeout> | null = null;
+  let running = false;
+  let again = false;
+  let cancelled = false;
+
+  const run = async () => {
+    timer = null;
+    if (cancelled) return;
+    running = true;
+    try {
+      await fn();
+    } catch {
+      /* fn reports its own errors */
+    } finally {
+      running = false;
+      if (again && !cancelled) {
+        again = false;
+        schedule();
+      }
+    }
+  };
+
+  const schedule = () => {
+    if (!timer) timer = setTimeout(run, delay);
+  };
+
+  return {
+    trigger: () => {
+      if (cancelled) return;
+      if (running) again = true;
+      else schedule();
+    },
+    cancel: () => {
+      cancelled = true;
+      if (timer) clearTimeout(timer);
+      timer = null;
+    },
+  };
+}
@@ -16,34 +16,33 @@ async def invalidate_cache(
     cache: CacheService = Depends(get_cache)
 ):
     """
-    Сбросить кэш справочников.
+    Сбросить кэш (O(1): увеличивается поколение пространства имён, без KEYS).
 
-    - cache_type=None: сбросить весь кэш (города, районы, метро)
+    - cache_type=None: сбросить весь кэш (города, районы, метро, страницы магазинов)
     - cache_type="cities": сбросить только кэш городов
     - cache_type="districts": сбросить только кэш районов
     - cache_type="metro": сбросить только кэш метро
+    - cache_type="seller_detail": сбросить кэш публичных страниц магазинов
     """
     logger.info("Cache invalidation requested", cache_type=cache_type or "all")
 
+    namespaces = {
+        CacheService.NS_CITIES: cache.invalidate_cities,
+        CacheService.NS_DISTRICTS: cache.invalidate_districts,
+        CacheService.NS_METRO: cache.invalidate_metro,
+        CacheService.NS_SELLER_DETAIL: cache.invalidate_seller_details,
+    }
     if cache_type is None:
         await cache.invalidate_all_references()
+        await cache.invalidate_seller_details()
         logger.info("Cache invalidated", cache_type="all")
         return {"status": "ok", "invalidated": "all"}
-    elif cache_type == "cities":
-        await cache.invalidate_cities()
-        logger.info("Cache invalidated", cache_type="cities")
-        return {"status": "ok", "invalidated": "cities"}
-    elif cache_type == "districts":
-        await cache.invalidate_districts()
-        logger.info("Cache invalidated", cache_type="districts")
-        return {"status": "ok", "invalidated": "districts"}
-    elif cache_type == "metro":
-        await cache.invalidate_metro()
-        logger.info("Cache invalidated", cache_type="metro")
-        return {"status": "ok", "invalidated": "metro"}
-    else:
+    if cache_type not in namespaces:
         logger.warning("Invalid cache type requested", cache_type=cache_type)
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid cache_type: {cache_type}. Use: cities, districts, metro, or omit for all."
+            detail=f"Invalid cache_type: {cache_type}. Use: {', '.join(namespaces)}, or omit for all."
         )
+    await namespaces[cache_type]()
+    logger.info("Cache invalidated", cache_type=cache_type)
+    return {"status": "ok", "invalidated": cache_type}
@@ -5,7 +5,7 @@ from typing import Optional
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.app.api.deps import get_session
+from backend.app.api.deps import get_read_session
 from backend.app.api.admin._common import require_admin_token
 
 router = APIRouter()
@@ -21,7 +21,7 @@ async def get_admin_customers(
     min_orders: Optional[int] = None,
     page: int = 1,
     per_page: int = 30,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     _token: None = Depends(require_admin_token),
 ):
     """Список покупателей с агрегированной статистикой."""
@@ -5,7 +5,7 @@ from pydantic import BaseModel, field_validator
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from backend.app.api.deps import get_session
+from backend.app.api.deps import get_session, get_read_session
 from backend.app.api.admin._common import require_admin_token
 
 router = APIRouter()
@@ -20,7 +20,7 @@ async def get_finance_summary(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     group_by: str = "day",
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     _token: None = Depends(require_admin_token),
 ):
     """Финансовая сводка с динамикой и разбивкой по продавцам."""
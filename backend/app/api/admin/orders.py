@@ -2,11 +2,19 @@
 
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.api.deps import get_session
 from backend.app.api.admin._common import require_admin_token
+from backend.app.services.cache import CacheService
+from backend.app.services.order_events import (
+    ADMIN_SCOPE,
+    ADMIN_STREAM_KEY,
+    SSE_HEADERS,
+    stream_order_events,
+)
 
 router = APIRouter()
 
@@ -157,6 +165,21 @@ async def get_admin_orders(
     }
 
 
+@router.get("/orders/events")
+async def admin_order_events(
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    _token: None = Depends(require_admin_token),
+):
+    """Server-sent events about orders of all sellers (new orders, status and payment changes).
+    Needs X-Admin-Token, so the panel reads it with fetch() streaming rather than EventSource."""
+    redis = await CacheService.get_redis()
+    return StreamingResponse(
+        stream_order_events(redis, ADMIN_SCOPE, ADMIN_STREAM_KEY, last_event_id),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 @router.get("/orders/{order_id}")
 async def get_admin_order_detail(
     order_id: int,
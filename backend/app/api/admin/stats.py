@@ -2,13 +2,14 @@
 
 from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.app.api.deps import get_session
+from backend.app.api.deps import get_read_session, get_cache
 from backend.app.api.admin._common import logger, require_admin_token
 from backend.app.services.sellers import SellerService
 from backend.app.services.orders import OrderService
+from backend.app.services.cache import CacheService
 
 router = APIRouter()
 
@@ -21,7 +22,7 @@ router = APIRouter()
 async def get_visitor_analytics(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     _admin: None = Depends(require_admin_token),
 ):
     """Статистика посещений платформы: уники, просмотры, конверсия."""
@@ -48,7 +49,7 @@ async def get_visitor_analytics(
 async def get_all_stats(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     _admin: None = Depends(require_admin_token),
 ):
     """Общая статистика всех продавцов. Опционально: date_from, date_to (дата YYYY-MM-DD)."""
@@ -67,7 +68,7 @@ async def get_all_stats(
 async def get_stats_overview(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     _admin: None = Depends(require_admin_token),
 ):
     """Дневная статистика по платформе для графика (выполненные заказы). date_from, date_to — YYYY-MM-DD."""
@@ -82,15 +83,38 @@ async def get_stats_overview(
     return await order_service.get_platform_daily_stats(date_from=d_from, date_to=d_to)
 
 
+@router.get("/stats/realtime")
+async def get_realtime_seller_counts(
+    seller_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cache: CacheService = Depends(get_cache),
+    _admin: None = Depends(require_admin_token),
+):
+    """Счётчики продавцов за сегодня (МСК) в реальном времени: созданные/выполненные заказы, новые товары.
+
+    Без запроса к БД — из Redis (services/business_metrics.py), задержка до FLUSH_INTERVAL.
+    """
+    from backend.app.services.business_metrics import get_seller_counts, ORDERS_CREATED, current_day
+
+    day = current_day()
+    counts = await get_seller_counts(cache.redis, day, seller_id)
+    sellers = sorted(
+        ({"seller_id": sid, **c} for sid, c in counts.items()),
+        key=lambda row: row[ORDERS_CREATED],
+        reverse=True,
+    )
+    return {"date": day.isoformat(), "sellers": sellers[:limit]}
+
+
 @router.get("/stats/seller")
-async def get_seller_stats(fio: str, session: AsyncSession = Depends(get_session), _admin: None = Depends(require_admin_token)):
+async def get_seller_stats(fio: str, session: AsyncSession = Depends(get_read_session), _admin: None = Depends(require_admin_token)):
     """Статистика конкретного продавца по ФИО"""
     service = SellerService(session)
     return await service.get_seller_stats_by_fio(fio)
 
 
 @router.get("/stats/limits")
-async def get_limits_analytics(session: AsyncSession = Depends(get_session), _admin: None = Depends(require_admin_token)):
+async def get_limits_analytics(session: AsyncSession = Depends(get_read_session), _admin: None = Depends(require_admin_token)):
     """Аналитика загрузки лимитов продавцов: активные, исчерпавшие, средняя загрузка, разбивка по тарифам."""
     service = SellerService(session)
     try:
@@ -442,9 +442,8 @@ async def checkout_cart(
             gift_notes_by_seller=gift_notes_map or None,
             payment_method_by_seller=payment_method_map or None,
         )
-        await session.commit()
 
-        # Send Telegram notification to seller for each created order
+        # Telegram notification to seller for each created order (same transaction)
         from backend.app.services.telegram_notify import notify_seller_new_order, resolve_notification_chat_id
         for o in orders:
             preorder_date_str = o.get("preorder_delivery_date")
@@ -458,6 +457,7 @@ async def checkout_cart(
                     pass
             _chat_id = await resolve_notification_chat_id(session, o["seller_id"])
             await notify_seller_new_order(
+                session,
                 seller_id=_chat_id,
                 order_id=o["order_id"],
                 items_info=o.get("items_info", ""),
@@ -471,6 +471,7 @@ async def checkout_cart(
                 recipient_phone=data.recipient_phone,
                 gift_note=gift_notes_map.get(o["seller_id"]),
             )
+        await session.commit()
 
         return {"orders": orders}
     except CartServiceError as e:
@@ -758,11 +759,11 @@ async def cancel_order(
                 refund_amt = result.get("total_price", 0)
                 if order_obj.buyer_id:
                     await notify_buyer_payment_refunded(
-                        order_obj.buyer_id, order_id, order_obj.seller_id, refund_amt,
+                        session, order_obj.buyer_id, order_id, order_obj.seller_id, refund_amt,
                     )
                 _chat_id = await resolve_notification_chat_id(session, order_obj.seller_id)
                 await notify_seller_payment_refunded(
-                    _chat_id, order_id, refund_amt,
+                    session, _chat_id, order_id, refund_amt,
                 )
             except Exception as refund_err:
                 logger.warning(
@@ -782,6 +783,7 @@ async def cancel_order(
             if order_obj and getattr(order_obj, "preorder_delivery_date", None):
                 preorder_date = order_obj.preorder_delivery_date.strftime("%d.%m.%Y")
             await notify_seller_preorder_cancelled(
+                session,
                 seller_id=_chat_id,
                 order_id=order_id,
                 items_info=result.get("items_info", ""),
@@ -790,10 +792,12 @@ async def cancel_order(
         else:
             from backend.app.services.telegram_notify import notify_seller_order_cancelled
             await notify_seller_order_cancelled(
+                session,
                 seller_id=_chat_id,
                 order_id=order_id,
                 items_info=result.get("items_info", ""),
             )
+        await session.commit()
 
         return {
             "status": "ok",
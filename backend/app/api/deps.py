@@ -1,6 +1,10 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
+from fastapi import Header, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend.app.core.database import async_session
+from backend.app.core.database_read_replica import (
+    read_replica_session, replica_configured, use_replica, note_owner_write,
+)
 from backend.app.services.cache import CacheService
 
 
@@ -10,7 +14,42 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+def _token_owner_id(x_seller_token: Optional[str]) -> Optional[int]:
+    """Owner (seller network) of a seller token, without a DB lookup; None if absent/invalid."""
+    if not x_seller_token:
+        return None
+    from backend.app.api.seller_auth import decode_seller_token
+    decoded = decode_seller_token(x_seller_token)
+    if not decoded:
+        return None
+    seller_id, owner_id, _is_primary = decoded
+    return owner_id or seller_id
+
+
+# Сессия только для чтения: реплика, если она не отстаёт и продавец ничего не менял только что
+async def get_read_session(
+    x_seller_token: Optional[str] = Header(None, alias="X-Seller-Token"),
+) -> AsyncGenerator[AsyncSession, None]:
+    factory = async_session
+    if replica_configured() and await use_replica(_token_owner_id(x_seller_token)):
+        factory = read_replica_session
+    async with factory() as session:
+        yield session
+
+
+# Запись из панели продавца: следующие чтения этой сети идут на primary (read-your-writes)
+async def track_seller_writes(
+    request: Request,
+    x_seller_token: Optional[str] = Header(None, alias="X-Seller-Token"),
+) -> AsyncGenerator[None, None]:
+    yield
+    if replica_configured() and request.method not in ("GET", "HEAD", "OPTIONS"):
+        owner_id = _token_owner_id(x_seller_token)
+        if owner_id is not None:
+            await note_owner_write(owner_id)
+
+
 # Эта функция выдает сервис кэширования для каждого запроса
 async def get_cache() -> AsyncGenerator[CacheService, None]:
     redis = await CacheService.get_redis()
-    yield CacheService(redis)
\ No newline at end of file
+    yield CacheService(redis)
@@ -84,17 +84,18 @@ async def create_order(
             delivery_type=data.delivery_type,
             address=data.address,
         )
-        await session.commit()
-        logger.info("Order created successfully", order_id=order.id, buyer_id=data.buyer_id)
         from backend.app.services.telegram_notify import notify_seller_new_order, resolve_notification_chat_id
         _chat_id = await resolve_notification_chat_id(session, data.seller_id)
         await notify_seller_new_order(
+            session,
             seller_id=_chat_id,
             order_id=order.id,
             items_info=data.items_info,
             total_price=float(order.total_price) if order.total_price is not None else None,
             delivery_type=data.delivery_type,
         )
+        await session.commit()
+        logger.info("Order created successfully", order_id=order.id, buyer_id=data.buyer_id)
         return order
     except OrderServiceError as e:
         await session.rollback()
@@ -150,6 +151,7 @@ async def accept_order(
         if confirmation_url and buyer_id:
             from backend.app.services.telegram_notify import notify_buyer_payment_required
             await notify_buyer_payment_required(
+                session,
                 buyer_id=buyer_id,
                 order_id=order_id,
                 seller_id=seller_id,
@@ -160,6 +162,7 @@ async def accept_order(
         else:
             from backend.app.services.telegram_notify import notify_buyer_order_status
             await notify_buyer_order_status(
+                session,
                 buyer_id=buyer_id,
                 order_id=order_id,
                 new_status=result["new_status"],
@@ -167,6 +170,7 @@ async def accept_order(
                 items_info=result.get("items_info"),
                 total_price=total_price,
             )
+        await session.commit()
 
         return {
             "status": "ok",
@@ -209,11 +213,11 @@ async def reject_order(
                 refund_amt = result.get("total_price", 0)
                 if order_obj.buyer_id:
                     await notify_buyer_payment_refunded(
-                        order_obj.buyer_id, order_id, order_obj.seller_id, refund_amt,
+                        session, order_obj.buyer_id, order_id, order_obj.seller_id, refund_amt,
                     )
                 _chat_id = await resolve_notification_chat_id(session, order_obj.seller_id)
                 await notify_seller_payment_refunded(
-                    _chat_id, order_id, refund_amt,
+                    session, _chat_id, order_id, refund_amt,
                 )
             except Exception as refund_err:
                 logger.warning(
@@ -224,6 +228,7 @@ async def reject_order(
 
         from backend.app.services.telegram_notify import notify_buyer_order_status
         await notify_buyer_order_status(
+            session,
             buyer_id=result["buyer_id"],
             order_id=order_id,
             new_status=result["new_status"],
@@ -231,6 +236,7 @@ async def reject_order(
             items_info=result.get("items_info"),
             total_price=result.get("total_price"),
         )
+        await session.commit()
         return {
             "status": "ok",
             "new_status": result["new_status"],
@@ -253,9 +259,9 @@ async def done_order(
     service = OrderService(session)
     try:
         result = await service.complete_order(order_id)
-        await session.commit()
         from backend.app.services.telegram_notify import notify_buyer_order_status
         await notify_buyer_order_status(
+            session,
             buyer_id=result["buyer_id"],
             order_id=order_id,
             new_status=result["new_status"],
@@ -263,6 +269,7 @@ async def done_order(
             items_info=result.get("items_info"),
             total_price=result.get("total_price"),
         )
+        await session.commit()
         return {
             "status": "ok",
             "new_status": result["new_status"],
@@ -322,18 +329,13 @@ async def update_order_status(
             order_id=order_id,
             new_status=status,
         )
-        await session.commit()
-        logger.info(
-            "Order status updated",
-            order_id=order_id,
-            new_status=result["new_status"],
-        )
         from backend.app.services.telegram_notify import (
             notify_buyer_order_status,
             notify_seller_order_completed,
             resolve_notification_chat_id,
         )
         await notify_buyer_order_status(
+            session,
             buyer_id=result["buyer_id"],
             order_id=order_id,
             new_status=result["new_status"],
@@ -344,9 +346,16 @@ async def update_order_status(
         if result["new_status"] == "completed":
             _chat_id = await resolve_notification_chat_id(session, result["seller_id"])
             await notify_seller_order_completed(
+                session,
                 seller_id=_chat_id,
                 order_id=order_id,
             )
+        await session.commit()
+        logger.info(
+            "Order status updated",
+            order_id=order_id,
+            new_status=result["new_status"],
+        )
         return {
             "status": "ok",
             "new_status": result["new_status"],
@@ -383,21 +392,22 @@ async def update_order_price(
     service = OrderService(session)
     try:
         result = await service.update_order_price(order_id, Decimal(str(new_price)))
-        await session.commit()
-        logger.info(
-            "Order price updated",
-            order_id=order_id,
-            old_price=result.get("original_price"),
-            new_price=result["total_price"]
-        )
         from backend.app.services.telegram_notify import notify_buyer_order_price_changed
         await notify_buyer_order_price_changed(
+            session,
             buyer_id=result["buyer_id"],
             order_id=result["order_id"],
             seller_id=result["seller_id"],
             new_price=result["total_price"],
             items_info=result.get("items_info", ""),
         )
+        await session.commit()
+        logger.info(
+            "Order price updated",
+            order_id=order_id,
+            old_price=result.get("original_price"),
+            new_price=result["total_price"]
+        )
         return {
             "status": "ok",
             "order_id": result["order_id"],
@@ -593,13 +603,12 @@ async def guest_checkout(
                 "delivery_zone_name": zone_match["name"] if zone_match else None,
             })
 
-        await session.commit()
-
-        # Send seller notifications (no buyer notification — guest has no Telegram)
+        # Seller notifications (no buyer notification — guest has no Telegram)
         from backend.app.services.telegram_notify import notify_seller_new_order_guest, resolve_notification_chat_id
         for o in created:
             _chat_id = await resolve_notification_chat_id(session, o["seller_id"])
             await notify_seller_new_order_guest(
+                session,
                 seller_id=_chat_id,
                 order_id=o["order_id"],
                 items_info=o["items_info"],
@@ -613,6 +622,7 @@ async def guest_checkout(
                 recipient_phone=data.recipient_phone,
                 gift_note=gift_notes_map.get(o["seller_id"]),
             )
+        await session.commit()
 
         logger.info(
             "Guest checkout completed",
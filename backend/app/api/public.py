@@ -11,17 +11,21 @@ from sqlalchemy.sql.expression import func as sql_func
 from typing import Optional, List
 from pydantic import BaseModel
 from datetime import datetime
+from decimal import Decimal
+import base64
 import json
 import traceback
 
-from backend.app.api.deps import get_session, get_cache
+from backend.app.api.deps import get_session, get_read_session, get_cache
 from backend.app.models.seller import Seller, City, District, Metro
 from backend.app.models.product import Product
 from backend.app.models.user import User
-from backend.app.models.cart import BuyerFavoriteSeller
 from backend.app.services.cache import CacheService
-from backend.app.services.sellers import _today_6am_date, _is_open_now, SellerService
+from backend.app.services.sellers import _today_6am_date, _is_open_now, SellerService, LIMIT_TIMEZONE
 from backend.app.services.bouquets import get_active_bouquet_ids
+from backend.app.services.catalog import normalize_delivery_type as _normalize_delivery_type, closed_now_clause
+from backend.app.services.product_images import photo_variants
+from backend.app.models.catalog import SellerCatalogStats
 from backend.app.core.logging import get_logger
 from backend.app.core.limiter import limiter
 from sqlalchemy import or_
@@ -142,20 +146,32 @@ class PublicSellersResponse(BaseModel):
     total: int
     page: int
     per_page: int
+    next_cursor: Optional[str] = None  # null = последняя страница (или случайная сортировка)
 
 
-def _normalize_delivery_type(value: Optional[str]) -> Optional[str]:
-    """Нормализует delivery_type из БД (русский/английский) в enum для публичного API."""
-    if not value or not str(value).strip():
-        return None
-    v = str(value).strip().lower()
-    if v in ("доставка", "delivery"):
-        return "delivery"
-    if v in ("самовывоз", "pickup"):
-        return "pickup"
-    if v in ("доставка и самовывоз", "both"):
-        return "both"
-    return None
+def _encode_cursor(sort_key: str, key: dict) -> str:
+    """Opaque keyset cursor: urlsafe base64 of the sort mode and last row's sort key."""
+    raw = json.dumps({"m": sort_key, **key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_key: str) -> dict:
+    """Decode and validate a cursor for the requested sort mode (400 on mismatch/garbage)."""
+    if sort_key == "random":
+        raise HTTPException(status_code=400, detail="Курсор не поддерживается для случайной сортировки")
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if key.get("m") != sort_key:
+            raise ValueError("sort mode mismatch")
+        key["id"], key["n"], key["t"] = int(key["id"]), int(key["n"]), int(key.get("t", 0))
+        if sort_key == "default":
+            key["b"], key["s"] = int(key["b"]), int(key["s"])
+        else:
+            Decimal(key["p"])
+        return key
+    except (ValueError, TypeError, KeyError, ArithmeticError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
 
 
 # --- Endpoints ---
@@ -163,7 +179,7 @@ def _normalize_delivery_type(value: Optional[str]) -> Optional[str]:
 @router.get("/sellers", response_model=PublicSellersResponse)
 async def get_public_sellers(
     request: Request,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     search: Optional[str] = Query(None, min_length=1, description="Полнотекстовый поиск по товарам, категориям и магазинам"),
     city_id: Optional[int] = Query(None, description="Фильтр по городу"),
     district_id: Optional[int] = Query(None, description="Фильтр по району"),
@@ -179,6 +195,7 @@ async def get_public_sellers(
     show_closed: Optional[bool] = Query(None, description="Показывать закрытые магазины"),
     page: int = Query(1, ge=1, description="Номер страницы"),
     per_page: int = Query(20, ge=1, le=100, description="Количество на странице"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа); page игнорируется"),
 ):
     """
     Получить список активных продавцов с фильтрами.
@@ -188,10 +205,24 @@ async def get_public_sellers(
     - Размещение не истекло (placement_expired_at > now или NULL)
     - Лимит на сегодня задан и есть свободные слоты
     - Есть хотя бы один товар в наличии (is_active=True, quantity > 0)
+
+    Пагинация: page/per_page или keyset-курсор. Ответ содержит next_cursor
+    (для всех сортировок, кроме случайной); передача его в cursor отдаёт
+    следующую страницу без сканирования предыдущих. total считается на первой
+    странице и переносится в курсоре.
     """
     # #region agent log
     logger.info("Public sellers endpoint called", origin=request.headers.get("origin"), page=page, per_page=per_page, hypothesisId="B")
     # #endregion
+    if sort_price in ("asc", "desc"):
+        sort_key = f"price_{sort_price}"
+    elif sort_mode in ("all_city", "nearby"):
+        sort_key = "random"
+    else:
+        sort_key = "default"
+    cursor_key = None
+    if cursor:
+        cursor_key = _decode_cursor(cursor, sort_key)
     try:
         from sqlalchemy import case, literal
 
@@ -214,24 +245,10 @@ async def get_public_sellers(
             Seller.subscription_plan == "active",
         ]
 
-        # Подзапрос для статистики товаров (только с количеством > 0, без addon)
-        from backend.app.models.category import Category as CategoryModel
-        product_stats = (
-            select(
-                Product.seller_id,
-                func.min(Product.price).label("min_price"),
-                func.max(Product.price).label("max_price"),
-                func.count(Product.id).label("product_count"),
-            )
-            .outerjoin(CategoryModel, Product.category_id == CategoryModel.id)
-            .where(
-                Product.is_active == True,
-                Product.quantity > 0,
-                or_(Product.category_id.is_(None), CategoryModel.is_addon == False),
-            )
-            .group_by(Product.seller_id)
-            .subquery()
-        )
+        # Статистика товаров, подписчиков и зон доставки — из снапшота seller_catalog_stats
+        # (только продавцы с товарами в наличии, без addon)
+        stats = SellerCatalogStats
+        base_conditions.append(stats.product_count > 0)
 
         # Добавляем пользовательские фильтры
         if city_id:
@@ -242,34 +259,20 @@ async def get_public_sellers(
             base_conditions.append(Seller.metro_id == metro_id)
         if delivery_type:
             if delivery_type == "delivery":
-                base_conditions.append(
-                    Seller.delivery_type.in_(["delivery", "доставка", "both", "доставка и самовывоз"])
-                )
+                base_conditions.append(stats.delivery_type.in_(["delivery", "both"]))
             elif delivery_type == "pickup":
-                base_conditions.append(
-                    Seller.delivery_type.in_(["pickup", "самовывоз", "both", "доставка и самовывоз"])
-                )
+                base_conditions.append(stats.delivery_type.in_(["pickup", "both"]))
             elif delivery_type == "both":
-                base_conditions.append(
-                    Seller.delivery_type.in_(["both", "доставка и самовывоз"])
-                )
+                base_conditions.append(stats.delivery_type == "both")
 
         if free_delivery is not None:
-            from backend.app.models.delivery_zone import DeliveryZone
-            has_free_zone = (
-                select(DeliveryZone.seller_id)
-                .where(
-                    DeliveryZone.seller_id == Seller.seller_id,
-                    DeliveryZone.is_active == True,
-                    DeliveryZone.delivery_price == 0,
-                )
-                .correlate(Seller)
-                .exists()
-            )
+            # Есть активная зона с бесплатной доставкой <=> минимальная цена зоны = 0
             if free_delivery:
-                base_conditions.append(has_free_zone)
+                base_conditions.append(stats.min_delivery_price == 0)
             else:
-                base_conditions.append(~has_free_zone)
+                base_conditions.append(
+                    or_(stats.min_delivery_price.is_(None), stats.min_delivery_price > 0)
+                )
 
         if search:
             q = search.strip()
@@ -367,15 +370,9 @@ async def get_public_sellers(
         if has_preorder:
             base_conditions.append(Seller.preorder_enabled == True)
 
-        # Подзапрос: количество подписчиков по продавцам
-        subscriber_count_subq = (
-            select(
-                BuyerFavoriteSeller.seller_id,
-                func.count(BuyerFavoriteSeller.id).label("subscriber_count"),
-            )
-            .group_by(BuyerFavoriteSeller.seller_id)
-            .subquery()
-        )
+        # Working hours: hide shops that are closed or on day off (evaluated in SQL so pages are full)
+        if not show_closed:
+            base_conditions.append(~closed_now_clause(Seller.seller_id, datetime.now(LIMIT_TIMEZONE)))
 
         # available_slots: effective_limit - active - pending (без completed_today)
         available_slots_expr = effective_limit_expr - Seller.active_orders - Seller.pending_requests
@@ -387,17 +384,11 @@ async def get_public_sellers(
         delivery_slots_expr = func.coalesce(Seller.max_delivery_orders, 10) - func.coalesce(Seller.active_delivery_orders, 0) - func.coalesce(Seller.pending_delivery_requests, 0)
         pickup_slots_expr = func.coalesce(Seller.max_pickup_orders, 20) - func.coalesce(Seller.active_pickup_orders, 0) - func.coalesce(Seller.pending_pickup_requests, 0)
 
-        # Min delivery price from active zones (per seller)
-        from backend.app.models.delivery_zone import DeliveryZone as DZ
-        min_dp_subq = (
-            select(
-                DZ.seller_id,
-                func.min(DZ.delivery_price).label("min_delivery_price"),
-            )
-            .where(DZ.is_active == True)
-            .group_by(DZ.seller_id)
-            .subquery()
-        )
+        # Фильтр по диапазону цен (на уровне продуктов продавца)
+        if price_min is not None:
+            base_conditions.append(stats.min_price >= price_min)
+        if price_max is not None:
+            base_conditions.append(stats.max_price <= price_max)
 
         # Основной запрос
         query = (
@@ -408,77 +399,107 @@ async def get_public_sellers(
                 District.name.label("district_name"),
                 Metro.name.label("metro_name"),
                 Metro.line_color.label("metro_line_color"),
-                product_stats.c.min_price,
-                product_stats.c.max_price,
-                func.coalesce(product_stats.c.product_count, 0).label("product_count"),
-                func.coalesce(subscriber_count_subq.c.subscriber_count, 0).label("subscriber_count"),
+                stats.min_price,
+                stats.max_price,
+                stats.product_count,
+                stats.subscriber_count,
                 available_slots_expr.label("available_slots"),
                 delivery_slots_expr.label("delivery_slots"),
                 pickup_slots_expr.label("pickup_slots"),
-                min_dp_subq.c.min_delivery_price,
+                stats.min_delivery_price,
             )
+            .join(stats, Seller.seller_id == stats.seller_id)
             .outerjoin(User, Seller.owner_id == User.tg_id)
             .outerjoin(City, Seller.city_id == City.id)
             .outerjoin(District, Seller.district_id == District.id)
             .outerjoin(Metro, Seller.metro_id == Metro.id)
-            .join(product_stats, Seller.seller_id == product_stats.c.seller_id)
-            .outerjoin(subscriber_count_subq, Seller.seller_id == subscriber_count_subq.c.seller_id)
-            .outerjoin(min_dp_subq, Seller.seller_id == min_dp_subq.c.seller_id)
             .where(and_(*base_conditions))
         )
 
-        # Фильтр по диапазону цен (на уровне продуктов продавца)
-        if price_min is not None:
-            query = query.where(product_stats.c.min_price >= price_min)
-        if price_max is not None:
-            query = query.where(product_stats.c.max_price <= price_max)
-
-        # Сортировка: доступные первыми, затем занятые
+        # Сортировка: доступные первыми, затем занятые. seller_id — стабильный tie-breaker для курсора
+        availability_bucket_expr = case((available_slots_expr > 0, 0), else_=1)
         if sort_price == "asc":
-            query = query.order_by(product_stats.c.min_price.asc().nullslast())
+            query = query.order_by(stats.min_price.asc().nullslast(), Seller.seller_id.asc())
         elif sort_price == "desc":
-            query = query.order_by(product_stats.c.max_price.desc().nullslast())
+            query = query.order_by(stats.max_price.desc().nullslast(), Seller.seller_id.asc())
         elif sort_mode in ("all_city", "nearby"):
             query = query.order_by(sql_func.random())
         else:
             # Сначала доступные (slots > 0), потом занятые (slots <= 0)
             query = query.order_by(
-                case((available_slots_expr > 0, 0), else_=1).asc(),
+                availability_bucket_expr.asc(),
                 available_slots_expr.desc(),
+                Seller.seller_id.asc(),
             )
 
-        # Подсчет общего количества
-        count_query = (
-            select(func.count(Seller.seller_id))
-            .select_from(Seller)
-            .join(product_stats, Seller.seller_id == product_stats.c.seller_id)
-            .where(and_(*base_conditions))
-        )
-        if price_min is not None:
-            count_query = count_query.where(product_stats.c.min_price >= price_min)
-        if price_max is not None:
-            count_query = count_query.where(product_stats.c.max_price <= price_max)
-        total_result = await session.execute(count_query)
-        total = total_result.scalar() or 0
-
-        # Пагинация
-        offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
+        # Общее количество — только на первой странице, тем же запросом (окно), без отдельного
+        # count_query; страницы по курсору его не пересчитывают, а берут из курсора
+        if cursor_key is None:
+            query = query.add_columns(func.count().over().label("total_count"))
+
+        # Пагинация: курсор (keyset) или page/offset
+        if cursor_key is not None:
+            seen = cursor_key["n"]
+            if sort_key == "default":
+                bucket, slots, last_id = cursor_key["b"], cursor_key["s"], cursor_key["id"]
+                query = query.where(or_(
+                    availability_bucket_expr > bucket,
+                    and_(availability_bucket_expr == bucket, available_slots_expr < slots),
+                    and_(availability_bucket_expr == bucket, available_slots_expr == slots, Seller.seller_id > last_id),
+                ))
+            else:
+                price_col = stats.min_price if sort_key == "price_asc" else stats.max_price
+                price, last_id = Decimal(cursor_key["p"]), cursor_key["id"]
+                beyond = price_col > price if sort_key == "price_asc" else price_col < price
+                query = query.where(or_(beyond, and_(price_col == price, Seller.seller_id > last_id)))
+            # Лишняя строка показывает, есть ли следующая страница
+            query = query.limit(per_page + 1)
+        else:
+            seen = (page - 1) * per_page
+            query = query.offset(seen).limit(per_page)
 
         result = await session.execute(query)
         rows = result.all()
 
+        has_more = False
+        if cursor_key is not None:
+            has_more = len(rows) > per_page
+            rows = rows[:per_page]
+            # Total первой страницы; не меньше уже отданного, если выборка с тех пор выросла
+            total = max(cursor_key.get("t", 0), seen + len(rows) + int(has_more))
+        elif rows:
+            # Окно считается до OFFSET/LIMIT
+            total = rows[0].total_count
+        elif seen:
+            # Страница за пределами выборки — окно пустое, считаем отдельно
+            count_query = (
+                select(func.count(Seller.seller_id))
+                .select_from(Seller)
+                .join(stats, Seller.seller_id == stats.seller_id)
+                .where(and_(*base_conditions))
+            )
+            total = (await session.execute(count_query)).scalar() or 0
+        else:
+            total = seen
+
+        next_cursor = None
+        more = has_more if cursor_key is not None else seen + len(rows) < total
+        if rows and sort_key != "random" and more:
+            last = rows[-1]
+            if sort_key == "default":
+                key = {"b": 0 if last.available_slots > 0 else 1, "s": int(last.available_slots)}
+            else:
+                key = {"p": str(last.min_price if sort_key == "price_asc" else last.max_price)}
+            key.update({"id": last[0].seller_id, "n": seen + len(rows), "t": total})
+            next_cursor = _encode_cursor(sort_key, key)
+
         sellers = []
-        filtered_out = 0
         for row in rows:
             seller = row[0]
 
-            # Filter by working hours: hide shops that are closed or on day off
+            # Closed shops are already filtered in SQL (unless show_closed); flag for display only
             wh = getattr(seller, "working_hours", None)
             is_open = _is_open_now(wh)
-            if is_open is False and not show_closed:
-                filtered_out += 1
-                continue
 
             slots = row.available_slots if hasattr(row, "available_slots") else 0
             if slots > 0:
@@ -515,14 +536,14 @@ async def get_public_sellers(
                 working_hours=wh,
                 is_open_now=is_open,
             ))
-        total = max(0, total - filtered_out)
 
         logger.info("Public sellers endpoint success", sellers_count=len(sellers), total=total)
         return PublicSellersResponse(
             sellers=sellers,
             total=total,
-            page=page,
+            page=seen // per_page + 1,
             per_page=per_page,
+            next_cursor=next_cursor,
         )
     except Exception as e:
         logger.error("Public sellers endpoint error", error_type=type(e).__name__, error_message=str(e), traceback=traceback.format_exc())
@@ -560,7 +581,7 @@ async def get_sellers_geo(
     sw_lon: Optional[float] = Query(None, description="Bounding box south-west longitude"),
     ne_lat: Optional[float] = Query(None, description="Bounding box north-east latitude"),
     ne_lon: Optional[float] = Query(None, description="Bounding box north-east longitude"),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """
     Lightweight seller coordinates for map display.
@@ -587,54 +608,37 @@ async def get_sellers_geo(
     if city_id:
         base_conditions.append(Seller.city_id == city_id)
 
-    from backend.app.models.category import Category as CategoryModel
-    product_stats = (
-        select(
-            Product.seller_id,
-            func.min(Product.price).label("min_price"),
-            func.count(Product.id).label("product_count"),
-        )
-        .outerjoin(CategoryModel, Product.category_id == CategoryModel.id)
-        .where(
-            Product.is_active == True,
-            Product.quantity > 0,
-            or_(Product.category_id.is_(None), CategoryModel.is_addon == False),
-        )
-        .group_by(Product.seller_id)
-        .subquery()
-    )
-
     available_slots_expr = effective_limit_expr - Seller.active_orders - Seller.pending_requests
 
-    # Effective geo: seller's own coords or metro fallback
-    eff_lat = func.coalesce(Seller.geo_lat, Metro.geo_lat)
-    eff_lon = func.coalesce(Seller.geo_lon, Metro.geo_lon)
+    # Effective geo (seller's own coords or metro fallback) is precomputed in the snapshot
+    stats = SellerCatalogStats
 
     query = (
         select(
             Seller.seller_id,
             Seller.shop_name,
-            eff_lat.label("geo_lat"),
-            eff_lon.label("geo_lon"),
+            stats.geo_lat,
+            stats.geo_lon,
             Metro.name.label("metro_name"),
             Metro.line_color.label("metro_line_color"),
             available_slots_expr.label("available_slots"),
-            func.coalesce(product_stats.c.product_count, 0).label("product_count"),
-            product_stats.c.min_price,
-            Seller.delivery_type,
+            stats.product_count,
+            stats.min_price,
+            stats.delivery_type,
         )
+        .join(stats, Seller.seller_id == stats.seller_id)
         .outerjoin(Metro, Seller.metro_id == Metro.id)
-        .join(product_stats, Seller.seller_id == product_stats.c.seller_id)
         .where(and_(*base_conditions))
+        .where(stats.product_count > 0)
         # Only sellers with some coordinates
-        .where(or_(Seller.geo_lat.isnot(None), Metro.geo_lat.isnot(None)))
+        .where(stats.geo_lat.isnot(None), stats.geo_lon.isnot(None))
     )
 
     # Viewport bounding box filter
     if all(v is not None for v in (sw_lat, sw_lon, ne_lat, ne_lon)):
         query = query.where(
-            eff_lat.between(sw_lat, ne_lat),
-            eff_lon.between(sw_lon, ne_lon),
+            stats.geo_lat.between(sw_lat, ne_lat),
+            stats.geo_lon.between(sw_lon, ne_lon),
         )
 
     result = await session.execute(query)
@@ -653,25 +657,35 @@ async def get_sellers_geo(
             availability="available" if slots > 0 else "busy",
             product_count=row.product_count or 0,
             min_price=float(row.min_price) if row.min_price else None,
-            delivery_type=_normalize_delivery_type(row.delivery_type),
+            delivery_type=row.delivery_type,
         ))
     return items
 
 
-@router.get("/sellers/{seller_id}", response_model=PublicSellerDetail)
-async def get_public_seller_detail(
-    seller_id: int,
-    session: AsyncSession = Depends(get_session)
-):
-    """
-    Получить публичный профиль продавца с товарами.
-    """
-    now = datetime.utcnow()
-    today = _today_6am_date()
+def _detail_product_dict(p: Product) -> dict:
+    """Product card for the shop page."""
+    photo_ids = p.photo_ids if p.photo_ids else ([p.photo_id] if p.photo_id else [])
+    return {
+        "id": p.id,
+        "name": p.name,
+        "description": p.description,
+        "price": float(p.price),
+        "photo_id": (p.photo_ids or [p.photo_id] if p.photo_id else [None])[0] if (p.photo_ids or p.photo_id) else None,
+        "photo_ids": photo_ids,
+        "photo_variants": [photo_variants(pid) for pid in photo_ids],
+        "quantity": max(0, p.quantity - (getattr(p, "reserved_quantity", 0) or 0)),
+        "is_preorder": getattr(p, "is_preorder", False),
+        "composition": getattr(p, "composition", None),
+        "category_id": getattr(p, "category_id", None),
+    }
 
-    query = (
+
+async def _seller_detail_static(session: AsyncSession, seller_id: int) -> dict:
+    """Cached part of the shop page: location/owner names and categories."""
+    from backend.app.models.category import Category
+
+    names = (await session.execute(
         select(
-            Seller,
             City.name.label("city_name"),
             District.name.label("district_name"),
             Metro.name.label("metro_name"),
@@ -681,14 +695,122 @@ async def get_public_seller_detail(
             User.username.label("owner_username"),
             User.fio.label("owner_fio"),
         )
+        .select_from(Seller)
         .outerjoin(City, Seller.city_id == City.id)
         .outerjoin(District, Seller.district_id == District.id)
         .outerjoin(Metro, Seller.metro_id == Metro.id)
         .outerjoin(User, Seller.owner_id == User.tg_id)
         .where(Seller.seller_id == seller_id)
+    )).one()
+
+    # Seller categories (split regular / addon)
+    cat_result = await session.execute(
+        select(Category)
+        .where(Category.seller_id == seller_id, Category.is_active == True)
+        .order_by(Category.sort_order, Category.id)
     )
+    all_categories = list(cat_result.scalars().all())
+    return {
+        **names._asdict(),
+        "categories": [
+            {"id": c.id, "name": c.name, "sort_order": c.sort_order}
+            for c in all_categories if not c.is_addon
+        ],
+        "addon_categories": [
+            {"id": c.id, "name": c.name, "sort_order": c.sort_order}
+            for c in all_categories if c.is_addon
+        ],
+        "addon_category_ids": [c.id for c in all_categories if c.is_addon],
+    }
 
-    result = await session.execute(query)
+
+async def _seller_detail_stock(session: AsyncSession, seller_id: int, addon_category_ids: List[int]) -> dict:
+    """Cached fast-changing part of the shop page: product lists filtered by stock."""
+    active_bouquet_ids = await get_active_bouquet_ids(session, seller_id)
+
+    def _assemblable(p: Product) -> bool:
+        return getattr(p, "bouquet_id", None) is None or p.bouquet_id in active_bouquet_ids
+
+    # Regular products (in stock, is_preorder=False)
+    products_result = await session.execute(
+        select(Product)
+        .where(
+            Product.seller_id == seller_id,
+            Product.is_active == True,
+            Product.quantity > 0,
+            Product.is_preorder == False,
+        )
+        .order_by(Product.price.asc())
+    )
+    products = [p for p in products_result.scalars().all() if _assemblable(p)]
+    # Preorder products (is_preorder=True, active)
+    preorder_result = await session.execute(
+        select(Product)
+        .where(
+            Product.seller_id == seller_id,
+            Product.is_active == True,
+            Product.is_preorder == True,
+        )
+        .order_by(Product.price.asc())
+    )
+    preorder_products = [p for p in preorder_result.scalars().all() if _assemblable(p)]
+
+    # Filter addon products out of regular/preorder lists
+    addon_ids = set(addon_category_ids)
+    products_list = [_detail_product_dict(p) for p in products if p.category_id not in addon_ids]
+    preorder_products_list = [_detail_product_dict(p) for p in preorder_products if p.category_id not in addon_ids]
+
+    # Addon products (from addon categories, in stock)
+    addon_products_list = []
+    if addon_ids:
+        addon_result = await session.execute(
+            select(Product)
+            .where(
+                Product.seller_id == seller_id,
+                Product.is_active == True,
+                Product.quantity > 0,
+                Product.category_id.in_(addon_ids),
+            )
+            .order_by(Product.price.asc())
+        )
+        addon_products_list = [_detail_product_dict(p) for p in addon_result.scalars().all() if _assemblable(p)]
+
+    return {
+        "products": products_list,
+        "preorder_products": preorder_products_list,
+        "addon_products": addon_products_list,
+        # Before the addon split, as the preorder toggle has always been computed
+        "has_preorder_products": bool(preorder_products),
+    }
+
+
+@router.get("/sellers/{seller_id}", response_model=PublicSellerDetail)
+async def get_public_seller_detail(
+    seller_id: int,
+    session: AsyncSession = Depends(get_read_session),
+    cache: CacheService = Depends(get_cache),
+):
+    """
+    Получить публичный профиль продавца с товарами.
+
+    Один запрос к БД на каждый вызов (продавец + снимок каталога); названия,
+    категории и списки товаров берутся из Redis. Ключи кэша содержат версии
+    из seller_catalog_stats, которые увеличиваются при записи (services/catalog.py).
+    """
+    now = datetime.utcnow()
+    stats = SellerCatalogStats
+
+    result = await session.execute(
+        select(
+            Seller,
+            stats.static_version,
+            stats.stock_version,
+            stats.subscriber_count,
+            stats.min_delivery_price,
+        )
+        .outerjoin(stats, Seller.seller_id == stats.seller_id)
+        .where(Seller.seller_id == seller_id)
+    )
     row = result.first()
 
     if not row:
@@ -731,63 +853,22 @@ async def get_public_seller_detail(
         availability = "busy"
     else:
         availability = "unavailable"
-    
-    # Subscriber count
-    sub_count_result = await session.execute(
-        select(func.count()).select_from(BuyerFavoriteSeller).where(
-            BuyerFavoriteSeller.seller_id == seller_id
-        )
-    )
-    subscriber_count = sub_count_result.scalar() or 0
-
-    # Min delivery price from active zones
-    from backend.app.models.delivery_zone import DeliveryZone
-    min_dp_result = await session.execute(
-        select(func.min(DeliveryZone.delivery_price)).where(
-            DeliveryZone.seller_id == seller_id,
-            DeliveryZone.is_active == True,
-        )
-    )
-    min_delivery_price_raw = min_dp_result.scalar()
-    min_delivery_price = float(min_delivery_price_raw) if min_delivery_price_raw is not None else None
 
-    # Regular products (in stock, is_preorder=False)
-    products_query = (
-        select(Product)
-        .where(
-            Product.seller_id == seller_id,
-            Product.is_active == True,
-            Product.quantity > 0,
-            Product.is_preorder == False,
-        )
-        .order_by(Product.price.asc())
+    static = await cache.get_or_set(
+        CacheService.KEY_SELLER_DETAIL_STATIC.format(seller_id=seller_id, version=row.static_version or 0),
+        lambda: _seller_detail_static(session, seller_id),
+        namespace=CacheService.NS_SELLER_DETAIL,
     )
-    products_result = await session.execute(products_query)
-    products = list(products_result.scalars().all())
-    active_bouquet_ids = await get_active_bouquet_ids(session, seller_id)
-    products = [
-        p for p in products
-        if getattr(p, "bouquet_id", None) is None or p.bouquet_id in active_bouquet_ids
-    ]
-    # Preorder products (is_preorder=True, active)
-    preorder_query = (
-        select(Product)
-        .where(
-            Product.seller_id == seller_id,
-            Product.is_active == True,
-            Product.is_preorder == True,
-        )
-        .order_by(Product.price.asc())
+    stock = await cache.get_or_set(
+        CacheService.KEY_SELLER_DETAIL_STOCK.format(seller_id=seller_id, version=row.stock_version or 0),
+        lambda: _seller_detail_stock(session, seller_id, static["addon_category_ids"]),
+        ttl=CacheService.TTL_SELLER_DETAIL_STOCK,
+        namespace=CacheService.NS_SELLER_DETAIL,
     )
-    preorder_result = await session.execute(preorder_query)
-    preorder_products = list(preorder_result.scalars().all())
-    preorder_products = [
-        p for p in preorder_products
-        if getattr(p, "bouquet_id", None) is None or p.bouquet_id in active_bouquet_ids
-    ]
-    if not products and not preorder_products:
-        # Don't 404 yet — addon products will be checked after category split
-        pass
+
+    if not stock["products"] and not stock["preorder_products"] and not stock["addon_products"]:
+        raise HTTPException(status_code=404, detail="Продавец не найден")
+
     from backend.app.services.sellers import get_preorder_available_dates
     # Column temporarily commented out in model until migration is applied
     preorder_custom_dates = getattr(seller, "preorder_custom_dates", None)
@@ -800,106 +881,26 @@ async def get_public_seller_detail(
         preorder_custom_dates,
         min_lead_days=getattr(seller, "preorder_min_lead_days", 2) or 0,
     )
-    preorder_enabled = bool(getattr(seller, "preorder_enabled", False) and preorder_available_dates and preorder_products)
-    # Debug: log preorder condition for diagnostics
-    import logging
-    logging.getLogger("flurai.public").info(
-        "Seller %s preorder check: db_flag=%s, schedule_type=%s, weekday=%s, "
-        "interval=%s, base_date=%s, custom_dates=%s, available_dates=%s, "
-        "preorder_products=%d, regular_products=%d, => enabled=%s",
-        seller_id,
-        getattr(seller, "preorder_enabled", False),
-        getattr(seller, "preorder_schedule_type", None),
-        getattr(seller, "preorder_weekday", None),
-        getattr(seller, "preorder_interval_days", None),
-        getattr(seller, "preorder_base_date", None),
-        preorder_custom_dates,
-        preorder_available_dates,
-        len(preorder_products),
-        len(products),
-        preorder_enabled,
+    preorder_enabled = bool(
+        getattr(seller, "preorder_enabled", False) and preorder_available_dates and stock["has_preorder_products"]
     )
-
-    def _photo_ids(p):
-        if p.photo_ids:
-            return p.photo_ids
-        return [p.photo_id] if p.photo_id else []
-
-    def _product_dict(p):
-        return {
-            "id": p.id,
-            "name": p.name,
-            "description": p.description,
-            "price": float(p.price),
-            "photo_id": (p.photo_ids or [p.photo_id] if p.photo_id else [None])[0] if (p.photo_ids or p.photo_id) else None,
-            "photo_ids": _photo_ids(p),
-            "quantity": max(0, p.quantity - (getattr(p, "reserved_quantity", 0) or 0)),
-            "is_preorder": getattr(p, "is_preorder", False),
-            "composition": getattr(p, "composition", None),
-            "category_id": getattr(p, "category_id", None),
-        }
-
-    products_list = [_product_dict(p) for p in products]
-    preorder_products_list = [_product_dict(p) for p in preorder_products]
-
-    # Seller categories (split regular / addon)
-    from backend.app.models.category import Category
-    cat_result = await session.execute(
-        select(Category)
-        .where(Category.seller_id == seller_id, Category.is_active == True)
-        .order_by(Category.sort_order, Category.id)
+    logger.debug(
+        "Seller preorder check",
+        seller_id=seller_id,
+        db_flag=getattr(seller, "preorder_enabled", False),
+        schedule_type=getattr(seller, "preorder_schedule_type", None),
+        available_dates=len(preorder_available_dates),
+        enabled=preorder_enabled,
     )
-    all_categories = list(cat_result.scalars().all())
-    regular_cats = [c for c in all_categories if not c.is_addon]
-    addon_cats = [c for c in all_categories if c.is_addon]
-    addon_category_ids = {c.id for c in addon_cats}
-
-    categories_list = [
-        {"id": c.id, "name": c.name, "sort_order": c.sort_order}
-        for c in regular_cats
-    ]
-    addon_categories_list = [
-        {"id": c.id, "name": c.name, "sort_order": c.sort_order}
-        for c in addon_cats
-    ]
-
-    # Filter addon products out of regular/preorder lists
-    if addon_category_ids:
-        products_list = [p for p in products_list if p.get("category_id") not in addon_category_ids]
-        preorder_products_list = [p for p in preorder_products_list if p.get("category_id") not in addon_category_ids]
-
-    # Addon products (from addon categories, in stock)
-    if addon_category_ids:
-        addon_query = (
-            select(Product)
-            .where(
-                Product.seller_id == seller_id,
-                Product.is_active == True,
-                Product.quantity > 0,
-                Product.category_id.in_(addon_category_ids),
-            )
-            .order_by(Product.price.asc())
-        )
-        addon_result = await session.execute(addon_query)
-        addon_products_raw = list(addon_result.scalars().all())
-        addon_products_raw = [
-            p for p in addon_products_raw
-            if getattr(p, "bouquet_id", None) is None or p.bouquet_id in active_bouquet_ids
-        ]
-        addon_products_list = [_product_dict(p) for p in addon_products_raw]
-    else:
-        addon_products_list = []
-
-    if not products_list and not preorder_products_list and not addon_products_list:
-        raise HTTPException(status_code=404, detail="Продавец не найден")
 
     delivery_type_normalized = _normalize_delivery_type(seller.delivery_type)
+    min_delivery_price = float(row.min_delivery_price) if row.min_delivery_price is not None else None
 
     # Geo: prefer seller's own coords, fallback to metro station coords
     seller_geo_lat = getattr(seller, "geo_lat", None)
     seller_geo_lon = getattr(seller, "geo_lon", None)
-    effective_lat = seller_geo_lat if seller_geo_lat is not None else row.metro_geo_lat
-    effective_lon = seller_geo_lon if seller_geo_lon is not None else row.metro_geo_lon
+    effective_lat = seller_geo_lat if seller_geo_lat is not None else static["metro_geo_lat"]
+    effective_lon = seller_geo_lon if seller_geo_lon is not None else static["metro_geo_lon"]
 
     return PublicSellerDetail(
         seller_id=seller.seller_id,
@@ -908,15 +909,15 @@ async def get_public_seller_detail(
         delivery_type=delivery_type_normalized,
         delivery_price=0.0,  # deprecated: use delivery zones
         min_delivery_price=min_delivery_price,
-        categories=categories_list,
+        categories=static["categories"],
         address_name=getattr(seller, "address_name", None),
         map_url=seller.map_url,
         city_id=seller.city_id,
-        city_name=row.city_name,
-        district_name=row.district_name,
-        metro_name=row.metro_name,
+        city_name=static["city_name"],
+        district_name=static["district_name"],
+        metro_name=static["metro_name"],
         metro_walk_minutes=seller.metro_walk_minutes,
-        metro_line_color=row.metro_line_color,
+        metro_line_color=static["metro_line_color"],
         geo_lat=effective_lat,
         geo_lon=effective_lon,
         available_slots=available_slots,
@@ -926,10 +927,10 @@ async def get_public_seller_detail(
         delivery_availability="available" if d_slots > 0 else "busy",
         pickup_availability="available" if p_slots > 0 else "busy",
         subscription_active=subscription_active,
-        products=products_list,
-        preorder_products=preorder_products_list,
-        addon_products=addon_products_list,
-        addon_categories=addon_categories_list,
+        products=stock["products"],
+        preorder_products=stock["preorder_products"],
+        addon_products=stock["addon_products"],
+        addon_categories=static["addon_categories"],
         preorder_available_dates=preorder_available_dates,
         preorder_enabled=preorder_enabled,
         preorder_discount_percent=float(getattr(seller, "preorder_discount_percent", 0) or 0),
@@ -937,12 +938,12 @@ async def get_public_seller_detail(
         preorder_max_per_date=getattr(seller, "preorder_max_per_date", None),
         banner_url=getattr(seller, "banner_url", None),
         logo_url=getattr(seller, "logo_url", None),
-        subscriber_count=subscriber_count,
+        subscriber_count=row.subscriber_count or 0,
         working_hours=getattr(seller, "working_hours", None),
         is_open_now=_is_open_now(getattr(seller, "working_hours", None)),
-        owner_username=row.owner_username,
+        owner_username=static["owner_username"],
         owner_tg_id=seller.seller_id,
-        owner_fio=row.owner_fio,
+        owner_fio=static["owner_fio"],
         contact_phone=getattr(seller, "contact_phone", None),
         contact_username=getattr(seller, "contact_username", None),
         inn=seller.inn,
@@ -969,7 +970,7 @@ async def get_seller_availability(
 @router.get("/metro/search", response_model=List[MetroResponse])
 async def search_metro_stations(
     q: str = Query(..., min_length=1, description="Поиск по названию станции"),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """
     Поиск станций метро по названию по всем районам.
@@ -992,7 +993,7 @@ async def search_metro_stations(
 @router.get("/metro/{district_id}", response_model=List[MetroResponse])
 async def get_metro_stations(
     district_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     cache: CacheService = Depends(get_cache)
 ):
     """
@@ -1030,7 +1031,7 @@ async def get_metro_stations(
 @router.get("/metro/city/{city_id}", response_model=List[MetroGeoItem])
 async def get_metro_by_city(
     city_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """All metro stations in a city with coordinates (for map display)."""
     query = (
@@ -1055,7 +1056,7 @@ async def get_metro_by_city(
 
 @router.get("/cities", response_model=List[CityResponse])
 async def get_cities(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     cache: CacheService = Depends(get_cache)
 ):
     """
@@ -1083,7 +1084,7 @@ async def get_cities(
 @router.get("/districts/{city_id}", response_model=List[DistrictResponse])
 async def get_districts(
     city_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     cache: CacheService = Depends(get_cache)
 ):
     """
@@ -1167,7 +1168,7 @@ async def check_delivery_endpoint(
 @router.get("/sellers/{seller_id}/delivery-zones")
 async def get_seller_delivery_zones(
     seller_id: int,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """Get active delivery zones for a seller (public, for checkout UI)."""
     from backend.app.services.delivery_zones import DeliveryZoneService
@@ -1221,11 +1222,14 @@ async def track_events(
     body: TrackEventsRequest,
     session: AsyncSession = Depends(get_session),
 ):
-    """Record page view events from Mini App (fire-and-forget)."""
-    from backend.app.services.analytics import AnalyticsService
-    svc = AnalyticsService(session)
+    """Record page view events from Mini App (fire-and-forget).
+
+    Events are appended to the Redis buffer and loaded by the worker; if Redis
+    is unavailable they are written to page_views directly.
+    """
+    from backend.app.services.analytics_ingest import ingest_page_views
     events = [ev.model_dump() for ev in body.events[:50]]
-    await svc.record_events(body.session_id, body.visitor_id, events)
+    await ingest_page_views(session, body.session_id, body.visitor_id, events)
     await session.commit()
 
 
@@ -15,6 +15,7 @@ from backend.app.api.deps import get_session
 from backend.app.core.password_utils import verify_password
 from backend.app.models.seller import Seller
 from backend.app.models.user import User
+from backend.app.services.seller_auth_state import load_seller_auth_state
 
 router = APIRouter()
 
@@ -104,79 +105,64 @@ def decode_seller_token(token: str) -> Optional[Tuple[int, int, bool]]:
         return None
 
 
-async def require_seller_token(
-    x_seller_token: Optional[str] = Header(None, alias="X-Seller-Token"),
-    session: AsyncSession = Depends(get_session),
-) -> int:
-    """Dependency: require valid seller token, return seller_id."""
+class SellerAuth(BaseModel):
+    """Authenticated seller of the request (request.state.seller_auth)."""
+    seller_id: int
+    owner_id: int
+    is_primary: bool
+
+
+async def _authenticate_seller(
+    request: Request, x_seller_token: Optional[str], session: AsyncSession,
+) -> SellerAuth:
+    """Check the token and the seller's cached auth state (no DB query on a cache hit)."""
     if not x_seller_token:
         raise HTTPException(status_code=401, detail="Требуется авторизация")
     decoded = decode_seller_token(x_seller_token)
     if not decoded:
         raise HTTPException(status_code=401, detail="Недействительный или истекший токен")
-    seller_id, _owner_id, _is_primary = decoded
-    # Verify seller exists and is not deleted
-    result = await session.execute(
-        select(Seller).where(
-            Seller.seller_id == seller_id,
-            Seller.deleted_at.is_(None),
-        )
-    )
-    seller = result.scalar_one_or_none()
-    if not seller:
+    seller_id, _owner_id, is_primary = decoded
+    # Verify seller exists, is not deleted and not blocked
+    state = await load_seller_auth_state(session, seller_id)
+    if state.get("deleted"):
         raise HTTPException(status_code=401, detail="Продавец не найден")
-    if seller.is_blocked:
+    if state["is_blocked"]:
         raise HTTPException(status_code=403, detail="Аккаунт заблокирован")
-    return seller_id
+    auth = SellerAuth(seller_id=seller_id, owner_id=state["owner_id"], is_primary=is_primary)
+    request.state.seller_auth = auth
+    return auth
+
+
+async def require_seller_token(
+    request: Request,
+    x_seller_token: Optional[str] = Header(None, alias="X-Seller-Token"),
+    session: AsyncSession = Depends(get_session),
+) -> int:
+    """Dependency: require valid seller token, return seller_id."""
+    auth = await _authenticate_seller(request, x_seller_token, session)
+    return auth.seller_id
 
 
 async def require_seller_token_with_owner(
+    request: Request,
     x_seller_token: Optional[str] = Header(None, alias="X-Seller-Token"),
     session: AsyncSession = Depends(get_session),
 ) -> Tuple[int, int]:
     """Dependency: require valid seller token, return (seller_id, owner_id)."""
-    if not x_seller_token:
-        raise HTTPException(status_code=401, detail="Требуется авторизация")
-    decoded = decode_seller_token(x_seller_token)
-    if not decoded:
-        raise HTTPException(status_code=401, detail="Недействительный или истекший токен")
-    seller_id, owner_id, _is_primary = decoded
-    result = await session.execute(
-        select(Seller).where(
-            Seller.seller_id == seller_id,
-            Seller.deleted_at.is_(None),
-        )
-    )
-    seller = result.scalar_one_or_none()
-    if not seller:
-        raise HTTPException(status_code=401, detail="Продавец не найден")
-    if seller.is_blocked:
-        raise HTTPException(status_code=403, detail="Аккаунт заблокирован")
-    return seller_id, seller.owner_id
+    auth = await _authenticate_seller(request, x_seller_token, session)
+    return auth.seller_id, auth.owner_id
 
 
 async def require_primary_seller(
+    request: Request,
     x_seller_token: Optional[str] = Header(None, alias="X-Seller-Token"),
     session: AsyncSession = Depends(get_session),
 ) -> Tuple[int, int]:
     """Require valid seller token with is_primary=True. Returns (seller_id, owner_id)."""
-    if not x_seller_token:
-        raise HTTPException(status_code=401, detail="Требуется авторизация")
-    decoded = decode_seller_token(x_seller_token)
-    if not decoded:
-        raise HTTPException(status_code=401, detail="Недействительный или истекший токен")
-    seller_id, _owner_id, is_primary = decoded
-    result = await session.execute(
-        select(Seller).where(Seller.seller_id == seller_id, Seller.deleted_at.is_(None))
-    )
-    seller = result.scalar_one_or_none()
-    if not seller:
-        raise HTTPException(status_code=401, detail="Продавец не найден")
-    if seller.is_blocked:
-        raise HTTPException(status_code=403, detail="Аккаунт заблокирован")
-    if not is_primary:
+    auth = await _authenticate_seller(request, x_seller_token, session)
+    if not auth.is_primary:
         raise HTTPException(status_code=403, detail="Только владелец сети может управлять филиалами")
-    return seller_id, seller.owner_id
+    return auth.seller_id, auth.owner_id
 
 
 async def _get_owner_branches(session: AsyncSession, owner_id: int) -> list[BranchInfo]:
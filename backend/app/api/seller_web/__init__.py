@@ -1,6 +1,7 @@
 """Seller web panel API package — protected by X-Seller-Token."""
 from fastapi import APIRouter, Depends
 
+from backend.app.api.deps import track_seller_writes
 from backend.app.api.seller_auth import require_seller_token
 
 # Re-export constants for backward compatibility (used by tests)
@@ -23,7 +24,7 @@ from backend.app.api.seller_web.customers import router as customers_router
 from backend.app.api.seller_web.branches import router as branches_router
 from backend.app.api.seller_web.payments import router as payments_router
 
-router = APIRouter(dependencies=[Depends(require_seller_token)])
+router = APIRouter(dependencies=[Depends(require_seller_token), Depends(track_seller_writes)])
 router.include_router(profile_router)
 router.include_router(orders_router)
 router.include_router(dashboard_router)
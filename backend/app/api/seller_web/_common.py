@@ -5,7 +5,7 @@ from typing import Optional
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.app.api.deps import get_session  # noqa: F401 — re-export
+from backend.app.api.deps import get_session, get_read_session  # noqa: F401 — re-export
 from backend.app.api.seller_auth import (  # noqa: F401 — re-export
     require_seller_token,
     require_seller_token_with_owner,
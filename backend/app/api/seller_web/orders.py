@@ -1,10 +1,12 @@
 """Seller web panel — Orders, Preorder Campaigns, Preorder Procurement."""
-from datetime import datetime, timedelta
-from typing import Optional
+import base64
+import json
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.api.seller_web._common import (
@@ -14,42 +16,125 @@ from backend.app.api.seller_web._common import (
     get_session,
     resolve_branch_target,
 )
+from backend.app.services.cache import CacheService
+from backend.app.services.order_events import (
+    SSE_HEADERS,
+    STREAM_KEY as ORDER_STREAM_KEY,
+    seller_scope,
+    stream_order_events,
+)
 from backend.app.services.orders import OrderService, OrderServiceError
 
 router = APIRouter()
 
 
 # --- ORDERS ---
+ORDERS_PAGE_SIZE = 50
+ORDERS_PAGE_MAX = 500
+ORDER_CHANGES_LIMIT = 200
+# Rows changed just before a poll may commit after it: the next poll re-reads this window
+ORDER_CHANGES_OVERLAP = timedelta(seconds=5)
+
+
+def _parse_day(value: Optional[str], name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Некорректная дата {name}, ожидается YYYY-MM-DD")
+
+
+def _encode_orders_cursor(order: dict) -> str:
+    """Opaque keyset cursor: urlsafe base64 of the last order's (created_at, id)."""
+    raw = json.dumps({"c": order["created_at"].rstrip("Z"), "id": order["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_orders_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(key["c"]), int(key["id"])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
 @router.get("/orders")
 async def get_orders(
+    response: Response,
     status: Optional[str] = Query(None),
     date_from: Optional[str] = Query(None, description="YYYY-MM-DD"),
     date_to: Optional[str] = Query(None, description="YYYY-MM-DD"),
     preorder: Optional[bool] = Query(None, description="Filter by is_preorder: true=preorders only, false=regular only"),
+    limit: int = Query(ORDERS_PAGE_SIZE, ge=1, le=ORDERS_PAGE_MAX, description="Page size; next page cursor in X-Next-Cursor"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     seller_id: int = Depends(require_seller_token),
     session: AsyncSession = Depends(get_session),
 ):
-    """Get orders for current seller. status=pending|accepted|assembling|in_transit|ready_for_pickup|done|completed|rejected.
-    For history (done/completed): use date_from, date_to. preorder=true for preorders only."""
+    """Get orders for current seller, newest first. status=pending|accepted|assembling|in_transit|ready_for_pickup|done|completed|rejected.
+    For history (done/completed): use date_from, date_to. preorder=true for preorders only.
+    The response is one page of `limit` orders; the X-Next-Cursor header (absent on the last page) is passed back as cursor."""
     service = OrderService(session)
-    orders = await service.get_seller_orders(seller_id, status, preorder=preorder)
-    # Filter by date if provided (for order history)
-    if date_from or date_to:
-        result = []
-        for o in orders:
-            created = o.get("created_at") or ""
-            try:
-                if date_from and created[:10] < date_from[:10]:
-                    continue
-                if date_to and created[:10] > date_to[:10]:
-                    continue
-            except (IndexError, TypeError):
-                pass
-            result.append(o)
-        return result
+    orders = await service.get_seller_orders(
+        seller_id,
+        status,
+        preorder=preorder,
+        date_from=_parse_day(date_from, "date_from"),
+        date_to=_parse_day(date_to, "date_to"),
+        limit=limit,
+        before=_decode_orders_cursor(cursor) if cursor else None,
+    )
+    if len(orders) == limit:
+        response.headers["X-Next-Cursor"] = _encode_orders_cursor(orders[-1])
     return orders
 
 
+@router.get("/orders/changes")
+async def get_order_changes(
+    since: Optional[str] = Query(None, description="next_since of the previous poll; omitted = changes of the last minute"),
+    seller_id: int = Depends(require_seller_token),
+    session: AsyncSession = Depends(get_session),
+):
+    """Polling feed: orders created or changed since the previous poll.
+    The client merges them by id into its list and sends next_since back; has_more=true means poll again right away."""
+    now = datetime.now()
+    if since:
+        try:
+            since_dt = datetime.fromisoformat(since.rstrip("Z"))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Некорректный since")
+    else:
+        since_dt = now - timedelta(minutes=1)
+    service = OrderService(session)
+    orders, last_change = await service.get_seller_order_changes(seller_id, since_dt, limit=ORDER_CHANGES_LIMIT)
+    has_more = len(orders) == ORDER_CHANGES_LIMIT
+    # A full batch continues from its last change (>=, so ties are re-read, not skipped)
+    next_since = last_change if has_more else max(since_dt, now - ORDER_CHANGES_OVERLAP)
+    return {"orders": orders, "next_since": next_since.isoformat(), "has_more": has_more}
+
+
+@router.get("/orders/events")
+async def order_events(
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    seller_id: int = Depends(require_seller_token),
+):
+    """Server-sent events about this seller's orders (order.created, order.status, order.payment).
+    Needs X-Seller-Token, so the panel reads it with fetch() streaming rather than EventSource.
+    Reconnects resume after Last-Event-ID; ``resync`` means refetch the lists. Heartbeat every 15 s."""
+    redis = await CacheService.get_redis()
+    return StreamingResponse(
+        stream_order_events(
+            redis,
+            seller_scope(seller_id),
+            ORDER_STREAM_KEY.format(seller_id=seller_id),
+            last_event_id,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 @router.get("/orders/{order_id}")
 async def get_order(
     order_id: int,
@@ -113,6 +198,7 @@ async def accept_order(
         if confirmation_url and buyer_id:
             from backend.app.services.telegram_notify import notify_buyer_payment_required
             await notify_buyer_payment_required(
+                session,
                 buyer_id=buyer_id,
                 order_id=order_id,
                 seller_id=seller_id_val,
@@ -123,6 +209,7 @@ async def accept_order(
         else:
             from backend.app.services.telegram_notify import notify_buyer_order_status
             await notify_buyer_order_status(
+                session,
                 buyer_id=buyer_id,
                 order_id=order_id,
                 new_status=result["new_status"],
@@ -131,6 +218,7 @@ async def accept_order(
                 total_price=total_price,
                 payment_method=payment_method,
             )
+        await session.commit()
 
         result["confirmation_url"] = confirmation_url
         return result
@@ -169,11 +257,11 @@ async def reject_order(
                 refund_amt = result.get("total_price", 0)
                 if order_obj.buyer_id:
                     await notify_buyer_payment_refunded(
-                        order_obj.buyer_id, order_id, order_obj.seller_id, refund_amt,
+                        session, order_obj.buyer_id, order_id, order_obj.seller_id, refund_amt,
                     )
                 _chat_id = await resolve_notification_chat_id(session, order_obj.seller_id)
                 await notify_seller_payment_refunded(
-                    _chat_id, order_id, refund_amt,
+                    session, _chat_id, order_id, refund_amt,
                 )
             except Exception as refund_err:
                 logger.warning(
@@ -184,6 +272,7 @@ async def reject_order(
 
         from backend.app.services.telegram_notify import notify_buyer_order_status
         await notify_buyer_order_status(
+            session,
             buyer_id=result["buyer_id"],
             order_id=order_id,
             new_status=result["new_status"],
@@ -191,6 +280,7 @@ async def reject_order(
             items_info=result.get("items_info"),
             total_price=result.get("total_price"),
         )
+        await session.commit()
         return result
     except OrderServiceError as e:
         await session.rollback()
@@ -210,9 +300,9 @@ async def update_order_status(
         result = await service.update_status(
             order_id, status, verify_seller_id=seller_id,
         )
-        await session.commit()
-        # Notify buyer in Telegram about status change
+        # Notify buyer in Telegram about status change (queued in the same transaction)
         await notify_buyer_order_status(
+            session,
             buyer_id=result["buyer_id"],
             order_id=order_id,
             new_status=result["new_status"],
@@ -224,9 +314,11 @@ async def update_order_status(
             from backend.app.services.telegram_notify import notify_seller_order_completed, resolve_notification_chat_id
             _chat_id = await resolve_notification_chat_id(session, result["seller_id"])
             await notify_seller_order_completed(
+                session,
                 seller_id=_chat_id,
                 order_id=order_id,
             )
+        await session.commit()
         return result
     except OrderServiceError as e:
         await session.rollback()
@@ -248,15 +340,16 @@ async def update_order_price(
     service = OrderService(session)
     try:
         result = await service.update_order_price(order_id, Decimal(str(new_price)), seller_id)
-        await session.commit()
         from backend.app.services.telegram_notify import notify_buyer_order_price_changed
         await notify_buyer_order_price_changed(
+            session,
             buyer_id=result["buyer_id"],
             order_id=result["order_id"],
             seller_id=result["seller_id"],
             new_price=result["total_price"],
             items_info=result.get("items_info", ""),
         )
+        await session.commit()
         return result
     except OrderServiceError as e:
         await session.rollback()
@@ -278,35 +371,45 @@ async def notify_subscribers_preorder(
     seller_id: int = Depends(require_seller_token),
     session: AsyncSession = Depends(get_session),
 ):
-    """Send a push notification to all subscribers that preorders are open."""
-    from backend.app.models.cart import BuyerFavoriteSeller
+    """Queue a push notification to all subscribers that preorders are open.
+
+    Delivery runs in the worker; poll GET /preorder-notify-subscribers/{broadcast_id} for progress.
+    """
     from backend.app.models.seller import Seller
-    from backend.app.services.telegram_notify import notify_subscriber_preorder_opened
+    from backend.app.services.broadcasts import (
+        broadcast_progress, create_subscriber_broadcast, get_active_broadcast,
+    )
+    from backend.app.services.telegram_notify import subscriber_preorder_opened_text
 
     seller = await session.get(Seller, seller_id)
     if not seller:
         raise HTTPException(status_code=404, detail="Seller not found")
+    if await get_active_broadcast(session, seller_id):
+        raise HTTPException(status_code=409, detail="Рассылка подписчикам уже выполняется")
     shop_name = seller.shop_name or "Магазин"
 
-    result = await session.execute(
-        select(BuyerFavoriteSeller.buyer_id).where(BuyerFavoriteSeller.seller_id == seller_id)
-    )
-    subscriber_ids = [row[0] for row in result.all()]
-    if not subscriber_ids:
-        return {"sent": 0, "total_subscribers": 0}
-
-    sent = 0
-    for buyer_id in subscriber_ids:
-        ok = await notify_subscriber_preorder_opened(
-            buyer_id=buyer_id,
-            shop_name=shop_name,
-            seller_id=seller_id,
-            message=body.message or "",
-        )
-        if ok:
-            sent += 1
+    text = subscriber_preorder_opened_text(shop_name, seller_id, body.message or "")
+    broadcast = await create_subscriber_broadcast(session, seller_id, text)
+    if broadcast is None:
+        return {"broadcast_id": None, "status": "done", "total_subscribers": 0, "sent": 0, "failed": 0, "blocked": 0}
+    await session.commit()
+    return broadcast_progress(broadcast)
+
 
-    return {"sent": sent, "total_subscribers": len(subscriber_ids)}
+@router.get("/preorder-notify-subscribers/{broadcast_id}")
+async def get_subscribers_notification_progress(
+    broadcast_id: int,
+    seller_id: int = Depends(require_seller_token),
+    session: AsyncSession = Depends(get_session),
+):
+    """Progress of a subscriber broadcast: sent / failed / blocked counts."""
+    from backend.app.models.notification import NotificationBroadcast
+    from backend.app.services.broadcasts import broadcast_progress
+
+    broadcast = await session.get(NotificationBroadcast, broadcast_id)
+    if not broadcast or broadcast.seller_id != seller_id:
+        raise HTTPException(status_code=404, detail="Рассылка не найдена")
+    return broadcast_progress(broadcast)
 
 
 # --- PREORDER PROCUREMENT ---
@@ -1,8 +1,8 @@
 """Seller web panel — Stats: analytics/visitors, stats, export CSV, customer stats."""
 import csv
 import io
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
 from zoneinfo import ZoneInfo
 
 from fastapi import APIRouter, Depends, Query
@@ -12,10 +12,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from backend.app.api.seller_web._common import (
     logger,
     require_seller_token_with_owner,
-    get_session,
+    get_read_session,
     resolve_branch_target,
 )
 from backend.app.services.orders import OrderService
+from backend.app.services.sales_cube import SalesCubeService
 
 router = APIRouter()
 
@@ -27,7 +28,7 @@ async def get_seller_visitor_analytics(
     date_to: Optional[str] = Query(None, description="YYYY-MM-DD"),
     branch: Optional[str] = Query(None, description="'all' for aggregated or seller_id"),
     auth: tuple = Depends(require_seller_token_with_owner),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """Visitor analytics for seller: views, unique visitors, conversion."""
     from datetime import date as date_type, datetime as dt_cls, timedelta
@@ -60,6 +61,40 @@ async def get_seller_visitor_analytics(
     return analytics
 
 
+def _resolve_days(
+    period: Optional[str], date_from: Optional[str], date_to: Optional[str],
+) -> Tuple[Optional[date], Optional[date], Optional[str]]:
+    """Moscow day range for stats: explicit dates win over a predefined period.
+
+    Returns (day_from, day_to, applied_period); (None, None, None) means all time.
+    """
+    def _parse_day(value: Optional[str]) -> Optional[date]:
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            return None
+
+    day_from = _parse_day(date_from)
+    day_to = _parse_day(date_to)
+    if day_from and not day_to:
+        day_to = day_from
+    elif day_to and not day_from:
+        day_from = day_to
+    if day_from and day_to:
+        if day_from > day_to:
+            day_from, day_to = day_to, day_from
+        return day_from, day_to, "custom"
+
+    period_key = (period or "").lower()
+    if period_key in {"1d", "7d", "30d"}:
+        today_msk = datetime.now(ZoneInfo("Europe/Moscow")).date()
+        span = {"1d": 0, "7d": 6, "30d": 29}[period_key]
+        return today_msk - timedelta(days=span), today_msk, period_key
+    return None, None, None
+
+
 @router.get("/stats")
 async def get_stats(
     period: Optional[str] = Query(None, description="Predefined range: 1d, 7d, 30d"),
@@ -67,59 +102,15 @@ async def get_stats(
     date_to: Optional[str] = Query(None, description="YYYY-MM-DD"),
     branch: Optional[str] = Query(None, description="'all' for aggregated or seller_id"),
     auth: tuple = Depends(require_seller_token_with_owner),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    """Get order stats for current seller or aggregated across branches."""
+    """Get order stats for current seller or aggregated across branches (from the daily sales cube)."""
     seller_id, owner_id = auth
     target = await resolve_branch_target(branch, seller_id, owner_id, session)
-
-    def _parse_date(value: Optional[str]) -> Optional[datetime]:
-        if not value:
-            return None
-        try:
-            return datetime.strptime(value, "%Y-%m-%d")
-        except ValueError:
-            return None
-
-    start_date = _parse_date(date_from)
-    end_date = _parse_date(date_to)
-    applied_period: Optional[str] = None
-
-    if start_date and not end_date:
-        end_date = start_date
-    elif end_date and not start_date:
-        start_date = end_date
-    if start_date and end_date and start_date > end_date:
-        start_date, end_date = end_date, start_date
-
-    period_key = (period or "").lower()
-    if not start_date and not end_date and period_key in {"1d", "7d", "30d"}:
-        # Use Moscow timezone for day boundaries
-        MSK = ZoneInfo("Europe/Moscow")
-        today_msk = datetime.now(MSK).date()
-        if period_key == "1d":
-            start_day_msk = today_msk
-        elif period_key == "7d":
-            start_day_msk = today_msk - timedelta(days=6)
-        else:
-            start_day_msk = today_msk - timedelta(days=29)
-        # Create datetime boundaries in MSK (00:00:00 to 23:59:59)
-        start_datetime_msk = datetime.combine(start_day_msk, datetime.min.time()).replace(tzinfo=MSK)
-        end_datetime_msk = datetime.combine(today_msk, datetime.max.time()).replace(tzinfo=MSK)
-        # Convert to UTC for database queries (DB stores UTC timestamps)
-        start_date = start_datetime_msk.astimezone(ZoneInfo("UTC")).replace(tzinfo=None)
-        end_date = end_datetime_msk.astimezone(ZoneInfo("UTC")).replace(tzinfo=None)
-        applied_period = period_key
-    elif start_date or end_date:
-        applied_period = "custom"
+    day_from, day_to, applied_period = _resolve_days(period, date_from, date_to)
 
     service = OrderService(session)
-    stats = await service.get_seller_stats(
-        target,
-        date_from=start_date,
-        date_to=end_date,
-    )
-    stats.setdefault("filters", {})
+    stats = await service.get_seller_dashboard_stats(target, day_from=day_from, day_to=day_to)
     stats["filters"]["period"] = applied_period
     return stats
 
@@ -131,49 +122,15 @@ async def export_stats_csv(
     date_to: Optional[str] = Query(None, description="YYYY-MM-DD"),
     branch: Optional[str] = Query(None, description="'all' for aggregated or seller_id"),
     auth: tuple = Depends(require_seller_token_with_owner),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """Export statistics to CSV file."""
     seller_id, owner_id = auth
     target = await resolve_branch_target(branch, seller_id, owner_id, session)
-
-    def _parse_date(value: Optional[str]) -> Optional[datetime]:
-        if not value:
-            return None
-        try:
-            return datetime.strptime(value, "%Y-%m-%d")
-        except ValueError:
-            return None
-
-    start_date = _parse_date(date_from)
-    end_date = _parse_date(date_to)
-
-    if start_date and not end_date:
-        end_date = start_date
-    elif end_date and not start_date:
-        start_date = end_date
-    if start_date and end_date and start_date > end_date:
-        start_date, end_date = end_date, start_date
-
-    period_key = (period or "").lower()
-    if not start_date and not end_date and period_key in {"1d", "7d", "30d"}:
-        # Use Moscow timezone for day boundaries
-        MSK = ZoneInfo("Europe/Moscow")
-        today_msk = datetime.now(MSK).date()
-        if period_key == "1d":
-            start_day_msk = today_msk
-        elif period_key == "7d":
-            start_day_msk = today_msk - timedelta(days=6)
-        else:
-            start_day_msk = today_msk - timedelta(days=29)
-        start_datetime_msk = datetime.combine(start_day_msk, datetime.min.time()).replace(tzinfo=MSK)
-        end_datetime_msk = datetime.combine(today_msk, datetime.max.time()).replace(tzinfo=MSK)
-        start_date = start_datetime_msk.astimezone(ZoneInfo("UTC")).replace(tzinfo=None)
-        end_date = end_datetime_msk.astimezone(ZoneInfo("UTC")).replace(tzinfo=None)
+    day_from, day_to, _ = _resolve_days(period, date_from, date_to)
 
     # Get stats
-    service = OrderService(session)
-    stats = await service.get_seller_stats(target, date_from=start_date, date_to=end_date)
+    stats = await SalesCubeService(session).get_sales(target, day_from=day_from, day_to=day_to)
 
     # Build CSV
     output = io.StringIO()
@@ -215,7 +172,7 @@ async def get_customer_stats(
     date_to: Optional[str] = Query(None, description="YYYY-MM-DD"),
     branch: Optional[str] = Query(None, description="'all' for aggregated or seller_id"),
     auth: tuple = Depends(require_seller_token_with_owner),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """Customer metrics: new vs returning, retention, LTV, top customers."""
     seller_id, owner_id = auth
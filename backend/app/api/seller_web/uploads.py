@@ -1,17 +1,26 @@
-"""Upload endpoints: product photo, shop banner, shop logo, about-media."""
+"""Upload endpoints: product photo, shop banner, shop logo, about-media.
+
+Images are converted in the process pool (core/image_pool.py) and written
+from a thread, so an upload never blocks the event loop. Product photos are
+stored as responsive variants under their content hash
+(services/product_images.py).
+"""
+import asyncio
 import time
 import uuid
+from contextlib import contextmanager
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.app.core.image_pool import ImagePoolBusy, ImagePoolError, get_image_pool
+from backend.app.services.product_images import photo_variants, store_product_photo
 from backend.app.services.sellers import SellerService
 
 from ._common import (
     logger,
     UPLOAD_DIR,
-    PRODUCTS_UPLOAD_SUBDIR,
     SHOP_BANNERS_UPLOAD_SUBDIR,
     SHOP_LOGOS_UPLOAD_SUBDIR,
     ABOUT_MEDIA_UPLOAD_SUBDIR,
@@ -38,14 +47,47 @@ def _validate_image_content(content: bytes) -> bool:
     return validate_image_content(content)
 
 
-def _convert_image_to_webp(content: bytes, max_side_px: int, force_square: bool = False) -> bytes:
-    """Общий конвертер (делегирует в core); при ошибке — HTTPException 400."""
-    from backend.app.core.image_convert import convert_image_to_webp
+@contextmanager
+def _image_errors():
+    """Ошибки конвертации в HTTP: не изображение — 400, пул занят — 429, таймаут — 503."""
     try:
-        return convert_image_to_webp(content, max_side_px, quality=UPLOAD_OUTPUT_QUALITY, force_square=force_square)
+        yield
     except ValueError as e:
         logger.warning("Image conversion failed: %s", e)
         raise HTTPException(status_code=400, detail=str(e)) from e
+    except ImagePoolBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"}) from e
+    except ImagePoolError as e:
+        logger.warning("Image conversion unavailable: %s", e)
+        raise HTTPException(status_code=503, detail=str(e)) from e
+
+
+async def _convert_image_to_webp(content: bytes, max_side_px: int, force_square: bool = False) -> bytes:
+    """Общий конвертер (process pool)."""
+    with _image_errors():
+        return await get_image_pool().convert_to_webp(
+            content, max_side_px, quality=UPLOAD_OUTPUT_QUALITY, force_square=force_square,
+        )
+
+
+def _check_image_capacity() -> None:
+    """429 before the upload body is read when the conversion pool is already full."""
+    if get_image_pool().saturated:
+        raise HTTPException(
+            status_code=429,
+            detail="Слишком много изображений в обработке, попробуйте позже",
+            headers={"Retry-After": "5"},
+        )
+
+
+def _write_file(path: Path, content: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+async def _save_upload(path: Path, content: bytes) -> None:
+    """Write an upload from a worker thread (disk I/O off the event loop)."""
+    await asyncio.to_thread(_write_file, path, content)
 
 
 # ---------------------------------------------------------------------------
@@ -57,7 +99,7 @@ async def upload_product_photo(
     file: UploadFile = File(...),
     seller_id: int = Depends(require_seller_token),
 ):
-    """Загрузка фото товара. Конвертируется в WebP с уменьшением размера. Возвращает photo_id.
+    """Загрузка фото товара. Сохраняется набором размеров WebP/AVIF. Возвращает photo_id и photo_variants.
 
     Security: Validates file extension, MIME type, and image content.
     """
@@ -84,6 +126,7 @@ async def upload_product_photo(
                 detail=f"Недопустимый тип файла: {file.content_type}"
             )
 
+    _check_image_capacity()
     content = await file.read()
 
     # Validate file size
@@ -94,24 +137,11 @@ async def upload_product_photo(
     if len(content) < 100:  # Minimum 100 bytes
         raise HTTPException(status_code=400, detail="Файл слишком маленький")
 
-    # Convert to WebP (same converter as banner: PNG/heavy images get compressed)
-    content = _convert_image_to_webp(content, UPLOAD_MAX_SIDE_PX, force_square=True)
-
-    # Secure file path generation
-    upload_dir = UPLOAD_DIR / PRODUCTS_UPLOAD_SUBDIR
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    name = f"{uuid.uuid4().hex}{UPLOAD_OUTPUT_EXT}"
-    path = upload_dir / name
-
-    # Ensure path is within upload directory (prevent path traversal)
-    try:
-        path.resolve().relative_to(upload_dir.resolve())
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Недопустимый путь к файлу")
-
-    path.write_bytes(content)
-    photo_id = f"/static/{PRODUCTS_UPLOAD_SUBDIR}/{name}"
-    return {"photo_id": photo_id}
+    # Square WebP/AVIF variants 160..1200 px; the path is derived from
+    # the content hash (no user input), identical photos share one set of files
+    with _image_errors():
+        photo_id = await store_product_photo(content, UPLOAD_DIR)
+    return {"photo_id": photo_id, "photo_variants": photo_variants(photo_id)}
 
 
 @router.post("/upload-banner")
@@ -133,21 +163,21 @@ async def upload_shop_banner(
         allowed_mime = {"image/jpeg", "image/jpg", "image/png", "image/webp", "image/gif"}
         if file.content_type not in allowed_mime:
             raise HTTPException(status_code=400, detail=f"Недопустимый тип файла: {file.content_type}")
+    _check_image_capacity()
     content = await file.read()
     if len(content) > 10 * 1024 * 1024:
         raise HTTPException(status_code=400, detail="Файл слишком большой (макс. 10 МБ)")
     if len(content) < 100:
         raise HTTPException(status_code=400, detail="Файл слишком маленький")
-    content = _convert_image_to_webp(content, UPLOAD_BANNER_MAX_SIDE_PX)
+    content = await _convert_image_to_webp(content, UPLOAD_BANNER_MAX_SIDE_PX)
     upload_dir = UPLOAD_DIR / SHOP_BANNERS_UPLOAD_SUBDIR
-    upload_dir.mkdir(parents=True, exist_ok=True)
     name = f"{seller_id}{UPLOAD_OUTPUT_EXT}"
     path = upload_dir / name
     try:
         path.resolve().relative_to(upload_dir.resolve())
     except ValueError:
         raise HTTPException(status_code=400, detail="Недопустимый путь к файлу")
-    path.write_bytes(content)
+    await _save_upload(path, content)
     banner_url = f"/static/{SHOP_BANNERS_UPLOAD_SUBDIR}/{name}?v={int(time.time())}"
     service = SellerService(session)
     await service.update_field(seller_id, "banner_url", banner_url)
@@ -173,21 +203,21 @@ async def upload_shop_logo(
         allowed_mime = {"image/jpeg", "image/jpg", "image/png", "image/webp", "image/gif"}
         if file.content_type not in allowed_mime:
             raise HTTPException(status_code=400, detail=f"Недопустимый тип файла: {file.content_type}")
+    _check_image_capacity()
     content = await file.read()
     if len(content) > 10 * 1024 * 1024:
         raise HTTPException(status_code=400, detail="Файл слишком большой (макс. 10 МБ)")
     if len(content) < 100:
         raise HTTPException(status_code=400, detail="Файл слишком маленький")
-    content = _convert_image_to_webp(content, UPLOAD_LOGO_MAX_SIDE_PX, force_square=True)
+    content = await _convert_image_to_webp(content, UPLOAD_LOGO_MAX_SIDE_PX, force_square=True)
     upload_dir = UPLOAD_DIR / SHOP_LOGOS_UPLOAD_SUBDIR
-    upload_dir.mkdir(parents=True, exist_ok=True)
     name = f"{seller_id}{UPLOAD_OUTPUT_EXT}"
     path = upload_dir / name
     try:
         path.resolve().relative_to(upload_dir.resolve())
     except ValueError:
         raise HTTPException(status_code=400, detail="Недопустимый путь к файлу")
-    path.write_bytes(content)
+    await _save_upload(path, content)
     logo_url = f"/static/{SHOP_LOGOS_UPLOAD_SUBDIR}/{name}?v={int(time.time())}"
     service = SellerService(session)
     await service.update_field(seller_id, "logo_url", logo_url)
@@ -212,20 +242,20 @@ async def upload_about_media(
         allowed_mime = {"image/jpeg", "image/jpg", "image/png", "image/webp", "image/gif"}
         if file.content_type not in allowed_mime:
             raise HTTPException(status_code=400, detail=f"Недопустимый тип файла: {file.content_type}")
+    _check_image_capacity()
     content = await file.read()
     if len(content) > 10 * 1024 * 1024:
         raise HTTPException(status_code=400, detail="Файл слишком большой (макс. 10 МБ)")
     if len(content) < 100:
         raise HTTPException(status_code=400, detail="Файл слишком маленький")
-    content = _convert_image_to_webp(content, UPLOAD_MAX_SIDE_PX)
+    content = await _convert_image_to_webp(content, UPLOAD_MAX_SIDE_PX)
     upload_dir = UPLOAD_DIR / ABOUT_MEDIA_UPLOAD_SUBDIR / str(seller_id)
-    upload_dir.mkdir(parents=True, exist_ok=True)
     name = f"{uuid.uuid4().hex}{UPLOAD_OUTPUT_EXT}"
     path = upload_dir / name
     try:
         path.resolve().relative_to(upload_dir.resolve())
     except ValueError:
         raise HTTPException(status_code=400, detail="Недопустимый путь к файлу")
-    path.write_bytes(content)
+    await _save_upload(path, content)
     url = f"/static/{ABOUT_MEDIA_UPLOAD_SUBDIR}/{seller_id}/{name}"
     return {"url": url}
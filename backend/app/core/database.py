@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from backend.app.core.config import DB_URL
 from backend.app.core.base import Base  # noqa: F401 - re-exported for compatibility
+from backend.app.core.db_instrumentation import TimedQueuePool, instrument_engine
 
 # Connection pool configuration for production scalability
 # For 10K concurrent users, we need larger pools
@@ -19,5 +20,8 @@ engine = create_async_engine(
     pool_pre_ping=True,  # Проверка соединения перед использованием
     pool_recycle=DB_POOL_RECYCLE,  # Пересоздание соединений каждый час
     pool_timeout=30,  # Timeout для получения соединения из пула
+    poolclass=TimedQueuePool,  # Замер ожидания свободного соединения (db_pool_wait_seconds)
+    pool_logging_name="primary",
 )
+instrument_engine(engine, "primary")
 async_session = async_sessionmaker(engine, expire_on_commit=False)
\ No newline at end of file
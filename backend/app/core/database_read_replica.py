@@ -1,13 +1,52 @@
 """
 Read replica support for database queries.
 Allows routing read-only queries to read replicas for better performance.
+
+Routing (see deps.get_read_session):
+- no replica configured -> primary;
+- replica lag above DB_REPLICA_MAX_LAG_SECONDS, or the replica is unreachable -> primary;
+- the seller network wrote within the last lag window (read-your-writes
+  marker set by deps.track_seller_writes) -> primary;
+- otherwise -> replica.
+
+The marker lives as long as the maximum tolerated lag (plus one lag check
+interval), so once it expires the replica is guaranteed to have the write.
 """
+import asyncio
 import os
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
 from backend.app.core.config import DB_URL
+from backend.app.core.database import engine, async_session
+from backend.app.core.db_instrumentation import TimedQueuePool, instrument_engine
+from backend.app.core.logging import get_logger
+from backend.app.core.settings import get_settings
+
+logger = get_logger(__name__)
 
+_settings = get_settings()
 # Read replica URL (optional, falls back to main DB if not set)
-DB_READ_REPLICA_URL = os.getenv("DB_READ_REPLICA_URL")
+DB_READ_REPLICA_URL = _settings.DB_READ_REPLICA_URL
+# Replica is skipped while it is further behind than this
+DB_REPLICA_MAX_LAG_SECONDS = _settings.DB_REPLICA_MAX_LAG_SECONDS
+# How long a measured lag is reused before the replica is asked again
+REPLICA_LAG_CHECK_INTERVAL = 2.0
+
+READ_YOUR_WRITES_KEY = "db:ryw:owner:{owner_id}"
+READ_YOUR_WRITES_TTL = int(DB_REPLICA_MAX_LAG_SECONDS + REPLICA_LAG_CHECK_INTERVAL) + 1
+
+# 0 when caught up (nothing left to replay), else time since the last replayed transaction
+_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
 
 # Create read replica engine if configured
 if DB_READ_REPLICA_URL:
@@ -19,18 +58,95 @@ if DB_READ_REPLICA_URL:
         pool_pre_ping=True,
         pool_recycle=3600,
         pool_timeout=30,
+        poolclass=TimedQueuePool,
+        pool_logging_name="replica",
     )
+    instrument_engine(read_replica_engine, "replica")
     read_replica_session = async_sessionmaker(read_replica_engine, expire_on_commit=False)
 else:
     # Fallback to main database if no read replica configured
-    from backend.app.core.database import engine, async_session
     read_replica_engine = engine
     read_replica_session = async_session
 
 
+def replica_configured() -> bool:
+    return read_replica_engine is not engine
+
+
+# Last measured lag: (seconds or None if the replica is unreachable, monotonic time, error)
+_lag_state: Dict[str, Any] = {"lag": None, "checked_at": float("-inf"), "error": None}
+_lag_lock = asyncio.Lock()
+
+
+async def replica_lag_seconds() -> Optional[float]:
+    """Replica lag in seconds (cached for REPLICA_LAG_CHECK_INTERVAL); None if unreachable."""
+    if not replica_configured():
+        return 0.0
+    if time.monotonic() - _lag_state["checked_at"] < REPLICA_LAG_CHECK_INTERVAL:
+        return _lag_state["lag"]
+    async with _lag_lock:
+        if time.monotonic() - _lag_state["checked_at"] < REPLICA_LAG_CHECK_INTERVAL:
+            return _lag_state["lag"]
+        try:
+            async with read_replica_engine.connect() as conn:
+                lag = float((await conn.execute(_LAG_SQL)).scalar() or 0)
+            _lag_state.update(lag=lag, error=None)
+        except Exception as e:
+            logger.warning("Read replica lag check failed", error=str(e))
+            _lag_state.update(lag=None, error=str(e))
+        _lag_state["checked_at"] = time.monotonic()
+        return _lag_state["lag"]
+
+
+async def note_owner_write(owner_id: int) -> None:
+    """Pin reads of a seller network to the primary for one lag window."""
+    if not replica_configured():
+        return
+    from backend.app.services.cache import CacheService
+    try:
+        redis = await CacheService.get_redis()
+        await redis.set(READ_YOUR_WRITES_KEY.format(owner_id=owner_id), b"1", ex=READ_YOUR_WRITES_TTL)
+    except Exception as e:
+        logger.warning("Read-your-writes marker not set", owner_id=owner_id, error=str(e))
+
+
+async def _owner_wrote_recently(owner_id: int) -> bool:
+    from backend.app.services.cache import CacheService
+    try:
+        redis = await CacheService.get_redis()
+        return bool(await redis.exists(READ_YOUR_WRITES_KEY.format(owner_id=owner_id)))
+    except Exception:
+        return True  # cannot tell: stay on the primary
+
+
+async def use_replica(owner_id: Optional[int] = None) -> bool:
+    """Whether a read-only request may go to the replica."""
+    if not replica_configured():
+        return False
+    lag = await replica_lag_seconds()
+    if lag is None or lag > DB_REPLICA_MAX_LAG_SECONDS:
+        return False
+    if owner_id is not None and await _owner_wrote_recently(owner_id):
+        return False
+    return True
+
+
+async def replica_health() -> str:
+    """Replica status for /health: ok, not_configured, lagging or error."""
+    if not replica_configured():
+        return "not_configured"
+    lag = await replica_lag_seconds()
+    if lag is None:
+        return f"error: {_lag_state['error']}"
+    if lag > DB_REPLICA_MAX_LAG_SECONDS:
+        return f"lagging: {lag:.1f}s (reads on primary)"
+    return "ok"
+
+
 def get_read_session():
     """
     Get a session for read-only queries.
     Uses read replica if configured, otherwise uses main database.
+    Lag-unaware: request handlers use deps.get_read_session instead.
     """
     return read_replica_session()
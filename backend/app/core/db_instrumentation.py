@@ -0,0 +1,159 @@
+"""
+SQLAlchemy engine instrumentation feeding the Prometheus metrics in core/metrics.py.
+
+- every statement is timed into db_query_duration_seconds, labelled by a
+  bounded fingerprint ("select orders", "update sellers") and the route
+  template of the calling request (core.metrics.current_route);
+- statements slower than DB_SLOW_QUERY_MS are logged with their normalized
+  SQL; for PostgreSQL SELECTs the plan (plain EXPLAIN, no ANALYZE) is fetched
+  on a separate connection and logged too, at most once per fingerprint per
+  SLOW_PLAN_INTERVAL;
+- TimedQueuePool records how long checkouts wait for a free connection;
+- pool occupancy gauges are refreshed on every /metrics scrape
+  (export_pool_stats).
+"""
+import asyncio
+import re
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from backend.app.core.logging import get_logger
+from backend.app.core.metrics import (
+    current_route,
+    db_connections_active,
+    db_connections_idle,
+    db_pool_overflow,
+    db_pool_wait_seconds,
+    db_query_duration_seconds,
+    db_slow_queries_total,
+)
+from backend.app.core.settings import get_settings
+
+logger = get_logger(__name__)
+
+SLOW_PLAN_INTERVAL = 600  # seconds between EXPLAINs of the same fingerprint
+SLOW_SQL_MAX_CHARS = 2000
+
+_QUERY_START = "query_start"
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\$\d+|%\(\w+\)s|\?")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+_TABLE = re.compile(r'\b(?:from|into|update|join)\s+"?([a-z_][a-z0-9_]*)', re.IGNORECASE)
+
+# (name, engine) of every instrumented engine, for export_pool_stats
+_engines: List[tuple] = []
+_last_plan: Dict[str, float] = {}
+
+
+def fingerprint(statement: str) -> str:
+    """Bounded label for a statement: verb and first table, e.g. "select orders"."""
+    head = statement.lstrip().split(None, 1)
+    verb = head[0].lower() if head else "?"
+    match = _TABLE.search(statement)
+    return f"{verb} {match.group(1).lower()}" if match else verb
+
+
+def normalize_sql(statement: str) -> str:
+    """Statement with literals and placeholders replaced by ? and IN-lists collapsed."""
+    sql = _SPACES.sub(" ", _LITERALS.sub("?", statement)).strip()
+    return _IN_LISTS.sub("(...)", sql)[:SLOW_SQL_MAX_CHARS]
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long a checkout waits for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait_seconds.labels(pool=self._orig_logging_name or "primary").observe(
+                time.perf_counter() - start
+            )
+
+
+async def _log_plan(engine: AsyncEngine, name: str, statement: str, parameters, fp: str, duration: float):
+    try:
+        async with engine.connect() as conn:
+            rows = (await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)).all()
+        plan = "\n".join(str(row[0]) for row in rows)
+    except Exception as e:
+        plan = f"unavailable: {e}"
+    logger.warning(
+        "Slow query plan",
+        engine=name, fingerprint=fp, duration_ms=round(duration * 1000), plan=plan,
+    )
+
+
+def _on_slow_query(engine: AsyncEngine, name: str, statement: str, parameters, fp: str, duration: float):
+    route = current_route.get()
+    db_slow_queries_total.labels(query_type=fp, route=route).inc()
+    logger.warning(
+        "Slow query",
+        engine=name, fingerprint=fp, route=route,
+        duration_ms=round(duration * 1000), sql=normalize_sql(statement),
+    )
+    if engine.dialect.name != "postgresql" or not statement.lstrip()[:6].lower() == "select":
+        return
+    now = time.monotonic()
+    if now - _last_plan.get(fp, float("-inf")) < SLOW_PLAN_INTERVAL:
+        return
+    _last_plan[fp] = now
+    try:
+        asyncio.get_running_loop().create_task(_log_plan(engine, name, statement, parameters, fp, duration))
+    except RuntimeError:
+        pass  # no running loop (sync use): the statement itself is logged above
+
+
+def instrument_engine(
+    engine: AsyncEngine, name: str = "primary", slow_query_ms: Optional[float] = None,
+) -> AsyncEngine:
+    """Attach query timing to an async engine and register its pool for export.
+
+    slow_query_ms defaults to settings.DB_SLOW_QUERY_MS.
+    """
+    sync_engine = engine.sync_engine
+    if slow_query_ms is None:
+        slow_query_ms = get_settings().DB_SLOW_QUERY_MS
+    slow_seconds = slow_query_ms / 1000
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_QUERY_START, []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get(_QUERY_START)
+        if not starts:
+            return
+        duration = time.perf_counter() - starts.pop()
+        fp = fingerprint(statement)
+        db_query_duration_seconds.labels(query_type=fp, route=current_route.get()).observe(duration)
+        if duration >= slow_seconds:
+            _on_slow_query(engine, name, statement, parameters, fp, duration)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get(_QUERY_START):
+            conn.info[_QUERY_START].pop()
+
+    _engines.append((name, engine))
+    return engine
+
+
+def export_pool_stats() -> None:
+    """Copy pool occupancy of instrumented engines into the gauges (called per scrape)."""
+    for name, engine in _engines:
+        pool = engine.sync_engine.pool
+        checkedout = getattr(pool, "checkedout", None)
+        if checkedout is None:
+            continue
+        db_connections_active.labels(pool=name).set(pool.checkedout())
+        db_connections_idle.labels(pool=name).set(pool.checkedin())
+        db_pool_overflow.labels(pool=name).set(max(pool.overflow(), 0))
@@ -3,9 +3,23 @@
 Минимальные зависимости: Pillow. Используется из backend.app.api.seller_web.
 """
 import io
-from PIL import Image, ImageOps
+from typing import Dict, Iterable
+
+from PIL import Image, ImageOps, features
 
 DEFAULT_QUALITY = 85
+# AVIF at this quality is visually on par with WebP at DEFAULT_QUALITY and ~30% smaller;
+# speed 8 keeps a 1200px encode around a second
+AVIF_QUALITY = 60
+AVIF_SPEED = 8
+
+
+def avif_supported() -> bool:
+    """Pillow was built with an AVIF encoder (Pillow >= 11.2 with libavif)."""
+    try:
+        return bool(features.check("avif"))
+    except ValueError:  # older Pillow: unknown feature
+        return False
 
 
 def validate_image_content(content: bytes) -> bool:
@@ -47,21 +61,64 @@ def convert_image_to_webp(
     if not validate_image_content(content):
         raise ValueError("Файл не является изображением")
     try:
-        img = Image.open(io.BytesIO(content))
-        img.verify()
-        img = Image.open(io.BytesIO(content))
-        img = ImageOps.exif_transpose(img)
-        if img.mode in ("RGBA", "P"):
-            img = img.convert("RGB")
-        if force_square:
-            img = crop_to_square(img)
-        w, h = img.size
-        if max(w, h) > max_side_px:
-            ratio = max_side_px / max(w, h)
-            new_size = (int(w * ratio), int(h * ratio))
-            img = img.resize(new_size, Image.Resampling.LANCZOS)
+        img = _resize(_open_image(content, force_square), max_side_px)
         out = io.BytesIO()
         img.save(out, "WEBP", quality=quality)
         return out.getvalue()
     except Exception as e:
         raise ValueError("Не удалось обработать изображение") from e
+
+
+def convert_image_variants(
+    content: bytes,
+    widths: Iterable[int],
+    quality: int = DEFAULT_QUALITY,
+    force_square: bool = False,
+    avif: bool = False,
+) -> Dict[str, bytes]:
+    """
+    Набор размеров одного изображения для srcset: {"400.webp": ..., "400.avif": ...}.
+    Исходник декодируется один раз; каждый размер уменьшается из предыдущего (большего),
+    без увеличения — ширина, превышающая исходник, получает исходный размер.
+    :raises ValueError: если контент не изображение или не удалось обработать.
+    """
+    if not validate_image_content(content):
+        raise ValueError("Файл не является изображением")
+    try:
+        img = _open_image(content, force_square)
+        out: Dict[str, bytes] = {}
+        for width in sorted(widths, reverse=True):
+            img = _resize(img, width)
+            buf = io.BytesIO()
+            img.save(buf, "WEBP", quality=quality)
+            out[f"{width}.webp"] = buf.getvalue()
+            if avif:
+                buf = io.BytesIO()
+                img.save(buf, "AVIF", quality=AVIF_QUALITY, speed=AVIF_SPEED)
+                out[f"{width}.avif"] = buf.getvalue()
+        return out
+    except Exception as e:
+        raise ValueError("Не удалось обработать изображение") from e
+
+
+def _open_image(content: bytes, force_square: bool) -> Image.Image:
+    """Decode with verification, apply EXIF rotation, RGB, optional center crop."""
+    img = Image.open(io.BytesIO(content))
+    img.verify()
+    img = Image.open(io.BytesIO(content))
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "P"):
+        img = img.convert("RGB")
+    if force_square:
+        img = crop_to_square(img)
+    return img
+
+
+def _resize(img: Image.Image, max_side_px: int) -> Image.Image:
+    """Downscale so the longer side is at most max_side_px (never upscale)."""
+    w, h = img.size
+    if max(w, h) > max_side_px:
+        ratio = max_side_px / max(w, h)
+        new_size = (int(w * ratio), int(h * ratio))
+        img = img.resize(new_size, Image.Resampling.LANCZOS)
+    return img
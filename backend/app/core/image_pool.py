@@ -0,0 +1,177 @@
+"""
+Process pool for image conversion (core/image_convert.py) off the event loop.
+
+Pillow decoding, EXIF transpose, LANCZOS resize and WebP encoding of a large
+photo take hundreds of milliseconds of CPU; run inline they stall every
+request on the worker. Conversions go to a small ProcessPoolExecutor instead:
+
+- at most IMAGE_POOL_MAX_PENDING conversions are queued or running per app
+  worker; beyond that ImagePoolBusy is raised and uploads answer 429;
+- a caller waits at most IMAGE_CONVERT_TIMEOUT seconds (ImagePoolError). A
+  conversion that has not started yet is cancelled; a running one finishes
+  in its process and counts against the limit until then;
+- a pool broken by a crashed worker (e.g. out of memory) is replaced on the
+  next call.
+
+IMAGE_POOL_WORKERS=0 runs conversions in a thread instead (development, tests).
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from backend.app.core.image_convert import DEFAULT_QUALITY, convert_image_to_webp, convert_image_variants
+from backend.app.core.logging import get_logger
+from backend.app.core.metrics import image_conversions_total, image_conversions_pending
+from backend.app.core.settings import get_settings
+
+logger = get_logger(__name__)
+
+
+# Default: two processes, but never more than CPUs (extra processes only contend)
+DEFAULT_WORKERS = min(2, os.cpu_count() or 1)
+
+
+class ImagePoolError(Exception):
+    """Conversion did not run to completion (timeout, broken pool)."""
+
+
+class ImagePoolBusy(ImagePoolError):
+    """Too many conversions queued: the caller should retry later (429)."""
+
+
+class ImagePool:
+    """Bounded process pool; one per app worker (get_image_pool)."""
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        max_pending: int = 8,
+        timeout: float = 20.0,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def saturated(self) -> bool:
+        """A new conversion would be rejected right now (check before reading the upload)."""
+        return self._pending >= self.max_pending
+
+    def _count(self, result: str) -> None:
+        image_conversions_total.labels(result=result).inc()
+
+    def _set_pending(self, delta: int) -> None:
+        self._pending += delta
+        image_conversions_pending.set(self._pending)
+
+    def _release(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Executor thread: hand the counter update to the loop that owns it
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(self._set_pending, -1)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers <= 0:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image")
+            else:
+                # spawn: forking a process that runs an event loop and DB/Redis pools is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return self._executor
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        try:
+            return self._get_executor().submit(fn, *args)
+        except BrokenProcessPool:
+            self._executor = None
+            return self._get_executor().submit(fn, *args)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) in the pool; fn and args must be picklable.
+
+        :raises ImagePoolBusy: max_pending conversions are already queued or running.
+        :raises ImagePoolError: timeout or broken pool.
+        Exceptions raised by fn propagate unchanged.
+        """
+        if self.saturated:
+            self._count("rejected")
+            raise ImagePoolBusy("Слишком много изображений в обработке, попробуйте позже")
+        loop = asyncio.get_running_loop()
+        future = self._submit(fn, *args)
+        self._set_pending(1)
+        # Released when the work really ends, not when the caller stops waiting
+        future.add_done_callback(lambda _: self._release(loop))
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self._count("timeout")
+            raise ImagePoolError("Обработка изображения заняла слишком много времени")
+        except BrokenProcessPool as e:
+            self._executor = None
+            self._count("error")
+            logger.error("Image pool broken", error=str(e))
+            raise ImagePoolError("Не удалось обработать изображение") from e
+        except ValueError:
+            self._count("invalid")
+            raise
+        self._count("ok")
+        return result
+
+    async def convert_to_webp(
+        self,
+        content: bytes,
+        max_side_px: int,
+        quality: int = DEFAULT_QUALITY,
+        force_square: bool = False,
+    ) -> bytes:
+        """convert_image_to_webp in the pool. ValueError: not an image / cannot be processed."""
+        return await self.run(convert_image_to_webp, content, max_side_px, quality, force_square)
+
+    async def convert_variants(
+        self,
+        content: bytes,
+        widths: Sequence[int],
+        quality: int = DEFAULT_QUALITY,
+        force_square: bool = False,
+        avif: bool = False,
+    ) -> Dict[str, bytes]:
+        """convert_image_variants in the pool (one job for all sizes)."""
+        return await self.run(convert_image_variants, content, tuple(widths), quality, force_square, avif)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_image_pool: Optional[ImagePool] = None
+
+
+def get_image_pool() -> ImagePool:
+    """The app worker's pool, configured from settings on first use."""
+    global _image_pool
+    if _image_pool is None:
+        settings = get_settings()
+        _image_pool = ImagePool(
+            workers=DEFAULT_WORKERS if settings.IMAGE_POOL_WORKERS is None else settings.IMAGE_POOL_WORKERS,
+            max_pending=settings.IMAGE_POOL_MAX_PENDING,
+            timeout=settings.IMAGE_CONVERT_TIMEOUT,
+        )
+    return _image_pool
+
+
+def shutdown_image_pool() -> None:
+    """Stop the worker's pool if it was ever started."""
+    if _image_pool is not None:
+        _image_pool.shutdown()
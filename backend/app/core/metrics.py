@@ -4,11 +4,16 @@ Prometheus metrics for application monitoring.
 from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
 from prometheus_client.openmetrics.exposition import generate_latest as generate_latest_openmetrics
 from fastapi import Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.routing import Match
+from contextvars import ContextVar
 import time
 
 
+# Route template of the request being served ("-" outside requests, e.g. the worker);
+# used as a label by database and Redis metrics
+current_route: ContextVar[str] = ContextVar("current_route", default="-")
+
+
 # Request metrics
 http_requests_total = Counter(
     'http_requests_total',
@@ -23,24 +28,60 @@ http_request_duration_seconds = Histogram(
     buckets=[0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0]
 )
 
-# Database metrics
+http_requests_in_progress = Gauge(
+    'http_requests_in_progress',
+    'HTTP requests currently being served',
+    ['method']
+)
+
+http_response_size_bytes = Histogram(
+    'http_response_size_bytes',
+    'HTTP response body size in bytes',
+    ['method', 'endpoint'],
+    buckets=[100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+)
+
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+# Database metrics (fed by core/db_instrumentation.py)
 db_connections_active = Gauge(
     'db_connections_active',
-    'Number of active database connections'
+    'Number of active (checked out) database connections',
+    ['pool']
 )
 
 db_connections_idle = Gauge(
     'db_connections_idle',
-    'Number of idle database connections'
+    'Number of idle database connections',
+    ['pool']
+)
+
+db_pool_overflow = Gauge(
+    'db_pool_overflow',
+    'Connections open above pool_size (max_overflow in use)',
+    ['pool']
+)
+
+db_pool_wait_seconds = Histogram(
+    'db_pool_wait_seconds',
+    'Time a checkout waited for a free pooled connection',
+    ['pool'],
+    buckets=[0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0]
 )
 
 db_query_duration_seconds = Histogram(
     'db_query_duration_seconds',
     'Database query duration in seconds',
-    ['query_type'],
+    ['query_type', 'route'],
     buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0]
 )
 
+db_slow_queries_total = Counter(
+    'db_slow_queries_total',
+    'Queries slower than DB_SLOW_QUERY_MS',
+    ['query_type', 'route']
+)
+
 # Redis metrics
 redis_connections_active = Gauge(
     'redis_connections_active',
@@ -56,27 +97,64 @@ redis_operations_total = Counter(
 redis_operation_duration_seconds = Histogram(
     'redis_operation_duration_seconds',
     'Redis operation duration in seconds',
-    ['operation'],
+    ['operation', 'route'],
     buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0]
 )
 
-# Business metrics
+# In-process L1 cache (services/local_cache.py)
+cache_local_requests_total = Counter(
+    'cache_local_requests_total',
+    'In-process cache lookups',
+    ['namespace', 'result']
+)
+
+cache_local_entries = Gauge(
+    'cache_local_entries',
+    'Entries currently held in the in-process cache'
+)
+
+# Telegram outbox dispatcher (services/telegram_outbox.py)
+telegram_outbox_messages_total = Counter(
+    'telegram_outbox_messages_total',
+    'Telegram outbox delivery attempts',
+    ['result']
+)
+
+# Buffered page view ingestion (services/analytics_ingest.py)
+analytics_ingest_events_total = Counter(
+    'analytics_ingest_events_total',
+    'Page view events by ingestion outcome (buffered, dropped, spilled, loaded)',
+    ['result']
+)
+
+# Image conversion process pool (core/image_pool.py)
+image_conversions_total = Counter(
+    'image_conversions_total',
+    'Image conversions by outcome (ok, invalid, rejected, timeout, error)',
+    ['result']
+)
+
+image_conversions_pending = Gauge(
+    'image_conversions_pending',
+    'Image conversions queued or running in the process pool'
+)
+
+# Business metrics: platform-level only; per-seller counts live in
+# services/business_metrics.py (a seller_id label grows one series per seller)
 orders_created_total = Counter(
     'orders_created_total',
     'Total number of orders created',
-    ['seller_id', 'status']
+    ['status']
 )
 
 orders_completed_total = Counter(
     'orders_completed_total',
-    'Total number of orders completed',
-    ['seller_id']
+    'Total number of orders completed'
 )
 
 products_created_total = Counter(
     'products_created_total',
-    'Total number of products created',
-    ['seller_id']
+    'Total number of products created'
 )
 
 active_sellers = Gauge(
@@ -90,41 +168,84 @@ active_products = Gauge(
 )
 
 
-class PrometheusMiddleware(BaseHTTPMiddleware):
-    """Middleware to collect HTTP request metrics."""
-    
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        # Get endpoint path (remove query parameters)
-        endpoint = request.url.path
-        
-        # Skip metrics endpoint itself
-        if endpoint == "/metrics":
-            return await call_next(request)
-        
+def route_template(scope) -> str:
+    """Path template of the route matching scope ("/orders/{order_id}"), "unmatched" if none."""
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+
+class PrometheusMiddleware:
+    """Pure ASGI middleware collecting HTTP request metrics.
+
+    Labels are bounded: the route template instead of the raw path (all of
+    /static is one series, unknown paths are "unmatched") and a fixed method set.
+    """
+
+    TEMPLATE_CACHE_SIZE = 4096
+
+    def __init__(self, app):
+        self.app = app
+        # (method, path) -> route template; cleared when full
+        self._templates: dict = {}
+
+    def _template(self, scope) -> str:
+        key = (scope["method"], scope["path"])
+        template = self._templates.get(key)
+        if template is None:
+            if len(self._templates) >= self.TEMPLATE_CACHE_SIZE:
+                self._templates.clear()
+            template = self._templates[key] = route_template(scope)
+        return template
+
+    async def __call__(self, scope, receive, send):
+        # Skip non-HTTP traffic and the metrics endpoint itself
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in HTTP_METHODS else "OTHER"
+        endpoint = self._template(scope)
+        token = current_route.set(endpoint)
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = http_requests_in_progress.labels(method=method)
+        in_progress.inc()
+        start_time = time.perf_counter()
         try:
-            response = await call_next(request)
-            status_code = response.status_code
-        except Exception as e:
-            status_code = 500
-            raise
+            await self.app(scope, receive, send_wrapper)
         finally:
-            duration = time.time() - start_time
-            
-            # Record metrics
+            duration = time.perf_counter() - start_time
+            in_progress.dec()
+            current_route.reset(token)
+
             http_requests_total.labels(
-                method=request.method,
+                method=method,
                 endpoint=endpoint,
                 status_code=status_code
             ).inc()
-            
+
             http_request_duration_seconds.labels(
-                method=request.method,
+                method=method,
                 endpoint=endpoint
             ).observe(duration)
-        
-        return response
+
+            http_response_size_bytes.labels(
+                method=method,
+                endpoint=endpoint
+            ).observe(response_size)
 
 
 def get_metrics_response(openmetrics: bool = False) -> Response:
@@ -137,6 +258,11 @@ def get_metrics_response(openmetrics: bool = False) -> Response:
     Returns:
         Response with metrics data
     """
+    from backend.app.core.db_instrumentation import export_pool_stats
+    from backend.app.services.cache import export_redis_pool_stats
+    export_pool_stats()
+    export_redis_pool_stats()
+
     if openmetrics:
         content = generate_latest_openmetrics()
         content_type = "application/openmetrics-text; version=1.0.0; charset=utf-8"
@@ -40,6 +40,8 @@ class Settings(BaseSettings):
     DB_HOST: str = Field(default="localhost", description="PostgreSQL host")
     DB_PORT: str = Field(default="5432", description="PostgreSQL port")
     DB_READ_REPLICA_URL: Optional[str] = Field(default=None, description="PostgreSQL read replica URL (optional)")
+    DB_REPLICA_MAX_LAG_SECONDS: float = Field(default=5.0, description="Reads fall back to the primary while the replica lags more than this")
+    DB_SLOW_QUERY_MS: float = Field(default=500.0, description="Statements slower than this are logged (PostgreSQL SELECTs with their plan)")
     
     # Redis configuration
     REDIS_HOST: str = Field(default="localhost", description="Redis host")
@@ -85,6 +87,15 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = Field(default=100, description="Database max overflow connections")
     DB_POOL_RECYCLE: int = Field(default=3600, description="Database connection recycle time (seconds)")
     
+    # Cart stock reservations: "postgres" (row locks) or "redis" (Lua TTL holds)
+    RESERVATION_BACKEND: str = Field(default="postgres", description="Reservation backend: postgres or redis")
+
+    # Image conversion process pool (uploads)
+    IMAGE_POOL_WORKERS: Optional[int] = Field(default=None, description="Processes converting uploaded images per app worker (default: min(2, CPUs))")
+    IMAGE_POOL_MAX_PENDING: int = Field(default=8, description="Conversions queued or running before uploads get 429")
+    IMAGE_CONVERT_TIMEOUT: float = Field(default=20.0, description="Seconds an upload waits for its conversion")
+    PRODUCT_PHOTO_AVIF: bool = Field(default=True, description="Also store AVIF variants of product photos (if Pillow supports AVIF)")
+
     # Bot pool configuration
     BOT_POOL_SIZE: int = Field(default=10, description="Bot database connection pool size")
     BOT_MAX_OVERFLOW: int = Field(default=20, description="Bot database max overflow connections")
@@ -97,6 +108,15 @@ class Settings(BaseSettings):
             raise ValueError("ENVIRONMENT must be 'development' or 'production'")
         return v
     
+    @field_validator("RESERVATION_BACKEND")
+    @classmethod
+    def validate_reservation_backend(cls, v: str) -> str:
+        """Validate reservation backend."""
+        v = v.lower()
+        if v not in ("postgres", "redis"):
+            raise ValueError("RESERVATION_BACKEND must be 'postgres' or 'redis'")
+        return v
+
     @field_validator("LOG_LEVEL")
     @classmethod
     def validate_log_level(cls, v: str) -> str:
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 from pathlib import Path
@@ -18,10 +19,17 @@ from backend.app.api import buyers, sellers, orders, admin, public, payments, su
 from backend.app.api import admin_auth, seller_auth, seller_web, auth
 from backend.app.api.admin import require_admin_token
 from backend.app.api.deps import get_session
+from backend.app.core.database_read_replica import replica_health
+from backend.app.services.business_metrics import run_seller_counter_flusher
 from backend.app.services.cache import CacheService
+from backend.app.services.catalog import install_catalog_sync
+from backend.app.services.reservations import install_reservation_hooks
+from backend.app.services.order_events import install_order_event_hooks, order_event_hub
+from backend.app.services.seller_auth_state import install_seller_auth_hooks
 from backend.app.core.logging import setup_logging, get_logger
 from backend.app.core.settings import get_settings
 from backend.app.core.metrics import PrometheusMiddleware, get_metrics_response
+from backend.app.core.image_pool import shutdown_image_pool
 
 # Load and validate settings
 try:
@@ -39,6 +47,14 @@ setup_logging(
 
 logger = get_logger(__name__)
 
+# Keep seller_catalog_stats in sync with product/subscription/zone writes
+install_catalog_sync()
+# Apply Redis reservation releases only once their transaction commits
+install_reservation_hooks()
+# Publish order events and drop stale seller auth state after commit
+install_order_event_hooks()
+install_seller_auth_hooks()
+
 # Log configuration status
 logger.info(
     "Application configuration loaded",
@@ -52,8 +68,21 @@ logger.info(
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     logger.info("Application starting up", version="1.0.0")
+    # Cross-worker invalidation of the in-process reference cache
+    invalidation_listener = asyncio.create_task(CacheService.run_invalidation_listener())
+    # Per-seller business counters -> Redis day hashes
+    counter_flusher = asyncio.create_task(run_seller_counter_flusher())
+    # One events-channel subscription per worker feeds all its SSE order streams
+    order_events_listener = asyncio.create_task(order_event_hub.run())
     yield
     logger.info("Application shutting down")
+    for task in (invalidation_listener, counter_flusher, order_events_listener):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    shutdown_image_pool()
     await CacheService.close()
 
 
@@ -137,14 +166,15 @@ async def root():
 async def health_check(session: AsyncSession = Depends(get_session)):
     """
     Health check endpoint for monitoring and orchestration.
-    Checks database and Redis connectivity.
+    Checks database and Redis connectivity and read replica lag.
     """
     health_status = {
         "status": "healthy",
         "version": "1.0.0",
         "checks": {
             "database": "ok",
-            "redis": "ok"
+            "redis": "ok",
+            "database_replica": "ok",
         }
     }
     
@@ -164,6 +194,12 @@ async def health_check(session: AsyncSession = Depends(get_session)):
         logger.error("Redis health check failed", error=str(e))
         health_status["status"] = "unhealthy"
         health_status["checks"]["redis"] = f"error: {str(e)}"
+
+    # Read replica: a lagging or unreachable replica only sends reads to the primary
+    replica = await replica_health()
+    health_status["checks"]["database_replica"] = replica
+    if replica not in ("ok", "not_configured") and health_status["status"] == "healthy":
+        health_status["status"] = "degraded"
     
     return health_status
 
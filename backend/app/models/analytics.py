@@ -1,5 +1,5 @@
 """Analytics models — page views tracking and daily aggregated stats."""
-from sqlalchemy import BigInteger, Integer, String, DateTime, Date, Index, UniqueConstraint
+from sqlalchemy import BigInteger, Integer, String, DateTime, Date, Index, UniqueConstraint, LargeBinary, DECIMAL
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime, date as date_type
 from typing import Optional
@@ -7,7 +7,12 @@ from backend.app.core.base import Base
 
 
 class PageView(Base):
-    """Raw page view event from Mini App."""
+    """Raw page view event from Mini App.
+
+    On PostgreSQL the table is range-partitioned by created_at, one partition
+    per Moscow day (migration partition_page_views); its primary key there is
+    (id, created_at), id stays unique through the sequence.
+    """
     __tablename__ = 'page_views'
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     visitor_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
@@ -26,7 +31,7 @@ class PageView(Base):
 
 
 class DailyStats(Base):
-    """Pre-aggregated daily statistics, rolled up from page_views hourly."""
+    """Pre-aggregated daily statistics, rolled up incrementally from page_views."""
     __tablename__ = 'daily_stats'
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     date: Mapped[date_type] = mapped_column(Date, nullable=False)
@@ -42,3 +47,56 @@ class DailyStats(Base):
         Index('ix_daily_stats_date', 'date'),
         Index('ix_daily_stats_seller_date', 'seller_id', 'date'),
     )
+
+
+class DailyVisitorSketch(Base):
+    """HyperLogLog registers of session_ids per Moscow day and seller (core/hll.py).
+
+    Merged into daily_stats.unique_visitors by the rollup and across days /
+    branches for period totals. seller_id = 0 is the platform-wide sketch.
+    """
+    __tablename__ = 'daily_visitor_sketches'
+    date: Mapped[date_type] = mapped_column(Date, primary_key=True)
+    seller_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    registers: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        Index('ix_daily_visitor_sketches_seller_date', 'seller_id', 'date'),
+    )
+
+
+class AnalyticsWatermark(Base):
+    """Last source row id folded into the rollups, per stream (e.g. 'page_views')."""
+    __tablename__ = 'analytics_watermarks'
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    last_id: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    # Newest created_at folded so far: lower bound of the next scan (partition pruning)
+    last_created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SellerDailySales(Base):
+    """Completed-order sales per seller and Moscow day (services/sales_cube.py).
+
+    The day is that of coalesce(completed_at, created_at). Cells are recomputed
+    from orders on completion and for recent days by the worker. All columns
+    sum across days and branches; new_buyers counts buyers whose first
+    completed order with the seller falls on the day, so its all-time sum is
+    the seller's distinct buyer count.
+    """
+    __tablename__ = 'seller_daily_sales'
+    seller_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    day: Mapped[date_type] = mapped_column(Date, primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[float] = mapped_column(DECIMAL(12, 2), nullable=False, default=0)
+    delivery_orders: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    delivery_revenue: Mapped[float] = mapped_column(DECIMAL(12, 2), nullable=False, default=0)
+    pickup_orders: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    pickup_revenue: Mapped[float] = mapped_column(DECIMAL(12, 2), nullable=False, default=0)
+    other_orders: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    other_revenue: Mapped[float] = mapped_column(DECIMAL(12, 2), nullable=False, default=0)
+    buyers: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    new_buyers: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Revenue of orders with a buyer_id (numerator of LTV; guest orders excluded)
+    buyer_revenue: Mapped[float] = mapped_column(DECIMAL(12, 2), nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -25,6 +25,8 @@ class CartItem(Base):
     __table_args__ = (
         UniqueConstraint('buyer_id', 'seller_id', 'product_id', 'preorder_delivery_date', name='uq_cart_buyer_seller_product_date'),
         Index('ix_cart_items_buyer_id', 'buyer_id'),
+        # Reservation sweeper picks expired holds by reserved_at
+        Index('ix_cart_items_reserved_at', 'reserved_at'),
     )
 
 
@@ -40,6 +42,8 @@ class BuyerFavoriteSeller(Base):
         UniqueConstraint('buyer_id', 'seller_id', name='uq_favorite_buyer_seller'),
         Index('ix_favorite_buyer_seller', 'buyer_id', 'seller_id'),
         Index('ix_favorite_seller_id', 'seller_id'),
+        # Keyset streaming of a seller's subscribers (broadcasts)
+        Index('ix_favorite_seller_buyer', 'seller_id', 'buyer_id'),
     )
 
 
@@ -0,0 +1,52 @@
+"""Denormalized per-seller catalog snapshot for the public Mini App feed."""
+from sqlalchemy import BigInteger, Integer, String, DateTime, Float, DECIMAL, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+from backend.app.core.base import Base
+
+
+class SellerCatalogStats(Base):
+    """One row per seller with the aggregates the public listing needs.
+
+    Maintained by services/catalog.py on every flush that touches products,
+    categories, subscriptions, delivery zones or seller geo, so that
+    GET /public/sellers and /public/sellers/geo read it with a single join.
+    """
+    __tablename__ = 'seller_catalog_stats'
+    seller_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('sellers.seller_id', ondelete='CASCADE'), primary_key=True)
+    # In-stock, non-addon products only (same rules as the public listing)
+    min_price: Mapped[Optional[float]] = mapped_column(DECIMAL(10, 2), nullable=True)
+    max_price: Mapped[Optional[float]] = mapped_column(DECIMAL(10, 2), nullable=True)
+    product_count: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    subscriber_count: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    # Min price over active delivery zones (null = seller has no active zones)
+    min_delivery_price: Mapped[Optional[float]] = mapped_column(DECIMAL(10, 2), nullable=True)
+    # Effective coordinates: seller's own or metro station fallback
+    geo_lat: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    geo_lon: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    # Normalized delivery type: delivery | pickup | both | null
+    delivery_type: Mapped[Optional[str]] = mapped_column(String(10), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Cache versions for GET /public/sellers/{id}: bumped on flush, part of the Redis key
+    static_version: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    stock_version: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+
+    __table_args__ = (
+        Index('ix_seller_catalog_stats_product_count', 'product_count'),
+        Index('ix_seller_catalog_stats_geo', 'geo_lat', 'geo_lon'),
+    )
+
+
+class SellerOpenHours(Base):
+    """Working hours flattened from Seller.working_hours, one row per configured weekday.
+
+    Lets the public listing filter closed shops in SQL. Weekdays missing from
+    the seller's config (no restriction) have no row; a day off is a row with
+    NULL open/close times.
+    """
+    __tablename__ = 'seller_open_hours'
+    seller_id: Mapped[int] = mapped_column(BigInteger, ForeignKey('sellers.seller_id', ondelete='CASCADE'), primary_key=True)
+    weekday: Mapped[int] = mapped_column(Integer, primary_key=True)  # 0=Mon, 6=Sun
+    open_time: Mapped[Optional[str]] = mapped_column(String(5), nullable=True)  # "09:00"
+    close_time: Mapped[Optional[str]] = mapped_column(String(5), nullable=True)  # "18:00"
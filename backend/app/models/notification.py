@@ -0,0 +1,65 @@
+"""Telegram notification outbox — messages queued in the caller's transaction."""
+from sqlalchemy import BigInteger, Integer, String, Text, DateTime, JSON, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+from backend.app.core.base import Base
+
+
+class TelegramOutbox(Base):
+    """One sendMessage call, delivered by the worker (services/telegram_outbox.py).
+
+    Rows are added by services/telegram_notify.py to the request's session, so
+    a notification exists if and only if the change it describes was committed.
+    """
+    __tablename__ = 'telegram_outbox'
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    # Which bot sends it: 'buyer' (BOT_TOKEN) or 'admin' (ADMIN_BOT_TOKEN); tokens are never stored
+    bot: Mapped[str] = mapped_column(String(10), nullable=False, default='buyer')
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    parse_mode: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    reply_markup: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # pending -> sent | failed
+    status: Mapped[str] = mapped_column(String(10), nullable=False, default='pending', server_default='pending')
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_telegram_outbox_due', 'status', 'next_attempt_at'),
+    )
+
+
+class NotificationBroadcast(Base):
+    """One message fanned out to an audience (services/broadcasts.py).
+
+    Recipients are streamed by buyer_id; `cursor` is the last buyer_id whose
+    chunk was fully processed, so a restarted worker resumes from there.
+    """
+    __tablename__ = 'notification_broadcasts'
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # Audience: 'seller_subscribers' (BuyerFavoriteSeller of seller_id)
+    audience: Mapped[str] = mapped_column(String(32), nullable=False)
+    seller_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    bot: Mapped[str] = mapped_column(String(10), nullable=False, default='buyer')
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    parse_mode: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    reply_markup: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # pending -> running -> done
+    status: Mapped[str] = mapped_column(String(10), nullable=False, default='pending', server_default='pending')
+    cursor: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    sent: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    failed: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    blocked: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_notification_broadcasts_status', 'status', 'id'),
+        Index('ix_notification_broadcasts_seller', 'seller_id', 'status'),
+    )
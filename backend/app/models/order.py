@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, String, ForeignKey, DateTime, DECIMAL, Text, Index, Boolean, Date
+from sqlalchemy import BigInteger, Integer, String, ForeignKey, DateTime, DECIMAL, Text, Index, Boolean, Date
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime, date
 from typing import Optional
@@ -18,6 +18,8 @@ class Order(Base):
     comment: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # Last change of the row; drives GET /seller-web/orders/changes polling
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, default=datetime.now, onupdate=datetime.now)
     is_preorder: Mapped[bool] = mapped_column(Boolean, default=False)
     preorder_delivery_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
     points_used: Mapped[Optional[float]] = mapped_column(DECIMAL(12, 2), nullable=True, default=0)
@@ -49,14 +51,34 @@ class Order(Base):
         Index('ix_orders_status', 'status'),
         Index('ix_orders_created_at', 'created_at'),
         # Composite indexes for common query patterns
-        Index('ix_orders_seller_status', 'seller_id', 'status'),  # Seller orders by status
+        Index('ix_orders_seller_status_created', 'seller_id', 'status', 'created_at'),  # Seller orders by status, newest first
         Index('ix_orders_seller_created', 'seller_id', 'created_at'),  # Seller orders by date
         Index('ix_orders_status_created', 'status', 'created_at'),  # Orders by status and date
         Index('ix_orders_is_preorder', 'is_preorder'),  # Preorder filter
-        Index('ix_orders_seller_preorder', 'seller_id', 'is_preorder'),  # Seller preorders
+        Index('ix_orders_seller_preorder_created', 'seller_id', 'is_preorder', 'created_at'),  # Seller preorders, newest first
+        Index('ix_orders_seller_updated', 'seller_id', 'updated_at'),  # Seller order changes feed
         Index('ix_orders_preorder_date', 'is_preorder', 'preorder_delivery_date'),  # Preorder dates
         Index('ix_orders_payment_id', 'payment_id'),  # Payment lookup
         Index('ix_orders_payment_status', 'payment_status'),  # Payment status filter
         Index('ix_orders_slot_lookup', 'seller_id', 'delivery_slot_date', 'delivery_slot_start', 'status'),
         Index('ix_orders_guest_phone', 'guest_phone'),  # Guest order → user phone matching
-    )
\ No newline at end of file
+    )
+
+class OrderItem(Base):
+    """One line of an order, written at checkout alongside Order.items_info.
+
+    name and price are snapshots at order time; product_id is not a foreign
+    key, so lines survive product deletion.
+    """
+    __tablename__ = 'order_items'
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    order_id: Mapped[int] = mapped_column(ForeignKey('orders.id', ondelete='CASCADE'), nullable=False)
+    product_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    price: Mapped[Optional[float]] = mapped_column(DECIMAL(10, 2), nullable=True)  # NULL for legacy lines
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('ix_order_items_order_id', 'order_id'),
+        Index('ix_order_items_product_order', 'product_id', 'order_id'),
+    )
@@ -0,0 +1,238 @@
+"""Admin dashboard aggregates, served as a shared short-lived snapshot.
+
+All admin clients read one snapshot from Redis (CacheService namespace
+``admin_dashboard``) instead of each aggregating orders on the primary.
+The worker rebuilds it every REFRESH_INTERVAL seconds; the endpoint builds
+it itself (single-flight) only when the snapshot has expired, e.g. while
+the worker is down. ``generated_at`` tells the client how fresh it is.
+
+Order figures come from two FILTER aggregates: one range scan over orders
+since yesterday and one pass for the live pipeline and totals.
+"""
+from datetime import datetime, time, timedelta, timezone, date
+from decimal import Decimal
+from typing import Any, Dict
+
+from sqlalchemy import select, func, and_, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.constants import COMPLETED_ORDER_STATUSES
+from backend.app.models.order import Order
+from backend.app.models.seller import Seller
+from backend.app.models.settings import GlobalSettings
+from backend.app.models.user import User
+from backend.app.services.cache import CacheService
+
+SNAPSHOT_KEY = "snapshot"
+REFRESH_INTERVAL = 30  # seconds; the snapshot TTL (CacheService.TTL_ADMIN_DASHBOARD) is longer
+
+REJECTED_STATUSES = ("rejected", "cancelled")
+PIPELINE_STATUSES = {
+    "pending": ("pending",),
+    "in_progress": ("accepted", "assembling"),
+    "in_transit": ("in_transit", "ready_for_pickup"),
+}
+
+
+def _money(value) -> int:
+    return round(float(value or 0))
+
+
+async def _commission_rate(session: AsyncSession) -> Decimal:
+    # Platform-wide rate (per-seller rates are not applicable to the aggregate)
+    gs = (await session.execute(select(GlobalSettings).order_by(GlobalSettings.id))).scalar_one_or_none()
+    return Decimal(str((gs.commission_percent if gs else 3) / 100))
+
+
+async def build_admin_dashboard(session: AsyncSession) -> Dict[str, Any]:
+    """Compute the admin dashboard payload from the database."""
+    now = datetime.now()
+    today_start = datetime.combine(date.today(), time.min)
+    yesterday_start = today_start - timedelta(days=1)
+    week_ago = today_start - timedelta(days=7)
+    commission = float(await _commission_rate(session))
+
+    # ── today vs yesterday: one range scan over orders since yesterday ──
+    is_today = Order.created_at >= today_start
+    is_yesterday = Order.created_at < today_start
+    is_completed = Order.status.in_(COMPLETED_ORDER_STATUSES)
+    is_rejected = Order.status.in_(REJECTED_STATUSES)
+    recent = (await session.execute(
+        select(
+            func.count(Order.id).filter(is_today).label("orders_today"),
+            func.count(Order.id).filter(is_yesterday).label("orders_yesterday"),
+            func.count(Order.id).filter(is_today, is_completed).label("completed_today"),
+            func.sum(Order.total_price).filter(is_today, is_completed).label("revenue_today"),
+            func.avg(Order.total_price).filter(is_today, is_completed).label("avg_today"),
+            func.sum(Order.total_price).filter(is_yesterday, is_completed).label("revenue_yesterday"),
+            func.avg(Order.total_price).filter(is_yesterday, is_completed).label("avg_yesterday"),
+            func.count(Order.id).filter(is_today, is_rejected).label("rejected_today"),
+            func.sum(Order.total_price).filter(is_today, is_rejected).label("rejected_amount"),
+        ).where(Order.created_at >= yesterday_start)
+    )).one()
+
+    customers = (await session.execute(
+        select(
+            func.count(User.tg_id).filter(User.created_at >= today_start).label("new_today"),
+            func.count(User.tg_id).filter(
+                User.created_at >= yesterday_start, User.created_at < today_start
+            ).label("new_yesterday"),
+            func.count(User.tg_id).label("total"),
+        ).where(User.role == "BUYER")
+    )).one()
+
+    rev_today = float(recent.revenue_today or 0)
+    rev_yest = float(recent.revenue_yesterday or 0)
+    today_data = {
+        "orders": recent.orders_today,
+        "orders_yesterday": recent.orders_yesterday,
+        "revenue": round(rev_today),
+        "revenue_yesterday": round(rev_yest),
+        "profit": round(rev_today * commission),
+        "profit_yesterday": round(rev_yest * commission),
+        "avg_check": _money(recent.avg_today),
+        "avg_check_yesterday": _money(recent.avg_yesterday),
+        "new_customers": customers.new_today,
+        "new_customers_yesterday": customers.new_yesterday,
+    }
+
+    # ── pipeline and order total: one pass over orders ──
+    buckets = []
+    for key, statuses in PIPELINE_STATUSES.items():
+        in_bucket = Order.status.in_(statuses)
+        buckets += [
+            func.count(Order.id).filter(in_bucket).label(f"{key}_count"),
+            func.sum(Order.total_price).filter(in_bucket).label(f"{key}_amount"),
+        ]
+    live = (await session.execute(select(func.count(Order.id).label("total"), *buckets))).one()
+    pipeline = {
+        key: {"count": getattr(live, f"{key}_count"), "amount": _money(getattr(live, f"{key}_amount"))}
+        for key in PIPELINE_STATUSES
+    }
+    pipeline["completed_today"] = {"count": recent.completed_today, "amount": round(rev_today)}
+    pipeline["rejected_today"] = {"count": recent.rejected_today, "amount": _money(recent.rejected_amount)}
+
+    # ── alerts ──
+    # expiring placements (< 7 days)
+    exp_rows = (await session.execute(
+        select(Seller.seller_id, Seller.shop_name, Seller.placement_expired_at).where(
+            Seller.placement_expired_at.isnot(None),
+            Seller.placement_expired_at <= now + timedelta(days=7),
+            Seller.placement_expired_at > now,
+            Seller.deleted_at.is_(None),
+        )
+    )).all()
+    expiring = [
+        {"tg_id": r[0], "shop_name": r[1] or "", "expires_in_days": max(0, (r[2] - now).days)}
+        for r in exp_rows
+    ]
+
+    # exhausted limits
+    exh_rows = (await session.execute(
+        select(Seller.seller_id, Seller.shop_name, Seller.active_orders, Seller.max_orders).where(
+            Seller.max_orders > 0,
+            Seller.active_orders >= Seller.max_orders,
+            Seller.deleted_at.is_(None),
+            Seller.is_blocked == False,
+        )
+    )).all()
+    exhausted = [
+        {"tg_id": r[0], "shop_name": r[1] or "", "used": r[2] or 0, "limit": r[3] or 0}
+        for r in exh_rows
+    ]
+
+    # stuck orders (pending > 30 min)
+    stuck_rows = (await session.execute(
+        select(Order.id, Order.total_price, Order.created_at, Seller.shop_name, Order.seller_id)
+        .join(Seller, Seller.seller_id == Order.seller_id)
+        .where(and_(Order.status == "pending", Order.created_at < now - timedelta(minutes=30)))
+        .order_by(Order.created_at)
+        .limit(10)
+    )).all()
+    stuck = [
+        {
+            "order_id": r[0],
+            "seller_id": r[4],
+            "seller_name": r[3] or "",
+            "minutes_pending": int((now - r[2]).total_seconds() / 60),
+            "amount": _money(r[1]),
+        }
+        for r in stuck_rows
+    ]
+
+    # ── weekly revenue (completed orders only) ──
+    weekly_rows = (await session.execute(
+        select(
+            func.date(Order.created_at).label("d"),
+            func.count(Order.id).label("orders"),
+            func.coalesce(func.sum(Order.total_price), 0).label("revenue"),
+        )
+        .where(and_(Order.created_at >= week_ago, is_completed))
+        .group_by(func.date(Order.created_at))
+        .order_by(literal_column("d"))
+    )).all()
+    weekly_revenue = [
+        {"date": str(r.d), "revenue": _money(r.revenue), "orders": r.orders}
+        for r in weekly_rows
+    ]
+
+    # ── top sellers today (completed orders only) ──
+    top_rows = (await session.execute(
+        select(
+            Seller.seller_id,
+            Seller.shop_name,
+            func.count(Order.id).label("orders"),
+            func.coalesce(func.sum(Order.total_price), 0).label("revenue"),
+            Seller.max_orders,
+            Seller.active_orders,
+        )
+        .join(Order, Order.seller_id == Seller.seller_id)
+        .where(and_(is_today, is_completed))
+        .group_by(Seller.seller_id, Seller.shop_name, Seller.max_orders, Seller.active_orders)
+        .order_by(func.count(Order.id).desc())
+        .limit(5)
+    )).all()
+    top_sellers = [
+        {
+            "tg_id": r.seller_id,
+            "shop_name": r.shop_name or "",
+            "orders": r.orders,
+            "revenue": _money(r.revenue),
+            "load_pct": round((r.active_orders or 0) / r.max_orders * 100) if r.max_orders else 0,
+        }
+        for r in top_rows
+    ]
+
+    total_sellers = (await session.execute(
+        select(func.count(Seller.seller_id)).where(Seller.deleted_at.is_(None))
+    )).scalar() or 0
+
+    return {
+        "today": today_data,
+        "pipeline": pipeline,
+        "alerts": {
+            "expiring_placements": expiring,
+            "exhausted_limits": exhausted,
+            "stuck_orders": stuck,
+        },
+        "weekly_revenue": weekly_revenue,
+        "top_sellers_today": top_sellers,
+        "totals": {"sellers": total_sellers, "buyers": customers.total, "orders": live.total},
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+async def refresh_admin_dashboard(session: AsyncSession, cache: CacheService) -> Dict[str, Any]:
+    """Rebuild the shared snapshot (called by the worker)."""
+    snapshot = await build_admin_dashboard(session)
+    await cache.set(SNAPSHOT_KEY, snapshot, namespace=CacheService.NS_ADMIN_DASHBOARD)
+    return snapshot
+
+
+async def get_admin_dashboard_snapshot(session: AsyncSession, cache: CacheService) -> Dict[str, Any]:
+    """Current snapshot; rebuilt here (one process at a time) only if it has expired."""
+    return await cache.get_or_set(
+        SNAPSHOT_KEY,
+        lambda: build_admin_dashboard(session),
+        namespace=CacheService.NS_ADMIN_DASHBOARD,
+    )
@@ -1,14 +1,27 @@
-"""Analytics service — record page views and query visitor statistics."""
-from datetime import date, datetime, time, timedelta
-from typing import Optional, List, Dict, Any
+"""Analytics service — record page views and query visitor statistics.
+
+daily_stats is maintained incrementally: rollup_page_views folds only the
+page_views above a persisted id watermark into the view counters and into
+per-day HyperLogLog sketches of session_ids (daily_visitor_sketches), from
+which unique visitors are estimated. Period and multi-branch unique counts
+merge those sketches instead of running COUNT(DISTINCT) over page_views.
+
+On PostgreSQL page_views is range-partitioned by created_at, one partition
+per Moscow day (page_views_pYYYYMMDD). The worker creates partitions ahead
+of time (ensure_page_view_partitions) and retention drops whole partitions
+instead of DELETEing rows.
+"""
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, List, Dict, Any, Iterable, Set, Tuple
 from zoneinfo import ZoneInfo
 
-from sqlalchemy import select, func, delete, case, cast, Date, literal
-from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy import select, func, delete, update, or_, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.app.core.hll import HyperLogLog
 from backend.app.core.logging import get_logger
-from backend.app.models.analytics import PageView, DailyStats
+from backend.app.models.analytics import PageView, DailyStats, DailyVisitorSketch, AnalyticsWatermark
 from backend.app.models.order import Order
 from backend.app.models.seller import Seller
 from backend.app.models.product import Product
@@ -19,6 +32,52 @@ ALLOWED_EVENTS = {'app_open', 'shop_view', 'product_view'}
 MAX_BATCH = 50
 MSK = ZoneInfo("Europe/Moscow")
 
+WATERMARK_PAGE_VIEWS = "page_views"
+# DailyVisitorSketch.seller_id of the platform-wide sketch (daily_stats uses NULL)
+PLATFORM = 0
+ROLLUP_CHUNK = 10000
+# Younger page_views wait for the next run: a transaction still in flight may
+# commit a lower id after a higher one, and the watermark must not skip it.
+ROLLUP_LAG = timedelta(minutes=2)
+# How far behind the newest folded row a newly loaded row may be dated (the
+# Redis page-view buffer acks events before they are inserted). The scan starts
+# this far before that row's created_at, so PostgreSQL prunes older partitions.
+ROLLUP_SLACK = timedelta(days=7)
+
+PARTITION_DAYS_AHEAD = 14
+# Catches rows no daily partition covers, so inserts never fail; rows there are logged as errors
+DEFAULT_PARTITION = "page_views_default"
+_PARTITION_UPPER = re.compile(r"TO \('([^']+)'\)")
+
+
+def _msk_date(created_at: datetime) -> date:
+    """Moscow calendar day of a naive UTC timestamp."""
+    return created_at.replace(tzinfo=timezone.utc).astimezone(MSK).date()
+
+
+def _msk_day_bounds(target_date: date) -> Tuple[datetime, datetime]:
+    """Moscow day boundaries as naive UTC datetimes (page_views / orders store UTC)."""
+    dt_from = datetime.combine(target_date, time.min, tzinfo=MSK)
+    dt_to = datetime.combine(target_date, time.max, tzinfo=MSK)
+    return (
+        dt_from.astimezone(timezone.utc).replace(tzinfo=None),
+        dt_to.astimezone(timezone.utc).replace(tzinfo=None),
+    )
+
+
+def _partition_name(day: date) -> str:
+    return f"page_views_p{day:%Y%m%d}"
+
+
+def _partition_ddl(day: date) -> str:
+    """CREATE TABLE for the partition holding one Moscow day of page_views."""
+    lower = _msk_day_bounds(day)[0]
+    upper = _msk_day_bounds(day + timedelta(days=1))[0]
+    return (
+        f"CREATE TABLE IF NOT EXISTS {_partition_name(day)} PARTITION OF page_views "
+        f"FOR VALUES FROM ('{lower.isoformat(sep=' ')}') TO ('{upper.isoformat(sep=' ')}')"
+    )
+
 
 def _fill_date_range(by_date: Dict[str, Dict], date_from: date, date_to: date) -> List[Dict]:
     """Fill missing dates with zero entries and add conversion_rate to each day."""
@@ -283,118 +342,180 @@ class AnalyticsService:
         date_to: date,
         seller_id: Optional[int | List[int]] = None,
     ) -> int:
-        """Count truly unique visitors (distinct session_id) across a date range."""
-        dt_from = datetime.combine(date_from, time.min)
-        dt_to = datetime.combine(date_to, time.max)
-        q = select(func.count(func.distinct(PageView.session_id))).where(
-            PageView.created_at >= dt_from,
-            PageView.created_at <= dt_to,
+        """Unique visitors (session_id) across a date range: union of the daily sketches."""
+        if seller_id is None:
+            sellers = [PLATFORM]
+        else:
+            sellers = seller_id if isinstance(seller_id, list) else [seller_id]
+        result = await self.session.execute(
+            select(DailyVisitorSketch.registers).where(
+                DailyVisitorSketch.seller_id.in_(sellers),
+                DailyVisitorSketch.date >= date_from,
+                DailyVisitorSketch.date <= date_to,
+            )
         )
-        if seller_id is not None:
-            if isinstance(seller_id, list):
-                q = q.where(PageView.seller_id.in_(seller_id))
+        merged: Optional[HyperLogLog] = None
+        for (registers,) in result.all():
+            sketch = HyperLogLog.from_bytes(registers)
+            if merged is None:
+                merged = sketch
             else:
-                q = q.where(PageView.seller_id == seller_id)
-        return (await self.session.execute(q)).scalar() or 0
+                merged.merge(sketch)
+        return merged.count() if merged else 0
 
     # ---- Aggregation ----
 
-    async def rollup_daily_stats(self, target_date: date) -> None:
-        """Aggregate page_views for target_date into daily_stats rows.
-
-        Uses Moscow timezone for day boundaries. For platform rows (seller_id IS NULL),
-        deletes and re-inserts to avoid PostgreSQL NULL unique constraint issue.
-        """
-        # Moscow day boundaries converted to UTC for querying page_views
-        dt_from_msk = datetime.combine(target_date, time.min, tzinfo=MSK)
-        dt_to_msk = datetime.combine(target_date, time.max, tzinfo=MSK)
-        dt_from = dt_from_msk.astimezone(ZoneInfo("UTC")).replace(tzinfo=None)
-        dt_to = dt_to_msk.astimezone(ZoneInfo("UTC")).replace(tzinfo=None)
-
-        # Platform-wide stats
-        q = select(
-            func.count(func.distinct(PageView.session_id)).label('unique_visitors'),
-            func.count().label('total_views'),
-            func.count().filter(PageView.event_type == 'shop_view').label('shop_views'),
-            func.count().filter(PageView.event_type == 'product_view').label('product_views'),
-        ).where(PageView.created_at >= dt_from, PageView.created_at <= dt_to)
-
+    async def _daily_stats_rows(
+        self, days: Iterable[date], sellers: Optional[Set[int]] = None,
+    ) -> Dict[Tuple[date, int], DailyStats]:
+        """Existing daily_stats rows keyed by (date, seller_id or PLATFORM); all sellers if sellers is None."""
+        q = select(DailyStats).where(DailyStats.date.in_(list(days))).order_by(DailyStats.id)
+        if sellers is not None:
+            seller_ids = [s for s in sellers if s != PLATFORM]
+            conds = [DailyStats.seller_id.in_(seller_ids)] if seller_ids else []
+            if PLATFORM in sellers:
+                conds.append(DailyStats.seller_id.is_(None))
+            q = q.where(or_(*conds))
         result = await self.session.execute(q)
-        row = result.one()
-
-        # Orders for that day (also using Moscow day boundaries)
-        orders_q = select(func.count()).select_from(Order).where(
-            Order.created_at >= dt_from,
-            Order.created_at <= dt_to,
+        # Latest row wins for legacy duplicate platform rows
+        return {(r.date, r.seller_id or PLATFORM): r for r in result.scalars().all()}
+
+    def _new_daily_stats(self, day: date, seller_id: int) -> DailyStats:
+        row = DailyStats(
+            date=day,
+            seller_id=None if seller_id == PLATFORM else seller_id,
+            unique_visitors=0, total_views=0, shop_views=0, product_views=0, orders_placed=0,
         )
-        orders_count = (await self.session.execute(orders_q)).scalar() or 0
+        self.session.add(row)
+        return row
 
-        # Delete + insert for platform row (seller_id IS NULL)
-        # PostgreSQL NULLs are DISTINCT in unique constraints, so ON CONFLICT won't fire
+    async def _reset_view_rollups(self) -> None:
+        """First run: drop view aggregates for the days still covered by page_views.
+
+        They are rebuilt from watermark 0; older days (page_views purged) keep their values.
+        """
+        first = (await self.session.execute(select(func.min(PageView.created_at)))).scalar()
+        if first is None:
+            return
+        first_day = _msk_date(first)
+        await self.session.execute(delete(DailyVisitorSketch).where(DailyVisitorSketch.date >= first_day))
         await self.session.execute(
-            delete(DailyStats).where(
-                DailyStats.date == target_date,
-                DailyStats.seller_id.is_(None),
-            )
+            update(DailyStats)
+            .where(DailyStats.date >= first_day)
+            .values(unique_visitors=0, total_views=0, shop_views=0, product_views=0)
         )
-        self.session.add(DailyStats(
-            date=target_date,
-            seller_id=None,
-            unique_visitors=row.unique_visitors or 0,
-            total_views=row.total_views or 0,
-            shop_views=row.shop_views or 0,
-            product_views=row.product_views or 0,
-            orders_placed=orders_count,
-        ))
-        await self.session.flush()
 
-        # Per-seller stats (ON CONFLICT works fine here — seller_id is NOT NULL)
-        seller_q = (
-            select(
-                PageView.seller_id,
-                func.count(func.distinct(PageView.session_id)).label('unique_visitors'),
-                func.count().label('total_views'),
-                func.count().filter(PageView.event_type == 'shop_view').label('shop_views'),
-                func.count().filter(PageView.event_type == 'product_view').label('product_views'),
-            )
-            .where(
-                PageView.created_at >= dt_from,
-                PageView.created_at <= dt_to,
-                PageView.seller_id.isnot(None),
+    async def _apply_view_chunk(self, rows) -> None:
+        """Add one chunk of page_views to daily_stats counters and visitor sketches."""
+        counts: Dict[Tuple[date, int], List[int]] = {}  # key -> [total, shop, product]
+        sessions: Dict[Tuple[date, int], Set[str]] = {}
+        for r in rows:
+            day = _msk_date(r.created_at)
+            keys = [(day, PLATFORM)] if r.seller_id is None else [(day, PLATFORM), (day, r.seller_id)]
+            for key in keys:
+                c = counts.setdefault(key, [0, 0, 0])
+                c[0] += 1
+                if r.event_type == 'shop_view':
+                    c[1] += 1
+                elif r.event_type == 'product_view':
+                    c[2] += 1
+                sessions.setdefault(key, set()).add(r.session_id)
+
+        days = {k[0] for k in counts}
+        sellers = {k[1] for k in counts}
+        result = await self.session.execute(
+            select(DailyVisitorSketch).where(
+                DailyVisitorSketch.date.in_(days),
+                DailyVisitorSketch.seller_id.in_(sellers),
             )
-            .group_by(PageView.seller_id)
         )
-        seller_result = await self.session.execute(seller_q)
+        sketches = {(sk.date, sk.seller_id): sk for sk in result.scalars().all()}
+        uniques: Dict[Tuple[date, int], int] = {}
+        for key, session_ids in sessions.items():
+            stored = sketches.get(key)
+            hll = HyperLogLog.from_bytes(stored.registers) if stored else HyperLogLog()
+            hll.update(session_ids)
+            if stored:
+                stored.registers = hll.to_bytes()
+            else:
+                self.session.add(DailyVisitorSketch(date=key[0], seller_id=key[1], registers=hll.to_bytes()))
+            uniques[key] = hll.count()
+
+        stats = await self._daily_stats_rows(days, sellers)
+        for key, (total, shop, product) in counts.items():
+            row = stats.get(key) or self._new_daily_stats(*key)
+            row.total_views = (row.total_views or 0) + total
+            row.shop_views = (row.shop_views or 0) + shop
+            row.product_views = (row.product_views or 0) + product
+            row.unique_visitors = uniques[key]
+        await self.session.flush()
 
-        for sr in seller_result.all():
-            so_q = select(func.count()).select_from(Order).where(
-                Order.created_at >= dt_from,
-                Order.created_at <= dt_to,
-                Order.seller_id == sr.seller_id,
-            )
-            seller_orders = (await self.session.execute(so_q)).scalar() or 0
-
-            stmt = pg_insert(DailyStats).values(
-                date=target_date,
-                seller_id=sr.seller_id,
-                unique_visitors=sr.unique_visitors or 0,
-                total_views=sr.total_views or 0,
-                shop_views=sr.shop_views or 0,
-                product_views=sr.product_views or 0,
-                orders_placed=seller_orders,
-            ).on_conflict_do_update(
-                constraint='uq_daily_stats_date_seller',
-                set_={
-                    'unique_visitors': sr.unique_visitors or 0,
-                    'total_views': sr.total_views or 0,
-                    'shop_views': sr.shop_views or 0,
-                    'product_views': sr.product_views or 0,
-                    'orders_placed': seller_orders,
-                },
-            )
-            await self.session.execute(stmt)
+    async def rollup_page_views(self) -> int:
+        """Fold page_views above the watermark into daily_stats. Returns events processed.
 
-        logger.info("Analytics rollup complete", date=str(target_date))
+        Work is proportional to the number of new events. The watermark is
+        updated in the same transaction as the aggregates; the caller commits.
+
+        Trade-off: the scan is also bounded below by the newest folded
+        created_at minus ROLLUP_LAG and ROLLUP_SLACK, which lets PostgreSQL
+        skip older partitions. An event that sat in the ingest buffer longer
+        than that before being loaded is kept in page_views but never folded.
+        """
+        state = await self.session.get(AnalyticsWatermark, WATERMARK_PAGE_VIEWS)
+        if state is None:
+            state = AnalyticsWatermark(name=WATERMARK_PAGE_VIEWS, last_id=0, last_created_at=None)
+            self.session.add(state)
+            await self._reset_view_rollups()
+        horizon = datetime.utcnow() - ROLLUP_LAG
+        processed = 0
+        while True:
+            query = (
+                select(
+                    PageView.id, PageView.created_at, PageView.seller_id,
+                    PageView.session_id, PageView.event_type,
+                )
+                .where(PageView.id > state.last_id)
+                .order_by(PageView.id)
+                .limit(ROLLUP_CHUNK)
+            )
+            if state.last_created_at is not None:
+                query = query.where(PageView.created_at >= state.last_created_at - ROLLUP_LAG - ROLLUP_SLACK)
+            result = await self.session.execute(query)
+            ready = []
+            for r in result.all():
+                if r.created_at > horizon:
+                    break
+                ready.append(r)
+            if ready:
+                await self._apply_view_chunk(ready)
+                state.last_id = ready[-1].id
+                newest = max(r.created_at for r in ready)
+                if state.last_created_at is None or newest > state.last_created_at:
+                    state.last_created_at = newest
+                processed += len(ready)
+            if len(ready) < ROLLUP_CHUNK:
+                break
+        if processed:
+            logger.info("Analytics rollup: page_views folded", events=processed, watermark=state.last_id)
+        return processed
+
+    async def rollup_order_counts(self, target_date: date) -> None:
+        """Set daily_stats.orders_placed for target_date (Moscow day) from one grouped query."""
+        dt_from, dt_to = _msk_day_bounds(target_date)
+        result = await self.session.execute(
+            select(Order.seller_id, func.count().label('orders'))
+            .where(Order.created_at >= dt_from, Order.created_at <= dt_to)
+            .group_by(Order.seller_id)
+        )
+        per_key = {(target_date, r.seller_id): r.orders for r in result.all() if r.seller_id is not None}
+        per_key[(target_date, PLATFORM)] = sum(per_key.values())
+
+        for key, row in (await self._daily_stats_rows([target_date])).items():
+            row.orders_placed = per_key.pop(key, 0)
+        for key, orders in per_key.items():
+            if orders:
+                self._new_daily_stats(*key).orders_placed = orders
+        await self.session.flush()
 
     async def cleanup_duplicate_platform_rows(self) -> int:
         """Remove duplicate platform rows (seller_id IS NULL) created by the NULL constraint bug.
@@ -439,10 +560,89 @@ class AnalyticsService:
             logger.info("Cleaned up duplicate platform daily_stats rows", deleted=deleted)
         return deleted
 
+    async def _is_partitioned(self) -> bool:
+        if self.session.bind.dialect.name != "postgresql":
+            return False
+        result = await self.session.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass('page_views')")
+        )
+        return result.scalar() == "p"
+
+    async def _page_view_partitions(self) -> List[Tuple[str, Optional[datetime]]]:
+        """(name, upper bound) of every page_views partition."""
+        result = await self.session.execute(
+            text("SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+                 "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = 'page_views'::regclass")
+        )
+        partitions = []
+        for name, bound in result.all():
+            match = _PARTITION_UPPER.search(bound or "")
+            partitions.append((name, datetime.fromisoformat(match.group(1)) if match else None))
+        return partitions
+
+    async def ensure_page_view_partitions(self, days_ahead: int = PARTITION_DAYS_AHEAD) -> int:
+        """Create missing daily page_views partitions through today + days_ahead. Caller commits."""
+        if not await self._is_partitioned():
+            return 0
+        await self.session.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF page_views DEFAULT"))
+        stray = await self._default_partition_days()
+        if stray:
+            # A daily partition cannot be created over rows already in the default one
+            logger.error(
+                "Analytics: page_views rows in the default partition",
+                partition=DEFAULT_PARTITION, days=[d.isoformat() for d in sorted(stray)],
+            )
+        uppers = [upper for _, upper in await self._page_view_partitions() if upper is not None]
+        last_day = datetime.now(MSK).date() + timedelta(days=days_ahead)
+        # Continue right after the last covered day (no gaps), or from today on a bare table
+        day = _msk_date(max(uppers)) if uppers else datetime.now(MSK).date()
+        created = 0
+        while day <= last_day:
+            if day not in stray:
+                await self.session.execute(text(_partition_ddl(day)))
+                created += 1
+            day += timedelta(days=1)
+        if created:
+            logger.info("Analytics: page_views partitions created", count=created)
+        return created
+
+    async def _default_partition_days(self) -> Set[date]:
+        """Moscow days of the rows in the default partition (normally none)."""
+        # Moscow is a whole-hour offset from UTC, so hours map to days exactly
+        result = await self.session.execute(
+            text(f"SELECT DISTINCT date_trunc('hour', created_at) FROM {DEFAULT_PARTITION}")
+        )
+        return {_msk_date(hour) for (hour,) in result.all()}
+
+    async def _drop_page_view_partitions(self, cutoff: datetime) -> int:
+        """Detach and drop partitions lying entirely before cutoff. Returns partitions dropped."""
+        dropped = 0
+        for name, upper in await self._page_view_partitions():
+            if upper is None or upper > cutoff:
+                continue
+            await self.session.execute(text(f'ALTER TABLE page_views DETACH PARTITION "{name}"'))
+            await self.session.execute(text(f'DROP TABLE "{name}"'))
+            dropped += 1
+        if dropped:
+            logger.info("Analytics: old page_views partitions dropped", count=dropped)
+        return dropped
+
     async def cleanup_old_events(self, days_to_keep: int = 90) -> int:
-        """Delete page_views older than days_to_keep. Returns deleted count."""
-        cutoff = datetime.utcnow() - timedelta(days=days_to_keep)
+        """Remove page_views older than days_to_keep (Moscow days). Caller commits.
+
+        Partitioned table: whole partitions are dropped, only a partition
+        straddling the cutoff (the pre-partitioning one) is trimmed with DELETE.
+        Returns rows deleted plus partitions dropped.
+        """
+        cutoff = _msk_day_bounds(datetime.now(MSK).date() - timedelta(days=days_to_keep))[0]
+        dropped = 0
+        if await self._is_partitioned():
+            dropped = await self._drop_page_view_partitions(cutoff)
         result = await self.session.execute(
             delete(PageView).where(PageView.created_at < cutoff)
         )
-        return result.rowcount
+        # Sketches share the raw events' retention (period uniques beyond it were never available)
+        await self.session.execute(
+            delete(DailyVisitorSketch).where(DailyVisitorSketch.date < _msk_date(cutoff))
+        )
+        return (result.rowcount or 0) + dropped
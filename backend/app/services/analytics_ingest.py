@@ -0,0 +1,160 @@
+"""Buffered ingestion of Mini App page views (POST /public/track).
+
+The endpoint does not touch Postgres: each request's batch is appended to
+the Redis stream analytics:page_views as one entry and acknowledged at once.
+The worker (_analytics_drainer) reads the stream in pages of DRAIN_ENTRIES,
+inserts the events with multi-row INSERTs in one transaction, then XDELs the
+entries — at-least-once: a crash between commit and XDEL loads one page twice.
+
+Overload policy:
+- the stream holds at most BUFFER_MAX_ENTRIES entries (the Redis memory
+  budget); while it is full new batches are dropped and counted, the
+  backlog already buffered is kept;
+- when Redis is unreachable the endpoint spills to the old synchronous path
+  (AnalyticsService.record_events) instead of losing the events.
+
+created_at is the time the request was acknowledged, not the time of the
+insert. The drainer is the only writer of back-dated rows and commits each
+page atomically, so the rollup watermark (ROLLUP_LAG) stays safe. Events
+loaded more than ROLLUP_SLACK after the newest folded row's time are not
+folded (see AnalyticsService.rollup_page_views).
+"""
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.logging import get_logger
+from backend.app.core.metrics import analytics_ingest_events_total
+from backend.app.models.analytics import PageView
+from backend.app.services.analytics import ALLOWED_EVENTS, MAX_BATCH, AnalyticsService
+from backend.app.services.cache import CacheService
+
+logger = get_logger(__name__)
+
+STREAM_KEY = "analytics:page_views"
+# ~20k requests of up to MAX_BATCH events (a few MB typical, ~100 MB worst case)
+BUFFER_MAX_ENTRIES = 20000
+DRAIN_ENTRIES = 1000
+INSERT_CHUNK = 1000       # rows per INSERT statement (7 params per row)
+
+# KEYS: stream; ARGV: max entries, payload. Returns 1 if appended, 0 if the buffer is full.
+_APPEND = """
+if redis.call('XLEN', KEYS[1]) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('XADD', KEYS[1], '*', 'd', ARGV[2])
+return 1
+"""
+
+
+def _count(result: str, n: int) -> None:
+    if n:
+        analytics_ingest_events_total.labels(result=result).inc(n)
+
+
+def encode_batch(
+    session_id: str,
+    visitor_id: Optional[int],
+    events: List[Dict[str, Any]],
+    ts: Optional[float] = None,
+) -> Tuple[Optional[str], int]:
+    """Validated stream payload for one request. Returns (payload or None, event count)."""
+    kept = [
+        [ev['event_type'], ev.get('seller_id'), ev.get('product_id')]
+        for ev in events[:MAX_BATCH]
+        if ev.get('event_type') in ALLOWED_EVENTS
+    ]
+    if not kept:
+        return None, 0
+    payload = {
+        's': session_id,
+        'v': visitor_id,
+        't': ts if ts is not None else time.time(),
+        'e': kept,
+    }
+    return json.dumps(payload, separators=(',', ':')), len(kept)
+
+
+def decode_batch(payload: bytes) -> List[Dict[str, Any]]:
+    """page_views rows of one stream entry."""
+    data = json.loads(payload)
+    created_at = datetime.utcfromtimestamp(data['t'])
+    return [
+        {
+            'session_id': data['s'][:64],
+            'visitor_id': data['v'],
+            'event_type': event_type,
+            'seller_id': seller_id,
+            'product_id': product_id,
+            'created_at': created_at,
+        }
+        for event_type, seller_id, product_id in data['e']
+    ]
+
+
+async def buffer_page_views(
+    redis: Redis,
+    session_id: str,
+    visitor_id: Optional[int],
+    events: List[Dict[str, Any]],
+) -> int:
+    """Append one request's events to the stream. Returns events buffered (0 if dropped).
+
+    Raises redis errors to the caller, which spills to a direct insert.
+    """
+    payload, count = encode_batch(session_id, visitor_id, events)
+    if payload is None:
+        return 0
+    appended = await redis.eval(_APPEND, 1, STREAM_KEY, BUFFER_MAX_ENTRIES, payload)
+    if not appended:
+        _count("dropped", count)
+        return 0
+    _count("buffered", count)
+    return count
+
+
+async def ingest_page_views(
+    session: AsyncSession,
+    session_id: str,
+    visitor_id: Optional[int],
+    events: List[Dict[str, Any]],
+) -> None:
+    """Buffer one request's events; spill to page_views if Redis is down. Caller commits."""
+    try:
+        await buffer_page_views(await CacheService.get_redis(), session_id, visitor_id, events)
+        return
+    except RedisError as e:
+        logger.warning("Page view buffer unavailable, writing directly", error=str(e))
+    spilled = await AnalyticsService(session).record_events(session_id, visitor_id, events)
+    _count("spilled", spilled)
+
+
+async def load_page_views(session: AsyncSession, payloads: Sequence[bytes]) -> int:
+    """Insert the events of buffered entries with multi-row INSERTs. Caller commits."""
+    rows: List[Dict[str, Any]] = []
+    for payload in payloads:
+        try:
+            rows.extend(decode_batch(payload))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Skipping malformed page view batch", error=str(e))
+    for i in range(0, len(rows), INSERT_CHUNK):
+        await session.execute(insert(PageView).values(rows[i:i + INSERT_CHUNK]))
+    return len(rows)
+
+
+async def drain_page_views(redis: Redis, session: AsyncSession, limit: int = DRAIN_ENTRIES) -> int:
+    """Move up to `limit` oldest stream entries into page_views. Returns entries drained."""
+    entries = await redis.xrange(STREAM_KEY, count=limit)
+    if not entries:
+        return 0
+    loaded = await load_page_views(session, [fields[b'd'] for _, fields in entries if b'd' in fields])
+    await session.commit()
+    await redis.xdel(STREAM_KEY, *[entry_id for entry_id, _ in entries])
+    _count("loaded", loaded)
+    return len(entries)
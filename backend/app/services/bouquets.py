@@ -2,92 +2,135 @@
 from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import select, delete, func
+from sqlalchemy import select, delete, func, case, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from backend.app.models.crm import Bouquet, BouquetItem, Flower, Reception, ReceptionItem
 
 
-async def check_bouquet_stock(
-    session: AsyncSession, seller_id: int, bouquet_id: int, order_quantity: int
-) -> Optional[str]:
-    """Return error message if insufficient stock for bouquet * order_quantity, else None."""
+async def _bouquet_flower_needs(
+    session: AsyncSession, seller_id: int, bouquet_quantities: Dict[int, int]
+) -> Dict[int, Tuple[int, str]]:
+    """Flowers needed for bouquet_id -> order quantity, in one query: flower_id -> (need, first bouquet name)."""
+    if not bouquet_quantities:
+        return {}
     result = await session.execute(
-        select(Bouquet)
-        .where(Bouquet.id == bouquet_id, Bouquet.seller_id == seller_id)
-        .options(selectinload(Bouquet.bouquet_items))
+        select(BouquetItem.bouquet_id, BouquetItem.flower_id, BouquetItem.quantity, Bouquet.name)
+        .join(Bouquet, Bouquet.id == BouquetItem.bouquet_id)
+        .where(Bouquet.id.in_(list(bouquet_quantities)), Bouquet.seller_id == seller_id)
+        .order_by(BouquetItem.bouquet_id, BouquetItem.id)
     )
-    bouquet = result.scalar_one_or_none()
-    if not bouquet or not bouquet.bouquet_items:
-        return None
-    for bi in bouquet.bouquet_items:
-        need = bi.quantity * order_quantity
+    needs: Dict[int, Tuple[int, str]] = {}
+    for bouquet_id, flower_id, quantity, name in result.all():
+        need = (quantity or 0) * bouquet_quantities[bouquet_id]
         if need <= 0:
             continue
-        sum_result = await session.execute(
-            select(func.coalesce(func.sum(ReceptionItem.remaining_quantity), 0))
-            .join(Reception, ReceptionItem.reception_id == Reception.id)
-            .where(
-                Reception.seller_id == seller_id,
-                ReceptionItem.flower_id == bi.flower_id,
-            )
-        )
-        total = int(sum_result.scalar() or 0)
+        total, first_name = needs.get(flower_id, (0, name))
+        needs[flower_id] = (total + need, first_name)
+    return needs
+
+
+async def check_bouquets_stock(
+    session: AsyncSession, seller_id: int, bouquet_quantities: Dict[int, int]
+) -> Optional[str]:
+    """Return error message if reception stock cannot cover all bouquets of an order, else None.
+
+    bouquet_quantities: bouquet_id -> number of bouquets. Needs of a flower are
+    summed across bouquets; stock is read with one grouped query.
+    """
+    needs = await _bouquet_flower_needs(session, seller_id, bouquet_quantities)
+    if not needs:
+        return None
+    stock = (
+        select(ReceptionItem.flower_id, func.sum(ReceptionItem.remaining_quantity).label("total"))
+        .join(Reception, ReceptionItem.reception_id == Reception.id)
+        .where(Reception.seller_id == seller_id, ReceptionItem.flower_id.in_(list(needs)))
+        .group_by(ReceptionItem.flower_id)
+        .subquery()
+    )
+    result = await session.execute(
+        select(Flower.id, Flower.name, func.coalesce(stock.c.total, 0))
+        .outerjoin(stock, stock.c.flower_id == Flower.id)
+        .where(Flower.id.in_(list(needs)))
+    )
+    found = {flower_id: (name, int(total or 0)) for flower_id, name, total in result.all()}
+    for flower_id, (need, bouquet_name) in needs.items():
+        name, total = found.get(flower_id, (str(flower_id), 0))
         if total < need:
-            flower = await session.get(Flower, bi.flower_id)
-            name = flower.name if flower else str(bi.flower_id)
-            return f"Недостаточно цветов для букета '{bouquet.name}': '{name}' нужно {need}, в наличии {total}"
+            return f"Недостаточно цветов для букета '{bouquet_name}': '{name}' нужно {need}, в наличии {total}"
     return None
 
 
-async def deduct_bouquet_from_receptions(
-    session: AsyncSession,
-    seller_id: int,
-    bouquet_id: int,
-    order_quantity: int,
+async def deduct_bouquets_from_receptions(
+    session: AsyncSession, seller_id: int, bouquet_quantities: Dict[int, int]
 ) -> None:
     """
-    Deduct bouquet composition from reception items (FIFO).
-    Call check_bouquet_stock before this. Updates remaining_quantity, sold_quantity, sold_amount.
+    Deduct the composition of all bouquets of an order from reception items (FIFO).
+    Call check_bouquets_stock before this. Updates remaining_quantity, sold_quantity, sold_amount.
+
+    One UPDATE: a running sum over each flower's lots (oldest arrival first)
+    gives the stock before every lot, and each lot gives
+    min(remaining, need - before) while before < need.
     """
-    result = await session.execute(
-        select(Bouquet)
-        .where(Bouquet.id == bouquet_id, Bouquet.seller_id == seller_id)
-        .options(selectinload(Bouquet.bouquet_items))
-    )
-    bouquet = result.scalar_one_or_none()
-    if not bouquet or not bouquet.bouquet_items:
+    needs = await _bouquet_flower_needs(session, seller_id, bouquet_quantities)
+    if not needs:
         return
-    for bi in bouquet.bouquet_items:
-        need = bi.quantity * order_quantity
-        if need <= 0:
-            continue
-        # Get reception_items for this flower, seller, with remaining > 0, FIFO
-        items_result = await session.execute(
-            select(ReceptionItem)
-            .join(Reception, ReceptionItem.reception_id == Reception.id)
-            .where(
-                Reception.seller_id == seller_id,
-                ReceptionItem.flower_id == bi.flower_id,
-                ReceptionItem.remaining_quantity > 0,
-            )
-            .order_by(ReceptionItem.arrival_date.asc().nullslast(), ReceptionItem.id.asc())
+    need = case({flower_id: n for flower_id, (n, _name) in needs.items()}, value=ReceptionItem.flower_id)
+    before = func.sum(ReceptionItem.remaining_quantity).over(
+        partition_by=ReceptionItem.flower_id,
+        order_by=(ReceptionItem.arrival_date.asc().nullslast(), ReceptionItem.id.asc()),
+    ) - ReceptionItem.remaining_quantity
+    lots = (
+        select(
+            ReceptionItem.id.label("id"),
+            ReceptionItem.remaining_quantity.label("remaining"),
+            need.label("need"),
+            before.label("before"),
+        )
+        .join(Reception, ReceptionItem.reception_id == Reception.id)
+        .where(
+            Reception.seller_id == seller_id,
+            ReceptionItem.flower_id.in_(list(needs)),
+            ReceptionItem.remaining_quantity > 0,
         )
-        items = items_result.scalars().all()
-        for ri in items:
-            if need <= 0:
-                break
-            take = min(need, ri.remaining_quantity)
-            if take <= 0:
-                continue
-            ri.remaining_quantity -= take
-            ri.sold_quantity += take
-            ri.sold_amount += Decimal(str(take)) * ri.price_per_unit
-            need -= take
+        .subquery()
+    )
+    take = case(
+        (lots.c.remaining < lots.c.need - lots.c.before, lots.c.remaining),
+        else_=lots.c.need - lots.c.before,
+    )
+    alloc = select(lots.c.id, take.label("take")).where(lots.c.before < lots.c.need).subquery()
+    await session.execute(
+        update(ReceptionItem)
+        .where(ReceptionItem.id == alloc.c.id)
+        .values(
+            remaining_quantity=ReceptionItem.remaining_quantity - alloc.c.take,
+            sold_quantity=ReceptionItem.sold_quantity + alloc.c.take,
+            sold_amount=ReceptionItem.sold_amount + alloc.c.take * ReceptionItem.price_per_unit,
+        )
+        .execution_options(synchronize_session=False)
+    )
     # No commit here - caller (order service) commits
 
 
+async def check_bouquet_stock(
+    session: AsyncSession, seller_id: int, bouquet_id: int, order_quantity: int
+) -> Optional[str]:
+    """Return error message if insufficient stock for bouquet * order_quantity, else None."""
+    return await check_bouquets_stock(session, seller_id, {bouquet_id: order_quantity})
+
+
+async def deduct_bouquet_from_receptions(
+    session: AsyncSession,
+    seller_id: int,
+    bouquet_id: int,
+    order_quantity: int,
+) -> None:
+    """Deduct one bouquet * order_quantity from reception items (FIFO); see deduct_bouquets_from_receptions."""
+    await deduct_bouquets_from_receptions(session, seller_id, {bouquet_id: order_quantity})
+
+
 async def _flower_stock_and_avg_price(
     session: AsyncSession, seller_id: int
 ) -> Dict[int, Tuple[int, Decimal]]:
@@ -0,0 +1,163 @@
+"""Broadcasts: one message to a large audience (e.g. every subscriber of a seller).
+
+A broadcast is a notification_broadcasts row created by the API; the worker
+(run_pending_broadcasts) streams its recipients by buyer_id in chunks,
+sends each chunk with bounded concurrency through the shared
+OutboxDispatcher (pooled client, per-bot token bucket) and commits the
+cursor and sent/failed/blocked counters after every chunk. A restarted
+worker resumes from the last committed cursor, so at most one chunk is
+sent twice.
+"""
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.logging import get_logger
+from backend.app.models.cart import BuyerFavoriteSeller
+from backend.app.models.notification import NotificationBroadcast
+from backend.app.services.telegram_notify import BOT_BUYER
+from backend.app.services.telegram_outbox import OutboxDispatcher, Delivery, SENT, RETRY, _backoff
+
+logger = get_logger(__name__)
+
+BROADCAST_CHUNK = 500
+BROADCAST_CONCURRENCY = 20
+BROADCAST_ATTEMPTS = 3
+
+AUDIENCE_SELLER_SUBSCRIBERS = "seller_subscribers"
+ACTIVE_STATUSES = ("pending", "running")
+
+
+def _recipients_query(broadcast: NotificationBroadcast, after: Optional[int], limit: int):
+    """Next chunk of recipient chat ids after `after` (keyset on buyer_id)."""
+    if broadcast.audience != AUDIENCE_SELLER_SUBSCRIBERS:
+        raise ValueError(f"Unknown broadcast audience: {broadcast.audience}")
+    query = select(BuyerFavoriteSeller.buyer_id).where(BuyerFavoriteSeller.seller_id == broadcast.seller_id)
+    if after is not None:
+        query = query.where(BuyerFavoriteSeller.buyer_id > after)
+    return query.order_by(BuyerFavoriteSeller.buyer_id).limit(limit)
+
+
+async def get_active_broadcast(session: AsyncSession, seller_id: int) -> Optional[NotificationBroadcast]:
+    result = await session.execute(
+        select(NotificationBroadcast)
+        .where(NotificationBroadcast.seller_id == seller_id, NotificationBroadcast.status.in_(ACTIVE_STATUSES))
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def create_subscriber_broadcast(
+    session: AsyncSession,
+    seller_id: int,
+    text: str,
+    parse_mode: Optional[str] = "HTML",
+) -> Optional[NotificationBroadcast]:
+    """Queue a broadcast to the seller's subscribers. Returns None if there are none. Caller commits."""
+    total = (await session.execute(
+        select(func.count()).select_from(BuyerFavoriteSeller).where(BuyerFavoriteSeller.seller_id == seller_id)
+    )).scalar_one()
+    if not total:
+        return None
+    broadcast = NotificationBroadcast(
+        audience=AUDIENCE_SELLER_SUBSCRIBERS,
+        seller_id=seller_id,
+        bot=BOT_BUYER,
+        text=text,
+        parse_mode=parse_mode,
+        total=total,
+    )
+    session.add(broadcast)
+    await session.flush()
+    return broadcast
+
+
+async def _send(dispatcher: OutboxDispatcher, broadcast: NotificationBroadcast, chat_id: int) -> Delivery:
+    """Send to one recipient, retrying transient errors a few times in place."""
+    for attempt in range(1, BROADCAST_ATTEMPTS + 1):
+        result = await dispatcher.send(
+            broadcast.bot, chat_id, broadcast.text, broadcast.parse_mode, broadcast.reply_markup,
+        )
+        if result.outcome != RETRY or attempt == BROADCAST_ATTEMPTS:
+            return result
+        # On 429 the dispatcher's bucket is already paused for retry_after
+        if result.delay is None:
+            await asyncio.sleep(_backoff(attempt))
+    return result
+
+
+async def run_broadcast(
+    session: AsyncSession,
+    broadcast: NotificationBroadcast,
+    dispatcher: OutboxDispatcher,
+    chunk_size: int = BROADCAST_CHUNK,
+) -> None:
+    """Send (or resume) a broadcast to completion, committing progress after every chunk."""
+    if broadcast.status == "pending":
+        broadcast.status = "running"
+        broadcast.started_at = datetime.utcnow()
+        await session.commit()
+    sem = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+
+    async def _one(chat_id: int) -> Delivery:
+        async with sem:
+            return await _send(dispatcher, broadcast, chat_id)
+
+    while True:
+        result = await session.execute(_recipients_query(broadcast, broadcast.cursor, chunk_size))
+        chat_ids: List[int] = list(result.scalars().all())
+        if not chat_ids:
+            break
+        for delivery in await asyncio.gather(*(_one(c) for c in chat_ids)):
+            if delivery.outcome == SENT:
+                broadcast.sent += 1
+            elif delivery.blocked:
+                broadcast.blocked += 1
+            else:
+                broadcast.failed += 1
+        broadcast.cursor = chat_ids[-1]
+        await session.commit()
+        if len(chat_ids) < chunk_size:
+            break
+
+    broadcast.status = "done"
+    broadcast.finished_at = datetime.utcnow()
+    await session.commit()
+    logger.info(
+        "Broadcast finished",
+        broadcast_id=broadcast.id,
+        seller_id=broadcast.seller_id,
+        sent=broadcast.sent,
+        failed=broadcast.failed,
+        blocked=broadcast.blocked,
+    )
+
+
+async def run_pending_broadcasts(session: AsyncSession, dispatcher: OutboxDispatcher) -> int:
+    """Run queued broadcasts oldest first, resuming interrupted ones. Returns count finished."""
+    result = await session.execute(
+        select(NotificationBroadcast.id)
+        .where(NotificationBroadcast.status.in_(ACTIVE_STATUSES))
+        .order_by(NotificationBroadcast.id)
+    )
+    finished = 0
+    for broadcast_id in result.scalars().all():
+        broadcast = await session.get(NotificationBroadcast, broadcast_id)
+        await run_broadcast(session, broadcast, dispatcher)
+        finished += 1
+    return finished
+
+
+def broadcast_progress(broadcast: NotificationBroadcast) -> dict:
+    """API view of a broadcast."""
+    return {
+        "broadcast_id": broadcast.id,
+        "status": broadcast.status,
+        "total_subscribers": broadcast.total,
+        "sent": broadcast.sent,
+        "failed": broadcast.failed,
+        "blocked": broadcast.blocked,
+    }
@@ -0,0 +1,151 @@
+"""
+Business metrics with bounded cardinality.
+
+Prometheus only gets platform-level counters (orders_created_total,
+orders_completed_total, products_created_total); a seller_id label would
+keep one series per seller in every worker.
+
+Per-seller counts go to an in-process accumulator (seller_counters) that
+every API worker flushes every FLUSH_INTERVAL seconds into one Redis hash per
+Moscow day (HINCRBY, so workers add up). GET /admin/stats/realtime reads
+that hash plus the not yet flushed local deltas.
+
+Durable per-seller history is not kept here: daily_stats.orders_placed and
+seller_daily_sales are recomputed from orders by the worker, so adding
+deltas to them would double count.
+"""
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+
+from backend.app.core.logging import get_logger
+from backend.app.core.metrics import orders_created_total, orders_completed_total, products_created_total
+from backend.app.services.analytics import MSK
+
+logger = get_logger(__name__)
+
+ORDERS_CREATED = "orders_created"
+ORDERS_COMPLETED = "orders_completed"
+PRODUCTS_CREATED = "products_created"
+COUNTERS = (ORDERS_CREATED, ORDERS_COMPLETED, PRODUCTS_CREATED)
+
+DAY_KEY = "bizmetrics:{day}"  # hash: "{seller_id}:{counter}" -> count
+DAY_KEY_TTL = 3 * 86400
+FLUSH_INTERVAL = 15
+
+
+def current_day() -> date:
+    return datetime.now(MSK).date()
+
+
+class SellerCounters:
+    """Per-seller, per-day counter deltas not yet written to Redis."""
+
+    def __init__(self):
+        self._pending: Dict[Tuple[date, int, str], int] = defaultdict(int)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, seller_id: int, counter: str, amount: int = 1, day: Optional[date] = None) -> None:
+        self._pending[(day or current_day(), int(seller_id), counter)] += amount
+
+    def pending(self, day: date, seller_id: Optional[int] = None) -> Dict[int, Dict[str, int]]:
+        """Unflushed deltas of a day as {seller_id: {counter: n}}."""
+        result: Dict[int, Dict[str, int]] = defaultdict(dict)
+        for (d, sid, counter), n in self._pending.items():
+            if d == day and (seller_id is None or sid == seller_id):
+                result[sid][counter] = result[sid].get(counter, 0) + n
+        return result
+
+    def drain(self) -> Dict[Tuple[date, int, str], int]:
+        drained, self._pending = self._pending, defaultdict(int)
+        return drained
+
+    def restore(self, deltas: Dict[Tuple[date, int, str], int]) -> None:
+        """Put back deltas whose flush failed."""
+        for key, n in deltas.items():
+            self._pending[key] += n
+
+
+seller_counters = SellerCounters()
+
+
+def record_order_created(seller_id: int) -> None:
+    orders_created_total.labels(status="pending").inc()
+    seller_counters.add(seller_id, ORDERS_CREATED)
+
+
+def record_order_completed(seller_id: int) -> None:
+    orders_completed_total.inc()
+    seller_counters.add(seller_id, ORDERS_COMPLETED)
+
+
+def record_product_created(seller_id: int) -> None:
+    products_created_total.inc()
+    seller_counters.add(seller_id, PRODUCTS_CREATED)
+
+
+async def flush_seller_counters(redis, counters: SellerCounters = seller_counters) -> int:
+    """Add pending deltas to the Redis day hashes in one pipeline. Returns deltas written."""
+    deltas = counters.drain()
+    if not deltas:
+        return 0
+    try:
+        pipe = redis.pipeline(transaction=False)
+        for day in {d for d, _sid, _c in deltas}:
+            key = DAY_KEY.format(day=day.isoformat())
+            for (d, sid, counter), n in deltas.items():
+                if d == day:
+                    pipe.hincrby(key, f"{sid}:{counter}", n)
+            pipe.expire(key, DAY_KEY_TTL)
+        await pipe.execute()
+    except Exception:
+        counters.restore(deltas)
+        raise
+    return len(deltas)
+
+
+async def get_seller_counts(
+    redis, day: Optional[date] = None, seller_id: Optional[int] = None,
+) -> Dict[int, Dict[str, int]]:
+    """Real-time per-seller counts of a day: flushed totals plus this worker's pending deltas."""
+    day = day or current_day()
+    key = DAY_KEY.format(day=day.isoformat())
+    if seller_id is not None:
+        fields = [f"{seller_id}:{c}" for c in COUNTERS]
+        raw = dict(zip(fields, await redis.hmget(key, fields)))
+    else:
+        raw = await redis.hgetall(key)
+
+    result: Dict[int, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for field, value in raw.items():
+        if value is None:
+            continue
+        field = field.decode() if isinstance(field, bytes) else field
+        sid, counter = field.split(":", 1)
+        result[int(sid)][counter] = int(value)
+    for sid, counts in seller_counters.pending(day, seller_id).items():
+        for counter, n in counts.items():
+            result[sid][counter] += n
+    return dict(result)
+
+
+async def run_seller_counter_flusher():
+    """Flush seller_counters to Redis every FLUSH_INTERVAL. Runs until cancelled (then flushes once more)."""
+    from backend.app.services.cache import CacheService
+
+    try:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await flush_seller_counters(await CacheService.get_redis())
+            except Exception as e:
+                logger.warning("Seller counters flush failed", error=str(e), pending=len(seller_counters))
+    except asyncio.CancelledError:
+        try:
+            await flush_seller_counters(await CacheService.get_redis())
+        except Exception:
+            pass
+        raise
@@ -1,121 +1,420 @@
 """
 Redis Cache Service for caching reference data.
 Provides TTL-based caching for cities, districts, metro stations, and other lookup data.
+
+Keys live in namespaces. Every namespace has a generation counter
+(``cache:gen:{namespace}``) that is baked into its keys
+(``{namespace}:g{gen}:{key}``), so dropping a whole namespace is a single
+INCR — old entries are never read again and expire by TTL. Nothing here
+uses KEYS; delete_pattern (SCAN) remains only as a fallback for keys
+outside namespaces.
+
+Namespaces with ``local_ttl`` are also kept in an in-process L1
+(services/local_cache.py), so hot reference lookups skip Redis entirely.
+Invalidations are published on a pub/sub channel and applied by
+run_invalidation_listener in every worker.
 """
+import asyncio
 import json
-from typing import Optional, Any, List
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional, Any, List, Dict, Callable, Awaitable
 from redis.asyncio import Redis
 
 from backend.app.core.config import REDIS_HOST, REDIS_PORT, REDIS_DB
+from backend.app.core.logging import get_logger
+from backend.app.core.metrics import (
+    current_route,
+    redis_connections_active,
+    redis_operations_total,
+    redis_operation_duration_seconds,
+)
+from backend.app.services.local_cache import local_cache, INVALIDATION_CHANNEL
+
+logger = get_logger(__name__)
+
+try:
+    import msgpack
+except ImportError:
+    # Optional: values fall back to JSON
+    msgpack = None
+
+
+# ----- Codecs -----
+# Each stored value starts with a one-byte codec marker, so a namespace can
+# switch codec without flushing: old values are still decoded by their marker.
+
+_JSON = b"j"
+_MSGPACK = b"m"
+
+
+def encode_value(value: Any, codec: str = "json") -> bytes:
+    """Serialize a value for Redis (msgpack when requested and installed, else JSON)."""
+    if codec == "msgpack" and msgpack is not None:
+        return _MSGPACK + msgpack.packb(value, use_bin_type=True)
+    return _JSON + json.dumps(value, ensure_ascii=False).encode()
+
+
+def decode_value(data: Optional[bytes]) -> Optional[Any]:
+    """Inverse of encode_value. Values without a marker are legacy plain JSON."""
+    if not data:
+        return None
+    if isinstance(data, str):
+        data = data.encode()
+    marker, body = data[:1], data[1:]
+    if marker == _MSGPACK:
+        if msgpack is None:
+            return None  # written by a worker with msgpack; treat as a miss
+        return msgpack.unpackb(body, raw=False)
+    if marker == _JSON:
+        return json.loads(body)
+    return json.loads(data)
+
+
+class InstrumentedRedis(Redis):
+    """Redis client that times every command into the redis_operation_* metrics."""
+
+    async def execute_command(self, *args, **options):
+        operation = str(args[0]).lower() if args else "?"
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return await super().execute_command(*args, **options)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            redis_operation_duration_seconds.labels(operation=operation, route=current_route.get()).observe(
+                time.perf_counter() - start
+            )
+            redis_operations_total.labels(operation=operation, status=status).inc()
+
+
+def export_redis_pool_stats() -> None:
+    """Copy the shared client's in-use connection count into the gauge (called per scrape)."""
+    client = CacheService._redis
+    if client is None:
+        return
+    in_use = getattr(client.connection_pool, "_in_use_connections", ())
+    redis_connections_active.set(len(in_use))
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """TTL policy of a namespace.
+
+    jitter is a fraction of ttl added at random; local_ttl > 0 enables the
+    in-process L1 for the namespace with that TTL.
+    """
+    ttl: int
+    jitter: float = 0.0
+    codec: str = "json"
+    local_ttl: int = 0
+
+    def expire_in(self, ttl: Optional[int] = None) -> int:
+        base = ttl if ttl is not None else self.ttl
+        return base + random.randint(0, int(base * self.jitter))
 
 
 class CacheService:
     """Service for caching operations using Redis."""
-    
+
     _redis: Optional[Redis] = None
-    
+
     # Default TTL values (in seconds)
     TTL_CITIES = 3600          # 1 hour - cities rarely change
     TTL_DISTRICTS = 3600       # 1 hour - districts rarely change
     TTL_METRO = 3600           # 1 hour - metro stations rarely change
     TTL_DEFAULT = 300          # 5 minutes - default for other data
-    
-    # Cache key prefixes
-    KEY_CITIES = "cities:all"
-    KEY_DISTRICTS = "districts:city:{city_id}"
-    KEY_METRO = "metro:district:{district_id}"
-    
+    TTL_SELLER_DETAIL_STATIC = 1800  # 30 minutes - versioned key, invalidated on write
+    TTL_SELLER_DETAIL_STOCK = 120    # 2 minutes - versioned key; TTL bounds bulk-DML and reservation staleness
+    TTL_LOCAL_REFERENCES = 300       # 5 minutes - L1 copy; pub/sub invalidation is the primary path
+    TTL_ADMIN_DASHBOARD = 90         # worker rebuilds every 30s; expiry only matters when it is down
+    TTL_SELLER_AUTH = 60             # bounds how long a block/delete can be missed if invalidation fails
+    TTL_LOCAL_SELLER_AUTH = 10
+
+    # Namespaces
+    NS_CITIES = "cities"
+    NS_DISTRICTS = "districts"
+    NS_METRO = "metro"
+    NS_SELLER_DETAIL = "seller_detail"
+    NS_ADMIN_DASHBOARD = "admin_dashboard"
+    NS_SELLER_AUTH = "seller_auth"
+
+    POLICIES: Dict[str, CachePolicy] = {
+        NS_CITIES: CachePolicy(TTL_CITIES, local_ttl=TTL_LOCAL_REFERENCES),
+        NS_DISTRICTS: CachePolicy(TTL_DISTRICTS, local_ttl=TTL_LOCAL_REFERENCES),
+        NS_METRO: CachePolicy(TTL_METRO, local_ttl=TTL_LOCAL_REFERENCES),
+        NS_SELLER_DETAIL: CachePolicy(TTL_SELLER_DETAIL_STATIC, jitter=0.1, codec="msgpack"),
+        NS_ADMIN_DASHBOARD: CachePolicy(TTL_ADMIN_DASHBOARD),
+        NS_SELLER_AUTH: CachePolicy(TTL_SELLER_AUTH, local_ttl=TTL_LOCAL_SELLER_AUTH),
+    }
+    DEFAULT_POLICY = CachePolicy(TTL_DEFAULT)
+
+    # Cache keys (inside their namespace)
+    KEY_CITIES = "all"
+    KEY_DISTRICTS = "city:{city_id}"
+    KEY_METRO = "district:{district_id}"
+    KEY_SELLER_DETAIL_STATIC = "{seller_id}:static:v{version}"
+    KEY_SELLER_DETAIL_STOCK = "{seller_id}:stock:v{version}"
+    KEY_GENERATION = "cache:gen:{namespace}"
+
+    # Single-flight: how long a recompute lock lives and how long others wait for it
+    LOCK_TTL = 10
+    LOCK_WAIT_STEP = 0.05
+    LOCK_WAIT_STEPS = 40
+    SCAN_BATCH = 500
+    LISTENER_RETRY_DELAY = 1.0
+
+    # In-process coalescing of concurrent misses (key -> pending recompute)
+    _inflight: Dict[str, "asyncio.Future"] = {}
+
     @classmethod
     async def get_redis(cls) -> Redis:
-        """Get or create Redis connection."""
+        """Get or create Redis connection (raw bytes; values go through the codec)."""
         if cls._redis is None:
-            cls._redis = Redis(
+            cls._redis = InstrumentedRedis(
                 host=REDIS_HOST,
                 port=REDIS_PORT,
                 db=REDIS_DB,
-                decode_responses=True
             )
         return cls._redis
-    
+
     @classmethod
     async def close(cls):
         """Close Redis connection."""
         if cls._redis:
             await cls._redis.close()
             cls._redis = None
-    
+
     def __init__(self, redis: Redis):
         self.redis = redis
-    
-    async def get(self, key: str) -> Optional[Any]:
-        """Get value from cache."""
-        data = await self.redis.get(key)
-        if data:
-            return json.loads(data)
-        return None
-    
-    async def set(self, key: str, value: Any, ttl: int = TTL_DEFAULT):
-        """Set value in cache with TTL."""
-        await self.redis.set(key, json.dumps(value, ensure_ascii=False), ex=ttl)
-    
-    async def delete(self, key: str):
+
+    @classmethod
+    def policy(cls, namespace: Optional[str]) -> CachePolicy:
+        return cls.POLICIES.get(namespace, cls.DEFAULT_POLICY)
+
+    # ----- Namespaces -----
+
+    async def namespaced_key(self, namespace: str, key: str) -> str:
+        """Full Redis key for key inside namespace at its current generation."""
+        gen = await self.redis.get(self.KEY_GENERATION.format(namespace=namespace))
+        return f"{namespace}:g{int(gen or 0)}:{key}"
+
+    async def invalidate_namespace(self, namespace: str) -> int:
+        """Drop every key of a namespace in O(1) by bumping its generation."""
+        gen = await self.redis.incr(self.KEY_GENERATION.format(namespace=namespace))
+        await self._invalidate_local(namespace)
+        return gen
+
+    async def _invalidate_local(self, namespace: str, key: Optional[str] = None):
+        """Drop L1 entries here and tell the other workers to do the same."""
+        if not self.policy(namespace).local_ttl:
+            return
+        local_cache.invalidate(namespace, key)
+        await self.redis.publish(INVALIDATION_CHANNEL, local_cache.invalidation_message(namespace, key))
+
+    @classmethod
+    async def run_invalidation_listener(cls):
+        """Apply L1 invalidations published by other workers. Runs until cancelled.
+
+        After a reconnect the L1 is flushed, since messages may have been missed.
+        """
+        while True:
+            pubsub = None
+            try:
+                redis = await cls.get_redis()
+                pubsub = redis.pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                local_cache.invalidate()
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        local_cache.apply_invalidation(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Cache invalidation listener error", error=str(e))
+                await asyncio.sleep(cls.LISTENER_RETRY_DELAY)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+    # ----- Raw key access -----
+
+    async def get(self, key: str, namespace: Optional[str] = None) -> Optional[Any]:
+        """Get value from cache (L1 first for namespaces with local_ttl)."""
+        if not namespace:
+            return decode_value(await self.redis.get(key))
+        local_ttl = self.policy(namespace).local_ttl
+        if local_ttl:
+            value = local_cache.get(namespace, key)
+            if value is not None:
+                return value
+        value = decode_value(await self.redis.get(await self.namespaced_key(namespace, key)))
+        if local_ttl and value is not None:
+            local_cache.set(namespace, key, value, local_ttl)
+        return value
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        namespace: Optional[str] = None,
+    ):
+        """Set value in cache. TTL and codec come from the namespace policy unless ttl is given."""
+        policy = self.policy(namespace)
+        if namespace and policy.local_ttl:
+            local_cache.set(namespace, key, value, policy.local_ttl)
+        if namespace:
+            key = await self.namespaced_key(namespace, key)
+        await self.redis.set(key, encode_value(value, policy.codec), ex=policy.expire_in(ttl))
+
+    async def delete(self, key: str, namespace: Optional[str] = None):
         """Delete value from cache."""
+        if namespace:
+            await self._invalidate_local(namespace, key)
+            key = await self.namespaced_key(namespace, key)
         await self.redis.delete(key)
-    
-    async def delete_pattern(self, pattern: str):
-        """Delete all keys matching pattern."""
-        keys = await self.redis.keys(pattern)
-        if keys:
-            await self.redis.delete(*keys)
-    
+
+    async def get_or_set(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        namespace: Optional[str] = None,
+    ) -> Any:
+        """Read-through cache with single-flight recompute on miss.
+
+        Concurrent misses in this process await one factory call; across
+        processes a short Redis lock (SET NX) lets one worker recompute while
+        the rest poll for the result. TTL and jitter come from the namespace
+        policy so entries written together do not expire together.
+        """
+        policy = self.policy(namespace)
+        if namespace:
+            key = await self.namespaced_key(namespace, key)
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._recompute_locked(key, factory, policy, ttl)
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    async def _recompute_locked(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        policy: CachePolicy,
+        ttl: Optional[int],
+    ) -> Any:
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex.encode()
+        if not await self.redis.set(lock_key, token, nx=True, ex=self.LOCK_TTL):
+            for _ in range(self.LOCK_WAIT_STEPS):
+                await asyncio.sleep(self.LOCK_WAIT_STEP)
+                cached = await self.get(key)
+                if cached is not None:
+                    return cached
+            # Lock holder is slow or gone: compute ourselves rather than fail
+            value = await factory()
+            await self.redis.set(key, encode_value(value, policy.codec), ex=policy.expire_in(ttl))
+            return value
+        try:
+            value = await factory()
+            await self.redis.set(key, encode_value(value, policy.codec), ex=policy.expire_in(ttl))
+            return value
+        finally:
+            if await self.redis.get(lock_key) == token:
+                await self.redis.delete(lock_key)
+
+    async def delete_pattern(self, pattern: str) -> int:
+        """Delete all keys matching pattern (incremental SCAN, never KEYS).
+
+        Fallback for keys outside namespaces; prefer invalidate_namespace.
+        """
+        deleted = 0
+        batch: List[bytes] = []
+        async for key in self.redis.scan_iter(match=pattern, count=self.SCAN_BATCH):
+            batch.append(key)
+            if len(batch) >= self.SCAN_BATCH:
+                deleted += await self.redis.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += await self.redis.unlink(*batch)
+        return deleted
+
     # ----- Convenience methods for reference data -----
-    
+
     async def get_cities(self) -> Optional[List[dict]]:
         """Get cached cities list."""
-        return await self.get(self.KEY_CITIES)
-    
+        return await self.get(self.KEY_CITIES, namespace=self.NS_CITIES)
+
     async def set_cities(self, cities: List[dict]):
         """Cache cities list."""
-        await self.set(self.KEY_CITIES, cities, self.TTL_CITIES)
-    
+        await self.set(self.KEY_CITIES, cities, namespace=self.NS_CITIES)
+
     async def invalidate_cities(self):
         """Invalidate cities cache."""
-        await self.delete(self.KEY_CITIES)
-    
+        await self.invalidate_namespace(self.NS_CITIES)
+
     async def get_districts(self, city_id: int) -> Optional[List[dict]]:
         """Get cached districts list for a city."""
         key = self.KEY_DISTRICTS.format(city_id=city_id)
-        return await self.get(key)
-    
+        return await self.get(key, namespace=self.NS_DISTRICTS)
+
     async def set_districts(self, city_id: int, districts: List[dict]):
         """Cache districts list for a city."""
         key = self.KEY_DISTRICTS.format(city_id=city_id)
-        await self.set(key, districts, self.TTL_DISTRICTS)
-    
+        await self.set(key, districts, namespace=self.NS_DISTRICTS)
+
     async def invalidate_districts(self, city_id: Optional[int] = None):
         """Invalidate districts cache. If city_id is None, invalidate all."""
         if city_id:
-            await self.delete(self.KEY_DISTRICTS.format(city_id=city_id))
+            await self.delete(self.KEY_DISTRICTS.format(city_id=city_id), namespace=self.NS_DISTRICTS)
         else:
-            await self.delete_pattern("districts:city:*")
-    
+            await self.invalidate_namespace(self.NS_DISTRICTS)
+
     async def get_metro(self, district_id: int) -> Optional[List[dict]]:
         """Get cached metro stations for a district."""
         key = self.KEY_METRO.format(district_id=district_id)
-        return await self.get(key)
-    
+        return await self.get(key, namespace=self.NS_METRO)
+
     async def set_metro(self, district_id: int, stations: List[dict]):
         """Cache metro stations for a district."""
         key = self.KEY_METRO.format(district_id=district_id)
-        await self.set(key, stations, self.TTL_METRO)
-    
+        await self.set(key, stations, namespace=self.NS_METRO)
+
     async def invalidate_metro(self, district_id: Optional[int] = None):
         """Invalidate metro cache. If district_id is None, invalidate all."""
         if district_id:
-            await self.delete(self.KEY_METRO.format(district_id=district_id))
+            await self.delete(self.KEY_METRO.format(district_id=district_id), namespace=self.NS_METRO)
         else:
-            await self.delete_pattern("metro:district:*")
-    
+            await self.invalidate_namespace(self.NS_METRO)
+
+    async def invalidate_seller_details(self):
+        """Invalidate every cached public seller page (per-seller keys are versioned by the DB)."""
+        await self.invalidate_namespace(self.NS_SELLER_DETAIL)
+
     async def invalidate_all_references(self):
         """Invalidate all reference data caches."""
         await self.invalidate_cities()
@@ -15,6 +15,8 @@ from backend.app.models.user import User
 from backend.app.services.orders import OrderService, OrderServiceError
 from backend.app.services.sellers import get_preorder_available_dates, normalize_delivery_type_setting
 from backend.app.services.reservations import ReservationService
+from backend.app.services.catalog import refresh_seller_catalog
+from backend.app.services.product_images import photo_variants
 
 
 class CartServiceError(ServiceError):
@@ -96,6 +98,7 @@ class CartService:
                         "is_preorder": getattr(it, "is_preorder", False),
                         "preorder_delivery_date": it.preorder_delivery_date.isoformat() if getattr(it, "preorder_delivery_date", None) else None,
                         "photo_id": _photo_id_for(it.product_id),
+                        "photo_variants": photo_variants(_photo_id_for(it.product_id)),
                         "reserved_at": it.reserved_at.isoformat() if getattr(it, "reserved_at", None) else None,
                     }
                     for it in items
@@ -168,7 +171,7 @@ class CartService:
             await reservation_svc.release_expired_for_buyer(buyer_id)
             # Re-fetch product after cleanup (reserved_quantity may have changed)
             await self.session.refresh(product)
-            available = product.quantity - product.reserved_quantity
+            available = await reservation_svc.available(product)
             if available < 1:
                 raise CartServiceError("Товар закончился", 409)
             if quantity > available:
@@ -209,18 +212,19 @@ class CartService:
             if item:
                 old_qty = item.quantity
                 new_qty = old_qty + quantity
-                available_for_increase = product.quantity - product.reserved_quantity + old_qty
+                available_for_increase = await reservation_svc.available(product) + old_qty
                 if new_qty > available_for_increase:
                     new_qty = available_for_increase
                 delta = new_qty - old_qty
                 if delta > 0:
-                    await reservation_svc.reserve_stock(product_id, delta)
+                    await reservation_svc.reserve_stock(product_id, delta, buyer_id)
                 elif delta < 0:
-                    await reservation_svc.release_stock(product_id, abs(delta))
+                    await reservation_svc.release_stock(product_id, abs(delta), buyer_id)
                 item.quantity = new_qty
                 item.reserved_at = datetime.utcnow()
+                await reservation_svc.refresh_hold(item)
             else:
-                reserved_at = await reservation_svc.reserve_stock(product_id, quantity)
+                reserved_at = await reservation_svc.reserve_stock(product_id, quantity, buyer_id)
                 item = CartItem(
                     buyer_id=buyer_id,
                     seller_id=product.seller_id,
@@ -264,19 +268,21 @@ class CartService:
         old_qty = item.quantity
         if not item.is_preorder:
             # Cap to available stock (current reserved by this item + free)
-            available_for_item = product.quantity - product.reserved_quantity + old_qty
+            available_for_item = await reservation_svc.available(product) + old_qty
             if quantity > available_for_item:
                 quantity = available_for_item
             delta = quantity - old_qty
             if delta > 0:
-                await reservation_svc.reserve_stock(product_id, delta)
+                await reservation_svc.reserve_stock(product_id, delta, buyer_id)
             elif delta < 0:
-                await reservation_svc.release_stock(product_id, abs(delta))
+                await reservation_svc.release_stock(product_id, abs(delta), buyer_id)
             item.reserved_at = datetime.utcnow()  # refresh timer on edit
         else:
             if product.quantity < quantity:
                 quantity = product.quantity
         item.quantity = quantity
+        if not item.is_preorder:
+            await reservation_svc.refresh_hold(item)
         await self.session.flush()
 
     async def remove_item(self, buyer_id: int, product_id: int) -> None:
@@ -578,7 +584,7 @@ class FavoriteSellersService:
 
     async def remove(self, buyer_id: int, seller_id: int) -> None:
         """Remove seller from favorites."""
-        await self.session.execute(
+        result = await self.session.execute(
             delete(BuyerFavoriteSeller).where(
                 and_(
                     BuyerFavoriteSeller.buyer_id == buyer_id,
@@ -586,6 +592,8 @@ class FavoriteSellersService:
                 )
             )
         )
+        if result.rowcount:
+            await refresh_seller_catalog(self.session, [seller_id])
 
     async def get_subscriber_count(self, seller_id: int) -> int:
         """Count subscribers for a seller."""
@@ -892,6 +900,7 @@ class FavoriteProductsService:
                 "price": float(p.price),
                 "photo_id": first_photo_id,
                 "photo_ids": p.photo_ids,
+                "photo_variants": photo_variants(first_photo_id),
                 "quantity": p.quantity,
                 "is_preorder": getattr(p, 'is_preorder', False),
                 "seller_id": seller_id,
@@ -0,0 +1,421 @@
+"""Seller catalog snapshot — keeps seller_catalog_stats in sync with its sources.
+
+The public listing needs, per seller: price range and count of in-stock
+non-addon products, subscriber count, min delivery zone price, effective
+coordinates and a normalized delivery type. Instead of rebuilding three
+GROUP BYs over the whole platform on every request, those values live in
+seller_catalog_stats and are recomputed for the affected sellers only:
+
+- ORM writes are picked up by a Session ``after_flush`` hook
+  (install_catalog_sync), so products, categories, subscriptions,
+  delivery zones, seller geo and metro coordinates need no extra calls;
+- bulk DML (``delete(Product)...``) must call refresh_seller_catalog;
+- rebuild_seller_catalog is a full reconcile for the daily worker.
+
+Seller.working_hours is flattened into seller_open_hours by the same hook,
+so "open now" can be evaluated in SQL (closed_now_clause).
+
+The hook also bumps static_version / stock_version on the snapshot row.
+They are part of the Redis keys of the cached seller detail page
+(GET /public/sellers/{id}), so a write to products, categories, bouquets,
+receptions or seller location invalidates exactly that seller's entries.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, select, delete, update, func, or_, and_, not_, inspect, tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.logging import get_logger
+from backend.app.models.catalog import SellerCatalogStats, SellerOpenHours
+from backend.app.models.cart import BuyerFavoriteSeller
+from backend.app.models.category import Category
+from backend.app.models.crm import Bouquet, BouquetItem, Reception, ReceptionItem, WriteOff
+from backend.app.models.delivery_zone import DeliveryZone
+from backend.app.models.product import Product
+from backend.app.models.seller import Seller, Metro
+
+logger = get_logger(__name__)
+
+REBUILD_CHUNK = 500
+
+# Attributes whose change affects a seller's snapshot row (per model)
+_TRACKED_ATTRS: Dict[type, tuple] = {
+    Product: ("seller_id", "price", "quantity", "is_active", "category_id"),
+    Category: ("seller_id", "is_addon"),
+    DeliveryZone: ("seller_id", "delivery_price", "is_active"),
+    BuyerFavoriteSeller: ("seller_id",),
+    Seller: ("geo_lat", "geo_lon", "metro_id", "delivery_type"),
+}
+
+# Any write to these invalidates the stock part of the seller detail cache
+_STOCK_MODELS = (Product, Category, Bouquet, Reception, WriteOff)
+# ...except updates of these models, which only count if a rendered attribute
+# changed. reserved_quantity is left out on purpose: every cart add/release
+# writes it, and bumping for it would serialize cart traffic on the seller's
+# snapshot row; the available quantity lags by at most TTL_SELLER_DETAIL_STOCK
+_STOCK_ATTRS: Dict[type, tuple] = {
+    Product: (
+        "seller_id", "name", "price", "description", "photo_id", "photo_ids", "is_active",
+        "quantity", "bouquet_id", "is_preorder", "composition", "category_id",
+    ),
+}
+# Seller attributes rendered from joins in the static part of the detail cache
+_STATIC_SELLER_ATTRS = ("city_id", "district_id", "metro_id", "owner_id")
+
+
+def normalize_delivery_type(value: Optional[str]) -> Optional[str]:
+    """Нормализует delivery_type из БД (русский/английский) в enum для публичного API."""
+    if not value or not str(value).strip():
+        return None
+    v = str(value).strip().lower()
+    if v in ("доставка", "delivery"):
+        return "delivery"
+    if v in ("самовывоз", "pickup"):
+        return "pickup"
+    if v in ("доставка и самовывоз", "both"):
+        return "both"
+    return None
+
+
+def _snapshot_query(seller_ids: List[int]):
+    """One SELECT producing snapshot rows for the given sellers."""
+    product_stats = (
+        select(
+            Product.seller_id,
+            func.min(Product.price).label("min_price"),
+            func.max(Product.price).label("max_price"),
+            func.count(Product.id).label("product_count"),
+        )
+        .outerjoin(Category, Product.category_id == Category.id)
+        .where(
+            Product.seller_id.in_(seller_ids),
+            Product.is_active == True,
+            Product.quantity > 0,
+            or_(Product.category_id.is_(None), Category.is_addon == False),
+        )
+        .group_by(Product.seller_id)
+        .subquery()
+    )
+    subscribers = (
+        select(
+            BuyerFavoriteSeller.seller_id,
+            func.count(BuyerFavoriteSeller.id).label("subscriber_count"),
+        )
+        .where(BuyerFavoriteSeller.seller_id.in_(seller_ids))
+        .group_by(BuyerFavoriteSeller.seller_id)
+        .subquery()
+    )
+    zones = (
+        select(
+            DeliveryZone.seller_id,
+            func.min(DeliveryZone.delivery_price).label("min_delivery_price"),
+        )
+        .where(DeliveryZone.seller_id.in_(seller_ids), DeliveryZone.is_active == True)
+        .group_by(DeliveryZone.seller_id)
+        .subquery()
+    )
+    return (
+        select(
+            Seller.seller_id,
+            Seller.delivery_type,
+            product_stats.c.min_price,
+            product_stats.c.max_price,
+            func.coalesce(product_stats.c.product_count, 0).label("product_count"),
+            func.coalesce(subscribers.c.subscriber_count, 0).label("subscriber_count"),
+            zones.c.min_delivery_price,
+            func.coalesce(Seller.geo_lat, Metro.geo_lat).label("geo_lat"),
+            func.coalesce(Seller.geo_lon, Metro.geo_lon).label("geo_lon"),
+        )
+        .outerjoin(Metro, Seller.metro_id == Metro.id)
+        .outerjoin(product_stats, Seller.seller_id == product_stats.c.seller_id)
+        .outerjoin(subscribers, Seller.seller_id == subscribers.c.seller_id)
+        .outerjoin(zones, Seller.seller_id == zones.c.seller_id)
+        .where(Seller.seller_id.in_(seller_ids))
+    )
+
+
+def _upsert(conn, model, rows: List[dict], key: Tuple[str, ...]) -> None:
+    """INSERT ... ON CONFLICT (key) DO UPDATE of the given columns (PostgreSQL / SQLite).
+
+    Concurrent flushes touching the same seller converge instead of failing
+    on the primary key, as a DELETE + INSERT rewrite would.
+    """
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    stmt = dialect_insert(model)
+    columns = [c for c in rows[0] if c not in key]
+    conn.execute(
+        stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={c: stmt.excluded[c] for c in columns},
+        ),
+        rows,
+    )
+
+
+def _refresh(session: Session, seller_ids: Iterable[int]) -> int:
+    """Recompute snapshot rows for seller_ids on the session's connection (sync).
+
+    static_version / stock_version are not in the upsert: existing rows keep them.
+    """
+    ids = sorted({int(s) for s in seller_ids if s is not None})
+    if not ids:
+        return 0
+    conn = session.connection()
+    rows = conn.execute(_snapshot_query(ids)).all()
+    now = datetime.utcnow()
+    if rows:
+        _upsert(
+            conn,
+            SellerCatalogStats,
+            [
+                {
+                    "seller_id": r.seller_id,
+                    "min_price": r.min_price,
+                    "max_price": r.max_price,
+                    "product_count": r.product_count or 0,
+                    "subscriber_count": r.subscriber_count or 0,
+                    "min_delivery_price": r.min_delivery_price,
+                    "geo_lat": r.geo_lat,
+                    "geo_lon": r.geo_lon,
+                    "delivery_type": normalize_delivery_type(r.delivery_type),
+                    "updated_at": now,
+                }
+                for r in rows
+            ],
+            ("seller_id",),
+        )
+    # Sellers gone from the snapshot query (hard-deleted) lose their row
+    gone = set(ids) - {r.seller_id for r in rows}
+    if gone:
+        conn.execute(delete(SellerCatalogStats).where(SellerCatalogStats.seller_id.in_(sorted(gone))))
+    return len(rows)
+
+
+def open_hours_rows(seller_id: int, working_hours: Optional[dict]) -> List[dict]:
+    """Flatten working_hours JSON into seller_open_hours rows (same rules as _is_open_now)."""
+    if not working_hours or not isinstance(working_hours, dict):
+        return []
+    rows = []
+    for weekday in range(7):
+        key = str(weekday)
+        if key not in working_hours:
+            continue
+        day_config = working_hours[key]
+        if day_config is None:
+            rows.append({"seller_id": seller_id, "weekday": weekday, "open_time": None, "close_time": None})
+        elif isinstance(day_config, dict) and day_config.get("open") and day_config.get("close"):
+            rows.append({
+                "seller_id": seller_id,
+                "weekday": weekday,
+                "open_time": str(day_config["open"]),
+                "close_time": str(day_config["close"]),
+            })
+    return rows
+
+
+def closed_now_clause(seller_id_col, now: datetime):
+    """SQL predicate: the seller is closed at `now` (local shop time, aware or naive).
+
+    Mirrors _is_open_now: a day off, or current HH:MM outside [open, close).
+    """
+    hhmm = now.strftime("%H:%M")
+    return (
+        select(SellerOpenHours.seller_id)
+        .where(
+            SellerOpenHours.seller_id == seller_id_col,
+            SellerOpenHours.weekday == now.weekday(),
+            or_(
+                SellerOpenHours.open_time.is_(None),
+                not_(and_(SellerOpenHours.open_time <= hhmm, SellerOpenHours.close_time > hhmm)),
+            ),
+        )
+        .exists()
+    )
+
+
+def _refresh_open_hours(session: Session, seller_ids: Iterable[int]) -> None:
+    """Rewrite seller_open_hours rows for seller_ids from Seller.working_hours (sync)."""
+    ids = sorted({int(s) for s in seller_ids if s is not None})
+    if not ids:
+        return
+    conn = session.connection()
+    result = conn.execute(
+        select(Seller.seller_id, Seller.working_hours).where(Seller.seller_id.in_(ids))
+    )
+    rows = [r for sid, wh in result.all() for r in open_hours_rows(sid, wh)]
+    # Drop weekdays no longer configured, upsert the rest (no DELETE + INSERT race)
+    conn.execute(
+        delete(SellerOpenHours).where(
+            SellerOpenHours.seller_id.in_(ids),
+            tuple_(SellerOpenHours.seller_id, SellerOpenHours.weekday).notin_(
+                [(r["seller_id"], r["weekday"]) for r in rows]
+            ),
+        )
+    )
+    if rows:
+        _upsert(conn, SellerOpenHours, rows, ("seller_id", "weekday"))
+
+
+def _bump_detail_versions(session: Session, static_ids: Set[int], stock_ids: Set[int]) -> None:
+    """Increment detail cache versions (sync). Old Redis entries simply expire."""
+    conn = session.connection()
+    for column, ids in (
+        (SellerCatalogStats.static_version, static_ids),
+        (SellerCatalogStats.stock_version, stock_ids),
+    ):
+        if ids:
+            conn.execute(
+                update(SellerCatalogStats)
+                .where(SellerCatalogStats.seller_id.in_(sorted(ids)))
+                .values({column: column + 1})
+            )
+
+
+def _attr_values(obj, attr: str) -> List:
+    """Current and previous (pre-flush) values of an attribute, without lazy loads."""
+    hist = inspect(obj).attrs[attr].history
+    return [v for v in (*hist.added, *hist.unchanged, *hist.deleted) if v is not None]
+
+
+def _has_changes(obj, attrs: tuple) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+
+def _collect_affected_sellers(session: Session) -> Tuple[Set[int], Set[int], Set[int], Set[int]]:
+    """Seller ids made stale by the pending flush.
+
+    Returns (snapshot, open hours, detail static part, detail stock part).
+    """
+    affected: Set[int] = set()
+    hours: Set[int] = set()
+    static: Set[int] = set()
+    stock: Set[int] = set()
+    metro_ids: Set[int] = set()
+    bouquet_ids: Set[int] = set()
+    reception_ids: Set[int] = set()
+
+    def _child(obj) -> None:
+        if type(obj) is BouquetItem:
+            bouquet_ids.update(_attr_values(obj, "bouquet_id"))
+        elif type(obj) is ReceptionItem:
+            reception_ids.update(_attr_values(obj, "reception_id"))
+
+    for obj in session.new:
+        if type(obj) in _TRACKED_ATTRS:
+            affected.update(_attr_values(obj, "seller_id"))
+        if isinstance(obj, _STOCK_MODELS):
+            stock.update(_attr_values(obj, "seller_id"))
+        if type(obj) in (Seller, Category):
+            static.update(_attr_values(obj, "seller_id"))
+        if type(obj) is Seller:
+            hours.add(obj.seller_id)
+        _child(obj)
+    for obj in session.deleted:
+        if type(obj) in _TRACKED_ATTRS:
+            affected.update(_attr_values(obj, "seller_id"))
+        if isinstance(obj, _STOCK_MODELS):
+            stock.update(_attr_values(obj, "seller_id"))
+        if type(obj) is Category:
+            static.update(_attr_values(obj, "seller_id"))
+        _child(obj)
+    for obj in session.dirty:
+        cls = type(obj)
+        if cls is Metro:
+            if _has_changes(obj, ("geo_lat", "geo_lon", "name", "line_color")):
+                metro_ids.add(obj.id)
+            continue
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        attrs = _TRACKED_ATTRS.get(cls)
+        if attrs and _has_changes(obj, attrs):
+            affected.update(_attr_values(obj, "seller_id"))
+        if isinstance(obj, _STOCK_MODELS):
+            stock_attrs = _STOCK_ATTRS.get(cls)
+            if stock_attrs is None or _has_changes(obj, stock_attrs):
+                stock.update(_attr_values(obj, "seller_id"))
+        if cls is Category or (cls is Seller and _has_changes(obj, _STATIC_SELLER_ATTRS)):
+            static.update(_attr_values(obj, "seller_id"))
+        if cls is Seller and _has_changes(obj, ("working_hours",)):
+            hours.add(obj.seller_id)
+        _child(obj)
+
+    conn = session.connection() if (metro_ids or bouquet_ids or reception_ids) else None
+    if metro_ids:
+        result = conn.execute(select(Seller.seller_id).where(Seller.metro_id.in_(metro_ids)))
+        metro_sellers = {r[0] for r in result.all()}
+        affected |= metro_sellers
+        static |= metro_sellers
+    if bouquet_ids:
+        result = conn.execute(select(Bouquet.seller_id).where(Bouquet.id.in_(bouquet_ids)))
+        stock.update(r[0] for r in result.all())
+    if reception_ids:
+        result = conn.execute(select(Reception.seller_id).where(Reception.id.in_(reception_ids)))
+        stock.update(r[0] for r in result.all())
+    return affected, hours, static, stock
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    affected, hours, static, stock = _collect_affected_sellers(session)
+    if affected:
+        _refresh(session, affected)
+    if hours:
+        _refresh_open_hours(session, hours)
+    if static or stock:
+        _bump_detail_versions(session, static, stock)
+
+
+def install_catalog_sync() -> None:
+    """Register the flush hook on all ORM sessions (idempotent)."""
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
+
+
+async def refresh_seller_catalog(session: AsyncSession, seller_ids: Iterable[int]) -> int:
+    """Recompute snapshot rows for seller_ids. Use after bulk DML the flush hook cannot see.
+
+    Also invalidates the stock part of their cached detail pages.
+    """
+    ids = {int(s) for s in seller_ids if s is not None}
+    await session.flush()
+
+    def _sync(s: Session) -> int:
+        written = _refresh(s, ids)
+        _bump_detail_versions(s, set(), ids)
+        return written
+
+    return await session.run_sync(_sync)
+
+
+async def touch_seller_detail_stock(session: AsyncSession, product_ids: Iterable[int]) -> None:
+    """Bump stock versions of the sellers owning product_ids (after bulk UPDATE of products)."""
+    ids = sorted({int(p) for p in product_ids})
+    if not ids:
+        return
+    await session.execute(
+        update(SellerCatalogStats)
+        .where(SellerCatalogStats.seller_id.in_(select(Product.seller_id).where(Product.id.in_(ids))))
+        .values(stock_version=SellerCatalogStats.stock_version + 1)
+    )
+
+
+async def rebuild_seller_catalog(session: AsyncSession) -> int:
+    """Full reconcile of seller_catalog_stats for every seller, in chunks. Returns rows written."""
+    result = await session.execute(select(Seller.seller_id).order_by(Seller.seller_id))
+    all_ids = [r[0] for r in result.all()]
+    written = 0
+    await session.flush()
+    for i in range(0, len(all_ids), REBUILD_CHUNK):
+        chunk = all_ids[i:i + REBUILD_CHUNK]
+        written += await session.run_sync(lambda s: _refresh(s, chunk))
+        await session.run_sync(lambda s: _refresh_open_hours(s, chunk))
+    # Drop orphans left behind by hard-deleted sellers (no FK cascade on SQLite)
+    for model in (SellerCatalogStats, SellerOpenHours):
+        await session.execute(delete(model).where(model.seller_id.notin_(select(Seller.seller_id))))
+    logger.info("Seller catalog snapshot rebuilt", sellers=written)
+    return written
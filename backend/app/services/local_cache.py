@@ -0,0 +1,89 @@
+"""
+In-process L1 cache in front of Redis (CacheService) for small, hot reference data.
+
+Bounded TTL/LRU map per worker. Entries are invalidated locally right away
+and in other workers through the Redis pub/sub channel
+INVALIDATION_CHANNEL (see CacheService.run_invalidation_listener). If a
+message is lost, local_ttl bounds staleness.
+
+Values are shared between requests as-is; callers must not mutate them.
+"""
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from backend.app.core.metrics import cache_local_requests_total, cache_local_entries
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+class LocalCache:
+    """TTL + LRU cache keyed by (namespace, key)."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _count(self, namespace: str, result: str) -> None:
+        cache_local_requests_total.labels(namespace=namespace, result=result).inc()
+
+    def _gauge(self) -> None:
+        cache_local_entries.set(len(self._data))
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Any]:
+        """Return a live value (and mark it recently used) or None."""
+        entry = self._data.get((namespace, key))
+        if entry is None:
+            self._count(namespace, "miss")
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[(namespace, key)]
+            self._gauge()
+            self._count(namespace, "miss")
+            return None
+        self._data.move_to_end((namespace, key))
+        self._count(namespace, "hit")
+        return value
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: int) -> None:
+        self._data[(namespace, key)] = (time.monotonic() + ttl, value)
+        self._data.move_to_end((namespace, key))
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+        self._gauge()
+
+    def invalidate(self, namespace: Optional[str] = None, key: Optional[Hashable] = None) -> None:
+        """Drop one key, a whole namespace, or everything (namespace=None)."""
+        if namespace is None:
+            self._data.clear()
+        elif key is not None:
+            self._data.pop((namespace, key), None)
+        else:
+            for k in [k for k in self._data if k[0] == namespace]:
+                del self._data[k]
+        self._gauge()
+
+    # ----- Pub/sub message format -----
+
+    @staticmethod
+    def invalidation_message(namespace: str, key: Optional[Hashable] = None) -> str:
+        return json.dumps({"ns": namespace, "key": key})
+
+    def apply_invalidation(self, message: Any) -> None:
+        """Apply a message published by another worker. Unreadable messages flush everything."""
+        try:
+            if isinstance(message, bytes):
+                message = message.decode()
+            payload = json.loads(message)
+            self.invalidate(payload["ns"], payload.get("key"))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self.invalidate()
+
+
+# One per worker process
+local_cache = LocalCache()
@@ -0,0 +1,315 @@
+"""
+Order event bus for the seller and admin panels (server-sent events).
+
+Order transitions (OrderService create/accept/reject/cancel/complete/update_status,
+preorder activation, PaymentService.handle_webhook) call queue_order_event();
+the events are published only after the session commits (after_commit hook,
+registered by install_order_event_hooks at app and worker startup)
+and dropped on rollback, so a client never hears of a change it cannot read.
+
+Publishing an event:
+- XADD to the seller stream orders:events:{seller_id} and to the admin stream
+  (both capped at STREAM_MAXLEN). The entry id is the SSE event id, so a
+  reconnecting client (Last-Event-ID) replays what it missed with XRANGE;
+- PUBLISH on one channel. Every worker holds a single subscription
+  (order_event_hub) and fans events out to its own SSE connections, so an
+  open stream costs no DB queries and no Redis connection of its own.
+"""
+import asyncio
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+CHANNEL = "orders:events"
+STREAM_KEY = "orders:events:{seller_id}"
+ADMIN_STREAM_KEY = "orders:events:admin"
+STREAM_MAXLEN = 1000          # per stream, approximate trimming
+STREAM_TTL = 7 * 86400        # streams of inactive sellers expire
+HEARTBEAT_INTERVAL = 15       # seconds; keeps proxies from closing idle streams
+SUBSCRIBER_QUEUE_SIZE = 100   # events buffered per connection before it falls back to replay
+LISTENER_RETRY_DELAY = 1.0
+CLIENT_RETRY_MS = 3000
+# X-Accel-Buffering: nginx must pass events through as they are written
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+ADMIN_SCOPE = "admin"
+_PENDING = "order_events"     # session.info key: events of the open transaction
+
+
+def seller_scope(seller_id: int) -> str:
+    return f"seller:{seller_id}"
+
+
+def _id_key(event_id: str) -> Tuple[int, int]:
+    ms, _, seq = event_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+# ----- Publishing -----
+
+def queue_order_event(session, order, event_type: str, **extra: Any) -> None:
+    """Queue an event about order for publication when session commits.
+
+    event_type: created | status | payment.
+    """
+    session.info.setdefault(_PENDING, []).append({
+        "type": f"order.{event_type}",
+        "order_id": order.id,
+        "seller_id": order.seller_id,
+        "status": order.status,
+        "payment_status": getattr(order, "payment_status", None),
+        "total_price": float(order.total_price) if order.total_price is not None else None,
+        "is_preorder": bool(getattr(order, "is_preorder", False)),
+        "at": datetime.utcnow().isoformat() + "Z",
+        **extra,
+    })
+
+
+async def publish_order_events(events: List[Dict[str, Any]]) -> None:
+    """Append events to the seller and admin streams, then announce them to all workers."""
+    from backend.app.services.cache import CacheService
+
+    redis = await CacheService.get_redis()
+    pipe = redis.pipeline(transaction=False)
+    for e in events:
+        data = json.dumps(e, ensure_ascii=False)
+        key = STREAM_KEY.format(seller_id=e["seller_id"])
+        pipe.xadd(key, {"data": data}, maxlen=STREAM_MAXLEN, approximate=True)
+        pipe.expire(key, STREAM_TTL)
+        pipe.xadd(ADMIN_STREAM_KEY, {"data": data}, maxlen=STREAM_MAXLEN, approximate=True)
+    results = await pipe.execute()
+
+    pipe = redis.pipeline(transaction=False)
+    for i, e in enumerate(events):
+        seller_id, admin_id = results[3 * i], results[3 * i + 2]
+        pipe.publish(CHANNEL, json.dumps(
+            {"ids": {seller_scope(e["seller_id"]): _text(seller_id), ADMIN_SCOPE: _text(admin_id)}, "event": e},
+            ensure_ascii=False,
+        ))
+    await pipe.execute()
+
+
+_publish_tasks: Set[asyncio.Task] = set()
+
+
+async def _publish_safely(events: List[Dict[str, Any]]) -> None:
+    try:
+        await publish_order_events(events)
+    except Exception as e:
+        # Clients still converge: the panels refetch lists on (re)connect
+        logger.warning("Order events not published", count=len(events), error=str(e))
+
+
+def _publish_after_commit(session):
+    events = session.info.pop(_PENDING, None)
+    if not events:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # sync use outside the app: nobody is listening
+    task = loop.create_task(_publish_safely(events))
+    _publish_tasks.add(task)
+    task.add_done_callback(_publish_tasks.discard)
+
+
+def _drop_after_rollback(session):
+    session.info.pop(_PENDING, None)
+
+
+def install_order_event_hooks() -> None:
+    """Register the commit/rollback hooks publishing queued order events (idempotent)."""
+    if not event.contains(Session, "after_commit", _publish_after_commit):
+        event.listen(Session, "after_commit", _publish_after_commit)
+    if not event.contains(Session, "after_rollback", _drop_after_rollback):
+        event.listen(Session, "after_rollback", _drop_after_rollback)
+
+
+# ----- Fan-out -----
+
+class Subscription:
+    """One SSE connection: events of its scope, buffered until the stream sends them."""
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # Events were lost (full buffer, listener reconnect): replay from the stream
+        self.stale = False
+
+    def offer(self, event_id: str, data: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait((event_id, data))
+        except asyncio.QueueFull:
+            self.stale = True
+
+    def mark_stale(self) -> None:
+        self.stale = True
+        try:
+            self.queue.put_nowait(None)  # wake the stream
+        except asyncio.QueueFull:
+            pass
+
+
+class OrderEventHub:
+    """Per-process fan-out of the events channel to local subscriptions."""
+
+    def __init__(self):
+        self._subscriptions: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, scope: str) -> Subscription:
+        sub = Subscription(scope)
+        self._subscriptions[scope].add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subscriptions.get(sub.scope)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subscriptions[sub.scope]
+
+    def dispatch(self, message) -> None:
+        """Hand one channel message to the subscriptions of its scopes."""
+        try:
+            payload = json.loads(message)
+            ids, data = payload["ids"], payload["event"]
+        except (ValueError, TypeError, KeyError):
+            return
+        for scope, event_id in ids.items():
+            for sub in list(self._subscriptions.get(scope, ())):
+                sub.offer(event_id, data)
+
+    def mark_all_stale(self) -> None:
+        for subs in self._subscriptions.values():
+            for sub in subs:
+                sub.mark_stale()
+
+    async def run(self):
+        """Listen on the events channel. Runs until cancelled.
+
+        After a reconnect every subscription replays from its stream, since
+        messages may have been missed.
+        """
+        from backend.app.services.cache import CacheService
+
+        while True:
+            pubsub = None
+            try:
+                redis = await CacheService.get_redis()
+                pubsub = redis.pubsub()
+                await pubsub.subscribe(CHANNEL)
+                self.mark_all_stale()
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.dispatch(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Order events listener error", error=str(e))
+                await asyncio.sleep(LISTENER_RETRY_DELAY)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+
+order_event_hub = OrderEventHub()
+
+
+# ----- SSE -----
+
+def format_sse(event_id: str, data: Dict[str, Any]) -> str:
+    return f"id: {event_id}\nevent: {data['type']}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _replay(redis, stream_key: str, last_id: str) -> Tuple[List[Tuple[str, Dict[str, Any]]], bool]:
+    """Stream entries after last_id, and whether entries after it were already trimmed (a gap).
+
+    last_id "0-0" means the stream was empty when the client connected: there
+    the gap is any trimming at all (XINFO entries-added above the length).
+    """
+    entries = await redis.xrange(stream_key, min=f"({last_id}", max="+", count=STREAM_MAXLEN)
+    first = await redis.xrange(stream_key, min="-", max="+", count=1)
+    if not first:
+        gap = False
+    elif last_id == "0-0":
+        info = await redis.xinfo_stream(stream_key)
+        gap = int(info.get("entries-added", 0)) > int(info["length"])
+    else:
+        gap = _id_key(_text(first[0][0])) > _id_key(last_id)
+    out = []
+    for entry_id, fields in entries:
+        raw = fields.get(b"data", fields.get("data"))
+        try:
+            out.append((_text(entry_id), json.loads(raw)))
+        except (ValueError, TypeError):
+            continue
+    return out, gap
+
+
+async def stream_order_events(
+    redis, scope: str, stream_key: str, last_event_id: Optional[str] = None,
+    hub: OrderEventHub = order_event_hub,
+) -> AsyncIterator[str]:
+    """SSE body for one client: replay after last_event_id, then live events and heartbeats.
+
+    An ``event: resync`` asks the client to refetch its lists (it was away
+    longer than the stream keeps events).
+    """
+    sub = hub.subscribe(scope)
+    try:
+        yield f"retry: {CLIENT_RETRY_MS}\n\n"
+        last_id = None
+        if last_event_id:
+            try:
+                _id_key(last_event_id)
+                last_id = last_event_id
+            except ValueError:
+                pass
+        if last_id is None:
+            # Start at the stream's current end; earlier events are in the lists the client fetched
+            latest = await redis.xrevrange(stream_key, max="+", min="-", count=1)
+            last_id = _text(latest[0][0]) if latest else "0-0"
+        else:
+            sub.stale = True
+
+        while True:
+            if sub.stale:
+                sub.stale = False
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+                entries, gap = await _replay(redis, stream_key, last_id)
+                if gap:
+                    yield "event: resync\ndata: {}\n\n"
+                for event_id, data in entries:
+                    last_id = event_id
+                    yield format_sse(event_id, data)
+                continue
+            try:
+                item = await asyncio.wait_for(sub.queue.get(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if item is None:
+                continue
+            event_id, data = item
+            if _id_key(event_id) <= _id_key(last_id):
+                continue  # already sent by a replay
+            last_id = event_id
+            yield format_sse(event_id, data)
+    finally:
+        hub.unsubscribe(sub)
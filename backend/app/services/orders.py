@@ -4,8 +4,8 @@ Order service - handles all order-related business logic.
 """
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from typing import Optional, List, Dict, Any
+from sqlalchemy import select, func, and_, or_
+from typing import Optional, List, Dict, Any, Tuple
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, timedelta, date
 from backend.app.core.logging import get_logger
@@ -15,7 +15,7 @@ from backend.app.core.constants import (
     VALID_ORDER_STATUSES, COMPLETED_ORDER_STATUSES,
     STATUSES_REQUIRING_PAYMENT, ZERO, ONE_CENT, PERCENT_BASE,
 )
-from backend.app.models.order import Order
+from backend.app.models.order import Order, OrderItem
 from backend.app.models.seller import Seller
 
 logger = get_logger(__name__)
@@ -24,16 +24,11 @@ from backend.app.models.user import User
 from backend.app.models.loyalty import normalize_phone
 from backend.app.models.crm import Bouquet
 from backend.app.services.sellers import SellerService, normalize_delivery_type, normalize_delivery_type_setting
-from backend.app.services.bouquets import check_bouquet_stock, deduct_bouquet_from_receptions
+from backend.app.services.bouquets import check_bouquets_stock, deduct_bouquets_from_receptions
 from backend.app.services.loyalty import LoyaltyService
-
-# Import metrics
-try:
-    from backend.app.core.metrics import orders_created_total, orders_completed_total
-except ImportError:
-    # Metrics not available (e.g., in tests)
-    orders_created_total = None
-    orders_completed_total = None
+from backend.app.services.business_metrics import record_order_created, record_order_completed
+from backend.app.services.order_events import queue_order_event
+from backend.app.services.sales_cube import SalesCubeService
 
 
 class OrderServiceError(ServiceError):
@@ -96,6 +91,19 @@ class OrderService:
         if seller.is_blocked:
             raise SellerBlockedError(seller_id)
     
+    def _add_order_items(self, order: Order) -> None:
+        """Write the structured order_items lines of a new order (parsed once, at checkout)."""
+        self.session.add_all([
+            OrderItem(
+                order_id=order.id,
+                product_id=item["product_id"],
+                name=item["name"][:255],
+                price=item.get("price"),
+                quantity=item["quantity"],
+            )
+            for item in parse_items_info(order.items_info)
+        ])
+
     async def create_order(
         self,
         buyer_id: int,
@@ -196,13 +204,11 @@ class OrderService:
         )
         self.session.add(order)
         await self.session.flush()
+        self._add_order_items(order)
+        queue_order_event(self.session, order, "created")
 
         # Record metrics
-        if orders_created_total:
-            orders_created_total.labels(
-                seller_id=str(seller_id),
-                status="pending"
-            ).inc()
+        record_order_created(seller_id)
 
         return order
 
@@ -280,12 +286,10 @@ class OrderService:
         )
         self.session.add(order)
         await self.session.flush()
+        self._add_order_items(order)
+        queue_order_event(self.session, order, "created")
 
-        if orders_created_total:
-            orders_created_total.labels(
-                seller_id=str(seller_id),
-                status="pending"
-            ).inc()
+        record_order_created(seller_id)
 
         return order
 
@@ -306,47 +310,53 @@ class OrderService:
         if order.status != "pending":
             raise InvalidOrderStatusError(order_id, order.status, "pending")
 
+        # Seller lock first (same order as cancel_order): accepts of one seller, and with them
+        # the FIFO deduction from its receptions, are serialized
+        seller = await self._get_seller_for_update(order.seller_id)
+
         # Уменьшаем количество товаров при принятии заказа (для предзаказов не списываем — выполнение на дату поставки)
         is_preorder = getattr(order, "is_preorder", False)
         if not is_preorder:
             parsed_items = parse_items_info(order.items_info)
 
             if parsed_items:
+                quantities: Dict[int, int] = {}
                 for item in parsed_items:
-                    product_id = item["product_id"]
-                    quantity_to_reduce = item["quantity"]
-
-                    # Получаем товар с блокировкой для атомарного обновления
-                    product_result = await self.session.execute(
-                        select(Product).where(
-                            Product.id == product_id,
-                            Product.seller_id == order.seller_id
-                        ).with_for_update()
-                    )
-                    product = product_result.scalar_one_or_none()
-
-                    if product:
-                        # Проверяем доступное количество
-                        if product.quantity < quantity_to_reduce:
-                            raise OrderServiceError(
-                                f"Недостаточно товара '{product.name}'. Доступно: {product.quantity}, запрошено: {quantity_to_reduce}",
-                                400
-                            )
-                        # Если товар из букета — проверяем остатки в приёмках и списываем
-                        if getattr(product, "bouquet_id", None):
-                            err = await check_bouquet_stock(
-                                self.session, order.seller_id, product.bouquet_id, quantity_to_reduce
-                            )
-                            if err:
-                                raise OrderServiceError(err, 400)
-                            await deduct_bouquet_from_receptions(
-                                self.session, order.seller_id, product.bouquet_id, quantity_to_reduce
-                            )
-                        # Уменьшаем количество товара
-                        product.quantity -= quantity_to_reduce
-
-        # Lock and update seller counters (для предзаказа pending_requests не увеличивали при создании)
-        seller = await self._get_seller_for_update(order.seller_id)
+                    quantities[item["product_id"]] = quantities.get(item["product_id"], 0) + item["quantity"]
+
+                # Все товары заказа одним запросом с блокировкой (по id — единый порядок блокировок)
+                product_result = await self.session.execute(
+                    select(Product).where(
+                        Product.id.in_(list(quantities)),
+                        Product.seller_id == order.seller_id
+                    ).order_by(Product.id).with_for_update()
+                )
+                products = product_result.scalars().all()
+
+                # Проверяем доступное количество
+                for product in products:
+                    if product.quantity < quantities[product.id]:
+                        raise OrderServiceError(
+                            f"Недостаточно товара '{product.name}'. Доступно: {product.quantity}, запрошено: {quantities[product.id]}",
+                            400
+                        )
+
+                # Товары из букетов — проверяем остатки в приёмках и списываем (FIFO) для всех букетов сразу
+                bouquets: Dict[int, int] = {}
+                for product in products:
+                    if getattr(product, "bouquet_id", None):
+                        bouquets[product.bouquet_id] = bouquets.get(product.bouquet_id, 0) + quantities[product.id]
+                if bouquets:
+                    err = await check_bouquets_stock(self.session, order.seller_id, bouquets)
+                    if err:
+                        raise OrderServiceError(err, 400)
+                    await deduct_bouquets_from_receptions(self.session, order.seller_id, bouquets)
+
+                # Уменьшаем количество товаров
+                for product in products:
+                    product.quantity -= quantities[product.id]
+
+        # Update seller counters (для предзаказа pending_requests не увеличивали при создании)
         dtype = normalize_delivery_type(order.delivery_type)
         if seller and seller.pending_requests > 0 and not is_preorder:
             seller.pending_requests -= 1
@@ -362,6 +372,7 @@ class OrderService:
                 seller.active_pickup_orders = (seller.active_pickup_orders or 0) + 1
 
         order.status = "accepted"
+        queue_order_event(self.session, order, "status", old_status="pending")
 
         return {
             "order_id": order.id,
@@ -404,6 +415,7 @@ class OrderService:
                 seller.pending_pickup_requests = max(0, (seller.pending_pickup_requests or 0) - 1)
 
         order.status = "rejected"
+        queue_order_event(self.session, order, "status", old_status="pending")
 
         return {
             "order_id": order.id,
@@ -490,6 +502,7 @@ class OrderService:
                     points_refunded = float(order.points_used)
 
         order.status = "cancelled"
+        queue_order_event(self.session, order, "status", old_status=old_status)
 
         return {
             "order_id": order.id,
@@ -529,10 +542,11 @@ class OrderService:
         order.status = "done"
         if order.completed_at is None:
             order.completed_at = datetime.utcnow()
+        await SalesCubeService(self.session).record_order(order)
+        queue_order_event(self.session, order, "status", old_status="accepted")
         
         # Record metrics
-        if orders_completed_total:
-            orders_completed_total.labels(seller_id=str(order.seller_id)).inc()
+        record_order_completed(order.seller_id)
 
         return {
             "order_id": order.id,
@@ -583,6 +597,8 @@ class OrderService:
                 )
 
         order.status = new_status
+        if new_status != old_status:
+            queue_order_event(self.session, order, "status", old_status=old_status)
 
         # Handle counter updates when order finishes
         if new_status == "done" and old_status in ["accepted", "assembling", "in_transit", "ready_for_pickup"]:
@@ -600,10 +616,15 @@ class OrderService:
         if new_status == "completed" and order.completed_at is None:
             order.completed_at = datetime.utcnow()
 
+        # Keep the sales cube in step when an order enters or leaves completed statuses
+        if new_status != old_status and (
+            new_status in COMPLETED_ORDER_STATUSES or old_status in COMPLETED_ORDER_STATUSES
+        ):
+            await SalesCubeService(self.session).record_order(order)
+
         # Record metrics when buyer confirms receipt
         if new_status == "completed" and old_status != "completed":
-            if orders_completed_total:
-                orders_completed_total.labels(seller_id=str(order.seller_id)).inc()
+            record_order_completed(order.seller_id)
 
         # Accrue loyalty points when order first reaches done or completed (by buyer phone)
         # Use original_price (before points/preorder discount) so customers aren't
@@ -636,8 +657,17 @@ class OrderService:
         seller_id: int,
         status: Optional[str] = None,
         preorder: Optional[bool] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        limit: Optional[int] = None,
+        before: Optional[Tuple[datetime, int]] = None,
     ) -> List[Dict[str, Any]]:
-        """Get orders for a seller with optional status and preorder filter. status can be comma-separated."""
+        """Get orders for a seller, newest first. status can be comma-separated.
+
+        date_from/date_to are inclusive days of created_at. With limit, pass the
+        (created_at, id) of the last returned order as before to get the next
+        page (keyset: served by the (seller_id, status|is_preorder, created_at) indexes).
+        """
         query = select(Order, User.fio, User.phone).outerjoin(
             User, Order.buyer_id == User.tg_id
         ).where(Order.seller_id == seller_id)
@@ -648,12 +678,42 @@ class OrderService:
                 query = query.where(Order.status.in_(statuses))
         if preorder is not None:
             query = query.where(Order.is_preorder == preorder)
-
-        query = query.order_by(Order.created_at.desc())
+        if date_from:
+            query = query.where(Order.created_at >= datetime.combine(date_from, datetime.min.time()))
+        if date_to:
+            query = query.where(Order.created_at < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+        if before:
+            created_at, order_id = before
+            query = query.where(or_(
+                Order.created_at < created_at,
+                and_(Order.created_at == created_at, Order.id < order_id),
+            ))
+
+        query = query.order_by(Order.created_at.desc(), Order.id.desc())
+        if limit:
+            query = query.limit(limit)
 
         result = await self.session.execute(query)
+        return await self._seller_order_rows(seller_id, result.all())
+
+    async def get_seller_order_changes(
+        self, seller_id: int, since: datetime, limit: int = 200
+    ) -> Tuple[List[Dict[str, Any]], Optional[datetime]]:
+        """Orders of a seller created or changed at/after since, oldest change first,
+        and the updated_at of the last one (None if nothing changed)."""
+        result = await self.session.execute(
+            select(Order, User.fio, User.phone)
+            .outerjoin(User, Order.buyer_id == User.tg_id)
+            .where(Order.seller_id == seller_id, Order.updated_at >= since)
+            .order_by(Order.updated_at, Order.id)
+            .limit(limit)
+        )
         rows = result.all()
+        last_change = rows[-1][0].updated_at if rows else None
+        return await self._seller_order_rows(seller_id, rows), last_change
 
+    async def _seller_order_rows(self, seller_id: int, rows) -> List[Dict[str, Any]]:
+        """Serialize (Order, fio, phone) rows for the seller panel, with loyalty customer_id."""
         # Batch lookup: collect unique phones and find matching loyalty customers
         phones = set()
         for row in rows:
@@ -1041,74 +1101,56 @@ class OrderService:
     async def _extract_top_products(
         self, seller_id, completed_conditions: list,  # seller_id: int | list[int]
     ) -> tuple:
-        """Extract top products and bouquets from items_info."""
-        orders_items_stmt = select(Order.items_info).where(*completed_conditions)
-        orders_items_result = await self.session.execute(orders_items_stmt)
-        product_agg: Dict[int, Dict[str, Any]] = {}
-        for (items_info_str,) in orders_items_result.all():
-            if not items_info_str:
-                continue
-            parsed = parse_items_info(items_info_str)
-            products_in_order: set = set()
-            for item in parsed:
-                product_id = item["product_id"]
-                product_name = item["name"]
-                qty = item["quantity"]
-                if product_id not in product_agg:
-                    product_agg[product_id] = {"product_id": product_id, "product_name": product_name, "quantity_sold": 0, "order_count": 0}
-                product_agg[product_id]["quantity_sold"] += qty
-                products_in_order.add(product_id)
-            for pid in products_in_order:
-                product_agg[pid]["order_count"] += 1
-
-        top_products: List[Dict[str, Any]] = []
-        top_bouquets: List[Dict[str, Any]] = []
-        if product_agg:
-            product_ids = list(product_agg.keys())
-            _prod_filter = Product.seller_id.in_(seller_id) if isinstance(seller_id, list) else (Product.seller_id == seller_id)
-            products_result = await self.session.execute(
-                select(Product.id, Product.bouquet_id).where(
-                    _prod_filter, Product.id.in_(product_ids)
-                )
+        """Top products (with revenue) and bouquets: grouped SQL over order_items of the matching orders."""
+        quantity_sold = func.sum(OrderItem.quantity).label("quantity_sold")
+        order_count = func.count(func.distinct(OrderItem.order_id)).label("order_count")
+        products_stmt = (
+            select(
+                OrderItem.product_id,
+                func.max(OrderItem.name).label("product_name"),
+                quantity_sold,
+                order_count,
+                func.coalesce(func.sum(OrderItem.price * OrderItem.quantity), 0).label("revenue"),
             )
-            product_to_bouquet: Dict[int, Optional[int]] = {row[0]: row[1] for row in products_result.all()}
-            top_products = sorted(
-                [
-                    {
-                        "product_id": p["product_id"],
-                        "product_name": p["product_name"] or f"Товар #{p['product_id']}",
-                        "quantity_sold": p["quantity_sold"],
-                        "order_count": p["order_count"],
-                    }
-                    for p in product_agg.values()
-                ],
-                key=lambda x: (-x["quantity_sold"], -x["order_count"]),
-            )[:10]
-            bouquet_agg: Dict[int, int] = {}
-            for pid, pdata in product_agg.items():
-                bid = product_to_bouquet.get(pid)
-                if bid is not None:
-                    bouquet_agg[bid] = bouquet_agg.get(bid, 0) + pdata["quantity_sold"]
-            if bouquet_agg:
-                bouquet_ids = list(bouquet_agg.keys())
-                _bouq_filter = Bouquet.seller_id.in_(seller_id) if isinstance(seller_id, list) else (Bouquet.seller_id == seller_id)
-                bouquets_result = await self.session.execute(
-                    select(Bouquet.id, Bouquet.name).where(
-                        _bouq_filter, Bouquet.id.in_(bouquet_ids)
-                    )
-                )
-                bouquet_names = {row[0]: row[1] for row in bouquets_result.all()}
-                top_bouquets = sorted(
-                    [
-                        {
-                            "bouquet_id": bid,
-                            "bouquet_name": bouquet_names.get(bid) or f"Букет #{bid}",
-                            "quantity_sold": qty,
-                        }
-                        for bid, qty in bouquet_agg.items()
-                    ],
-                    key=lambda x: -x["quantity_sold"],
-                )[:10]
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(*completed_conditions)
+            .group_by(OrderItem.product_id)
+            .order_by(quantity_sold.desc(), order_count.desc())
+            .limit(10)
+        )
+        top_products = [
+            {
+                "product_id": row.product_id,
+                "product_name": row.product_name or f"Товар #{row.product_id}",
+                "quantity_sold": int(row.quantity_sold or 0),
+                "order_count": row.order_count,
+                "revenue": round(float(row.revenue or 0), 2),
+            }
+            for row in (await self.session.execute(products_stmt)).all()
+        ]
+
+        _prod_filter = Product.seller_id.in_(seller_id) if isinstance(seller_id, list) else (Product.seller_id == seller_id)
+        _bouq_filter = Bouquet.seller_id.in_(seller_id) if isinstance(seller_id, list) else (Bouquet.seller_id == seller_id)
+        bouquet_qty = func.sum(OrderItem.quantity).label("quantity_sold")
+        bouquets_stmt = (
+            select(Product.bouquet_id, func.max(Bouquet.name).label("bouquet_name"), bouquet_qty)
+            .select_from(OrderItem)
+            .join(Order, Order.id == OrderItem.order_id)
+            .join(Product, and_(Product.id == OrderItem.product_id, _prod_filter))
+            .outerjoin(Bouquet, and_(Bouquet.id == Product.bouquet_id, _bouq_filter))
+            .where(*completed_conditions, Product.bouquet_id.isnot(None))
+            .group_by(Product.bouquet_id)
+            .order_by(bouquet_qty.desc())
+            .limit(10)
+        )
+        top_bouquets = [
+            {
+                "bouquet_id": row.bouquet_id,
+                "bouquet_name": row.bouquet_name or f"Букет #{row.bouquet_id}",
+                "quantity_sold": int(row.quantity_sold or 0),
+            }
+            for row in (await self.session.execute(bouquets_stmt)).all()
+        ]
         return top_products, top_bouquets
 
     async def get_seller_stats(
@@ -1201,6 +1243,45 @@ class OrderService:
             },
         }
 
+    async def get_seller_dashboard_stats(
+        self,
+        seller_id,  # int | list[int]
+        day_from: Optional[date] = None,
+        day_to: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        """Seller-web dashboard stats for Moscow days [day_from, day_to] (None = unbounded).
+
+        Sales figures come from the seller_daily_sales cube; order statuses and
+        top products are bounded queries over the same period.
+        """
+        from backend.app.services.analytics import _msk_day_bounds
+
+        stats = await SalesCubeService(self.session).get_sales(seller_id, day_from, day_to)
+
+        date_field = func.coalesce(Order.completed_at, Order.created_at)
+        base_conditions = [Order.seller_id.in_(seller_id) if isinstance(seller_id, list) else (Order.seller_id == seller_id)]
+        if day_from:
+            base_conditions.append(date_field >= _msk_day_bounds(day_from)[0])
+        if day_to:
+            base_conditions.append(date_field < _msk_day_bounds(day_to + timedelta(days=1))[0])
+        completed_conditions = base_conditions + [Order.status.in_(COMPLETED_ORDER_STATUSES)]
+
+        status_stmt = (
+            select(Order.status, func.count(Order.id).label("count"))
+            .where(*base_conditions)
+            .group_by(Order.status)
+        )
+        stats["orders_by_status"] = {
+            row.status: row.count
+            for row in (await self.session.execute(status_stmt)).all()
+        }
+        stats["top_products"], stats["top_bouquets"] = await self._extract_top_products(seller_id, completed_conditions)
+        stats["filters"] = {
+            "date_from": day_from.isoformat() if day_from else None,
+            "date_to": day_to.isoformat() if day_to else None,
+        }
+        return stats
+
     async def get_customer_stats(
         self,
         seller_id,  # int | list[int]
@@ -1229,38 +1310,31 @@ class OrderService:
         period_buyer_ids = {r[0] for r in period_buyer_rows}
         total_customers = len(period_buyer_ids)
 
-        # -- new vs returning: buyers whose FIRST completed order falls in the period --
-        first_order_subq = (
-            select(Order.buyer_id, func.min(date_field).label("first_date"))
-            .where(_seller_filter, Order.status.in_(COMPLETED_ORDER_STATUSES))
-            .group_by(Order.buyer_id)
-            .subquery()
-        )
-        new_buyers_conds = [first_order_subq.c.buyer_id.in_(period_buyer_ids)]
-        if date_from:
-            new_buyers_conds.append(first_order_subq.c.first_date >= date_from)
-        if end_exclusive:
-            new_buyers_conds.append(first_order_subq.c.first_date < end_exclusive)
-        new_buyers_stmt = select(func.count()).select_from(first_order_subq).where(*new_buyers_conds)
-        new_customers = (await self.session.execute(new_buyers_stmt)).scalar() or 0
-        returning_customers = total_customers - new_customers
+        # -- new vs returning: returning buyers had a completed order before the period --
+        returning_ids: set = set()
+        if date_from and period_buyer_ids:
+            returning_stmt = (
+                select(Order.buyer_id)
+                .where(
+                    _seller_filter,
+                    Order.status.in_(COMPLETED_ORDER_STATUSES),
+                    Order.buyer_id.in_(period_buyer_ids),
+                    date_field < date_from,
+                )
+                .group_by(Order.buyer_id)
+            )
+            returning_ids = {r[0] for r in (await self.session.execute(returning_stmt)).all()}
+        returning_customers = len(returning_ids)
+        new_customers = total_customers - returning_customers
 
         # -- repeat purchases: orders from returning customers in the period --
         repeat_orders = 0
-        if returning_customers > 0 and period_buyer_ids:
-            all_new_ids_stmt = (
-                select(first_order_subq.c.buyer_id)
-                .where(*new_buyers_conds)
+        if returning_ids:
+            repeat_stmt = (
+                select(func.count(Order.id))
+                .where(*period_conds, Order.buyer_id.in_(returning_ids))
             )
-            new_ids_rows = (await self.session.execute(all_new_ids_stmt)).all()
-            new_ids = {r[0] for r in new_ids_rows}
-            returning_ids = period_buyer_ids - new_ids
-            if returning_ids:
-                repeat_stmt = (
-                    select(func.count(Order.id))
-                    .where(*period_conds, Order.buyer_id.in_(returning_ids))
-                )
-                repeat_orders = (await self.session.execute(repeat_stmt)).scalar() or 0
+            repeat_orders = (await self.session.execute(repeat_stmt)).scalar() or 0
 
         # -- retention rate: % of prev period buyers who bought in this period --
         retention_rate = 0.0
@@ -1283,19 +1357,8 @@ class OrderService:
                 retained = prev_buyer_ids & period_buyer_ids
                 retention_rate = round(len(retained) / len(prev_buyer_ids) * 100, 1)
 
-        # -- average LTV: total revenue per buyer (all time) --
-        buyer_totals_sq = (
-            select(
-                Order.buyer_id,
-                func.sum(Order.total_price).label("buyer_total"),
-            )
-            .where(_seller_filter, Order.status.in_(COMPLETED_ORDER_STATUSES))
-            .group_by(Order.buyer_id)
-            .subquery()
-        )
-        ltv_stmt = select(func.avg(buyer_totals_sq.c.buyer_total)).select_from(buyer_totals_sq)
-        avg_ltv_raw = (await self.session.execute(ltv_stmt)).scalar()
-        avg_ltv = round(float(avg_ltv_raw or 0), 2)
+        # -- average LTV: total revenue per buyer (all time, from the sales cube) --
+        avg_ltv = await SalesCubeService(self.session).average_ltv(seller_id)
 
         # -- top 5 customers by revenue in period --
         top_stmt = (
@@ -1403,16 +1466,19 @@ class OrderService:
 
         Returns product breakdown with quantities for procurement planning.
         """
-        result = await self.session.execute(
-            select(Order).where(
-                Order.seller_id == seller_id,
-                Order.is_preorder.is_(True),
-                Order.preorder_delivery_date == target_date,
-                Order.status.notin_(["rejected", "cancelled"]),
-            )
-        )
-        orders = list(result.scalars().all())
-        if not orders:
+        conditions = [
+            Order.seller_id == seller_id,
+            Order.is_preorder.is_(True),
+            Order.preorder_delivery_date == target_date,
+            Order.status.notin_(["rejected", "cancelled"]),
+        ]
+        totals = (await self.session.execute(
+            select(
+                func.count(Order.id).label("orders_count"),
+                func.coalesce(func.sum(Order.total_price), 0).label("total_amount"),
+            ).where(*conditions)
+        )).one()
+        if not totals.orders_count:
             return {
                 "date": target_date.isoformat(),
                 "orders_count": 0,
@@ -1420,37 +1486,38 @@ class OrderService:
                 "products": [],
             }
 
-        total_amount = sum(float(o.total_price or 0) for o in orders)
-
-        # Aggregate products
-        product_totals: Dict[int, Dict[str, Any]] = {}
-        for order in orders:
-            for item in parse_items_info(order.items_info):
-                pid = item["product_id"]
-                qty = item["quantity"]
-                if pid not in product_totals:
-                    product_totals[pid] = {"product_id": pid, "name": item["name"], "total_quantity": 0, "order_count": 0}
-                product_totals[pid]["total_quantity"] += qty
-                product_totals[pid]["order_count"] += 1
-
-        # Enrich with bouquet flower breakdown
-        product_ids = list(product_totals.keys())
-        if product_ids:
-            products_result = await self.session.execute(
-                select(Product).where(Product.id.in_(product_ids))
+        # Aggregate products (bouquet_id for the flower breakdown)
+        total_quantity = func.sum(OrderItem.quantity).label("total_quantity")
+        products_result = await self.session.execute(
+            select(
+                OrderItem.product_id,
+                func.max(OrderItem.name).label("name"),
+                total_quantity,
+                func.count(OrderItem.id).label("order_count"),
+                func.max(Product.bouquet_id).label("bouquet_id"),
             )
-            products_map = {p.id: p for p in products_result.scalars().all()}
-            for pid, info in product_totals.items():
-                product = products_map.get(pid)
-                if product and getattr(product, "bouquet_id", None):
-                    info["bouquet_id"] = product.bouquet_id
-
-        products_list = sorted(product_totals.values(), key=lambda x: x["total_quantity"], reverse=True)
+            .join(Order, Order.id == OrderItem.order_id)
+            .outerjoin(Product, Product.id == OrderItem.product_id)
+            .where(*conditions)
+            .group_by(OrderItem.product_id)
+            .order_by(total_quantity.desc())
+        )
+        products_list = []
+        for row in products_result.all():
+            info = {
+                "product_id": row.product_id,
+                "name": row.name,
+                "total_quantity": int(row.total_quantity or 0),
+                "order_count": row.order_count,
+            }
+            if row.bouquet_id:
+                info["bouquet_id"] = row.bouquet_id
+            products_list.append(info)
 
         return {
             "date": target_date.isoformat(),
-            "orders_count": len(orders),
-            "total_amount": round(total_amount, 2),
+            "orders_count": totals.orders_count,
+            "total_amount": round(float(totals.total_amount or 0), 2),
             "products": products_list,
         }
 
@@ -1538,6 +1605,7 @@ async def activate_due_preorders(session: AsyncSession, today: date) -> List[Dic
         try:
             old_status = order.status
             order.status = "assembling"
+            queue_order_event(session, order, "status", old_status=old_status)
             activated.append({
                 "order_id": order.id,
                 "buyer_id": order.buyer_id,
@@ -23,6 +23,7 @@ from backend.app.core.settings import get_settings
 from backend.app.core.logging import get_logger
 from backend.app.core.exceptions import ServiceError
 from backend.app.core.item_parsing import parse_items_info
+from backend.app.services.order_events import queue_order_event
 
 logger = get_logger(__name__)
 
@@ -442,6 +443,7 @@ class PaymentService:
                 order_status=order.status,
             )
             order.payment_status = payment_status
+            queue_order_event(self.session, order, "payment")
             try:
                 await self.refund_payment(order_id)
                 logger.info("Auto-refund initiated", order_id=order_id)
@@ -456,6 +458,8 @@ class PaymentService:
         old_status = order.payment_status
         order.payment_id = payment_id
         order.payment_status = payment_status
+        if payment_status != old_status:
+            queue_order_event(self.session, order, "payment", old_payment_status=old_status)
 
         logger.info(
             "Webhook processed",
@@ -468,7 +472,7 @@ class PaymentService:
 
         # Send notifications on successful payment
         if payment_status == "succeeded" and old_status != "succeeded":
-            # Send Telegram notifications
+            # Queue Telegram notifications (committed with the payment status)
             try:
                 from backend.app.services.telegram_notify import (
                     notify_buyer_payment_succeeded,
@@ -477,18 +481,20 @@ class PaymentService:
                 )
                 if order.buyer_id:
                     await notify_buyer_payment_succeeded(
+                        self.session,
                         buyer_id=order.buyer_id,
                         order_id=order_id,
                         seller_id=order.seller_id,
                     )
                 _chat_id = await resolve_notification_chat_id(self.session, order.seller_id)
                 await notify_seller_payment_received(
+                    self.session,
                     seller_id=_chat_id,
                     order_id=order_id,
                     total_price=float(order.total_price) if order.total_price else 0,
                 )
                 logger.info(
-                    "Payment success notifications sent",
+                    "Payment success notifications queued",
                     order_id=order_id,
                 )
             except Exception as notify_err:
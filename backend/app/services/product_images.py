@@ -0,0 +1,135 @@
+"""
+Product photos: responsive size variants in content-addressed storage.
+
+An uploaded photo is converted once (core/image_pool.py) into square WebP
+variants of PRODUCT_PHOTO_WIDTHS px, plus AVIF when Pillow can encode it,
+and stored under the SHA-256 of the original upload:
+
+    static/uploads/products/<digest>/160.webp, 160.avif, ... 1200.webp, manifest.json
+
+The manifest is written after all images and records the formats and the
+real width of each file (a source smaller than 1200 px yields smaller files).
+Its presence marks a complete set.
+
+The photo_id kept on Product is the largest WebP
+(/static/uploads/products/<digest>/1200.webp), so every existing consumer
+keeps showing the same image. Uploading identical bytes again (the same
+photo for several bouquets, a retried upload) reuses a complete set without
+converting. Files are never deleted, so sharing them between products is safe.
+
+photo_variants() turns such a photo_id into srcset URLs for the API
+payloads; legacy photo_ids (uuid.webp, Telegram file ids) and sets without
+a manifest get None.
+"""
+import asyncio
+import hashlib
+import io
+import json
+import os
+import re
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from PIL import Image
+
+from backend.app.core.image_convert import DEFAULT_QUALITY, avif_supported
+from backend.app.core.image_pool import get_image_pool
+from backend.app.core.settings import get_settings
+
+UPLOAD_DIR = Path(__file__).resolve().parents[2] / "static"
+PRODUCTS_UPLOAD_SUBDIR = Path("uploads") / "products"
+
+PRODUCT_PHOTO_WIDTHS = (160, 400, 800, 1200)
+MAIN_WIDTH = max(PRODUCT_PHOTO_WIDTHS)
+MANIFEST_NAME = "manifest.json"
+
+_PHOTO_ID_RE = re.compile(r"^/static/uploads/products/([0-9a-f]{32})/%d\.webp$" % MAIN_WIDTH)
+
+
+def photo_digest(content: bytes) -> str:
+    """Storage key of an upload: first 128 bits of SHA-256 of the original bytes."""
+    return hashlib.sha256(content).hexdigest()[:32]
+
+
+def _photo_url(digest: str, name: str) -> str:
+    return f"/static/{PRODUCTS_UPLOAD_SUBDIR.as_posix()}/{digest}/{name}"
+
+
+def _write_file(path: Path, content: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+
+def _write_variants(directory: Path, variants: Dict[str, bytes], widths: Sequence[int]) -> None:
+    """Write each file via a temp name + rename, then the manifest: its presence
+    means the whole set is on disk (it is what the dedupe check looks for)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, content in variants.items():
+        _write_file(directory / name, content)
+    manifest = {
+        "formats": [fmt for fmt in ("webp", "avif") if f"{MAIN_WIDTH}.{fmt}" in variants],
+        # Real width per file; the variants are square, and only the header is read
+        "widths": {str(w): Image.open(io.BytesIO(variants[f"{w}.webp"])).width for w in widths},
+    }
+    _write_file(directory / MANIFEST_NAME, json.dumps(manifest).encode())
+
+
+def avif_enabled() -> bool:
+    """AVIF variants are stored when PRODUCT_PHOTO_AVIF is on and Pillow can encode AVIF."""
+    return get_settings().PRODUCT_PHOTO_AVIF and avif_supported()
+
+
+async def store_product_photo(content: bytes, upload_dir: Optional[Path] = None) -> str:
+    """Convert and store an uploaded product photo; returns its photo_id.
+
+    :raises ValueError: not an image / cannot be processed.
+    :raises ImagePoolBusy, ImagePoolError: see ImagePool.run.
+    """
+    root = upload_dir or UPLOAD_DIR
+    digest = photo_digest(content)
+    directory = root / PRODUCTS_UPLOAD_SUBDIR / digest
+    if not await asyncio.to_thread((directory / MANIFEST_NAME).exists):
+        # No manifest: nothing stored yet, or an interrupted write (rewritten in full)
+        variants = await get_image_pool().convert_variants(
+            content,
+            PRODUCT_PHOTO_WIDTHS,
+            quality=DEFAULT_QUALITY,
+            force_square=True,
+            avif=avif_enabled(),
+        )
+        await asyncio.to_thread(_write_variants, directory, variants, PRODUCT_PHOTO_WIDTHS)
+    return _photo_url(digest, f"{MAIN_WIDTH}.webp")
+
+
+@lru_cache(maxsize=4096)
+def _load_manifest(root: Path, digest: str) -> Dict[str, Any]:
+    # Variant sets are immutable once written; a missing manifest raises and is not cached
+    return json.loads((root / PRODUCTS_UPLOAD_SUBDIR / digest / MANIFEST_NAME).read_bytes())
+
+
+def photo_variants(photo_id: Optional[str]) -> Optional[Dict[str, Dict[str, str]]]:
+    """{"webp": {"160": url, ..., "1200": url}, "avif": {...}} for a stored photo_id.
+
+    Keys are the real widths of the files (srcset "w" descriptors). Sizes that
+    came out equal (source smaller than the larger widths) are listed once, by
+    their smallest file. "avif" is present only if those files were generated.
+    None for photo_ids stored otherwise or sets without a manifest.
+    """
+    match = _PHOTO_ID_RE.match(photo_id) if photo_id else None
+    if not match:
+        return None
+    digest = match.group(1)
+    try:
+        manifest = _load_manifest(UPLOAD_DIR, digest)
+    except (OSError, ValueError):
+        return None
+    files: Dict[int, int] = {}
+    for name, real in sorted(manifest["widths"].items(), key=lambda item: int(item[0])):
+        files.setdefault(real, int(name))
+    return {
+        fmt: {str(real): _photo_url(digest, f"{name}.{fmt}") for real, name in files.items()}
+        for fmt in manifest["formats"]
+    }
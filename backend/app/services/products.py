@@ -5,6 +5,8 @@ from typing import Optional
 from backend.app.models.product import Product
 from backend.app.models.cart import CartItem, BuyerFavoriteProduct
 from backend.app.schemas import MAX_PRODUCT_PHOTOS
+from backend.app.services.business_metrics import record_product_created
+from backend.app.services.catalog import refresh_seller_catalog
 
 
 def _normalize_photo_ids(data: dict) -> dict:
@@ -28,6 +30,7 @@ async def create_product_service(session: AsyncSession, data: dict):
     new_product = Product(**data)
     session.add(new_product)
     await session.commit()
+    record_product_created(new_product.seller_id)
     return new_product
 
 async def get_products_by_seller_service(
@@ -81,8 +84,14 @@ async def update_product_service(session: AsyncSession, product_id: int, update_
     return product
 
 async def delete_product_service(session: AsyncSession, product_id: int):
+    seller_id = (await session.execute(
+        select(Product.seller_id).where(Product.id == product_id)
+    )).scalar_one_or_none()
     await session.execute(delete(CartItem).where(CartItem.product_id == product_id))
     await session.execute(delete(BuyerFavoriteProduct).where(BuyerFavoriteProduct.product_id == product_id))
     await session.execute(delete(Product).where(Product.id == product_id))
+    if seller_id is not None:
+        # Bulk DELETE bypasses the flush hook — refresh the catalog snapshot explicitly
+        await refresh_seller_catalog(session, [seller_id])
     await session.commit()
     return True
\ No newline at end of file
@@ -1,19 +1,67 @@
-"""Stock reservation service for 5-minute cart hold."""
+"""Stock reservation service for 5-minute cart hold.
+
+Two backends, selected by settings.RESERVATION_BACKEND:
+- "postgres" (default): products.reserved_quantity under SELECT ... FOR UPDATE;
+- "redis": per-buyer TTL holds in Redis (services/reservations_redis.py),
+  no product row locks; the worker writes totals back to
+  products.reserved_quantity (sync_reserved_quantities). Redis holds are
+  not part of the DB transaction: a hold taken by a rolled-back request
+  expires with its TTL, while releases are queued on the session and
+  applied only after it commits (install_reservation_hooks), so a failed
+  checkout keeps the buyer's holds.
+"""
+import asyncio
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional, Set, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import event, select, update, delete, and_, case
+from sqlalchemy.orm import Session
 
+from backend.app.core.logging import get_logger
 from backend.app.models.cart import CartItem
 from backend.app.models.product import Product
+from backend.app.services.catalog import touch_seller_detail_stock
+
+logger = get_logger(__name__)
 
 RESERVATION_TTL_SECONDS = 420  # 7 minutes
+SWEEP_CHUNK_SIZE = 500  # cart rows released per statement pair in the global sweep
+SYNC_CHUNK_SIZE = 500  # products per write-back statement (redis backend)
+
+BACKEND_POSTGRES = "postgres"
+BACKEND_REDIS = "redis"
+
+
+def _configured_backend() -> str:
+    from backend.app.core.settings import get_settings
+    return get_settings().RESERVATION_BACKEND
 
 
 class ReservationService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, backend: Optional[str] = None):
         self.session = session
+        self.backend = backend or _configured_backend()
+        self._store = None
+
+    async def _redis_store(self):
+        if self._store is None:
+            from backend.app.services.cache import CacheService
+            from backend.app.services.reservations_redis import RedisReservationStore
+            self._store = RedisReservationStore(await CacheService.get_redis(), RESERVATION_TTL_SECONDS)
+        return self._store
+
+    async def _stock(self, product_id: int) -> Optional[int]:
+        """Current products.quantity without a row lock (redis backend)."""
+        result = await self.session.execute(select(Product.quantity).where(Product.id == product_id))
+        return result.scalar_one_or_none()
+
+    async def available(self, product: Product) -> int:
+        """Units of product not held by any cart."""
+        if self.backend == BACKEND_REDIS:
+            totals = await (await self._redis_store()).totals([product.id])
+            return product.quantity - totals[product.id]
+        return product.quantity - product.reserved_quantity
 
     @staticmethod
     def is_expired(reserved_at: Optional[datetime]) -> bool:
@@ -21,13 +69,23 @@ class ReservationService:
             return True
         return (datetime.utcnow() - reserved_at).total_seconds() > RESERVATION_TTL_SECONDS
 
-    async def reserve_stock(self, product_id: int, quantity: int) -> datetime:
+    async def reserve_stock(self, product_id: int, quantity: int, buyer_id: Optional[int] = None) -> datetime:
         """
         Atomically reserve `quantity` units of product.
-        Uses SELECT ... FOR UPDATE on the product row.
+        Uses SELECT ... FOR UPDATE on the product row (postgres) or a Lua
+        script on the buyer's hold (redis; buyer_id required).
         Returns the reserved_at timestamp.
         Raises ValueError if insufficient available stock.
         """
+        if self.backend == BACKEND_REDIS:
+            stock = await self._stock(product_id)
+            if stock is None:
+                raise ValueError("Product not found")
+            ok, available = await (await self._redis_store()).reserve(product_id, buyer_id, quantity, stock)
+            if not ok:
+                raise ValueError(f"Недостаточно товара. Доступно: {max(0, available)}")
+            return datetime.utcnow()
+
         result = await self.session.execute(
             select(Product).where(Product.id == product_id).with_for_update()
         )
@@ -42,8 +100,14 @@ class ReservationService:
         product.reserved_quantity += quantity
         return datetime.utcnow()
 
-    async def release_stock(self, product_id: int, quantity: int) -> None:
+    async def release_stock(self, product_id: int, quantity: int, buyer_id: Optional[int] = None) -> None:
         """Release `quantity` units back from reservation on product."""
+        if self.backend == BACKEND_REDIS:
+            # Applied after commit: a rolled-back checkout must not lose the hold
+            self.session.sync_session.info.setdefault(_PENDING_RELEASES, []).append(
+                (product_id, buyer_id, quantity)
+            )
+            return
         result = await self.session.execute(
             select(Product).where(Product.id == product_id).with_for_update()
         )
@@ -54,9 +118,18 @@ class ReservationService:
     async def release_reservation(self, cart_item: CartItem) -> None:
         """Release reservation for a specific cart item."""
         if cart_item.reserved_at is not None and not cart_item.is_preorder:
-            await self.release_stock(cart_item.product_id, cart_item.quantity)
+            await self.release_stock(cart_item.product_id, cart_item.quantity, cart_item.buyer_id)
             cart_item.reserved_at = None
 
+    async def refresh_hold(self, cart_item: CartItem) -> None:
+        """Restart the hold timer of a cart item whose reserved_at was just reset."""
+        if self.backend == BACKEND_REDIS and not cart_item.is_preorder:
+            stock = await self._stock(cart_item.product_id)
+            if stock is not None:
+                await (await self._redis_store()).extend(
+                    cart_item.product_id, cart_item.buyer_id, cart_item.quantity, stock
+                )
+
     async def release_expired_for_buyer(self, buyer_id: int) -> int:
         """
         Find buyer's expired cart items, release reservations, delete from cart.
@@ -76,36 +149,71 @@ class ReservationService:
         count = 0
         for item in expired_items:
             if not item.is_preorder:
-                await self.release_stock(item.product_id, item.quantity)
+                await self.release_stock(item.product_id, item.quantity, item.buyer_id)
             await self.session.delete(item)
             count += 1
         if count > 0:
             await self.session.flush()
         return count
 
-    async def release_all_expired(self) -> int:
+    async def release_expired_batch(self, limit: int = SWEEP_CHUNK_SIZE) -> int:
         """
-        Global sweep: find all expired cart reservations and release them.
-        For use by background sweeper task.
-        Returns count of released items.
+        Release up to `limit` expired cart reservations, set-based.
+
+        One DELETE ... RETURNING over rows picked with FOR UPDATE SKIP LOCKED
+        (rows held by a concurrent checkout are left for the next sweep), then
+        one UPDATE of products with the per-product sums. Constant round trips
+        per batch, no per-row product locks. Returns count of released items.
         """
         cutoff = datetime.utcnow() - timedelta(seconds=RESERVATION_TTL_SECONDS)
-        result = await self.session.execute(
-            select(CartItem).where(
-                and_(
-                    CartItem.reserved_at.isnot(None),
-                    CartItem.reserved_at < cutoff,
-                )
+        expired_ids = (
+            select(CartItem.id)
+            .where(
+                CartItem.reserved_at.isnot(None),
+                CartItem.reserved_at < cutoff,
             )
+            .order_by(CartItem.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
         )
-        expired_items = result.scalars().all()
-        count = 0
-        for item in expired_items:
-            if not item.is_preorder:
-                await self.release_stock(item.product_id, item.quantity)
-            await self.session.delete(item)
-            count += 1
-        return count
+        result = await self.session.execute(
+            delete(CartItem)
+            .where(CartItem.id.in_(expired_ids.scalar_subquery()))
+            .returning(CartItem.product_id, CartItem.quantity, CartItem.is_preorder),
+            execution_options={"synchronize_session": False},
+        )
+        released = result.all()
+        if self.backend == BACKEND_REDIS:
+            # Redis holds expire on their own; only the cart rows needed deleting
+            return len(released)
+
+        per_product: dict = {}
+        for product_id, quantity, is_preorder in released:
+            if not is_preorder:
+                per_product[product_id] = per_product.get(product_id, 0) + quantity
+        if per_product:
+            remaining = Product.reserved_quantity - case(per_product, value=Product.id, else_=0)
+            await self.session.execute(
+                update(Product)
+                .where(Product.id.in_(sorted(per_product)))
+                .values(reserved_quantity=case((remaining < 0, 0), else_=remaining)),
+                execution_options={"synchronize_session": False},
+            )
+            await touch_seller_detail_stock(self.session, product_ids=per_product)
+        return len(released)
+
+    async def release_all_expired(self, chunk_size: int = SWEEP_CHUNK_SIZE) -> int:
+        """
+        Global sweep: release all expired cart reservations in one transaction.
+        The background sweeper uses release_expired_batch with a commit per batch instead.
+        Returns count of released items.
+        """
+        total = 0
+        while True:
+            released = await self.release_expired_batch(chunk_size)
+            total += released
+            if released < chunk_size:
+                return total
 
     async def extend_reservation(self, buyer_id: int, product_id: int) -> Optional[datetime]:
         """
@@ -125,8 +233,14 @@ class ReservationService:
         if not item:
             return None
 
+        if self.backend == BACKEND_REDIS:
+            stock = await self._stock(product_id)
+            if stock is None:
+                return None
+            if not await (await self._redis_store()).extend(product_id, buyer_id, item.quantity, stock):
+                return None
         # If already expired, we need to re-reserve the stock
-        if self.is_expired(item.reserved_at):
+        elif self.is_expired(item.reserved_at):
             # Check if stock is still available
             prod_result = await self.session.execute(
                 select(Product).where(Product.id == product_id).with_for_update()
@@ -143,3 +257,95 @@ class ReservationService:
         item.reserved_at = now
         await self.session.flush()
         return now
+
+    async def sync_reserved_quantities(self, chunk_size: int = SYNC_CHUNK_SIZE) -> int:
+        """
+        Redis backend: write live hold totals back to products.reserved_quantity.
+
+        One script call and one UPDATE per chunk of products that have (or just
+        lost) holds, then the same for products whose reserved_quantity is
+        still non-zero without being in the active set (left over from the
+        postgres backend, or from a lost write-back): their live total, usually
+        0, replaces it. Keeps listings and a fallback to the postgres backend
+        consistent. Returns number of products written.
+        """
+        if self.backend != BACKEND_REDIS:
+            return 0
+        store = await self._redis_store()
+        written = 0
+        synced: Set[int] = set()
+
+        async def _write(chunk: List[int]) -> None:
+            nonlocal written
+            totals = await store.totals(chunk)
+            await self.session.execute(
+                update(Product)
+                .where(Product.id.in_(sorted(totals)))
+                .values(reserved_quantity=case(totals, value=Product.id, else_=Product.reserved_quantity)),
+                execution_options={"synchronize_session": False},
+            )
+            await touch_seller_detail_stock(self.session, product_ids=totals)
+            synced.update(totals)
+            written += len(totals)
+
+        async for chunk in store.iter_active(chunk_size):
+            await _write(chunk)
+
+        last_id = 0
+        while True:
+            result = await self.session.execute(
+                select(Product.id)
+                .where(Product.reserved_quantity != 0, Product.id > last_id)
+                .order_by(Product.id)
+                .limit(chunk_size)
+            )
+            ids = list(result.scalars().all())
+            if not ids:
+                return written
+            last_id = ids[-1]
+            stale = [pid for pid in ids if pid not in synced]
+            if stale:
+                await _write(stale)
+
+
+# ----- Deferred Redis releases -----
+
+_PENDING_RELEASES = "reservation_releases"  # session.info key: (product_id, buyer_id, qty)
+_release_tasks: Set[asyncio.Task] = set()
+
+
+async def _apply_releases(releases: List[Tuple[int, int, int]]) -> None:
+    from backend.app.services.cache import CacheService
+    from backend.app.services.reservations_redis import RedisReservationStore
+    try:
+        store = RedisReservationStore(await CacheService.get_redis(), RESERVATION_TTL_SECONDS)
+        for product_id, buyer_id, quantity in releases:
+            await store.release(product_id, buyer_id, quantity)
+    except Exception as e:
+        # The holds expire with their TTL
+        logger.warning("Reservation release failed", count=len(releases), error=str(e))
+
+
+def _release_after_commit(session):
+    releases = session.info.pop(_PENDING_RELEASES, None)
+    if not releases:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # sync use outside the app: holds expire by TTL
+    task = loop.create_task(_apply_releases(releases))
+    _release_tasks.add(task)
+    task.add_done_callback(_release_tasks.discard)
+
+
+def _drop_after_rollback(session):
+    session.info.pop(_PENDING_RELEASES, None)
+
+
+def install_reservation_hooks() -> None:
+    """Register the commit/rollback hooks applying queued Redis releases (idempotent)."""
+    if not event.contains(Session, "after_commit", _release_after_commit):
+        event.listen(Session, "after_commit", _release_after_commit)
+    if not event.contains(Session, "after_rollback", _drop_after_rollback):
+        event.listen(Session, "after_rollback", _drop_after_rollback)
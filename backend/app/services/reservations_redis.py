@@ -0,0 +1,174 @@
+"""Redis reservation store: per-buyer TTL holds on products, changed only by Lua scripts.
+
+Per product:
+- {resv}:<pid>:exp   ZSET buyer_id -> hold expiry (unix seconds)
+- {resv}:<pid>:qty   HASH buyer_id -> held quantity
+- {resv}:<pid>:total sum of live holds
+plus {resv}:active, the set of product ids that currently have holds.
+
+Every key carries the {resv} hash tag: the scripts touch the active set and
+(totals) many products at once, so on Redis Cluster all keys must share one
+slot. The store therefore lives on a single shard.
+
+Every script first purges expired holds of its product, so holds expire by
+themselves — no sweeper round trips. Stock (products.quantity) stays in
+Postgres and is passed in by the caller; the scripts guarantee that live
+holds never exceed it. totals() feeds the periodic write-back to
+products.reserved_quantity (ReservationService.sync_reserved_quantities).
+"""
+import time
+from typing import AsyncIterator, Dict, List, Tuple
+
+from redis.asyncio import Redis
+
+KEY_PREFIX = "{resv}"
+ACTIVE_KEY = f"{KEY_PREFIX}:active"
+
+_PURGE = """
+local function purge(exp, qty, total_key, now)
+    local total = tonumber(redis.call('GET', total_key) or '0')
+    local expired = redis.call('ZRANGEBYSCORE', exp, '-inf', now)
+    if #expired > 0 then
+        for _, member in ipairs(expired) do
+            total = total - tonumber(redis.call('HGET', qty, member) or '0')
+            redis.call('HDEL', qty, member)
+        end
+        redis.call('ZREMRANGEBYSCORE', exp, '-inf', now)
+        if total < 0 then total = 0 end
+        redis.call('SET', total_key, total)
+    end
+    return total
+end
+"""
+
+# KEYS: exp, qty, total, active; ARGV: buyer, delta, stock, now, expires_at, product_id
+# Returns {ok, available_after}
+_RESERVE = _PURGE + """
+local total = purge(KEYS[1], KEYS[2], KEYS[3], ARGV[4])
+local delta = tonumber(ARGV[2])
+local stock = tonumber(ARGV[3])
+if total + delta > stock then
+    return {0, stock - total}
+end
+redis.call('HINCRBY', KEYS[2], ARGV[1], delta)
+redis.call('ZADD', KEYS[1], ARGV[5], ARGV[1])
+redis.call('SET', KEYS[3], total + delta)
+redis.call('SADD', KEYS[4], ARGV[6])
+return {1, stock - total - delta}
+"""
+
+# KEYS: exp, qty, total; ARGV: buyer, delta, now. Returns released quantity.
+_RELEASE = _PURGE + """
+local total = purge(KEYS[1], KEYS[2], KEYS[3], ARGV[3])
+local cur = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+local d = math.min(tonumber(ARGV[2]), cur)
+if d <= 0 then
+    return 0
+end
+if cur - d <= 0 then
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    redis.call('ZREM', KEYS[1], ARGV[1])
+else
+    redis.call('HSET', KEYS[2], ARGV[1], cur - d)
+end
+redis.call('SET', KEYS[3], total - d)
+return d
+"""
+
+# KEYS: exp, qty, total, active; ARGV: buyer, quantity, stock, now, expires_at, product_id
+# Live hold: push expiry. Expired hold: re-reserve if stock allows. Returns 1/0.
+_EXTEND = _PURGE + """
+local total = purge(KEYS[1], KEYS[2], KEYS[3], ARGV[4])
+if redis.call('HEXISTS', KEYS[2], ARGV[1]) == 1 then
+    redis.call('ZADD', KEYS[1], ARGV[5], ARGV[1])
+    return 1
+end
+local qty = tonumber(ARGV[2])
+if total + qty > tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('HSET', KEYS[2], ARGV[1], qty)
+redis.call('ZADD', KEYS[1], ARGV[5], ARGV[1])
+redis.call('SET', KEYS[3], total + qty)
+redis.call('SADD', KEYS[4], ARGV[6])
+return 1
+"""
+
+# KEYS: (exp, qty, total) * n, active; ARGV: now, product_id * n
+# Returns live totals; products left without holds are dropped from the active set.
+_TOTALS = _PURGE + """
+local n = (#KEYS - 1) / 3
+local active = KEYS[#KEYS]
+local out = {}
+for i = 1, n do
+    local base = (i - 1) * 3
+    local total = purge(KEYS[base + 1], KEYS[base + 2], KEYS[base + 3], ARGV[1])
+    if total == 0 then
+        redis.call('SREM', active, ARGV[i + 1])
+    end
+    out[i] = total
+end
+return out
+"""
+
+
+def _keys(product_id: int) -> List[str]:
+    base = f"{KEY_PREFIX}:{product_id}"
+    return [f"{base}:exp", f"{base}:qty", f"{base}:total"]
+
+
+class RedisReservationStore:
+    """Thin async wrapper over the Lua scripts above."""
+
+    def __init__(self, redis: Redis, ttl_seconds: int):
+        self.redis = redis
+        self.ttl_seconds = ttl_seconds
+        self._reserve = redis.register_script(_RESERVE)
+        self._release = redis.register_script(_RELEASE)
+        self._extend = redis.register_script(_EXTEND)
+        self._totals = redis.register_script(_TOTALS)
+
+    def _now(self) -> Tuple[float, float]:
+        now = time.time()
+        return now, now + self.ttl_seconds
+
+    async def reserve(self, product_id: int, buyer_id: int, quantity: int, stock: int) -> Tuple[bool, int]:
+        """Add quantity to the buyer's hold (and refresh its TTL). Returns (ok, available)."""
+        now, expires_at = self._now()
+        ok, available = await self._reserve(
+            keys=[*_keys(product_id), ACTIVE_KEY],
+            args=[buyer_id, quantity, stock, now, expires_at, product_id],
+        )
+        return bool(ok), int(available)
+
+    async def release(self, product_id: int, buyer_id: int, quantity: int) -> int:
+        """Drop up to quantity from the buyer's hold. Returns the released amount."""
+        now, _ = self._now()
+        return int(await self._release(keys=_keys(product_id), args=[buyer_id, quantity, now]))
+
+    async def extend(self, product_id: int, buyer_id: int, quantity: int, stock: int) -> bool:
+        now, expires_at = self._now()
+        return bool(await self._extend(
+            keys=[*_keys(product_id), ACTIVE_KEY],
+            args=[buyer_id, quantity, stock, now, expires_at, product_id],
+        ))
+
+    async def totals(self, product_ids: List[int]) -> Dict[int, int]:
+        """Live reserved totals for product_ids (expired holds purged)."""
+        if not product_ids:
+            return {}
+        now, _ = self._now()
+        keys = [k for pid in product_ids for k in _keys(pid)] + [ACTIVE_KEY]
+        values = await self._totals(keys=keys, args=[now, *product_ids])
+        return {pid: int(v) for pid, v in zip(product_ids, values)}
+
+    async def iter_active(self, chunk_size: int) -> AsyncIterator[List[int]]:
+        """Product ids that had holds at their last change, in chunks (SSCAN)."""
+        batch: List[int] = []
+        async for member in self.redis.sscan_iter(ACTIVE_KEY, count=chunk_size):
+            batch.append(int(member))
+            if len(batch) >= chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,242 @@
+"""Seller daily sales cube (seller_daily_sales) for dashboard statistics.
+
+One row per seller and Moscow day with completed-order counts, revenue,
+the delivery/pickup split and buyer counts. A cell is always recomputed
+from orders (never incremented), so refreshing it is idempotent:
+- on order completion (OrderService.complete_order / update_status);
+- by the worker for today and yesterday, which catches later changes of
+  completed orders (status, price);
+- the add_seller_daily_sales migration backfills history.
+
+Dashboard ranges then read a few hundred cube rows at most instead of
+aggregating raw orders; branch=all sums the cells of all branches.
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, func, case, and_, delete, exists
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.constants import COMPLETED_ORDER_STATUSES
+from backend.app.core.logging import get_logger
+from backend.app.models.analytics import SellerDailySales
+from backend.app.models.order import Order
+from backend.app.services.analytics import _msk_date, _msk_day_bounds
+
+logger = get_logger(__name__)
+
+DELIVERY_TYPES = ("delivery", "доставка", "Доставка")
+PICKUP_TYPES = ("pickup", "самовывоз", "Самовывоз")
+SUM_COLUMNS = (
+    "orders", "revenue", "delivery_orders", "delivery_revenue", "pickup_orders", "pickup_revenue",
+    "other_orders", "other_revenue", "buyers", "new_buyers", "buyer_revenue",
+)
+
+
+def _seller_filter(column, seller_id):
+    return column.in_(seller_id) if isinstance(seller_id, list) else (column == seller_id)
+
+
+def order_day(order: Order) -> date:
+    """Cube day of an order: Moscow day of coalesce(completed_at, created_at)."""
+    return _msk_date(order.completed_at or order.created_at)
+
+
+def _day_window(day: date) -> Tuple[datetime, datetime]:
+    """[start, end) of a Moscow day as naive UTC datetimes."""
+    return _msk_day_bounds(day)[0], _msk_day_bounds(day + timedelta(days=1))[0]
+
+
+class SalesCubeService:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    # ---- Write ----
+
+    async def _aggregate_day(self, day: date, seller_ids: Optional[List[int]]) -> Dict[int, Dict[str, Any]]:
+        """Cube cells of one day computed from orders, keyed by seller_id."""
+        start, end = _day_window(day)
+        date_field = func.coalesce(Order.completed_at, Order.created_at)
+        conditions = [
+            Order.status.in_(COMPLETED_ORDER_STATUSES),
+            date_field >= start,
+            date_field < end,
+        ]
+        if seller_ids is not None:
+            conditions.append(Order.seller_id.in_(seller_ids))
+
+        dtype = func.trim(Order.delivery_type)
+        is_delivery = func.lower(dtype).in_(DELIVERY_TYPES)
+        is_pickup = func.lower(dtype).in_(PICKUP_TYPES)
+        is_other = and_(Order.delivery_type.isnot(None), Order.delivery_type != "", ~is_delivery, ~is_pickup)
+
+        def _count_if(cond):
+            return func.coalesce(func.sum(case((cond, 1), else_=0)), 0)
+
+        def _sum_if(cond):
+            return func.coalesce(func.sum(case((cond, Order.total_price), else_=0)), 0)
+
+        result = await self.session.execute(
+            select(
+                Order.seller_id,
+                func.count(Order.id).label("orders"),
+                func.coalesce(func.sum(Order.total_price), 0).label("revenue"),
+                _count_if(is_delivery).label("delivery_orders"),
+                _sum_if(is_delivery).label("delivery_revenue"),
+                _count_if(is_pickup).label("pickup_orders"),
+                _sum_if(is_pickup).label("pickup_revenue"),
+                _count_if(is_other).label("other_orders"),
+                _sum_if(is_other).label("other_revenue"),
+                func.count(func.distinct(Order.buyer_id)).label("buyers"),
+                _sum_if(Order.buyer_id.isnot(None)).label("buyer_revenue"),
+            )
+            .where(*conditions)
+            .group_by(Order.seller_id)
+        )
+        cells = {row.seller_id: {**row._asdict(), "new_buyers": 0} for row in result.all()}
+        if not cells:
+            return cells
+
+        # Buyers with no completed order at this seller before the day
+        earlier = aliased(Order)
+        new_result = await self.session.execute(
+            select(Order.seller_id, func.count(func.distinct(Order.buyer_id)))
+            .where(
+                *conditions,
+                Order.buyer_id.isnot(None),
+                ~exists().where(
+                    earlier.seller_id == Order.seller_id,
+                    earlier.buyer_id == Order.buyer_id,
+                    earlier.status.in_(COMPLETED_ORDER_STATUSES),
+                    func.coalesce(earlier.completed_at, earlier.created_at) < start,
+                ),
+            )
+            .group_by(Order.seller_id)
+        )
+        for seller_id, new_buyers in new_result.all():
+            cells[seller_id]["new_buyers"] = new_buyers
+        return cells
+
+    async def refresh_day(self, day: date, seller_ids: Optional[Iterable[int]] = None) -> int:
+        """Recompute the cells of `day` (for seller_ids, or all sellers). Caller commits.
+
+        Returns the number of cells written.
+        """
+        ids = sorted({int(s) for s in seller_ids}) if seller_ids is not None else None
+        await self.session.flush()
+        cells = await self._aggregate_day(day, ids)
+
+        stale = delete(SellerDailySales).where(SellerDailySales.day == day)
+        if ids is not None:
+            stale = stale.where(SellerDailySales.seller_id.in_(ids))
+        if cells:
+            stale = stale.where(SellerDailySales.seller_id.notin_(list(cells)))
+        await self.session.execute(stale)
+
+        existing = {
+            row.seller_id: row
+            for row in (await self.session.execute(
+                select(SellerDailySales).where(
+                    SellerDailySales.day == day,
+                    SellerDailySales.seller_id.in_(list(cells)),
+                )
+            )).scalars().all()
+        } if cells else {}
+        for seller_id, values in cells.items():
+            row = existing.get(seller_id)
+            if row is None:
+                row = SellerDailySales(seller_id=seller_id, day=day)
+                self.session.add(row)
+            for column in SUM_COLUMNS:
+                setattr(row, column, values[column])
+        await self.session.flush()
+        return len(cells)
+
+    async def record_order(self, order: Order) -> None:
+        """Refresh the cell of a completed order. Caller commits."""
+        await self.refresh_day(order_day(order), [order.seller_id])
+
+    # ---- Read ----
+
+    async def _totals(self, seller_id, day_from: Optional[date], day_to: Optional[date]) -> Dict[str, float]:
+        query = select(*[func.coalesce(func.sum(getattr(SellerDailySales, c)), 0).label(c) for c in SUM_COLUMNS])
+        query = query.where(_seller_filter(SellerDailySales.seller_id, seller_id))
+        if day_from:
+            query = query.where(SellerDailySales.day >= day_from)
+        if day_to:
+            query = query.where(SellerDailySales.day <= day_to)
+        row = (await self.session.execute(query)).one()
+        return {c: float(getattr(row, c) or 0) for c in SUM_COLUMNS}
+
+    async def _daily(self, seller_id, day_from: Optional[date], day_to: Optional[date]) -> List[Dict[str, Any]]:
+        """Daily orders/revenue over the range, gaps filled with zeros."""
+        query = (
+            select(
+                SellerDailySales.day,
+                func.sum(SellerDailySales.orders).label("orders"),
+                func.sum(SellerDailySales.revenue).label("revenue"),
+            )
+            .where(_seller_filter(SellerDailySales.seller_id, seller_id))
+            .group_by(SellerDailySales.day)
+        )
+        if day_from:
+            query = query.where(SellerDailySales.day >= day_from)
+        if day_to:
+            query = query.where(SellerDailySales.day <= day_to)
+        by_day = {row.day: row for row in (await self.session.execute(query)).all()}
+        if not by_day and not (day_from and day_to):
+            return []
+        current = day_from or min(by_day)
+        end = day_to or max(by_day)
+        series = []
+        while current <= end:
+            row = by_day.get(current)
+            series.append({
+                "date": current.isoformat(),
+                "orders": int(row.orders or 0) if row else 0,
+                "revenue": round(float(row.revenue or 0), 2) if row else 0.0,
+            })
+            current += timedelta(days=1)
+        return series
+
+    async def get_sales(
+        self,
+        seller_id,  # int | list[int]
+        day_from: Optional[date] = None,
+        day_to: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        """Revenue, daily series, delivery breakdown and previous-period totals for a day range."""
+        totals = await self._totals(seller_id, day_from, day_to)
+        orders = int(totals["orders"])
+        revenue = totals["revenue"]
+
+        previous_orders, previous_revenue = 0, 0.0
+        if day_from and day_to:
+            span = (day_to - day_from).days + 1
+            prev = await self._totals(seller_id, day_from - timedelta(days=span), day_from - timedelta(days=1))
+            previous_orders, previous_revenue = int(prev["orders"]), prev["revenue"]
+
+        def _bucket(prefix: str) -> Dict[str, float]:
+            return {"orders": int(totals[f"{prefix}_orders"]), "revenue": round(totals[f"{prefix}_revenue"], 2)}
+
+        breakdown = {"delivery": _bucket("delivery"), "pickup": _bucket("pickup"), "other": _bucket("other")}
+        known_orders = sum(b["orders"] for b in breakdown.values())
+        known_revenue = totals["delivery_revenue"] + totals["pickup_revenue"] + totals["other_revenue"]
+        breakdown["unknown"] = {"orders": orders - known_orders, "revenue": round(revenue - known_revenue, 2)}
+
+        return {
+            "total_completed_orders": orders,
+            "total_revenue": round(revenue, 2),
+            "average_check": round(revenue / orders, 2) if orders else 0,
+            "daily_sales": await self._daily(seller_id, day_from, day_to),
+            "delivery_breakdown": breakdown,
+            "previous_period_orders": previous_orders,
+            "previous_period_revenue": round(previous_revenue, 2),
+            "new_customers": int(totals["new_buyers"]),
+        }
+
+    async def average_ltv(self, seller_id) -> float:
+        """All-time revenue per distinct buyer (registered buyers), from the cube."""
+        totals = await self._totals(seller_id, None, None)
+        return round(totals["buyer_revenue"] / totals["new_buyers"], 2) if totals["new_buyers"] else 0.0
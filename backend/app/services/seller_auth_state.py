@@ -0,0 +1,162 @@
+"""
+Auth state of sellers for the seller-web token dependencies (api/seller_auth.py).
+
+A valid JWT still has to be checked against the seller row: deleted_at,
+is_blocked and owner_id. Instead of loading the whole row on every panel
+request, that state is kept per seller_id in the ``seller_auth`` cache
+namespace (in-process L1 + Redis, short TTL); a missing or deleted seller
+is cached as ``{"deleted": True}``.
+
+This only saves the auth check's query: handlers that need seller fields
+(shop_name, limits, settings, ...) still load the Seller row themselves.
+
+Invalidation is driven by ORM writes (install_seller_auth_hooks, called at
+app and worker startup): a Session ``after_flush`` hook notes sellers whose
+is_blocked / deleted_at / owner_id changed (block_seller, soft_delete,
+restore, branch create/delete, grace-period blocking, hard delete), and
+after commit their entries are dropped from L1 here, from Redis and from
+the L1 of the other workers. Bulk UPDATEs of those columns must call
+invalidate_seller_auth themselves; the TTL bounds what is missed.
+"""
+import asyncio
+from typing import Any, Dict, Iterable, Optional, Set
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.app.core.logging import get_logger
+from backend.app.models.seller import Seller
+from backend.app.services.cache import CacheService
+from backend.app.services.local_cache import local_cache
+
+logger = get_logger(__name__)
+
+NAMESPACE = CacheService.NS_SELLER_AUTH
+_TRACKED_ATTRS = ("is_blocked", "deleted_at", "owner_id")
+_STALE = "seller_auth_stale"  # session.info key: seller ids to invalidate on commit
+_DELETED: Dict[str, Any] = {"deleted": True}
+
+
+def _key(seller_id: int) -> str:
+    return str(seller_id)
+
+
+async def _redis_cache() -> Optional[CacheService]:
+    try:
+        return CacheService(await CacheService.get_redis())
+    except Exception:
+        return None
+
+
+async def load_seller_auth_state(session: AsyncSession, seller_id: int) -> Dict[str, Any]:
+    """{"owner_id", "is_blocked"} of a live seller, or {"deleted": True}.
+
+    Reads L1, then Redis, then the seller row. Redis errors fall back to the DB.
+    """
+    local = local_cache.get(NAMESPACE, _key(seller_id))
+    if local is not None:
+        return local
+
+    cache = await _redis_cache()
+    if cache is not None:
+        try:
+            cached = await cache.get(_key(seller_id), namespace=NAMESPACE)
+            if cached is not None:
+                return cached
+        except Exception as e:
+            logger.debug("Seller auth cache read failed", seller_id=seller_id, error=str(e))
+            cache = None
+
+    # Full entity on purpose: it stays in the request's identity map, so a
+    # handler's session.get(Seller, seller_id) needs no second query
+    seller = (await session.execute(
+        select(Seller).where(Seller.seller_id == seller_id, Seller.deleted_at.is_(None))
+    )).scalar_one_or_none()
+    state = (
+        {"owner_id": seller.owner_id, "is_blocked": bool(seller.is_blocked)}
+        if seller else _DELETED
+    )
+    if cache is not None:
+        try:
+            await cache.set(_key(seller_id), state, namespace=NAMESPACE)
+        except Exception as e:
+            logger.debug("Seller auth cache write failed", seller_id=seller_id, error=str(e))
+    else:
+        local_cache.set(NAMESPACE, _key(seller_id), state, CacheService.TTL_LOCAL_SELLER_AUTH)
+    return state
+
+
+async def invalidate_seller_auth(seller_ids: Iterable[int]) -> None:
+    """Drop cached auth state of seller_ids in every worker."""
+    ids = {int(s) for s in seller_ids if s is not None}
+    for seller_id in ids:
+        local_cache.invalidate(NAMESPACE, _key(seller_id))
+    cache = await _redis_cache()
+    if cache is None:
+        return
+    try:
+        for seller_id in ids:
+            await cache.delete(_key(seller_id), namespace=NAMESPACE)
+    except Exception as e:
+        # Other workers converge within TTL_SELLER_AUTH
+        logger.warning("Seller auth cache invalidation failed", count=len(ids), error=str(e))
+
+
+# ----- ORM hooks -----
+
+def _stale_sellers(session: Session) -> Set[int]:
+    ids: Set[int] = set()
+    for obj in session.new:
+        if type(obj) is Seller:
+            ids.add(obj.seller_id)
+    for obj in session.deleted:
+        if type(obj) is Seller:
+            ids.add(obj.seller_id)
+    for obj in session.dirty:
+        if type(obj) is not Seller:
+            continue
+        state = inspect(obj)
+        if any(state.attrs[a].history.has_changes() for a in _TRACKED_ATTRS):
+            ids.add(obj.seller_id)
+    return ids
+
+
+_invalidate_tasks: Set[asyncio.Task] = set()
+
+
+def _collect_after_flush(session, flush_context):
+    ids = _stale_sellers(session)
+    if ids:
+        session.info.setdefault(_STALE, set()).update(ids)
+
+
+def _invalidate_after_commit(session):
+    ids = session.info.pop(_STALE, None)
+    if not ids:
+        return
+    # This worker stops trusting its copy at once; Redis and the other workers follow
+    for seller_id in ids:
+        local_cache.invalidate(NAMESPACE, _key(seller_id))
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # sync use outside the app: entries expire by TTL
+    task = loop.create_task(invalidate_seller_auth(ids))
+    _invalidate_tasks.add(task)
+    task.add_done_callback(_invalidate_tasks.discard)
+
+
+def _drop_after_rollback(session):
+    session.info.pop(_STALE, None)
+
+
+def install_seller_auth_hooks() -> None:
+    """Register the flush/commit/rollback hooks invalidating seller auth state (idempotent)."""
+    for name, fn in (
+        ("after_flush", _collect_after_flush),
+        ("after_commit", _invalidate_after_commit),
+        ("after_rollback", _drop_after_rollback),
+    ):
+        if not event.contains(Session, name, fn):
+            event.listen(Session, name, fn)
@@ -488,6 +488,7 @@ class SubscriptionService:
             from backend.app.services.telegram_notify import notify_seller_subscription_activated, resolve_notification_chat_id
             _chat_id = await resolve_notification_chat_id(self.session, target_seller_id)
             await notify_seller_subscription_activated(
+                self.session,
                 seller_id=_chat_id,
                 period_months=sub.period_months,
                 expires_at=sub.expires_at,
@@ -531,7 +532,7 @@ class SubscriptionService:
                 try:
                     from backend.app.services.telegram_notify import notify_seller_subscription_expired, resolve_notification_chat_id
                     _chat_id = await resolve_notification_chat_id(self.session, target_seller_id)
-                    await notify_seller_subscription_expired(_chat_id)
+                    await notify_seller_subscription_expired(self.session, _chat_id)
                 except Exception as e:
                     logger.warning("Subscription expiry notification failed", seller_id=target_seller_id, error=str(e))
 
@@ -600,6 +601,7 @@ class SubscriptionService:
                     from backend.app.services.telegram_notify import notify_seller_subscription_expiring, resolve_notification_chat_id
                     _chat_id = await resolve_notification_chat_id(self.session, sub.seller_id)
                     await notify_seller_subscription_expiring(
+                        self.session,
                         seller_id=_chat_id,
                         days_label=label,
                         expires_at=sub.expires_at,
@@ -1,4 +1,5 @@
 """Download file from Telegram Bot API and save to static. Used when seller sends photo in bot."""
+import asyncio
 import os
 import uuid
 import logging
@@ -7,7 +8,9 @@ from typing import Optional
 
 import httpx
 
-from backend.app.core.image_convert import convert_image_to_webp, validate_image_content
+from backend.app.core.image_convert import validate_image_content
+from backend.app.core.image_pool import ImagePoolError
+from backend.app.services.product_images import store_product_photo
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +23,15 @@ PRODUCTS_UPLOAD_SUBDIR = Path("uploads") / "products"
 ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
 
 
+def _write_file(path: Path, content: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
 async def download_telegram_photo_to_static(file_id: str) -> Optional[str]:
     """
-    Get file from Telegram by file_id, save to static/uploads/products/, return path like /static/uploads/products/xxx.jpg.
+    Get file from Telegram by file_id, save to static/uploads/products/, return path like
+    /static/uploads/products/<digest>/1200.webp (or .../xxx.jpg if it could not be converted).
     Returns None if BOT_TOKEN missing or Telegram API error.
     """
     if not BOT_TOKEN:
@@ -54,23 +63,16 @@ async def download_telegram_photo_to_static(file_id: str) -> Optional[str]:
         if len(content) > 10 * 1024 * 1024:  # 10 MB
             logger.warning("Telegram file too large: %s bytes", len(content))
             return None
-        # Convert to square WebP (same as web upload)
+        # Square WebP/AVIF variants, content-addressed (same as web upload)
         if validate_image_content(content):
             try:
-                content = convert_image_to_webp(content, max_side_px=1200, force_square=True)
-                ext = ".webp"
-            except ValueError:
+                return await store_product_photo(content, UPLOAD_DIR)
+            except (ValueError, ImagePoolError):
                 logger.warning("Failed to convert Telegram photo, saving as-is")
-                ext = Path(file_path).suffix.lower()
-                if ext not in ALLOWED_IMAGE_EXTENSIONS:
-                    ext = ".jpg"
-        else:
-            ext = Path(file_path).suffix.lower()
-            if ext not in ALLOWED_IMAGE_EXTENSIONS:
-                ext = ".jpg"
-        upload_dir = UPLOAD_DIR / PRODUCTS_UPLOAD_SUBDIR
-        upload_dir.mkdir(parents=True, exist_ok=True)
+        ext = Path(file_path).suffix.lower()
+        if ext not in ALLOWED_IMAGE_EXTENSIONS:
+            ext = ".jpg"
         name = f"{uuid.uuid4().hex}{ext}"
-        path = upload_dir / name
-        path.write_bytes(content)
+        path = UPLOAD_DIR / PRODUCTS_UPLOAD_SUBDIR / name
+        await asyncio.to_thread(_write_file, path, content)
         return f"/static/{PRODUCTS_UPLOAD_SUBDIR}/{name}"
@@ -1,13 +1,19 @@
 # backend/app/services/telegram_notify.py
-"""Send Telegram notifications to buyers and sellers for order events."""
+"""Telegram notifications to buyers and sellers for order events.
+
+notify_* functions only queue rows in telegram_outbox within the caller's
+transaction; delivery (rate limits, retries) is done by the worker.
+"""
 import html
 import os
 import re
+from datetime import datetime
 from typing import Optional, Dict, Any, List
 
-import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.app.core.logging import get_logger
+from backend.app.models.notification import TelegramOutbox
 
 logger = get_logger(__name__)
 
@@ -19,6 +25,15 @@ SELLER_PANEL_URL = (os.getenv("SELLER_MINI_APP_URL") or "").rstrip("/")
 
 SEPARATOR = "─────────────────────"
 
+# Outbox bot names (TelegramOutbox.bot)
+BOT_BUYER = "buyer"
+BOT_ADMIN = "admin"
+
+
+def bot_token_for(bot: str) -> Optional[str]:
+    """Token of an outbox bot name; seller notifications go through the admin bot."""
+    return ADMIN_BOT_TOKEN if bot == BOT_ADMIN else BOT_TOKEN
+
 
 def _escape(text) -> str:
     """Escape HTML special chars in user-provided text."""
@@ -130,60 +145,36 @@ def _seller_order_keyboard() -> Optional[Dict[str, Any]]:
     ]]}
 
 
-async def _send_telegram_message(
+def _enqueue(
+    session: AsyncSession,
     chat_id: int,
     text: str,
     reply_markup: Optional[Dict[str, Any]] = None,
     parse_mode: str = "HTML",
-    bot_token: Optional[str] = None,
+    bot: str = BOT_BUYER,
 ) -> bool:
     """
-    Send a Telegram message. Returns True if sent successfully.
-    bot_token overrides default BOT_TOKEN (used for seller notifications via ADMIN_BOT_TOKEN).
+    Queue a Telegram message in the outbox. Returns True if queued.
+
+    The row is added to the caller's session: it is delivered by the worker
+    (services/telegram_outbox.py) only if the caller commits.
+    bot=BOT_ADMIN sends via ADMIN_BOT_TOKEN (seller notifications).
     """
     if not chat_id:
         logger.debug("No chat_id provided, skip Telegram notification (guest order?)")
         return False
-    token = bot_token or BOT_TOKEN
-    if not token:
+    if not bot_token_for(bot):
         logger.warning("No bot token available, skip Telegram notification")
         return False
-    payload: dict = {
-        "chat_id": chat_id,
-        "text": text,
-        "parse_mode": parse_mode,
-    }
-    if reply_markup:
-        payload["reply_markup"] = reply_markup
-    url = f"{TELEGRAM_API}/bot{token}/sendMessage"
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            r = await client.post(url, json=payload)
-            if r.is_success:
-                return True
-            # If HTML/Markdown fails, retry without parse_mode
-            if r.status_code == 400 and parse_mode:
-                logger.info(
-                    "Telegram sendMessage 400 with %s, retrying without parse_mode (chat=%s)",
-                    parse_mode, chat_id,
-                )
-                payload.pop("parse_mode", None)
-                r2 = await client.post(url, json=payload)
-                if r2.is_success:
-                    return True
-                logger.warning(
-                    "Telegram sendMessage retry also failed: status=%s body=%s",
-                    r2.status_code, r2.text[:500],
-                )
-                return False
-            logger.warning(
-                "Telegram sendMessage failed: chat_id=%s status=%s body=%s",
-                chat_id, r.status_code, r.text[:500],
-            )
-            return False
-    except Exception as e:
-        logger.exception("Telegram _send_telegram_message failed: %s", e)
-        return False
+    session.add(TelegramOutbox(
+        chat_id=chat_id,
+        bot=bot,
+        text=text,
+        parse_mode=parse_mode,
+        reply_markup=reply_markup,
+        next_attempt_at=datetime.utcnow(),
+    ))
+    return True
 
 
 # ---------------------------------------------------------------------------
@@ -192,6 +183,7 @@ async def _send_telegram_message(
 
 
 async def notify_buyer_order_created(
+    session: AsyncSession,
     buyer_id: int,
     order_id: int,
     seller_id: int,
@@ -210,10 +202,11 @@ async def notify_buyer_order_created(
     if total_price is not None:
         text += f"\n\n💰 <b>Итого: {_fmt_price(total_price)}</b>"
     reply_markup = _order_notification_keyboard(order_id, seller_id)
-    return await _send_telegram_message(buyer_id, text, reply_markup=reply_markup)
+    return _enqueue(session, buyer_id, text, reply_markup=reply_markup)
 
 
 async def notify_buyer_order_status(
+    session: AsyncSession,
     buyer_id: int,
     order_id: int,
     new_status: str,
@@ -237,10 +230,11 @@ async def notify_buyer_order_status(
     reply_markup = _order_notification_keyboard(
         order_id, seller_id, show_confirm_button=(new_status == "done"),
     )
-    return await _send_telegram_message(buyer_id, text, reply_markup=reply_markup)
+    return _enqueue(session, buyer_id, text, reply_markup=reply_markup)
 
 
 async def notify_buyer_order_price_changed(
+    session: AsyncSession,
     buyer_id: int,
     order_id: int,
     seller_id: int,
@@ -252,10 +246,11 @@ async def notify_buyer_order_price_changed(
     text += _items_block(items_info)
     text += f"\n\n💰 <b>Новая сумма: {_fmt_price(new_price)}</b>"
     reply_markup = _order_notification_keyboard(order_id, seller_id)
-    return await _send_telegram_message(buyer_id, text, reply_markup=reply_markup)
+    return _enqueue(session, buyer_id, text, reply_markup=reply_markup)
 
 
 async def notify_buyer_payment_required(
+    session: AsyncSession,
     buyer_id: int,
     order_id: int,
     seller_id: int,
@@ -277,10 +272,11 @@ async def notify_buyer_payment_required(
             {"text": "📱 Открыть заказ", "web_app": {"url": f"{MINI_APP_URL}/order/{order_id}"}},
         ])
     reply_markup = {"inline_keyboard": rows}
-    return await _send_telegram_message(buyer_id, text, reply_markup=reply_markup)
+    return _enqueue(session, buyer_id, text, reply_markup=reply_markup)
 
 
 async def notify_buyer_payment_succeeded(
+    session: AsyncSession,
     buyer_id: int,
     order_id: int,
     seller_id: int,
@@ -289,10 +285,11 @@ async def notify_buyer_payment_succeeded(
     text = f"✅  <b>Заказ #{order_id} оплачен!</b>"
     text += "\n\nПродавец начнёт сборку в ближайшее время."
     reply_markup = _order_notification_keyboard(order_id, seller_id)
-    return await _send_telegram_message(buyer_id, text, reply_markup=reply_markup)
+    return _enqueue(session, buyer_id, text, reply_markup=reply_markup)
 
 
 async def notify_buyer_payment_refunded(
+    session: AsyncSession,
     buyer_id: int,
     order_id: int,
     seller_id: int,
@@ -302,10 +299,11 @@ async def notify_buyer_payment_refunded(
     text = f"💸  <b>Возврат по заказу #{order_id}</b>"
     text += f"\n\nСумма <b>{_fmt_price(refund_amount)}</b> будет возвращена на карту в течение нескольких дней."
     reply_markup = _order_notification_keyboard(order_id, seller_id)
-    return await _send_telegram_message(buyer_id, text, reply_markup=reply_markup)
+    return _enqueue(session, buyer_id, text, reply_markup=reply_markup)
 
 
 async def notify_preorder_reminder_buyer(
+    session: AsyncSession,
     buyer_id: int,
     order_id: int,
     seller_id: int,
@@ -317,21 +315,27 @@ async def notify_preorder_reminder_buyer(
     text += f"\n\nВаш предзаказ <b>#{order_id}</b> на <b>{_escape(preorder_delivery_date)}</b> будет выполнен завтра."
     text += _items_block(items_info)
     reply_markup = _order_notification_keyboard(order_id, seller_id)
-    return await _send_telegram_message(buyer_id, text, reply_markup=reply_markup)
+    return _enqueue(session, buyer_id, text, reply_markup=reply_markup)
+
+
+def subscriber_preorder_opened_text(shop_name: str, seller_id: int, message: str = "") -> str:
+    """Text of the "preorders are open" message (same for every subscriber, see services/broadcasts.py)."""
+    text = f"🌸  <b>{_escape(shop_name)} открыл предзаказы!</b>"
+    if message:
+        text += f"\n\n{_escape(message)}"
+    text += f'\n\n📱 <a href="tg://user?id={seller_id}">Оформить предзаказ →</a>'
+    return text
 
 
 async def notify_subscriber_preorder_opened(
+    session: AsyncSession,
     buyer_id: int,
     shop_name: str,
     seller_id: int,
     message: str = "",
 ) -> bool:
     """Notify a subscriber that a seller opened preorders."""
-    text = f"🌸  <b>{_escape(shop_name)} открыл предзаказы!</b>"
-    if message:
-        text += f"\n\n{_escape(message)}"
-    text += f'\n\n📱 <a href="tg://user?id={seller_id}">Оформить предзаказ →</a>'
-    return await _send_telegram_message(buyer_id, text)
+    return _enqueue(session, buyer_id, subscriber_preorder_opened_text(shop_name, seller_id, message))
 
 
 # ---------------------------------------------------------------------------
@@ -375,6 +379,7 @@ def _build_recipient_block(
 
 
 async def notify_seller_new_order(
+    session: AsyncSession,
     seller_id: int,
     order_id: int,
     items_info: str = "",
@@ -399,13 +404,14 @@ async def notify_seller_new_order(
         text += f"\n\n💰 <b>Итого: {_fmt_price(total_price)}</b>"
     text += _build_delivery_block(delivery_type, delivery_zone_name, delivery_fee)
     text += _build_recipient_block(recipient_name, recipient_phone, gift_note)
-    return await _send_telegram_message(
-        seller_id, text, reply_markup=_seller_order_keyboard(),
-        bot_token=ADMIN_BOT_TOKEN,
+    return _enqueue(
+        session, seller_id, text, reply_markup=_seller_order_keyboard(),
+        bot=BOT_ADMIN,
     )
 
 
 async def notify_seller_new_order_guest(
+    session: AsyncSession,
     seller_id: int,
     order_id: int,
     items_info: str = "",
@@ -429,20 +435,21 @@ async def notify_seller_new_order_guest(
     text += f"\n\n👤 <b>Покупатель</b>"
     text += f"\n      {_escape(guest_name)}  ({_escape(guest_phone)})"
     text += _build_recipient_block(recipient_name, recipient_phone, gift_note)
-    return await _send_telegram_message(
-        seller_id, text, reply_markup=_seller_order_keyboard(),
-        bot_token=ADMIN_BOT_TOKEN,
+    return _enqueue(
+        session, seller_id, text, reply_markup=_seller_order_keyboard(),
+        bot=BOT_ADMIN,
     )
 
 
-async def notify_seller_order_completed(seller_id: int, order_id: int) -> bool:
+async def notify_seller_order_completed(session: AsyncSession, seller_id: int, order_id: int) -> bool:
     """Notify seller that buyer confirmed receipt."""
     text = f"✅  <b>Заказ #{order_id} — получен</b>"
     text += "\n\nПокупатель подтвердил получение."
-    return await _send_telegram_message(seller_id, text, bot_token=ADMIN_BOT_TOKEN)
+    return _enqueue(session, seller_id, text, bot=BOT_ADMIN)
 
 
 async def notify_seller_preorder_cancelled(
+    session: AsyncSession,
     seller_id: int,
     order_id: int,
     items_info: str = "",
@@ -453,10 +460,11 @@ async def notify_seller_preorder_cancelled(
     if preorder_delivery_date:
         text += f"\n<i>на {_escape(preorder_delivery_date)}</i>"
     text += _items_block(items_info)
-    return await _send_telegram_message(seller_id, text, bot_token=ADMIN_BOT_TOKEN)
+    return _enqueue(session, seller_id, text, bot=BOT_ADMIN)
 
 
 async def notify_seller_order_cancelled(
+    session: AsyncSession,
     seller_id: int,
     order_id: int,
     items_info: str = "",
@@ -464,10 +472,11 @@ async def notify_seller_order_cancelled(
     """Notify seller that a regular order was cancelled by the buyer."""
     text = f"🚫  <b>Заказ #{order_id} отменён</b>"
     text += _items_block(items_info)
-    return await _send_telegram_message(seller_id, text, bot_token=ADMIN_BOT_TOKEN)
+    return _enqueue(session, seller_id, text, bot=BOT_ADMIN)
 
 
 async def notify_preorder_summary_seller(
+    session: AsyncSession,
     seller_id: int,
     delivery_date: str,
     orders_count: int,
@@ -481,10 +490,11 @@ async def notify_preorder_summary_seller(
     text += f"\n💰 Сумма: <b>{_fmt_price(total_amount)}</b>"
     if items_summary:
         text += f"\n\n📝 <b>Что подготовить:</b>\n<blockquote>{_escape(items_summary)}</blockquote>"
-    return await _send_telegram_message(seller_id, text, bot_token=ADMIN_BOT_TOKEN)
+    return _enqueue(session, seller_id, text, bot=BOT_ADMIN)
 
 
 async def notify_seller_upcoming_events(
+    session: AsyncSession,
     seller_id: int,
     events: List[Dict[str, Any]],
 ) -> bool:
@@ -506,10 +516,11 @@ async def notify_seller_upcoming_events(
     text = f"📅  <b>Предстоящие события</b>"
     text += f"\n{SEPARATOR}"
     text += f"\n\n<blockquote>" + "\n".join(lines) + "</blockquote>"
-    return await _send_telegram_message(seller_id, text, bot_token=ADMIN_BOT_TOKEN)
+    return _enqueue(session, seller_id, text, bot=BOT_ADMIN)
 
 
 async def notify_seller_payment_received(
+    session: AsyncSession,
     seller_id: int,
     order_id: int,
     total_price: float = 0,
@@ -520,13 +531,14 @@ async def notify_seller_payment_received(
     if total_price:
         text += f" — {_fmt_price(total_price)}"
     text += "\nМожно начинать сборку."
-    return await _send_telegram_message(
-        seller_id, text, reply_markup=_seller_order_keyboard(),
-        bot_token=ADMIN_BOT_TOKEN,
+    return _enqueue(
+        session, seller_id, text, reply_markup=_seller_order_keyboard(),
+        bot=BOT_ADMIN,
     )
 
 
 async def notify_seller_payment_refunded(
+    session: AsyncSession,
     seller_id: int,
     order_id: int,
     refund_amount: float,
@@ -535,13 +547,14 @@ async def notify_seller_payment_refunded(
     text = f"💸  <b>Возврат по заказу #{order_id}</b>"
     text += f"\n\nСумма: <b>{_fmt_price(refund_amount)}</b>"
     text += "\nСредства будут возвращены покупателю."
-    return await _send_telegram_message(seller_id, text, bot_token=ADMIN_BOT_TOKEN)
+    return _enqueue(session, seller_id, text, bot=BOT_ADMIN)
 
 
 # --- Subscription notifications ---
 
 
 async def notify_seller_subscription_activated(
+    session: AsyncSession,
     seller_id: int,
     period_months: int,
     expires_at,
@@ -551,10 +564,11 @@ async def notify_seller_subscription_activated(
     text = f"✅  <b>Подписка Flurai активирована</b>"
     text += f"\n\nПериод: <b>{period_months} мес.</b>"
     text += f"\nДействует до <b>{expires_str}</b>"
-    return await _send_telegram_message(seller_id, text, bot_token=ADMIN_BOT_TOKEN)
+    return _enqueue(session, seller_id, text, bot=BOT_ADMIN)
 
 
 async def notify_seller_subscription_expiring(
+    session: AsyncSession,
     seller_id: int,
     days_label: str,
     expires_at,
@@ -564,12 +578,12 @@ async def notify_seller_subscription_expiring(
     text = f"⚠️  <b>Подписка Flurai истекает</b>"
     text += f"\n\nОсталось: <b>{_escape(days_label)}</b> ({expires_str})"
     text += "\nПродлите подписку, чтобы продолжить принимать заказы."
-    return await _send_telegram_message(seller_id, text, bot_token=ADMIN_BOT_TOKEN)
+    return _enqueue(session, seller_id, text, bot=BOT_ADMIN)
 
 
-async def notify_seller_subscription_expired(seller_id: int) -> bool:
+async def notify_seller_subscription_expired(session: AsyncSession, seller_id: int) -> bool:
     """Notify seller that subscription has expired."""
     text = f"🔴  <b>Подписка Flurai истекла</b>"
     text += "\n\nМагазин не может принимать заказы."
     text += "\nПродлите подписку в панели управления."
-    return await _send_telegram_message(seller_id, text, bot_token=ADMIN_BOT_TOKEN)
+    return _enqueue(session, seller_id, text, bot=BOT_ADMIN)
@@ -0,0 +1,279 @@
+"""Telegram outbox dispatcher: delivers telegram_outbox rows from the worker.
+
+Request handlers only insert rows (services/telegram_notify.py); this module
+sends them with one pooled HTTP client, respecting Telegram's limits:
+
+- ~30 messages/s per bot (token bucket per bot, paused on 429 retry_after);
+- ~1 message/s per chat (messages of one chat go out in order, spaced);
+- transient errors (network, 5xx, 429) are retried with exponential backoff,
+  permanent ones (403 blocked by user, 400 chat not found) fail at once.
+
+No row lock or transaction is held while sending: a batch claims its rows
+with a lease (next_attempt_at moved CLAIM_LEASE ahead) and commits, then
+commits each outcome as soon as it is known. A crashed batch resends only
+its undelivered rows, once their lease runs out.
+"""
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.core.logging import get_logger
+from backend.app.core.metrics import telegram_outbox_messages_total
+from backend.app.models.notification import TelegramOutbox
+from backend.app.services.telegram_notify import TELEGRAM_API, bot_token_for
+
+logger = get_logger(__name__)
+
+GLOBAL_RATE = 30          # messages/s per bot
+PER_CHAT_INTERVAL = 1.0   # seconds between messages to one chat
+BATCH_SIZE = 100
+CHAT_BATCH = 5            # messages to one chat per batch, so a busy chat does not hold the batch up
+CLAIM_LEASE = 120         # seconds claimed rows stay invisible to other batches
+CONCURRENCY = 10          # chats served in parallel (= pooled connections)
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 5          # seconds, doubled per attempt
+BACKOFF_MAX = 3600
+SENT_RETENTION_DAYS = 7
+
+# Delivery outcomes
+SENT = "sent"
+RETRY = "retry"
+FAILED = "failed"
+
+
+class Delivery(NamedTuple):
+    """Result of one sendMessage: outcome, retry delay (429 retry_after), error, HTTP status (0 = no response)."""
+    outcome: str
+    delay: Optional[float] = None
+    error: Optional[str] = None
+    status: int = 0
+
+    @property
+    def blocked(self) -> bool:
+        """Recipient blocked the bot or deleted the account."""
+        return self.status == 403
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens/s, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for `seconds` (Telegram 429 retry_after)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(BACKOFF_BASE * 2 ** max(attempts - 1, 0), BACKOFF_MAX)
+    return delay * random.uniform(1.0, 1.25)
+
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return float(response.json()["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        return float(BACKOFF_BASE)
+
+
+def _classify(response: httpx.Response) -> Tuple[str, Optional[float]]:
+    """Map a sendMessage response to (outcome, retry delay)."""
+    if response.is_success:
+        return SENT, None
+    if response.status_code == 429:
+        return RETRY, _retry_after(response)
+    if response.status_code >= 500:
+        return RETRY, None
+    return FAILED, None
+
+
+class OutboxDispatcher:
+    """Sends due outbox rows. One instance per worker; keeps the HTTP pool and limiter state."""
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        rate: float = GLOBAL_RATE,
+        chat_interval: float = PER_CHAT_INTERVAL,
+    ):
+        self.client = client or httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY),
+        )
+        self.rate = rate
+        self.chat_interval = chat_interval
+        self._buckets: Dict[str, TokenBucket] = {}
+        # (bot, chat_id) -> monotonic time of the next allowed message
+        self._chat_next: "OrderedDict[Tuple[str, int], float]" = OrderedDict()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def _bucket(self, bot: str) -> TokenBucket:
+        if bot not in self._buckets:
+            self._buckets[bot] = TokenBucket(self.rate)
+        return self._buckets[bot]
+
+    async def _wait_chat(self, key: Tuple[str, int]) -> None:
+        delay = self._chat_next.get(key, 0.0) - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._chat_next[key] = time.monotonic() + self.chat_interval
+        self._chat_next.move_to_end(key)
+        # Entries in the past carry no information; keep the map small
+        now = time.monotonic()
+        while self._chat_next and next(iter(self._chat_next.values())) <= now:
+            self._chat_next.popitem(last=False)
+
+    async def _post(self, bot: str, url: str, payload: dict) -> Delivery:
+        """One rate-limited sendMessage call."""
+        bucket = self._bucket(bot)
+        await bucket.acquire()
+        try:
+            r = await self.client.post(url, json=payload)
+        except httpx.HTTPError as e:
+            return Delivery(RETRY, error=f"{type(e).__name__}: {e}"[:500])
+        outcome, delay = _classify(r)
+        if r.status_code == 429:
+            bucket.pause(delay)
+        error = None if outcome == SENT else f"{r.status_code}: {r.text[:480]}"
+        return Delivery(outcome, delay, error, r.status_code)
+
+    async def send(
+        self,
+        bot: str,
+        chat_id: int,
+        text: str,
+        parse_mode: Optional[str] = None,
+        reply_markup: Optional[dict] = None,
+    ) -> Delivery:
+        """Send one message under the per-bot and per-chat limits. Does not retry."""
+        token = bot_token_for(bot)
+        if not token:
+            return Delivery(FAILED, error="no bot token configured")
+        payload: dict = {"chat_id": chat_id, "text": text}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        if reply_markup:
+            payload["reply_markup"] = reply_markup
+        url = f"{TELEGRAM_API}/bot{token}/sendMessage"
+
+        await self._wait_chat((bot, chat_id))
+        result = await self._post(bot, url, payload)
+        if result.status == 400 and payload.get("parse_mode"):
+            # Broken HTML/Markdown: resend as plain text
+            logger.info("Telegram 400 with parse_mode, retrying as plain text", chat_id=chat_id)
+            payload.pop("parse_mode")
+            result = await self._post(bot, url, payload)
+        return result
+
+    async def deliver(self, row: TelegramOutbox) -> Delivery:
+        """Send one outbox row."""
+        return await self.send(row.bot, row.chat_id, row.text, row.parse_mode, row.reply_markup)
+
+    @staticmethod
+    def _apply(row: TelegramOutbox, result: Delivery) -> None:
+        now = datetime.utcnow()
+        row.attempts += 1
+        row.last_error = result.error
+        if result.outcome == SENT:
+            row.status = "sent"
+            row.sent_at = now
+        elif result.outcome == RETRY and row.attempts < MAX_ATTEMPTS:
+            delay = result.delay if result.delay is not None else _backoff(row.attempts)
+            row.next_attempt_at = now + timedelta(seconds=delay)
+        else:
+            row.status = "failed"
+            logger.warning(
+                "Telegram notification dropped",
+                outbox_id=row.id, chat_id=row.chat_id, attempts=row.attempts, error=result.error,
+            )
+        telegram_outbox_messages_total.labels(result=result.outcome).inc()
+
+    async def _deliver_chat(
+        self,
+        session: AsyncSession,
+        write_lock: asyncio.Lock,
+        rows: List[TelegramOutbox],
+        sem: asyncio.Semaphore,
+    ) -> None:
+        async with sem:
+            for i, row in enumerate(rows[:CHAT_BATCH]):
+                result = await self.deliver(row)
+                later = rows[i + 1:]
+                # One session for all chats: changes and commits are serialized
+                async with write_lock:
+                    self._apply(row, result)
+                    if row.status == "pending":
+                        # Keep per-chat order: later messages wait for this one
+                        for r in later:
+                            r.next_attempt_at = row.next_attempt_at
+                    elif i + 1 == CHAT_BATCH:
+                        # This chat's share of the batch is used up: the rest is due again at once
+                        for r in later:
+                            r.next_attempt_at = datetime.utcnow()
+                    await session.commit()
+                if row.status == "pending":
+                    return
+
+    async def dispatch_batch(self, session: AsyncSession, limit: int = BATCH_SIZE) -> int:
+        """Deliver up to `limit` due rows, at most CHAT_BATCH per chat. Commits itself. Returns rows claimed."""
+        result = await session.execute(
+            select(TelegramOutbox)
+            .where(TelegramOutbox.status == "pending", TelegramOutbox.next_attempt_at <= datetime.utcnow())
+            .order_by(TelegramOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        rows = list(result.scalars().all())
+        if not rows:
+            return 0
+        lease_until = datetime.utcnow() + timedelta(seconds=CLAIM_LEASE)
+        for row in rows:
+            row.next_attempt_at = lease_until
+        # Claimed: the row locks are released before anything is sent
+        await session.commit()
+        by_chat: Dict[Tuple[str, int], List[TelegramOutbox]] = {}
+        for row in rows:
+            by_chat.setdefault((row.bot, row.chat_id), []).append(row)
+        sem = asyncio.Semaphore(CONCURRENCY)
+        write_lock = asyncio.Lock()
+        await asyncio.gather(*(
+            self._deliver_chat(session, write_lock, chat_rows, sem) for chat_rows in by_chat.values()
+        ))
+        return len(rows)
+
+
+async def purge_sent_notifications(session: AsyncSession, days_to_keep: int = SENT_RETENTION_DAYS) -> int:
+    """Delete delivered outbox rows older than days_to_keep. Returns count deleted."""
+    cutoff = datetime.utcnow() - timedelta(days=days_to_keep)
+    result = await session.execute(
+        delete(TelegramOutbox).where(TelegramOutbox.status == "sent", TelegramOutbox.sent_at < cutoff)
+    )
+    return result.rowcount or 0
@@ -77,12 +77,14 @@ async def _daily_scheduler():
                     for sid, events in events_by_seller.items():
                         try:
                             _chat_id = await resolve_notification_chat_id(session, sid)
-                            await notify_seller_upcoming_events(_chat_id, events)
+                            await notify_seller_upcoming_events(session, _chat_id, events)
                         except Exception as e:
                             logger.error("Daily scheduler: notify failed", seller_id=sid, error=str(e))
                     if events_by_seller:
-                        logger.info("Daily scheduler: sent event notifications", sellers_count=len(events_by_seller))
+                        await session.commit()
+                        logger.info("Daily scheduler: queued event notifications", sellers_count=len(events_by_seller))
                 except Exception as e:
+                    await session.rollback()
                     logger.error("Daily scheduler: get_all_sellers_upcoming_events failed", error=str(e))
 
                 # 3. Auto-activate preorders whose delivery date is today
@@ -93,10 +95,10 @@ async def _daily_scheduler():
                     today_msk = datetime.now(tz=msk).date()
                     activated = await activate_due_preorders(session, today_msk)
                     if activated:
-                        await session.commit()
                         for a in activated:
                             try:
                                 await notify_buyer_order_status(
+                                    session,
                                     buyer_id=a["buyer_id"],
                                     order_id=a["order_id"],
                                     new_status="assembling",
@@ -106,6 +108,7 @@ async def _daily_scheduler():
                                 )
                             except Exception as e:
                                 logger.error("Preorder activation notify failed", order_id=a["order_id"], error=str(e))
+                        await session.commit()
                         logger.info("Daily scheduler: activated preorders", count=len(activated), date=str(today_msk))
                 except Exception as e:
                     await session.rollback()
@@ -144,6 +147,16 @@ async def _daily_scheduler():
                     await session.rollback()
                     logger.error("Daily scheduler: bouquet sync failed", error=str(e))
 
+                # 5b. Reconcile the public catalog snapshot (safety net for bulk DML)
+                try:
+                    from backend.app.services.catalog import rebuild_seller_catalog
+                    rebuilt = await rebuild_seller_catalog(session)
+                    await session.commit()
+                    logger.info("Daily scheduler: rebuilt seller catalog snapshot", sellers=rebuilt)
+                except Exception as e:
+                    await session.rollback()
+                    logger.error("Daily scheduler: catalog rebuild failed", error=str(e))
+
                 # 6. Expire overdue subscriptions and send expiry warnings
                 try:
                     from backend.app.services.subscription import SubscriptionService
@@ -155,22 +168,35 @@ async def _daily_scheduler():
                         logger.info("Daily scheduler: expired subscriptions", count=expired_count)
 
                     await sub_svc.check_expiring_subscriptions()
+                    await session.commit()
                 except Exception as e:
                     await session.rollback()
                     logger.error("Daily scheduler: subscription check failed", error=str(e))
 
-                # 7. Clean up old analytics events (keep 90 days)
+                # 7. Clean up old analytics events (keep 90 days), create upcoming partitions
                 try:
                     from backend.app.services.analytics import AnalyticsService
                     analytics_svc = AnalyticsService(session)
                     deleted = await analytics_svc.cleanup_old_events(days_to_keep=90)
+                    await analytics_svc.ensure_page_view_partitions()
+                    await session.commit()
                     if deleted > 0:
-                        await session.commit()
                         logger.info("Daily scheduler: cleaned old analytics events", count=deleted)
                 except Exception as e:
                     await session.rollback()
                     logger.error("Daily scheduler: analytics cleanup failed", error=str(e))
 
+                # 7b. Clean up delivered Telegram notifications
+                try:
+                    from backend.app.services.telegram_outbox import purge_sent_notifications
+                    purged = await purge_sent_notifications(session)
+                    if purged > 0:
+                        await session.commit()
+                        logger.info("Daily scheduler: purged sent notifications", count=purged)
+                except Exception as e:
+                    await session.rollback()
+                    logger.error("Daily scheduler: notification purge failed", error=str(e))
+
                 # 8. Clean up expired refresh tokens
                 try:
                     from backend.app.services.token_service import cleanup_expired_tokens
@@ -189,28 +215,103 @@ async def _daily_scheduler():
 async def _reservation_sweeper():
     """Background task: release expired stock reservations every 60 seconds."""
     from backend.app.core.database import async_session
-    from backend.app.services.reservations import ReservationService
+    from backend.app.services.reservations import ReservationService, SWEEP_CHUNK_SIZE
 
     while True:
         try:
             await asyncio.sleep(60)
             async with async_session() as session:
                 svc = ReservationService(session)
-                released = await svc.release_all_expired()
-                if released > 0:
+                # Short transaction per batch: product locks never outlive one batch
+                total = 0
+                while True:
+                    released = await svc.release_expired_batch(SWEEP_CHUNK_SIZE)
                     await session.commit()
-                    logger.info("Reservation sweeper: released expired reservations", count=released)
+                    total += released
+                    if released < SWEEP_CHUNK_SIZE:
+                        break
+                if total > 0:
+                    logger.info("Reservation sweeper: released expired reservations", count=total)
         except Exception as e:
             logger.error("Reservation sweeper error", error=str(e))
             await asyncio.sleep(10)
 
 
+async def _reservation_writeback():
+    """Background task (redis reservation backend): write hold totals to products every 15 seconds."""
+    from backend.app.core.database import async_session
+    from backend.app.services.reservations import ReservationService, BACKEND_REDIS
+
+    while True:
+        try:
+            await asyncio.sleep(15)
+            async with async_session() as session:
+                written = await ReservationService(session, backend=BACKEND_REDIS).sync_reserved_quantities()
+                if written > 0:
+                    await session.commit()
+        except Exception as e:
+            logger.error("Reservation write-back error", error=str(e))
+            await asyncio.sleep(10)
+
+
+async def _telegram_dispatcher(dispatcher):
+    """Background task: deliver queued Telegram notifications (telegram_outbox)."""
+    from backend.app.core.database import async_session
+    from backend.app.services.telegram_outbox import BATCH_SIZE
+
+    while True:
+        try:
+            async with async_session() as session:
+                handled = await dispatcher.dispatch_batch(session)
+            # Drain a backlog without pausing; poll once a second when idle
+            if handled < BATCH_SIZE:
+                await asyncio.sleep(1)
+        except Exception as e:
+            logger.error("Telegram dispatcher error", error=str(e))
+            await asyncio.sleep(5)
+
+
+async def _broadcast_runner(dispatcher):
+    """Background task: run queued subscriber broadcasts, resuming interrupted ones."""
+    from backend.app.core.database import async_session
+    from backend.app.services.broadcasts import run_pending_broadcasts
+
+    while True:
+        try:
+            async with async_session() as session:
+                await run_pending_broadcasts(session, dispatcher)
+            await asyncio.sleep(5)
+        except Exception as e:
+            logger.error("Broadcast runner error", error=str(e))
+            await asyncio.sleep(30)
+
+
+async def _analytics_drainer():
+    """Background task: load buffered /public/track events into page_views."""
+    from backend.app.core.database import async_session
+    from backend.app.services.cache import CacheService
+    from backend.app.services.analytics_ingest import drain_page_views, DRAIN_ENTRIES
+
+    while True:
+        try:
+            redis = await CacheService.get_redis()
+            async with async_session() as session:
+                drained = await drain_page_views(redis, session)
+            # Drain a backlog without pausing; poll once a second when idle
+            if drained < DRAIN_ENTRIES:
+                await asyncio.sleep(1)
+        except Exception as e:
+            logger.error("Analytics drainer error", error=str(e))
+            await asyncio.sleep(5)
+
+
 async def _analytics_aggregator():
-    """Background task: roll up page_views into daily_stats every hour."""
+    """Background task: fold new page_views and order counts into daily_stats every hour."""
     from datetime import datetime, timedelta
     from zoneinfo import ZoneInfo
     from backend.app.core.database import async_session
     from backend.app.services.analytics import AnalyticsService
+    from backend.app.services.sales_cube import SalesCubeService
 
     MSK = ZoneInfo("Europe/Moscow")
 
@@ -224,6 +325,14 @@ async def _analytics_aggregator():
     except Exception as e:
         logger.error("Analytics cleanup error", error=str(e))
 
+    # page_views partitions for the coming days (also refreshed by the daily scheduler)
+    try:
+        async with async_session() as session:
+            if await AnalyticsService(session).ensure_page_view_partitions():
+                await session.commit()
+    except Exception as e:
+        logger.error("Analytics partition setup error", error=str(e))
+
     while True:
         try:
             await asyncio.sleep(3600)
@@ -231,15 +340,39 @@ async def _analytics_aggregator():
                 svc = AnalyticsService(session)
                 today = datetime.now(MSK).date()
                 yesterday = today - timedelta(days=1)
-                await svc.rollup_daily_stats(yesterday)
-                await svc.rollup_daily_stats(today)
+                events = await svc.rollup_page_views()
+                await svc.rollup_order_counts(yesterday)
+                await svc.rollup_order_counts(today)
+                # Seller sales cube: recompute recent days (late status/price changes)
+                cube = SalesCubeService(session)
+                await cube.refresh_day(yesterday)
+                await cube.refresh_day(today)
                 await session.commit()
-                logger.info("Analytics aggregator: rolled up daily stats")
+                logger.info("Analytics aggregator: rolled up daily stats", events=events)
         except Exception as e:
             logger.error("Analytics aggregator error", error=str(e))
             await asyncio.sleep(60)
 
 
+async def _admin_dashboard_refresher():
+    """Background task: rebuild the shared admin dashboard snapshot."""
+    from backend.app.core.database import async_session
+    from backend.app.core.database_read_replica import read_replica_session, use_replica
+    from backend.app.services.cache import CacheService
+    from backend.app.services.admin_dashboard import refresh_admin_dashboard, REFRESH_INTERVAL
+
+    while True:
+        try:
+            cache = CacheService(await CacheService.get_redis())
+            factory = read_replica_session if await use_replica() else async_session
+            async with factory() as session:
+                await refresh_admin_dashboard(session, cache)
+            await asyncio.sleep(REFRESH_INTERVAL)
+        except Exception as e:
+            logger.error("Admin dashboard refresh error", error=str(e))
+            await asyncio.sleep(60)
+
+
 _shutdown_event = asyncio.Event()
 
 
@@ -253,21 +386,42 @@ async def main():
     for sig in (signal.SIGTERM, signal.SIGINT):
         loop.add_signal_handler(sig, _signal_handler)
 
+    from backend.app.services.catalog import install_catalog_sync
+    from backend.app.services.reservations import install_reservation_hooks
+    from backend.app.services.order_events import install_order_event_hooks
+    from backend.app.services.seller_auth_state import install_seller_auth_hooks
+    install_catalog_sync()
+    install_reservation_hooks()
+    install_order_event_hooks()
+    install_seller_auth_hooks()
+
     lock_conn = await _acquire_advisory_lock()
 
+    # One HTTP pool and rate limiter shared by notifications and broadcasts
+    from backend.app.services.telegram_outbox import OutboxDispatcher
+    dispatcher = OutboxDispatcher()
+
     tasks = [
         asyncio.create_task(_daily_scheduler()),
         asyncio.create_task(_reservation_sweeper()),
+        asyncio.create_task(_telegram_dispatcher(dispatcher)),
+        asyncio.create_task(_broadcast_runner(dispatcher)),
+        asyncio.create_task(_analytics_drainer()),
         asyncio.create_task(_analytics_aggregator()),
+        asyncio.create_task(_admin_dashboard_refresher()),
     ]
+    from backend.app.core.settings import get_settings
+    if get_settings().RESERVATION_BACKEND == "redis":
+        tasks.append(asyncio.create_task(_reservation_writeback()))
 
-    logger.info("Worker started, running 3 background tasks")
+    logger.info("Worker started", background_tasks=len(tasks))
 
     await _shutdown_event.wait()
 
     for t in tasks:
         t.cancel()
     await asyncio.gather(*tasks, return_exceptions=True)
+    await dispatcher.aclose()
 
     await lock_conn.close()
     logger.info("Worker stopped")
@@ -0,0 +1,27 @@
+"""Add analytics_watermarks.last_created_at (lower bound of the rollup scan)
+
+Revision ID: add_analytics_watermark_created_at
+Revises: add_orders_seller_feed_indexes
+Create Date: 2026-10-16
+
+Existing watermarks start without it: their next rollup scans by id only
+once and stores the bound.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_analytics_watermark_created_at'
+down_revision: Union[str, None] = 'add_orders_seller_feed_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('analytics_watermarks', sa.Column('last_created_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('analytics_watermarks', 'last_created_at')
@@ -0,0 +1,23 @@
+"""Add index on cart_items.reserved_at for the batched reservation sweeper
+
+Revision ID: add_cart_items_reserved_at_index
+Revises: add_seller_detail_versions
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_cart_items_reserved_at_index'
+down_revision: Union[str, None] = 'add_seller_detail_versions'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_cart_items_reserved_at', 'cart_items', ['reserved_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cart_items_reserved_at', table_name='cart_items')
@@ -0,0 +1,40 @@
+"""Add visitor sketches and watermarks for the incremental analytics rollup
+
+Revision ID: add_incremental_analytics_rollup
+Revises: add_notification_broadcasts
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_incremental_analytics_rollup'
+down_revision: Union[str, None] = 'add_notification_broadcasts'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'daily_visitor_sketches',
+        sa.Column('date', sa.Date(), primary_key=True),
+        sa.Column('seller_id', sa.BigInteger(), primary_key=True),
+        sa.Column('registers', sa.LargeBinary(), nullable=False),
+    )
+    op.create_index('ix_daily_visitor_sketches_seller_date', 'daily_visitor_sketches', ['seller_id', 'date'])
+    # No watermark row yet: the first rollup rebuilds view counters and sketches
+    # from the retained page_views, then continues incrementally.
+    op.create_table(
+        'analytics_watermarks',
+        sa.Column('name', sa.String(32), primary_key=True),
+        sa.Column('last_id', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analytics_watermarks')
+    op.drop_index('ix_daily_visitor_sketches_seller_date', table_name='daily_visitor_sketches')
+    op.drop_table('daily_visitor_sketches')
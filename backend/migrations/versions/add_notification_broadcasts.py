@@ -0,0 +1,48 @@
+"""Add notification_broadcasts and a (seller_id, buyer_id) index for subscriber streaming
+
+Revision ID: add_notification_broadcasts
+Revises: add_telegram_outbox
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_notification_broadcasts'
+down_revision: Union[str, None] = 'add_telegram_outbox'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'notification_broadcasts',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('audience', sa.String(32), nullable=False),
+        sa.Column('seller_id', sa.BigInteger(), nullable=True),
+        sa.Column('bot', sa.String(10), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('parse_mode', sa.String(16), nullable=True),
+        sa.Column('reply_markup', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(10), nullable=False, server_default='pending'),
+        sa.Column('cursor', sa.BigInteger(), nullable=True),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sent', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('blocked', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_notification_broadcasts_status', 'notification_broadcasts', ['status', 'id'])
+    op.create_index('ix_notification_broadcasts_seller', 'notification_broadcasts', ['seller_id', 'status'])
+    op.create_index('ix_favorite_seller_buyer', 'buyer_favorite_sellers', ['seller_id', 'buyer_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_favorite_seller_buyer', table_name='buyer_favorite_sellers')
+    op.drop_index('ix_notification_broadcasts_seller', table_name='notification_broadcasts')
+    op.drop_index('ix_notification_broadcasts_status', table_name='notification_broadcasts')
+    op.drop_table('notification_broadcasts')
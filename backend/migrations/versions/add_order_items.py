@@ -0,0 +1,78 @@
+"""Add order_items (structured order lines) and backfill them from orders.items_info
+
+Historical items_info strings are parsed here with the same patterns as
+core/item_parsing.py (kept inline so the migration does not change with the
+app), in pages of orders by id.
+
+Revision ID: add_order_items
+Revises: partition_page_views
+Create Date: 2026-10-16
+"""
+import re
+from decimal import Decimal
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_order_items'
+down_revision: Union[str, None] = 'partition_page_views'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_PAGE = 2000
+ITEMS_WITH_PRICE_RE = re.compile(r'(\d+):(.+?)@(\d+(?:\.\d+)?)\s*[x×]\s*(\d+)')
+ITEMS_LEGACY_RE = re.compile(r'(\d+):(.+?)\s*[x×]\s*(\d+)')
+
+
+def _parse(order_id: int, items_info: str) -> list:
+    matches = ITEMS_WITH_PRICE_RE.findall(items_info or "")
+    if matches:
+        return [
+            {"order_id": order_id, "product_id": int(pid), "name": name.strip()[:255],
+             "price": Decimal(price), "quantity": int(qty)}
+            for pid, name, price, qty in matches
+        ]
+    return [
+        {"order_id": order_id, "product_id": int(pid), "name": name.strip()[:255],
+         "price": None, "quantity": int(qty)}
+        for pid, name, qty in ITEMS_LEGACY_RE.findall(items_info or "")
+    ]
+
+
+def upgrade() -> None:
+    order_items = op.create_table(
+        'order_items',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('order_id', sa.Integer(), sa.ForeignKey('orders.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(255), nullable=False),
+        sa.Column('price', sa.DECIMAL(10, 2), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text("SELECT id, items_info FROM orders WHERE id > :last ORDER BY id LIMIT :n"),
+            {"last": last_id, "n": BACKFILL_PAGE},
+        ).all()
+        if not rows:
+            break
+        lines = [line for order_id, items_info in rows for line in _parse(order_id, items_info)]
+        if lines:
+            op.bulk_insert(order_items, lines)
+        last_id = rows[-1][0]
+
+    # Indexes after the bulk load
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'])
+    op.create_index('ix_order_items_product_order', 'order_items', ['product_id', 'order_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_order_items_product_order', table_name='order_items')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_table('order_items')
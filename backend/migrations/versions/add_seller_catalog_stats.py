@@ -0,0 +1,90 @@
+"""Add seller_catalog_stats snapshot table for the public seller listing
+
+Revision ID: add_seller_catalog_stats
+Revises: add_seller_applications
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_seller_catalog_stats'
+down_revision: Union[str, None] = 'add_seller_applications'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'seller_catalog_stats',
+        sa.Column('seller_id', sa.BigInteger(), nullable=False),
+        sa.Column('min_price', sa.DECIMAL(10, 2), nullable=True),
+        sa.Column('max_price', sa.DECIMAL(10, 2), nullable=True),
+        sa.Column('product_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('subscriber_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('min_delivery_price', sa.DECIMAL(10, 2), nullable=True),
+        sa.Column('geo_lat', sa.Float(), nullable=True),
+        sa.Column('geo_lon', sa.Float(), nullable=True),
+        sa.Column('delivery_type', sa.String(length=10), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.text('now()')),
+        sa.ForeignKeyConstraint(['seller_id'], ['sellers.seller_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('seller_id'),
+    )
+    op.create_index('ix_seller_catalog_stats_product_count', 'seller_catalog_stats', ['product_count'])
+    op.create_index('ix_seller_catalog_stats_geo', 'seller_catalog_stats', ['geo_lat', 'geo_lon'])
+
+    # Backfill: same aggregates as services/catalog.py::_snapshot_query
+    op.execute("""
+        INSERT INTO seller_catalog_stats (
+            seller_id, min_price, max_price, product_count, subscriber_count,
+            min_delivery_price, geo_lat, geo_lon, delivery_type, updated_at
+        )
+        SELECT
+            s.seller_id,
+            ps.min_price,
+            ps.max_price,
+            COALESCE(ps.product_count, 0),
+            COALESCE(fs.subscriber_count, 0),
+            dz.min_delivery_price,
+            COALESCE(s.geo_lat, m.geo_lat),
+            COALESCE(s.geo_lon, m.geo_lon),
+            CASE lower(trim(s.delivery_type))
+                WHEN 'delivery' THEN 'delivery'
+                WHEN 'доставка' THEN 'delivery'
+                WHEN 'pickup' THEN 'pickup'
+                WHEN 'самовывоз' THEN 'pickup'
+                WHEN 'both' THEN 'both'
+                WHEN 'доставка и самовывоз' THEN 'both'
+            END,
+            now()
+        FROM sellers s
+        LEFT JOIN metro_stations m ON m.id = s.metro_id
+        LEFT JOIN (
+            SELECT p.seller_id, min(p.price) AS min_price, max(p.price) AS max_price,
+                   count(p.id) AS product_count
+            FROM products p
+            LEFT JOIN categories c ON c.id = p.category_id
+            WHERE p.is_active AND p.quantity > 0
+              AND (p.category_id IS NULL OR NOT c.is_addon)
+            GROUP BY p.seller_id
+        ) ps ON ps.seller_id = s.seller_id
+        LEFT JOIN (
+            SELECT seller_id, count(id) AS subscriber_count
+            FROM buyer_favorite_sellers
+            GROUP BY seller_id
+        ) fs ON fs.seller_id = s.seller_id
+        LEFT JOIN (
+            SELECT seller_id, min(delivery_price) AS min_delivery_price
+            FROM delivery_zones
+            WHERE is_active
+            GROUP BY seller_id
+        ) dz ON dz.seller_id = s.seller_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_seller_catalog_stats_geo', table_name='seller_catalog_stats')
+    op.drop_index('ix_seller_catalog_stats_product_count', table_name='seller_catalog_stats')
+    op.drop_table('seller_catalog_stats')
@@ -0,0 +1,93 @@
+"""Add seller_daily_sales (per-seller daily sales cube) and backfill it from orders
+
+Revision ID: add_seller_daily_sales
+Revises: add_order_items
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_seller_daily_sales'
+down_revision: Union[str, None] = 'add_order_items'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    money = sa.DECIMAL(12, 2)
+    op.create_table(
+        'seller_daily_sales',
+        sa.Column('seller_id', sa.BigInteger(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('revenue', money, nullable=False, server_default='0'),
+        sa.Column('delivery_orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('delivery_revenue', money, nullable=False, server_default='0'),
+        sa.Column('pickup_orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('pickup_revenue', money, nullable=False, server_default='0'),
+        sa.Column('other_orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('other_revenue', money, nullable=False, server_default='0'),
+        sa.Column('buyers', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('new_buyers', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('buyer_revenue', money, nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('seller_id', 'day'),
+    )
+
+    # Same definitions as services/sales_cube.py: Moscow day of
+    # coalesce(completed_at, created_at), completed statuses only.
+    op.execute(sa.text("""
+        WITH completed AS (
+            SELECT
+                seller_id,
+                buyer_id,
+                total_price,
+                lower(trim(delivery_type)) AS dtype,
+                (coalesce(completed_at, created_at) AT TIME ZONE 'UTC' AT TIME ZONE 'Europe/Moscow')::date AS day
+            FROM orders
+            WHERE status IN ('done', 'completed')
+        ),
+        first_days AS (
+            SELECT seller_id, buyer_id, min(day) AS day
+            FROM completed
+            WHERE buyer_id IS NOT NULL
+            GROUP BY seller_id, buyer_id
+        ),
+        new_buyers AS (
+            SELECT seller_id, day, count(*) AS new_buyers
+            FROM first_days
+            GROUP BY seller_id, day
+        )
+        INSERT INTO seller_daily_sales (
+            seller_id, day, orders, revenue, delivery_orders, delivery_revenue,
+            pickup_orders, pickup_revenue, other_orders, other_revenue,
+            buyers, new_buyers, buyer_revenue, updated_at
+        )
+        SELECT
+            c.seller_id,
+            c.day,
+            count(*),
+            coalesce(sum(c.total_price), 0),
+            count(*) FILTER (WHERE c.dtype IN ('delivery', 'доставка')),
+            coalesce(sum(c.total_price) FILTER (WHERE c.dtype IN ('delivery', 'доставка')), 0),
+            count(*) FILTER (WHERE c.dtype IN ('pickup', 'самовывоз')),
+            coalesce(sum(c.total_price) FILTER (WHERE c.dtype IN ('pickup', 'самовывоз')), 0),
+            count(*) FILTER (WHERE c.dtype <> '' AND c.dtype NOT IN ('delivery', 'доставка', 'pickup', 'самовывоз')),
+            coalesce(sum(c.total_price) FILTER (
+                WHERE c.dtype <> '' AND c.dtype NOT IN ('delivery', 'доставка', 'pickup', 'самовывоз')
+            ), 0),
+            count(DISTINCT c.buyer_id),
+            coalesce(max(n.new_buyers), 0),
+            coalesce(sum(c.total_price) FILTER (WHERE c.buyer_id IS NOT NULL), 0),
+            now()
+        FROM completed c
+        LEFT JOIN new_buyers n ON n.seller_id = c.seller_id AND n.day = c.day
+        GROUP BY c.seller_id, c.day
+    """))
+
+
+def downgrade() -> None:
+    op.drop_table('seller_daily_sales')
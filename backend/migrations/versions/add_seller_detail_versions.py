@@ -0,0 +1,26 @@
+"""Add cache version counters to seller_catalog_stats for the seller detail cache
+
+Revision ID: add_seller_detail_versions
+Revises: add_seller_open_hours
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_seller_detail_versions'
+down_revision: Union[str, None] = 'add_seller_open_hours'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('seller_catalog_stats', sa.Column('static_version', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('seller_catalog_stats', sa.Column('stock_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('seller_catalog_stats', 'stock_version')
+    op.drop_column('seller_catalog_stats', 'static_version')
@@ -0,0 +1,52 @@
+"""Add seller_open_hours (flattened working_hours) for SQL-side open-now filtering
+
+Revision ID: add_seller_open_hours
+Revises: add_seller_catalog_stats
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_seller_open_hours'
+down_revision: Union[str, None] = 'add_seller_catalog_stats'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'seller_open_hours',
+        sa.Column('seller_id', sa.BigInteger(), nullable=False),
+        sa.Column('weekday', sa.Integer(), nullable=False),
+        sa.Column('open_time', sa.String(length=5), nullable=True),
+        sa.Column('close_time', sa.String(length=5), nullable=True),
+        sa.ForeignKeyConstraint(['seller_id'], ['sellers.seller_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('seller_id', 'weekday'),
+    )
+
+    # Backfill: same rules as services/catalog.py::open_hours_rows
+    # (null day = day off row; day with open+close = hours row; anything else = no row)
+    op.execute("""
+        INSERT INTO seller_open_hours (seller_id, weekday, open_time, close_time)
+        SELECT s.seller_id, d.key::int,
+               CASE WHEN json_typeof(d.value) = 'object' THEN d.value->>'open' END,
+               CASE WHEN json_typeof(d.value) = 'object' THEN d.value->>'close' END
+        FROM sellers s
+        CROSS JOIN LATERAL json_each(s.working_hours) AS d
+        WHERE s.working_hours IS NOT NULL
+          AND json_typeof(s.working_hours) = 'object'
+          AND d.key IN ('0', '1', '2', '3', '4', '5', '6')
+          AND (
+              json_typeof(d.value) = 'null'
+              OR (json_typeof(d.value) = 'object'
+                  AND coalesce(d.value->>'open', '') <> ''
+                  AND coalesce(d.value->>'close', '') <> '')
+          )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('seller_open_hours')
@@ -0,0 +1,40 @@
+"""Add telegram_outbox for transactional Telegram notifications
+
+Revision ID: add_telegram_outbox
+Revises: add_cart_items_reserved_at_index
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_telegram_outbox'
+down_revision: Union[str, None] = 'add_cart_items_reserved_at_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'telegram_outbox',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('chat_id', sa.BigInteger(), nullable=False),
+        sa.Column('bot', sa.String(10), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('parse_mode', sa.String(16), nullable=True),
+        sa.Column('reply_markup', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(10), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.String(500), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_telegram_outbox_due', 'telegram_outbox', ['status', 'next_attempt_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_telegram_outbox_due', table_name='telegram_outbox')
+    op.drop_table('telegram_outbox')
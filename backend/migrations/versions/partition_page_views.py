@@ -0,0 +1,143 @@
+"""Range-partition page_views by created_at (one partition per Moscow day)
+
+The existing table is converted without copying or long locks:
+1. outside a transaction, build the (id, created_at) unique index
+   concurrently and validate a CHECK that bounds created_at — neither
+   blocks inserts;
+2. in one short transaction, rename the table to page_views_legacy, create
+   the partitioned page_views with the same columns, sequence and indexes
+   and attach page_views_legacy as the partition for everything before
+   SPLIT (the validated CHECK lets ATTACH skip the scan), then create
+   daily partitions from SPLIT on and a DEFAULT partition, so an insert
+   past the last daily partition lands there instead of failing (the
+   partition job logs such rows as errors).
+
+Step 1 can be re-run after a failure: the CHECK is dropped and added again.
+
+page_views_legacy ages out through the regular retention job: rows past
+the cutoff are trimmed, and the partition is dropped once its upper bound
+falls behind the cutoff.
+
+Revision ID: partition_page_views
+Revises: add_incremental_analytics_rollup
+Create Date: 2026-10-16
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'partition_page_views'
+down_revision: Union[str, None] = 'add_incremental_analytics_rollup'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MSK = ZoneInfo("Europe/Moscow")
+DAYS_AHEAD = 14
+INDEXES = {
+    'ix_page_views_created_at': 'created_at',
+    'ix_page_views_event_created': 'event_type, created_at',
+    'ix_page_views_seller_created': 'seller_id, created_at',
+    'ix_page_views_product_created': 'product_id, created_at',
+}
+
+
+def _msk_midnight_utc(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=MSK).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# The legacy range ends two Moscow days ahead, so inserts during the migration satisfy the CHECK
+SPLIT_DAY = datetime.now(MSK).date() + timedelta(days=2)
+SPLIT = _msk_midnight_utc(SPLIT_DAY).isoformat(sep=' ')
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(sa.text("UPDATE page_views SET created_at = now() WHERE created_at IS NULL"))
+        op.execute(sa.text(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS page_views_legacy_id_created_key "
+            "ON page_views (id, created_at)"
+        ))
+        # A failed earlier run may have left the constraint (with an older SPLIT)
+        op.execute(sa.text("ALTER TABLE page_views DROP CONSTRAINT IF EXISTS page_views_legacy_bounds"))
+        op.execute(sa.text(
+            "ALTER TABLE page_views ADD CONSTRAINT page_views_legacy_bounds "
+            f"CHECK (created_at IS NOT NULL AND created_at < '{SPLIT}') NOT VALID"
+        ))
+        op.execute(sa.text("ALTER TABLE page_views VALIDATE CONSTRAINT page_views_legacy_bounds"))
+
+    op.execute(sa.text("LOCK TABLE page_views IN ACCESS EXCLUSIVE MODE"))
+    op.execute(sa.text("ALTER TABLE page_views RENAME TO page_views_legacy"))
+    op.execute(sa.text("ALTER INDEX page_views_pkey RENAME TO page_views_legacy_pkey"))
+    for name in INDEXES:
+        op.execute(sa.text(f"ALTER INDEX {name} RENAME TO {name.replace('ix_page_views', 'ix_page_views_legacy')}"))
+    # NOT NULL is implied by the validated CHECK, so no scan here
+    op.execute(sa.text("ALTER TABLE page_views_legacy ALTER COLUMN created_at SET NOT NULL"))
+    op.execute(sa.text(
+        "ALTER TABLE page_views_legacy ADD CONSTRAINT page_views_legacy_id_created_key "
+        "UNIQUE USING INDEX page_views_legacy_id_created_key"
+    ))
+
+    op.execute(sa.text("""
+        CREATE TABLE page_views (
+            id INTEGER NOT NULL DEFAULT nextval('page_views_id_seq'),
+            visitor_id BIGINT,
+            session_id VARCHAR(64) NOT NULL,
+            event_type VARCHAR(20) NOT NULL,
+            seller_id BIGINT,
+            product_id INTEGER,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT page_views_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """))
+    op.execute(sa.text("ALTER SEQUENCE page_views_id_seq OWNED BY page_views.id"))
+    op.execute(sa.text("ALTER TABLE page_views_legacy ALTER COLUMN id DROP DEFAULT"))
+    for name, columns in INDEXES.items():
+        op.execute(sa.text(f"CREATE INDEX {name} ON page_views ({columns})"))
+
+    op.execute(sa.text(
+        f"ALTER TABLE page_views ATTACH PARTITION page_views_legacy FOR VALUES FROM (MINVALUE) TO ('{SPLIT}')"
+    ))
+    op.execute(sa.text("ALTER TABLE page_views_legacy DROP CONSTRAINT page_views_legacy_bounds"))
+
+    for offset in range(DAYS_AHEAD + 1):
+        day = SPLIT_DAY + timedelta(days=offset)
+        lower = _msk_midnight_utc(day).isoformat(sep=' ')
+        upper = _msk_midnight_utc(day + timedelta(days=1)).isoformat(sep=' ')
+        op.execute(sa.text(
+            f"CREATE TABLE page_views_p{day:%Y%m%d} PARTITION OF page_views "
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        ))
+    op.execute(sa.text("CREATE TABLE page_views_default PARTITION OF page_views DEFAULT"))
+
+
+def downgrade() -> None:
+    # Offline: copies the retained events back into a plain table
+    op.execute(sa.text("ALTER TABLE page_views RENAME TO page_views_partitioned"))
+    op.execute(sa.text("ALTER INDEX page_views_pkey RENAME TO page_views_partitioned_pkey"))
+    for name in INDEXES:
+        op.execute(sa.text(f"ALTER INDEX {name} RENAME TO {name}_partitioned"))
+    op.execute(sa.text("""
+        CREATE TABLE page_views (
+            id INTEGER NOT NULL DEFAULT nextval('page_views_id_seq'),
+            visitor_id BIGINT,
+            session_id VARCHAR(64) NOT NULL,
+            event_type VARCHAR(20) NOT NULL,
+            seller_id BIGINT,
+            product_id INTEGER,
+            created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+            CONSTRAINT page_views_pkey PRIMARY KEY (id)
+        )
+    """))
+    op.execute(sa.text(
+        "INSERT INTO page_views (id, visitor_id, session_id, event_type, seller_id, product_id, created_at) "
+        "SELECT id, visitor_id, session_id, event_type, seller_id, product_id, created_at "
+        "FROM page_views_partitioned"
+    ))
+    op.execute(sa.text("ALTER SEQUENCE page_views_id_seq OWNED BY page_views.id"))
+    op.execute(sa.text("DROP TABLE page_views_partitioned CASCADE"))
+    for name, columns in INDEXES.items():
+        op.execute(sa.text(f"CREATE INDEX {name} ON page_views ({columns})"))
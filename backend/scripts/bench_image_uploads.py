@@ -0,0 +1,88 @@
+"""
+Event loop responsiveness during bulk image uploads: inline Pillow vs process pool.
+
+Converts N large photos concurrently, the way N simultaneous uploads would,
+while a probe task sleeps 10 ms in a loop and records how late it wakes up.
+Inline conversion blocks the loop for the whole batch; with the pool the
+probe keeps its schedule.
+
+Run from the repository root:
+  python -m backend.scripts.bench_image_uploads --uploads 16 --side 3000
+"""
+import argparse
+import asyncio
+import io
+import random
+import time
+
+from PIL import Image
+
+from backend.app.core.image_convert import convert_image_to_webp
+from backend.app.core.image_pool import ImagePool
+
+PROBE_INTERVAL = 0.01
+
+
+def make_photo(side: int) -> bytes:
+    """Noisy JPEG (compresses like a real photo, unlike a flat color)."""
+    img = Image.effect_noise((side, side * 3 // 4), 64).convert("RGB")
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+
+async def probe(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+
+async def run(mode: str, photos: list, pool: ImagePool) -> None:
+    lags: list = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+
+    async def upload(content: bytes) -> bytes:
+        if mode == "inline":
+            return convert_image_to_webp(content, 1200, force_square=True)
+        return await pool.convert_to_webp(content, 1200, force_square=True)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(upload(p) for p in photos))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    print(
+        f"{mode:>6}: {len(photos)} uploads in {elapsed:6.2f}s | "
+        f"loop lag max {max(lags) * 1000:8.1f} ms, p99 {p99 * 1000:8.1f} ms, "
+        f"probe ticks {len(lags)}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--uploads", type=int, default=16)
+    parser.add_argument("--side", type=int, default=3000, help="long side of the test photos, px")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    random.seed(0)
+    photos = [make_photo(args.side) for _ in range(args.uploads)]
+    print(f"{args.uploads} photos, {sum(map(len, photos)) / len(photos) / 1e6:.1f} MB each on average")
+
+    pool = ImagePool(workers=args.workers, max_pending=args.uploads, timeout=300)
+    try:
+        await pool.convert_to_webp(photos[0], 1200)  # start the worker processes
+        await run("inline", photos, pool)
+        await run("pool", photos, pool)
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -49,7 +49,7 @@ from backend.app.core.base import Base
 import backend.app.models.delivery_zone  # noqa: F401 — register DeliveryZone with Base.metadata
 import backend.app.models.category  # noqa: F401 — register Category with Base.metadata
 from backend.app.main import app
-from backend.app.api.deps import get_session, get_cache
+from backend.app.api.deps import get_session, get_read_session, get_cache
 from backend.app.services.cache import CacheService
 from backend.app.models.user import User
 from backend.app.models.seller import Seller, City, District, Metro
@@ -96,6 +96,18 @@ class MockCacheService:
     
     async def delete(self, key: str):
         self._cache.pop(key, None)
+
+    async def get_or_set(self, key: str, factory, ttl=None, namespace=None):
+        if namespace:
+            key = f"{namespace}:{key}"
+        if key not in self._cache:
+            self._cache[key] = await factory()
+        return self._cache[key]
+
+    async def invalidate_namespace(self, namespace: str):
+        for k in [k for k in self._cache if k.startswith(f"{namespace}:")]:
+            self._cache.pop(k, None)
+        return 1
     
     async def get_cities(self):
         return self._cache.get("cities:all")
@@ -132,6 +144,9 @@ class MockCacheService:
         for k in keys_to_remove:
             self._cache.pop(k, None)
 
+    async def invalidate_seller_details(self):
+        await self.invalidate_namespace("seller_detail")
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -187,6 +202,7 @@ async def client(
         yield mock_cache
     
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
     app.dependency_overrides[get_cache] = override_get_cache
     
     async with AsyncClient(
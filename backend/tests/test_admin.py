@@ -421,6 +421,45 @@ async def test_admin_stats_seller(client: AsyncClient, test_seller_user: User, t
     assert response.status_code == 200
 
 
+@pytest.mark.asyncio
+async def test_admin_dashboard_snapshot(
+    client: AsyncClient, test_session, mock_cache, test_user: User, test_seller: Seller,
+):
+    """Dashboard aggregates come from FILTER queries and are served as a shared snapshot."""
+    for status, price in [("done", 100), ("done", 300), ("pending", 50), ("assembling", 70), ("rejected", 20)]:
+        test_session.add(Order(
+            buyer_id=test_user.tg_id, seller_id=test_seller.seller_id, items_info="x",
+            total_price=price, status=status, delivery_type="pickup",
+        ))
+    await test_session.commit()
+
+    response = await client.get("/admin/dashboard", headers=admin_headers())
+    assert response.status_code == 200
+    data = response.json()
+    assert data["generated_at"]
+    assert data["today"]["orders"] == 5
+    assert data["today"]["revenue"] == 400
+    assert data["today"]["avg_check"] == 200
+    assert data["pipeline"]["pending"] == {"count": 1, "amount": 50}
+    assert data["pipeline"]["in_progress"] == {"count": 1, "amount": 70}
+    assert data["pipeline"]["in_transit"] == {"count": 0, "amount": 0}
+    assert data["pipeline"]["completed_today"] == {"count": 2, "amount": 400}
+    assert data["pipeline"]["rejected_today"] == {"count": 1, "amount": 20}
+    assert data["totals"] == {"sellers": 1, "buyers": 1, "orders": 5}
+    assert data["top_sellers_today"][0]["orders"] == 2
+    assert "admin_dashboard:snapshot" in mock_cache._cache
+
+    # Later orders are not visible until the snapshot is rebuilt
+    test_session.add(Order(
+        buyer_id=test_user.tg_id, seller_id=test_seller.seller_id, items_info="x",
+        total_price=10, status="pending", delivery_type="pickup",
+    ))
+    await test_session.commit()
+    again = (await client.get("/admin/dashboard", headers=admin_headers())).json()
+    assert again["totals"]["orders"] == 5
+    assert again["generated_at"] == data["generated_at"]
+
+
 # ============================================
 # CACHE INVALIDATION (admin.py)
 # ============================================
@@ -451,6 +490,22 @@ async def test_admin_cache_invalidate_cities(client: AsyncClient):
     assert data["invalidated"] == "cities"
 
 
+@pytest.mark.asyncio
+async def test_admin_cache_invalidate_seller_detail(client: AsyncClient, mock_cache):
+    """Test invalidating cached seller pages drops only that namespace."""
+    mock_cache._cache["seller_detail:1:static:v0"] = {"x": 1}
+    mock_cache._cache["cities:all"] = [{"id": 1}]
+    response = await client.post(
+        "/admin/cache/invalidate",
+        params={"cache_type": "seller_detail"},
+        headers=admin_headers(),
+    )
+    assert response.status_code == 200
+    assert response.json()["invalidated"] == "seller_detail"
+    assert "seller_detail:1:static:v0" not in mock_cache._cache
+    assert "cities:all" in mock_cache._cache
+
+
 @pytest.mark.asyncio
 async def test_admin_cache_invalidate_invalid_type(client: AsyncClient):
     """Test invalidating cache with invalid type."""
@@ -37,6 +37,125 @@ async def test_health_check(client: AsyncClient):
     assert "checks" in data
 
 
+@pytest.mark.asyncio
+async def test_read_replica_routing(client: AsyncClient, monkeypatch):
+    """Reads go to the replica only while it keeps up and the seller has not just written."""
+    import time
+    from backend.app.core import database_read_replica as replica
+
+    response = await client.get("/health")
+    assert response.json()["checks"]["database_replica"] == "not_configured"
+    assert await replica.use_replica() is False
+
+    monkeypatch.setattr(replica, "read_replica_engine", object())
+    monkeypatch.setattr(replica, "_lag_state", {"lag": 1.0, "checked_at": time.monotonic(), "error": None})
+    wrote = {42}
+
+    async def _wrote_recently(owner_id):
+        return owner_id in wrote
+
+    monkeypatch.setattr(replica, "_owner_wrote_recently", _wrote_recently)
+    assert await replica.use_replica() is True
+    assert await replica.use_replica(7) is True
+    assert await replica.use_replica(42) is False
+    assert await replica.replica_health() == "ok"
+
+    replica._lag_state["lag"] = replica.DB_REPLICA_MAX_LAG_SECONDS + 1
+    assert await replica.use_replica(7) is False
+    assert (await replica.replica_health()).startswith("lagging")
+
+    replica._lag_state.update(lag=None, error="connection refused")
+    assert await replica.use_replica() is False
+    assert await replica.replica_health() == "error: connection refused"
+
+
+@pytest.mark.asyncio
+async def test_track_seller_writes_pins_reads_to_primary(monkeypatch):
+    """After a seller-panel write, that network's reads go to the primary; other networks stay on the replica."""
+    import contextlib
+    import time
+    from starlette.requests import Request
+    from backend.app.api import deps
+    from backend.app.api.seller_auth import create_seller_token
+    from backend.app.core import database_read_replica as replica
+    from backend.app.services.cache import CacheService
+
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(CacheService, "_redis", redis)
+    monkeypatch.setattr(replica, "read_replica_engine", object())
+    monkeypatch.setattr(replica, "_lag_state", {"lag": 0.0, "checked_at": time.monotonic(), "error": None})
+
+    def _factory(name):
+        @contextlib.asynccontextmanager
+        async def factory():
+            yield name
+        return factory
+
+    monkeypatch.setattr(deps, "async_session", _factory("primary"))
+    monkeypatch.setattr(deps, "read_replica_session", _factory("replica"))
+
+    async def read_target(token):
+        gen = deps.get_read_session(token)
+        target = await gen.__anext__()
+        await gen.aclose()
+        return target
+
+    async def seller_request(method, token):
+        gen = deps.track_seller_writes(Request({"type": "http", "method": method, "headers": []}), token)
+        await gen.__anext__()
+        with pytest.raises(StopAsyncIteration):
+            await gen.__anext__()
+
+    writer = create_seller_token(11, owner_id=10, is_primary=False)
+    branch = create_seller_token(10, owner_id=10)
+    other = create_seller_token(20, owner_id=20)
+
+    await seller_request("GET", writer)
+    assert await read_target(writer) == "replica"
+
+    await seller_request("PUT", writer)
+    # The whole network (every branch of owner 10) reads from the primary
+    assert await read_target(writer) == "primary"
+    assert await read_target(branch) == "primary"
+    assert await read_target(other) == "replica"
+    assert 0 < await redis.ttl(replica.READ_YOUR_WRITES_KEY.format(owner_id=10)) <= replica.READ_YOUR_WRITES_TTL
+
+    # Once the marker expires the replica has caught up
+    await redis.delete(replica.READ_YOUR_WRITES_KEY.format(owner_id=10))
+    assert await read_target(writer) == "replica"
+
+
+@pytest.mark.asyncio
+async def test_db_query_instrumentation(monkeypatch):
+    """Statements are timed per fingerprint and route; slow ones are counted."""
+    from prometheus_client import REGISTRY
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from backend.app.core import db_instrumentation as dbi
+    from backend.app.core.metrics import current_route
+
+    assert dbi.fingerprint('SELECT o.id FROM "orders" o JOIN sellers s ON s.seller_id = o.seller_id') == "select orders"
+    assert dbi.fingerprint("UPDATE products SET quantity = quantity - $1") == "update products"
+    assert dbi.normalize_sql("SELECT *\n FROM t WHERE id IN (1, 2, 3) AND name = 'o''k'") == (
+        "SELECT * FROM t WHERE id IN (...) AND name = ?"
+    )
+
+    monkeypatch.setattr(dbi, "_engines", [])
+    engine = dbi.instrument_engine(create_async_engine("sqlite+aiosqlite://"), "test", slow_query_ms=0)
+    labels = {"query_type": "select", "route": "/test/{item_id}"}
+    before = REGISTRY.get_sample_value("db_slow_queries_total", labels) or 0
+    token = current_route.set("/test/{item_id}")
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    finally:
+        current_route.reset(token)
+        await engine.dispose()
+    assert REGISTRY.get_sample_value("db_query_duration_seconds_count", labels) >= 1
+    assert REGISTRY.get_sample_value("db_slow_queries_total", labels) == before + 1
+    dbi.export_pool_stats()  # pools without QueuePool stats are skipped
+
 @pytest.mark.asyncio
 async def test_metrics_endpoint(client: AsyncClient):
     """Test Prometheus metrics endpoint."""
@@ -60,3 +179,28 @@ async def test_rate_limiting(client: AsyncClient):
     # Should eventually get rate limited (429)
     # Note: This depends on rate limiter configuration
     assert 429 in responses or all(r == 401 for r in responses)
+
+
+@pytest.mark.asyncio
+async def test_http_metrics_use_route_templates(client: AsyncClient):
+    """Request metrics are labelled by route template, so ids and static files add no series."""
+    from prometheus_client import REGISTRY
+
+    def _count(endpoint, status_code):
+        return REGISTRY.get_sample_value(
+            "http_requests_total", {"method": "GET", "endpoint": endpoint, "status_code": status_code}
+        ) or 0
+
+    before = _count("/public/sellers/{seller_id}", "404")
+    static_before = _count("/static", "404")
+    for seller_id in (910001, 910002):
+        assert (await client.get(f"/public/sellers/{seller_id}")).status_code == 404
+    await client.get("/static/uploads/none-910003.webp")
+
+    assert _count("/public/sellers/{seller_id}", "404") == before + 2
+    assert _count("/static", "404") == static_before + 1
+    assert _count("/public/sellers/910001", "404") == 0
+    assert REGISTRY.get_sample_value(
+        "http_response_size_bytes_count", {"method": "GET", "endpoint": "/public/sellers/{seller_id}"}
+    ) >= 2
+    assert REGISTRY.get_sample_value("http_requests_in_progress", {"method": "GET"}) == 0
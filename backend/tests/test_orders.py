@@ -373,6 +373,127 @@ async def test_get_seller_order_stats(
     assert data["total_revenue"] == 300.0
 
 
+@pytest.mark.asyncio
+async def test_order_items_written_and_top_products(
+    client: AsyncClient,
+    test_session,
+    test_seller: Seller,
+    test_user: User,
+    test_product: Product,
+):
+    """Checkout writes order_items; top products are aggregated from them."""
+    from sqlalchemy import select
+    from backend.app.models.order import OrderItem
+
+    order_ids = []
+    for qty in (2, 3):
+        response = await client.post("/orders/create", json={
+            "buyer_id": test_user.tg_id,
+            "seller_id": test_seller.seller_id,
+            "items_info": f"{test_product.id}:Розы@150.00 x {qty}, 999:Лента@20 x 1",
+            "total_price": "500.00",
+            "delivery_type": "pickup",
+        })
+        assert response.status_code == 200
+        order_ids.append(response.json()["id"])
+
+    items = (await test_session.execute(
+        select(OrderItem).where(OrderItem.order_id == order_ids[0]).order_by(OrderItem.id)
+    )).scalars().all()
+    assert [(i.product_id, i.name, float(i.price), i.quantity) for i in items] == [
+        (test_product.id, "Розы", 150.0, 2), (999, "Лента", 20.0, 1),
+    ]
+
+    for order_id in order_ids:
+        order = await test_session.get(Order, order_id)
+        order.status = "done"
+    await test_session.commit()
+
+    response = await client.get(f"/orders/seller/{test_seller.seller_id}/stats")
+    top = response.json()["top_products"]
+    assert top[0] == {
+        "product_id": test_product.id, "product_name": "Розы",
+        "quantity_sold": 5, "order_count": 2, "revenue": 750.0,
+    }
+    assert top[1]["product_id"] == 999 and top[1]["quantity_sold"] == 2
+
+
+@pytest.mark.asyncio
+async def test_accept_order_deducts_bouquets_fifo(
+    client: AsyncClient,
+    test_session,
+    test_seller: Seller,
+    test_user: User,
+):
+    """Accepting a multi-bouquet order checks stock per flower and deducts oldest lots first."""
+    from datetime import date
+    from sqlalchemy import select
+    from backend.app.models.crm import Bouquet, BouquetItem, Flower, Reception, ReceptionItem
+
+    rose = Flower(seller_id=test_seller.seller_id, name="Роза")
+    tulip = Flower(seller_id=test_seller.seller_id, name="Тюльпан")
+    reception = Reception(seller_id=test_seller.seller_id, name="Поставка")
+    test_session.add_all([rose, tulip, reception])
+    await test_session.flush()
+    lots = [
+        ReceptionItem(reception_id=reception.id, flower_id=rose.id, quantity_initial=n, remaining_quantity=n,
+                      arrival_date=day, shelf_life_days=7, price_per_unit=price, sold_quantity=0, sold_amount=0)
+        for n, day, price in [(4, date(2026, 3, 2), 50), (3, date(2026, 3, 1), 40), (10, date(2026, 3, 3), 60)]
+    ] + [
+        ReceptionItem(reception_id=reception.id, flower_id=tulip.id, quantity_initial=5, remaining_quantity=5,
+                      arrival_date=date(2026, 3, 1), shelf_life_days=7, price_per_unit=30, sold_quantity=0, sold_amount=0)
+    ]
+    small = Bouquet(seller_id=test_seller.seller_id, name="Малый")
+    mixed = Bouquet(seller_id=test_seller.seller_id, name="Микс")
+    test_session.add_all(lots + [small, mixed])
+    await test_session.flush()
+    test_session.add_all([
+        BouquetItem(bouquet_id=small.id, flower_id=rose.id, quantity=3),
+        BouquetItem(bouquet_id=mixed.id, flower_id=rose.id, quantity=2),
+        BouquetItem(bouquet_id=mixed.id, flower_id=tulip.id, quantity=5),
+    ])
+    p_small = Product(seller_id=test_seller.seller_id, name="Малый", price=500, quantity=5, bouquet_id=small.id)
+    p_mixed = Product(seller_id=test_seller.seller_id, name="Микс", price=900, quantity=5, bouquet_id=mixed.id)
+    test_session.add_all([p_small, p_mixed])
+    await test_session.flush()
+
+    def _order(mixed_qty):
+        return Order(
+            buyer_id=test_user.tg_id, seller_id=test_seller.seller_id, status="pending",
+            items_info=f"{p_small.id}:Малый x 2, {p_mixed.id}:Микс x {mixed_qty}",
+            total_price=1900, delivery_type="pickup",
+        )
+
+    too_big, ok = _order(2), _order(1)
+    test_session.add_all([too_big, ok])
+    await test_session.commit()
+
+    # Roses: 2*3 + 2*2 = 10 of 17, but tulips: 2*5 = 10 of 5
+    response = await client.post(f"/orders/{too_big.id}/accept")
+    assert response.status_code == 400
+    assert "Тюльпан" in response.json()["detail"]
+
+    rose_id, tulip_id, small_id, mixed_id = rose.id, tulip.id, p_small.id, p_mixed.id
+    response = await client.post(f"/orders/{ok.id}/accept")
+    assert response.status_code == 200
+    test_session.expire_all()
+    remaining = {
+        (ri.flower_id, ri.arrival_date.day): (ri.remaining_quantity, ri.sold_quantity, float(ri.sold_amount))
+        for ri in (await test_session.execute(select(ReceptionItem))).scalars().all()
+    }
+    # Roses: 2*3 + 1*2 = 8 -> 3 from 1 March, 4 from 2 March, 1 from 3 March
+    assert remaining == {
+        (rose_id, 1): (0, 3, 120.0),
+        (rose_id, 2): (0, 4, 200.0),
+        (rose_id, 3): (9, 1, 60.0),
+        (tulip_id, 1): (0, 5, 150.0),
+    }
+    quantities = dict((await test_session.execute(
+        select(Product.id, Product.quantity).where(Product.id.in_([small_id, mixed_id]))
+    )).all())
+    assert quantities == {small_id: 3, mixed_id: 4}
+
+
 @pytest.mark.asyncio
 async def test_order_lifecycle(
     client: AsyncClient,
@@ -690,3 +690,233 @@ async def test_public_seller_detail_includes_per_type_slots(
     assert "pickup_remaining" in data
     assert data["delivery_remaining"] == 5  # 10 - (4+1)
     assert data["pickup_remaining"] == 20
+
+
+# --- Catalog Snapshot Tests ---
+
+@pytest.mark.asyncio
+async def test_catalog_snapshot_follows_product_stock(
+    client: AsyncClient,
+    test_session,
+    test_seller: Seller,
+    test_product: Product,
+):
+    """Seller leaves the public list when its last product sells out, and returns on restock."""
+    response = await client.get("/public/sellers")
+    seller = next(s for s in response.json()["sellers"] if s["seller_id"] == test_seller.seller_id)
+    assert seller["product_count"] == 1
+    assert seller["min_price"] == 100.0
+
+    test_product.quantity = 0
+    await test_session.commit()
+    response = await client.get("/public/sellers")
+    assert test_seller.seller_id not in [s["seller_id"] for s in response.json()["sellers"]]
+
+    test_product.quantity = 3
+    test_product.price = 250.0
+    await test_session.commit()
+    response = await client.get("/public/sellers")
+    seller = next(s for s in response.json()["sellers"] if s["seller_id"] == test_seller.seller_id)
+    assert seller["min_price"] == 250.0
+
+
+@pytest.mark.asyncio
+async def test_catalog_snapshot_subscribers_and_zones(
+    client: AsyncClient,
+    test_session,
+    test_seller: Seller,
+    test_product: Product,
+    test_user: User,
+):
+    """Subscriber count and min delivery price come from the snapshot and track writes."""
+    from backend.app.models.cart import BuyerFavoriteSeller
+    from backend.app.models.delivery_zone import DeliveryZone
+    from backend.app.services.cart import FavoriteSellersService
+
+    test_session.add(BuyerFavoriteSeller(buyer_id=test_user.tg_id, seller_id=test_seller.seller_id))
+    test_session.add(DeliveryZone(seller_id=test_seller.seller_id, name="Центр", delivery_price=0, is_active=True))
+    test_session.add(DeliveryZone(seller_id=test_seller.seller_id, name="Область", delivery_price=500, is_active=True))
+    await test_session.commit()
+
+    response = await client.get("/public/sellers", params={"free_delivery": True})
+    seller = next(s for s in response.json()["sellers"] if s["seller_id"] == test_seller.seller_id)
+    assert seller["subscriber_count"] == 1
+    assert seller["min_delivery_price"] == 0.0
+
+    # Bulk DELETE path refreshes explicitly
+    await FavoriteSellersService(test_session).remove(test_user.tg_id, test_seller.seller_id)
+    await test_session.commit()
+    response = await client.get("/public/sellers")
+    seller = next(s for s in response.json()["sellers"] if s["seller_id"] == test_seller.seller_id)
+    assert seller["subscriber_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_sellers_geo_uses_metro_fallback(
+    client: AsyncClient,
+    test_session,
+    test_seller: Seller,
+    test_product: Product,
+    test_metro: Metro,
+):
+    """Geo endpoint reads effective coordinates from the snapshot, including metro changes."""
+    test_seller.metro_id = test_metro.id
+    await test_session.commit()
+    response = await client.get("/public/sellers/geo")
+    assert test_seller.seller_id not in [s["seller_id"] for s in response.json()]
+
+    test_metro.geo_lat = 55.75
+    test_metro.geo_lon = 37.61
+    await test_session.commit()
+    response = await client.get("/public/sellers/geo")
+    item = next(s for s in response.json() if s["seller_id"] == test_seller.seller_id)
+    assert item["geo_lat"] == 55.75
+    assert item["delivery_type"] == "both"
+
+
+@pytest.mark.asyncio
+async def test_rebuild_seller_catalog(
+    test_session,
+    test_seller: Seller,
+    test_product: Product,
+):
+    """Full rebuild restores rows removed out-of-band."""
+    from sqlalchemy import delete, select
+    from backend.app.models.catalog import SellerCatalogStats
+    from backend.app.services.catalog import rebuild_seller_catalog
+
+    await test_session.execute(delete(SellerCatalogStats))
+    assert await rebuild_seller_catalog(test_session) == 1
+    row = (await test_session.execute(select(SellerCatalogStats))).scalar_one()
+    assert row.product_count == 1
+
+
+@pytest.mark.asyncio
+async def test_catalog_refresh_upserts_and_keeps_versions(
+    test_session,
+    test_seller: Seller,
+    test_product: Product,
+):
+    """Refresh updates rows in place: detail versions survive, dropped weekdays go away."""
+    from sqlalchemy import select, update
+    from backend.app.models.catalog import SellerCatalogStats, SellerOpenHours
+    from backend.app.services.catalog import refresh_seller_catalog
+
+    await test_session.execute(
+        update(SellerCatalogStats)
+        .where(SellerCatalogStats.seller_id == test_seller.seller_id)
+        .values(static_version=7)
+    )
+    test_seller.working_hours = {"0": {"open": "09:00", "close": "18:00"}, "6": None}
+    await test_session.commit()
+    test_seller.working_hours = {"0": {"open": "10:00", "close": "18:00"}}
+    await test_session.commit()
+    await refresh_seller_catalog(test_session, [test_seller.seller_id])
+    await test_session.commit()
+
+    row = (await test_session.execute(
+        select(SellerCatalogStats).where(SellerCatalogStats.seller_id == test_seller.seller_id)
+    )).scalar_one()
+    assert row.static_version == 7
+    assert row.product_count == 1
+    hours = (await test_session.execute(
+        select(SellerOpenHours.weekday, SellerOpenHours.open_time)
+        .where(SellerOpenHours.seller_id == test_seller.seller_id)
+    )).all()
+    assert [tuple(h) for h in hours] == [(0, "10:00")]
+
+
+@pytest.mark.asyncio
+async def test_public_sellers_cursor_pagination(
+    client: AsyncClient,
+    test_session,
+    test_city: City,
+    test_district: District,
+):
+    """Cursor pages are full, have no duplicates, and total excludes closed shops."""
+    for i in range(6):
+        test_session.add(User(tg_id=200000000 + i, username=f"cur{i}", fio=f"Cursor {i}", role="SELLER"))
+    await test_session.commit()
+    for i in range(6):
+        test_session.add(Seller(
+            seller_id=200000000 + i,
+            owner_id=200000000 + i,
+            shop_name=f"Cursor Shop {i}",
+            city_id=test_city.id,
+            district_id=test_district.id,
+            delivery_type="both",
+            max_orders=10,
+            active_orders=i % 3,
+            pending_requests=0,
+            is_blocked=False,
+            subscription_plan="active",
+            # Every second shop is on a day off all week
+            working_hours={str(d): None for d in range(7)} if i % 2 else None,
+        ))
+        test_session.add(Product(
+            seller_id=200000000 + i, name=f"P{i}", price=100 + (i // 2) * 10, quantity=5, is_active=True,
+        ))
+    await test_session.commit()
+
+    for params in ({}, {"sort_price": "asc"}, {"sort_price": "desc"}):
+        seen, cursor = [], None
+        while True:
+            query = {**params, "per_page": 2, **({"cursor": cursor} if cursor else {})}
+            data = (await client.get("/public/sellers", params=query)).json()
+            assert data["total"] == 3
+            seen += [s["seller_id"] for s in data["sellers"]]
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+            assert len(data["sellers"]) == 2
+        assert sorted(seen) == [200000000, 200000002, 200000004]
+
+    offset_page = (await client.get("/public/sellers", params={"per_page": 2, "page": 2})).json()
+    assert offset_page["total"] == 3 and len(offset_page["sellers"]) == 1
+
+    response = await client.get("/public/sellers", params={"cursor": "garbage"})
+    assert response.status_code == 400
+    response = await client.get("/public/sellers", params={"sort_mode": "all_city", "cursor": cursor or "x"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_seller_detail_cache_invalidated_by_writes(
+    client: AsyncClient,
+    test_session,
+    test_seller: Seller,
+    test_product: Product,
+    mock_cache,
+):
+    """Detail payload is cached under versioned keys; writes bump the version."""
+    from backend.app.models.category import Category
+
+    response = await client.get(f"/public/sellers/{test_seller.seller_id}")
+    assert response.json()["products"][0]["quantity"] == 10
+    stock_keys = [k for k in mock_cache._cache if ":stock:" in k]
+    assert len(stock_keys) == 1
+
+    # Stock write -> new stock key, static part reused
+    test_product.quantity = 3
+    await test_session.commit()
+    response = await client.get(f"/public/sellers/{test_seller.seller_id}")
+    assert response.json()["products"][0]["quantity"] == 3
+    assert len([k for k in mock_cache._cache if ":static:" in k]) == 1
+
+    # Reservation-only write (cart add) -> same stock key, no version bump
+    stock_keys = {k for k in mock_cache._cache if ":stock:" in k}
+    test_product.reserved_quantity = 1
+    await test_session.commit()
+    await client.get(f"/public/sellers/{test_seller.seller_id}")
+    assert {k for k in mock_cache._cache if ":stock:" in k} == stock_keys
+
+    # Category write -> both parts rebuilt, product moves to addons
+    category = Category(seller_id=test_seller.seller_id, name="Открытки", is_addon=True, is_active=True)
+    test_session.add(category)
+    await test_session.flush()
+    test_product.category_id = category.id
+    await test_session.commit()
+    data = (await client.get(f"/public/sellers/{test_seller.seller_id}")).json()
+    assert data["products"] == []
+    assert [p["id"] for p in data["addon_products"]] == [test_product.id]
+    assert [c["name"] for c in data["addon_categories"]] == ["Открытки"]
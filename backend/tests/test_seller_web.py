@@ -3,9 +3,10 @@ Tests for Seller Web Panel API endpoints and Seller Authentication.
 
 Tests cover:
 - Seller login (JWT auth)
-- Seller token validation (require_seller_token dependency)
+- Seller token validation (require_seller_token dependency, cached auth state)
 - Seller profile (/me) and update
 - Orders via web panel (list, accept, reject, status update, price update)
+- Subscriber broadcast (preorder notification)
 - Products CRUD via web panel
 - Stats and CSV export
 - Dashboard alerts
@@ -194,6 +195,35 @@ async def test_seller_endpoint_blocked_seller(
     assert response.status_code == 403
 
 
+@pytest.mark.asyncio
+async def test_seller_auth_state_cached_and_invalidated(
+    client: AsyncClient,
+    test_session,
+    test_seller: Seller,
+):
+    """Auth state is cached per seller; SellerService block/unblock invalidates it on commit."""
+    from sqlalchemy import update
+    from backend.app.services.sellers import SellerService
+    from backend.app.services.seller_auth_state import invalidate_seller_auth
+
+    headers = seller_headers(test_seller.seller_id)
+    assert (await client.get("/seller-web/me", headers=headers)).status_code == 200
+
+    # Bulk UPDATE bypasses the ORM hook: the cached state is still served
+    await test_session.execute(
+        update(Seller).where(Seller.seller_id == test_seller.seller_id).values(is_blocked=True)
+    )
+    await test_session.commit()
+    assert (await client.get("/seller-web/me", headers=headers)).status_code == 200
+    await invalidate_seller_auth([test_seller.seller_id])
+    assert (await client.get("/seller-web/me", headers=headers)).status_code == 403
+
+    await SellerService(test_session).block_seller(test_seller.seller_id, False)
+    assert (await client.get("/seller-web/me", headers=headers)).status_code == 200
+    await SellerService(test_session).soft_delete(test_seller.seller_id)
+    assert (await client.get("/seller-web/me", headers=headers)).status_code == 401
+
+
 # ============================================
 # SELLER PROFILE (/me)
 # ============================================
@@ -285,6 +315,86 @@ async def test_seller_get_orders_with_status(client: AsyncClient, test_seller: S
         assert order["status"] == "pending"
 
 
+@pytest.mark.asyncio
+async def test_seller_orders_feed_pages_and_changes(
+    client: AsyncClient, test_session, test_seller: Seller, test_user: User
+):
+    """Date filter in SQL, keyset pages via X-Next-Cursor, and the changes-since feed."""
+    base = datetime(2026, 3, 10, 12, 0)
+    orders = [
+        Order(
+            buyer_id=test_user.tg_id, seller_id=test_seller.seller_id, items_info="x", total_price=100,
+            status="done" if i % 2 else "pending", created_at=base + timedelta(days=i),
+            updated_at=base + timedelta(days=i),
+        )
+        for i in range(5)
+    ]
+    # Same created_at as the last one: the cursor must tie-break by id
+    orders.append(Order(
+        buyer_id=test_user.tg_id, seller_id=test_seller.seller_id, items_info="x", total_price=100,
+        status="pending", created_at=base + timedelta(days=4), updated_at=base,
+    ))
+    test_session.add_all(orders)
+    await test_session.commit()
+    expected = sorted(orders, key=lambda o: (o.created_at, o.id), reverse=True)
+    headers = seller_headers(test_seller.seller_id)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/seller-web/orders", params=params, headers=headers)
+        assert response.status_code == 200
+        seen += [o["id"] for o in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == [o.id for o in expected]
+
+    response = await client.get(
+        "/seller-web/orders",
+        params={"date_from": "2026-03-11", "date_to": "2026-03-13", "status": "done"},
+        headers=headers,
+    )
+    assert [o["id"] for o in response.json()] == [orders[3].id, orders[1].id]
+    response = await client.get("/seller-web/orders", params={"date_from": "10.03.2026"}, headers=headers)
+    assert response.status_code == 400
+
+    response = await client.get(
+        "/seller-web/orders/changes", params={"since": (base + timedelta(days=3)).isoformat()}, headers=headers
+    )
+    assert response.status_code == 200
+    feed = response.json()
+    assert [o["id"] for o in feed["orders"]] == [orders[3].id, orders[4].id]
+    assert feed["has_more"] is False
+
+    # A status change moves the order into the next poll
+    orders[0].status = "accepted"
+    await test_session.commit()
+    response = await client.get(
+        "/seller-web/orders/changes", params={"since": feed["next_since"]}, headers=headers
+    )
+    assert [o["id"] for o in response.json()["orders"]] == [orders[0].id]
+
+
+@pytest.mark.asyncio
+async def test_seller_orders_feed_paged_by_default(
+    client: AsyncClient, test_session, test_seller: Seller, test_user: User
+):
+    """Without limit the feed returns one default-size page, never the whole history."""
+    from backend.app.api.seller_web.orders import ORDERS_PAGE_SIZE
+
+    test_session.add_all([
+        Order(buyer_id=test_user.tg_id, seller_id=test_seller.seller_id, items_info="x",
+              total_price=100, status="done")
+        for _ in range(ORDERS_PAGE_SIZE + 1)
+    ])
+    await test_session.commit()
+    response = await client.get("/seller-web/orders", headers=seller_headers(test_seller.seller_id))
+    assert response.status_code == 200
+    assert len(response.json()) == ORDERS_PAGE_SIZE
+    assert response.headers.get("X-Next-Cursor")
+
+
 @pytest.mark.asyncio
 async def test_seller_get_order_by_id(client: AsyncClient, test_seller: Seller, test_order: Order):
     """Test getting specific order."""
@@ -371,6 +481,33 @@ async def test_seller_update_order_price(
     assert float(data.get("total_price", 0)) == 250.0
 
 
+@pytest.mark.asyncio
+async def test_seller_preorder_broadcast_queued(
+    client: AsyncClient,
+    test_session,
+    test_user: User,
+    test_seller: Seller,
+):
+    """Notifying subscribers queues one broadcast job; a second one is refused while it runs."""
+    from backend.app.models.cart import BuyerFavoriteSeller
+    test_session.add(BuyerFavoriteSeller(buyer_id=test_user.tg_id, seller_id=test_seller.seller_id))
+    await test_session.commit()
+    headers = seller_headers(test_seller.seller_id)
+
+    response = await client.post("/seller-web/preorder-notify-subscribers", json={"message": "Скоро 8 марта"}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "pending"
+    assert data["total_subscribers"] == 1
+
+    again = await client.post("/seller-web/preorder-notify-subscribers", json={}, headers=headers)
+    assert again.status_code == 409
+
+    progress = await client.get(f"/seller-web/preorder-notify-subscribers/{data['broadcast_id']}", headers=headers)
+    assert progress.status_code == 200
+    assert progress.json()["sent"] == 0
+
+
 # ============================================
 # SELLER PRODUCTS (via web panel)
 # ============================================
@@ -536,6 +673,61 @@ async def test_seller_get_stats_with_dates(client: AsyncClient, test_seller: Sel
     assert response.status_code == 200
 
 
+@pytest.mark.asyncio
+async def test_seller_stats_from_sales_cube(
+    client: AsyncClient, test_session, test_seller: Seller, test_user: User,
+):
+    """Completion refreshes the daily sales cube; /stats reads totals and series from it."""
+    from backend.app.models.analytics import SellerDailySales
+    from backend.app.services.orders import OrderService
+    from backend.app.services.sales_cube import SalesCubeService
+
+    day1 = datetime(2026, 3, 10, 9, 0)  # 12:00 MSK
+    day2 = datetime(2026, 3, 12, 9, 0)
+    orders = [
+        Order(buyer_id=test_user.tg_id, seller_id=test_seller.seller_id, items_info="1:Розы x 1",
+              total_price=100, status="done", delivery_type="delivery", created_at=day1, completed_at=day1),
+        Order(buyer_id=test_user.tg_id, seller_id=test_seller.seller_id, items_info="1:Розы x 1",
+              total_price=300, status="accepted", delivery_type="pickup", created_at=day2),
+        Order(buyer_id=None, seller_id=test_seller.seller_id, items_info="1:Розы x 1",
+              total_price=50, status="done", delivery_type=None, created_at=day2, completed_at=day2),
+    ]
+    test_session.add_all(orders)
+    await test_session.flush()
+    cube = SalesCubeService(test_session)
+    await cube.refresh_day(day1.date())
+    await cube.refresh_day(day2.date())
+    await test_session.commit()
+
+    # Completing the accepted order refreshes its cell (completion day)
+    orders[1].completed_at = day2
+    await OrderService(test_session).update_status(orders[1].id, "done")
+    await test_session.commit()
+
+    cell = await test_session.get(SellerDailySales, (test_seller.seller_id, day2.date()))
+    assert (cell.orders, float(cell.revenue), cell.buyers, cell.new_buyers) == (2, 350.0, 1, 0)
+
+    response = await client.get(
+        "/seller-web/stats",
+        params={"date_from": "2026-03-11", "date_to": "2026-03-12"},
+        headers=seller_headers(test_seller.seller_id),
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_completed_orders"] == 2
+    assert data["total_revenue"] == 350.0
+    assert data["daily_sales"] == [
+        {"date": "2026-03-11", "orders": 0, "revenue": 0.0},
+        {"date": "2026-03-12", "orders": 2, "revenue": 350.0},
+    ]
+    assert data["delivery_breakdown"]["pickup"] == {"orders": 1, "revenue": 300.0}
+    assert data["delivery_breakdown"]["unknown"] == {"orders": 1, "revenue": 50.0}
+    assert data["previous_period_orders"] == 1  # 2026-03-09..10
+    assert data["orders_by_status"] == {"done": 2}
+    assert data["filters"] == {"date_from": "2026-03-11", "date_to": "2026-03-12", "period": "custom"}
+    assert await cube.average_ltv(test_seller.seller_id) == 400.0
+
+
 @pytest.mark.asyncio
 async def test_seller_export_stats_csv(client: AsyncClient, test_seller: Seller):
     """Test exporting seller stats as CSV."""
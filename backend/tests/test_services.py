@@ -8,6 +8,11 @@ Tests cover:
 - Password utilities (hashing, verification, validation)
 - Phone normalization
 - Referral commissions (disabled, kept as no-op tests)
+- Reservation sweeper (set-based batches)
+- Cache codec and TTL policies, in-process L1 cache
+- Telegram outbox dispatcher (rate limits, retries), resumable broadcasts
+- Incremental analytics rollup (watermark, HyperLogLog visitor sketches)
+- Order event bus (publish after commit, per-worker fan-out, SSE resume)
 """
 import pytest
 from decimal import Decimal
@@ -793,6 +798,686 @@ class TestBouquetCostCalculation:
         assert _can_assemble_count(stock, items) == 0
 
 
+# ============================================
+# RESERVATION SWEEPER
+# ============================================
+
+@pytest.mark.asyncio
+async def test_release_expired_batch_set_based(
+    test_session: AsyncSession, test_user: User, test_seller_user: User, test_seller: Seller, test_product: Product
+):
+    """Expired reservations are released in bounded batches; preorders and fresh holds are untouched."""
+    from datetime import date, datetime, timedelta
+    from sqlalchemy import select
+    from backend.app.services.reservations import ReservationService
+
+    expired_at = datetime.utcnow() - timedelta(hours=1)
+    product_id, fresh_buyer_id = test_product.id, test_seller_user.tg_id
+    test_product.reserved_quantity = 4
+    item = dict(seller_id=test_seller.seller_id, product_id=test_product.id, name="x", price=100)
+    test_session.add_all([
+        CartItem(buyer_id=test_user.tg_id, quantity=3, reserved_at=expired_at, **item),
+        CartItem(buyer_id=test_seller_user.tg_id, quantity=1, reserved_at=datetime.utcnow(), **item),
+        CartItem(buyer_id=test_user.tg_id, quantity=5, reserved_at=expired_at, is_preorder=True,
+                 preorder_delivery_date=date.today(), **item),
+    ])
+    await test_session.commit()
+
+    svc = ReservationService(test_session)
+    assert await svc.release_expired_batch(limit=1) == 1
+    assert await svc.release_expired_batch(limit=1) == 1
+    assert await svc.release_expired_batch(limit=1) == 0
+    await test_session.commit()
+
+    reserved = (await test_session.execute(
+        select(Product.reserved_quantity).where(Product.id == product_id)
+    )).scalar_one()
+    assert reserved == 1
+    remaining = (await test_session.execute(select(CartItem.buyer_id))).scalars().all()
+    assert remaining == [fresh_buyer_id]
+
+
+# ============================================
+# REDIS RESERVATION BACKEND
+# ============================================
+
+@pytest.fixture
+def fake_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # Lua scripting in fakeredis
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.mark.asyncio
+async def test_redis_reservation_store_holds(fake_redis, monkeypatch):
+    """Lua holds: reserve caps at stock, release/extend per buyer, totals purge expired holds."""
+    from backend.app.services import reservations_redis
+    from backend.app.services.reservations_redis import RedisReservationStore
+
+    clock = [1000.0]
+    monkeypatch.setattr(reservations_redis.time, "time", lambda: clock[0])
+    store = RedisReservationStore(fake_redis, ttl_seconds=60)
+
+    assert await store.reserve(1, 101, 3, stock=5) == (True, 2)
+    assert await store.reserve(1, 102, 3, stock=5) == (False, 2)
+    assert await store.reserve(1, 102, 2, stock=5) == (True, 0)
+    assert await store.totals([1, 2]) == {1: 5, 2: 0}
+
+    assert await store.release(1, 101, 10) == 3  # capped at the buyer's hold
+    assert await store.release(1, 101, 1) == 0
+    assert await store.totals([1]) == {1: 2}
+
+    # Buyer 102 keeps the hold alive past the original TTL
+    clock[0] += 50
+    assert await store.extend(1, 102, 2, stock=5) is True
+    clock[0] += 50
+    assert await store.totals([1]) == {1: 2}
+
+    # Expired holds free their stock and leave the active set
+    clock[0] += 61
+    assert await store.totals([1]) == {1: 0}
+    assert [c async for c in store.iter_active(10)] == []
+    # Re-reserve on extend of an expired hold only within stock
+    assert await store.extend(1, 102, 6, stock=5) is False
+    assert await store.extend(1, 102, 5, stock=5) is True
+
+    # Scripts touch several products and the active set: one Cluster slot for all keys
+    from redis.crc import key_slot
+    keys = [*reservations_redis._keys(1), *reservations_redis._keys(2), reservations_redis.ACTIVE_KEY]
+    assert len({key_slot(k.encode()) for k in keys}) == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_reservation_store_stock_cap_race(fake_redis):
+    """Concurrent reserves never hold more than stock."""
+    import asyncio
+    from backend.app.services.reservations_redis import RedisReservationStore
+
+    store = RedisReservationStore(fake_redis, ttl_seconds=60)
+    results = await asyncio.gather(*(store.reserve(7, buyer, 1, stock=3) for buyer in range(20)))
+    assert sum(ok for ok, _ in results) == 3
+    assert await store.totals([7]) == {7: 3}
+
+
+@pytest.mark.asyncio
+async def test_redis_reservation_backend_release_and_writeback(
+    test_session: AsyncSession, test_product: Product, test_user: User, fake_redis, monkeypatch
+):
+    """Releases wait for commit (rollback keeps the hold); write-back clears stale reserved_quantity."""
+    import asyncio
+    from sqlalchemy import select
+    from backend.app.services import reservations
+    from backend.app.services.cache import CacheService
+    from backend.app.services.reservations import BACKEND_REDIS, ReservationService
+
+    async def get_redis():
+        return fake_redis
+
+    monkeypatch.setattr(CacheService, "get_redis", staticmethod(get_redis))
+    product_id, seller_id, buyer_id = test_product.id, test_product.seller_id, test_user.tg_id
+    svc = ReservationService(test_session, backend=BACKEND_REDIS)
+    store = await svc._redis_store()
+
+    await svc.reserve_stock(product_id, 4, buyer_id)
+    await svc.release_stock(product_id, 4, buyer_id)
+    await test_session.rollback()
+    await asyncio.gather(*reservations._release_tasks)
+    assert await store.totals([product_id]) == {product_id: 4}
+
+    await svc.release_stock(product_id, 3, buyer_id)
+    assert await store.totals([product_id]) == {product_id: 4}  # not before commit
+    await test_session.commit()
+    await asyncio.gather(*reservations._release_tasks)
+    assert await store.totals([product_id]) == {product_id: 1}
+
+    # Stale value from the postgres backend on a product Redis knows nothing about
+    other = Product(seller_id=seller_id, name="Old", price=10, quantity=5, reserved_quantity=2)
+    test_session.add(other)
+    await test_session.flush()
+    other_id = other.id
+    await test_session.commit()
+    assert await svc.sync_reserved_quantities(chunk_size=1) == 2
+    await test_session.commit()
+    rows = dict((await test_session.execute(select(Product.id, Product.reserved_quantity))).all())
+    assert rows == {product_id: 1, other_id: 0}
+
+
+# ============================================
+# CACHE CODEC / POLICIES
+# ============================================
+
+class TestCacheCodec:
+    """Test cache value codec and namespace TTL policies."""
+
+    def test_json_roundtrip(self):
+        """JSON-encoded values carry a marker and decode back."""
+        from backend.app.services.cache import encode_value, decode_value
+        value = {"name": "Розы", "ids": [1, 2], "price": 10.5}
+        data = encode_value(value)
+        assert data[:1] == b"j"
+        assert decode_value(data) == value
+
+    def test_msgpack_falls_back_to_json_when_missing(self):
+        """msgpack codec round-trips whether or not msgpack is installed."""
+        from backend.app.services import cache
+        value = {"products": [{"id": 1}], "ok": True}
+        data = cache.encode_value(value, codec="msgpack")
+        assert data[:1] == (b"m" if cache.msgpack is not None else b"j")
+        assert cache.decode_value(data) == value
+
+    def test_legacy_plain_json(self):
+        """Values written before codec markers are still readable."""
+        from backend.app.services.cache import decode_value
+        assert decode_value('[{"id": 1}]') == [{"id": 1}]
+        assert decode_value(None) is None
+
+    def test_policy_jitter_bounds(self):
+        """expire_in stays within ttl .. ttl * (1 + jitter)."""
+        from backend.app.services.cache import CachePolicy
+        policy = CachePolicy(ttl=100, jitter=0.1)
+        for _ in range(50):
+            assert 100 <= policy.expire_in() <= 110
+        assert CachePolicy(ttl=60).expire_in(30) == 30
+
+
+class TestLocalCache:
+    """Test in-process L1 cache (TTL, LRU bound, pub/sub invalidation messages)."""
+
+    def test_hit_and_expiry(self):
+        from backend.app.services.local_cache import LocalCache
+        cache = LocalCache()
+        cache.set("cities", "all", [{"id": 1}], ttl=60)
+        assert cache.get("cities", "all") == [{"id": 1}]
+        cache.set("cities", "all", [{"id": 1}], ttl=0)
+        assert cache.get("cities", "all") is None
+        assert len(cache) == 0
+
+    def test_lru_bound(self):
+        from backend.app.services.local_cache import LocalCache
+        cache = LocalCache(max_entries=2)
+        cache.set("metro", 1, "a", ttl=60)
+        cache.set("metro", 2, "b", ttl=60)
+        cache.get("metro", 1)  # 1 is now most recently used
+        cache.set("metro", 3, "c", ttl=60)
+        assert cache.get("metro", 2) is None
+        assert cache.get("metro", 1) == "a"
+        assert cache.get("metro", 3) == "c"
+
+    def test_apply_invalidation_message(self):
+        from backend.app.services.local_cache import LocalCache
+        cache = LocalCache()
+        cache.set("districts", "city:1", ["d1"], ttl=60)
+        cache.set("districts", "city:2", ["d2"], ttl=60)
+        cache.set("metro", "district:1", ["m1"], ttl=60)
+        cache.apply_invalidation(LocalCache.invalidation_message("districts", "city:1").encode())
+        assert cache.get("districts", "city:1") is None
+        assert cache.get("districts", "city:2") == ["d2"]
+        cache.apply_invalidation(LocalCache.invalidation_message("districts"))
+        assert cache.get("districts", "city:2") is None
+        assert cache.get("metro", "district:1") == ["m1"]
+        cache.apply_invalidation(b"garbage")
+        assert len(cache) == 0
+
+
+# ============================================
+# TELEGRAM OUTBOX
+# ============================================
+
+@pytest.mark.asyncio
+async def test_telegram_outbox_dispatch(test_session: AsyncSession):
+    """Notifications are queued in the session and delivered by the dispatcher with retry rules."""
+    import json
+    import httpx
+    from sqlalchemy import select
+    from backend.app.models.notification import TelegramOutbox
+    from backend.app.services.telegram_notify import notify_buyer_order_status, notify_subscriber_preorder_opened
+    from backend.app.services.telegram_outbox import OutboxDispatcher
+
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        calls.append(payload)
+        chat_id = payload["chat_id"]
+        if chat_id == 1002:
+            return httpx.Response(429, json={"ok": False, "parameters": {"retry_after": 1}})
+        if chat_id == 1003:
+            return httpx.Response(403, json={"ok": False, "description": "bot was blocked by the user"})
+        if chat_id == 1004 and "parse_mode" in payload:
+            return httpx.Response(400, json={"ok": False, "description": "can't parse entities"})
+        return httpx.Response(200, json={"ok": True})
+
+    assert await notify_buyer_order_status(test_session, 1001, 1, "accepted", seller_id=5)
+    for chat_id in (1002, 1002, 1003, 1004):
+        assert await notify_subscriber_preorder_opened(test_session, chat_id, "Shop", seller_id=5)
+    assert not await notify_subscriber_preorder_opened(test_session, None, "Shop", seller_id=5)
+    await test_session.commit()
+    assert calls == []
+
+    dispatcher = OutboxDispatcher(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)), rate=1000, chat_interval=0,
+    )
+    try:
+        assert await dispatcher.dispatch_batch(test_session) == 5
+        await test_session.commit()
+    finally:
+        await dispatcher.aclose()
+
+    rows = (await test_session.execute(select(TelegramOutbox).order_by(TelegramOutbox.id))).scalars().all()
+    assert [(r.chat_id, r.status, r.attempts) for r in rows] == [
+        (1001, "sent", 1),
+        (1002, "pending", 1),   # 429: retried after retry_after
+        (1002, "pending", 0),   # held back to keep per-chat order
+        (1003, "failed", 1),    # 403 is permanent
+        (1004, "sent", 1),      # 400 with parse_mode: resent as plain text
+    ]
+    assert rows[2].next_attempt_at == rows[1].next_attempt_at
+    assert len([c for c in calls if c["chat_id"] == 1002]) == 1
+
+
+@pytest.mark.asyncio
+async def test_telegram_outbox_claims_and_commits_per_message(test_session: AsyncSession):
+    """Rows are leased before sending, each outcome is committed at once, and a chat gets CHAT_BATCH per batch."""
+    from datetime import datetime
+    import httpx
+    import json
+    from sqlalchemy import select
+    from backend.app.models.notification import TelegramOutbox
+    from backend.app.services.telegram_outbox import CHAT_BATCH, OutboxDispatcher
+    from backend.tests.conftest import TestSessionLocal
+
+    test_session.add_all([TelegramOutbox(chat_id=3002, text=f"m{i}") for i in range(3)])
+    await test_session.commit()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        if payload["chat_id"] == 3002 and payload["text"] == "m1":
+            raise RuntimeError("worker crashed")
+        return httpx.Response(200, json={"ok": True})
+
+    dispatcher = OutboxDispatcher(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)), rate=1000, chat_interval=0,
+    )
+    try:
+        with pytest.raises(RuntimeError):
+            await dispatcher.dispatch_batch(test_session)
+
+        # What a fresh worker sees: the delivered row stays sent, the rest wait for their lease
+        async with TestSessionLocal() as fresh:
+            rows = (await fresh.execute(select(TelegramOutbox).order_by(TelegramOutbox.id))).scalars().all()
+        assert [r.status for r in rows] == ["sent", "pending", "pending"]
+        assert all(r.next_attempt_at > datetime.utcnow() for r in rows[1:])
+
+        test_session.add_all([TelegramOutbox(chat_id=3001, text=f"m{i}") for i in range(CHAT_BATCH + 2)])
+        await test_session.commit()
+        assert await dispatcher.dispatch_batch(test_session) == CHAT_BATCH + 2
+    finally:
+        await dispatcher.aclose()
+
+    async with TestSessionLocal() as fresh:
+        rows = (await fresh.execute(
+            select(TelegramOutbox).where(TelegramOutbox.chat_id == 3001).order_by(TelegramOutbox.id)
+        )).scalars().all()
+    assert [r.status for r in rows] == ["sent"] * CHAT_BATCH + ["pending"] * 2
+    assert all(r.attempts == 0 and r.next_attempt_at <= datetime.utcnow() for r in rows[CHAT_BATCH:])
+
+
+@pytest.mark.asyncio
+async def test_subscriber_broadcast_resumes_and_counts(test_session: AsyncSession, test_seller: Seller):
+    """Broadcast streams subscribers in chunks, resumes from its cursor and counts sent/failed/blocked."""
+    import httpx
+    import json
+    from backend.app.models.cart import BuyerFavoriteSeller
+    from backend.app.services.broadcasts import create_subscriber_broadcast, run_pending_broadcasts
+    from backend.app.services.telegram_outbox import OutboxDispatcher
+
+    buyer_ids = [2001, 2002, 2003, 2004, 2005]
+    for buyer_id in buyer_ids:
+        test_session.add(User(tg_id=buyer_id, fio=f"Buyer {buyer_id}", role="BUYER"))
+        test_session.add(BuyerFavoriteSeller(buyer_id=buyer_id, seller_id=test_seller.seller_id))
+    await test_session.commit()
+
+    broadcast = await create_subscriber_broadcast(test_session, test_seller.seller_id, "<b>Предзаказы открыты</b>")
+    assert broadcast.total == 5
+    # As if a previous worker committed the first chunk and then crashed
+    broadcast.status, broadcast.cursor, broadcast.sent = "running", 2002, 2
+    await test_session.commit()
+
+    sent_to = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        chat_id = json.loads(request.content)["chat_id"]
+        sent_to.append(chat_id)
+        if chat_id == 2003:
+            return httpx.Response(403, json={"ok": False, "description": "bot was blocked by the user"})
+        if chat_id == 2004:
+            return httpx.Response(400, json={"ok": False, "description": "chat not found"})
+        return httpx.Response(200, json={"ok": True})
+
+    dispatcher = OutboxDispatcher(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)), rate=1000, chat_interval=0,
+    )
+    try:
+        assert await run_pending_broadcasts(test_session, dispatcher) == 1
+    finally:
+        await dispatcher.aclose()
+
+    # 2004 fails twice: with parse_mode, then as plain text
+    assert sorted(set(sent_to)) == [2003, 2004, 2005]
+    assert (broadcast.status, broadcast.cursor) == ("done", 2005)
+    assert (broadcast.sent, broadcast.failed, broadcast.blocked) == (3, 1, 1)
+    assert await create_subscriber_broadcast(test_session, 999, "x") is None
+
+
+# ============================================
+# ANALYTICS ROLLUP
+# ============================================
+
+class TestHyperLogLog:
+    """Test the mergeable distinct-count sketch used for unique visitors."""
+
+    def test_estimate_and_merge(self):
+        from backend.app.core.hll import HyperLogLog
+        small = HyperLogLog()
+        small.update(["a", "b", "a", "c"])
+        assert small.count() == 3
+
+        a, b = HyperLogLog(), HyperLogLog()
+        a.update(f"s{i}" for i in range(20000))
+        b.update(f"s{i}" for i in range(10000, 30000))
+        assert abs(a.count() - 20000) < 20000 * 0.05
+        a.merge(HyperLogLog.from_bytes(b.to_bytes()))
+        assert abs(a.count() - 30000) < 30000 * 0.05
+
+
+@pytest.mark.asyncio
+async def test_analytics_rollup_incremental(test_session: AsyncSession, test_seller: Seller, test_order: Order):
+    """Only page_views above the watermark are folded in; uniques merge across runs."""
+    from datetime import datetime, timedelta
+    from backend.app.models.analytics import PageView
+    from backend.app.services.analytics import ROLLUP_SLACK, AnalyticsService, _msk_date
+
+    seen_at = datetime.utcnow() - timedelta(minutes=10)
+    day = _msk_date(seen_at)
+    sid = test_seller.seller_id
+
+    def views(*specs):
+        return [PageView(session_id=s, event_type=e, seller_id=sid, created_at=seen_at) for s, e in specs]
+
+    test_session.add_all(views(("s1", "shop_view"), ("s1", "product_view"), ("s2", "shop_view")))
+    test_session.add(PageView(session_id="s3", event_type="app_open", created_at=seen_at))
+    # Too fresh: it (and everything after it) is left for the next run
+    fresh = PageView(session_id="s9", event_type="app_open", created_at=datetime.utcnow())
+    test_session.add(fresh)
+    await test_session.commit()
+
+    svc = AnalyticsService(test_session)
+    assert await svc.rollup_page_views() == 4
+    await test_session.commit()
+    assert await svc.rollup_page_views() == 0
+
+    test_session.add_all(views(("s2", "product_view"), ("s4", "shop_view")))
+    fresh.created_at = seen_at
+    # Acked late (buffered for days): still above the watermark, so still folded in
+    test_session.add(PageView(session_id="s5", event_type="app_open", created_at=seen_at - timedelta(days=3)))
+    await test_session.commit()
+    assert await svc.rollup_page_views() == 4
+    # Dated before the scan's lower bound (newest folded - ROLLUP_SLACK): kept, not folded
+    test_session.add(PageView(
+        session_id="s6", event_type="app_open", created_at=seen_at - ROLLUP_SLACK - timedelta(days=1),
+    ))
+    await test_session.commit()
+    assert await svc.rollup_page_views() == 0
+    await svc.rollup_order_counts(_msk_date(test_order.created_at))
+    await test_session.commit()
+
+    seller = await svc.get_seller_analytics(sid, day, day)
+    assert seller["summary"]["shop_views"] == 3
+    assert seller["summary"]["product_views"] == 2
+    assert seller["summary"]["unique_visitors"] == 3  # s1, s2, s4
+    platform = await svc.get_platform_analytics(day, day)
+    assert platform["summary"]["unique_visitors"] == 5  # + s3, s9 without a seller
+    assert platform["daily"][0]["unique_visitors"] == 5
+    assert platform["summary"]["orders_placed"] == (1 if _msk_date(test_order.created_at) == day else 0)
+
+
+@pytest.mark.asyncio
+async def test_page_view_retention_and_partition_bounds(test_session: AsyncSession):
+    """Partitions span Moscow days; retention removes events before the cutoff day."""
+    from datetime import date, datetime, timedelta
+    from sqlalchemy import select
+    from backend.app.models.analytics import PageView
+    from backend.app.services.analytics import AnalyticsService, _partition_ddl
+
+    assert _partition_ddl(date(2026, 3, 2)) == (
+        "CREATE TABLE IF NOT EXISTS page_views_p20260302 PARTITION OF page_views "
+        "FOR VALUES FROM ('2026-03-01 21:00:00') TO ('2026-03-02 21:00:00')"
+    )
+
+    now = datetime.utcnow()
+    test_session.add_all([
+        PageView(session_id="old", event_type="app_open", created_at=now - timedelta(days=100)),
+        PageView(session_id="new", event_type="app_open", created_at=now - timedelta(days=1)),
+    ])
+    await test_session.commit()
+    svc = AnalyticsService(test_session)
+    assert await svc.ensure_page_view_partitions() == 0  # not partitioned on SQLite
+    assert await svc.cleanup_old_events(days_to_keep=90) == 1
+    await test_session.commit()
+    left = (await test_session.execute(select(PageView.session_id))).scalars().all()
+    assert left == ["new"]
+
+
+@pytest.mark.asyncio
+async def test_page_view_buffer_load_and_spill(test_session: AsyncSession, monkeypatch):
+    """Buffered batches load with their ack time; without Redis events are written directly."""
+    from datetime import datetime
+    from redis.exceptions import ConnectionError as RedisConnectionError
+    from sqlalchemy import select
+    from backend.app.models.analytics import PageView
+    from backend.app.services import analytics_ingest
+    from backend.app.services.cache import CacheService
+
+    events = [
+        {"event_type": "shop_view", "seller_id": 7},
+        {"event_type": "bogus"},
+        {"event_type": "product_view", "seller_id": 7, "product_id": 3},
+    ]
+    acked = datetime(2026, 3, 1, 12, 0, 0).timestamp()
+    payload, count = analytics_ingest.encode_batch("s1", 42, events, ts=acked)
+    assert count == 2
+    assert analytics_ingest.encode_batch("s1", None, [{"event_type": "bogus"}]) == (None, 0)
+
+    assert await analytics_ingest.load_page_views(test_session, [payload.encode(), b"not json"]) == 2
+    await test_session.commit()
+    rows = (await test_session.execute(select(PageView).order_by(PageView.id))).scalars().all()
+    assert [(r.session_id, r.visitor_id, r.event_type, r.product_id) for r in rows] == [
+        ("s1", 42, "shop_view", None), ("s1", 42, "product_view", 3),
+    ]
+    assert rows[0].created_at == datetime.utcfromtimestamp(acked)
+
+    async def _down():
+        raise RedisConnectionError("down")
+
+    monkeypatch.setattr(CacheService, "get_redis", _down)
+    await analytics_ingest.ingest_page_views(test_session, "s2", None, events)
+    await test_session.commit()
+    spilled = (await test_session.execute(
+        select(PageView.event_type).where(PageView.session_id == "s2").order_by(PageView.id)
+    )).scalars().all()
+    assert spilled == ["shop_view", "product_view"]
+
+
+@pytest.mark.asyncio
+async def test_business_counters_per_seller_without_prometheus_labels(
+    test_session: AsyncSession, test_seller, test_user,
+):
+    """Order creation counts per seller in the accumulator; Prometheus only sees platform totals."""
+    from prometheus_client import REGISTRY
+    from backend.app.services import business_metrics
+    from backend.app.services.business_metrics import SellerCounters, seller_counters, ORDERS_CREATED
+    from backend.app.services.orders import OrderService
+
+    before = REGISTRY.get_sample_value("orders_created_total", {"status": "pending"}) or 0
+    seller_counters.drain()
+    await OrderService(test_session).create_order(
+        buyer_id=test_user.tg_id, seller_id=test_seller.seller_id,
+        items_info="1:Roses x 1", total_price=100, delivery_type="pickup",
+    )
+    assert REGISTRY.get_sample_value("orders_created_total", {"status": "pending"}) == before + 1
+    day = business_metrics.current_day()
+    assert seller_counters.pending(day) == {test_seller.seller_id: {ORDERS_CREATED: 1}}
+
+    counters = SellerCounters()
+    counters.add(7, ORDERS_CREATED, day=day)
+    counters.add(7, ORDERS_CREATED, day=day)
+    deltas = counters.drain()
+    assert deltas == {(day, 7, ORDERS_CREATED): 2} and len(counters) == 0
+    counters.restore(deltas)  # failed flush keeps the deltas
+    assert counters.pending(day, 7) == {7: {ORDERS_CREATED: 2}}
+    seller_counters.drain()
+
+
+# ============================================
+# ORDER EVENTS
+# ============================================
+
+@pytest.mark.asyncio
+async def test_order_events_published_after_commit_only(
+    test_session: AsyncSession, test_seller, test_user, monkeypatch,
+):
+    """Transitions queue events on the session; commit publishes them, rollback drops them."""
+    import asyncio
+    from backend.app.services import order_events
+    from backend.app.services.orders import OrderService
+
+    published = []
+
+    async def _publish(events):
+        published.extend(events)
+
+    monkeypatch.setattr(order_events, "publish_order_events", _publish)
+    service = OrderService(test_session)
+    order = await service.create_order(
+        buyer_id=test_user.tg_id, seller_id=test_seller.seller_id,
+        items_info="1:Roses x 1", total_price=100, delivery_type="pickup",
+    )
+    order_id = order.id
+    assert published == []
+    await test_session.commit()
+    await asyncio.sleep(0)
+    assert [(e["type"], e["order_id"], e["status"]) for e in published] == [
+        ("order.created", order_id, "pending"),
+    ]
+
+    published.clear()
+    await service.reject_order(order_id)
+    await test_session.rollback()
+    await asyncio.sleep(0)
+    assert published == []
+
+    await service.accept_order(order_id)
+    await test_session.commit()
+    await asyncio.sleep(0)
+    assert [(e["type"], e["status"], e["old_status"]) for e in published] == [
+        ("order.status", "accepted", "pending"),
+    ]
+
+
+class _FakeStreamRedis:
+    """XRANGE/XREVRANGE/XINFO STREAM over an in-memory list of (id, fields)."""
+
+    def __init__(self, entries, trimmed=0):
+        self.entries = entries
+        self.trimmed = trimmed
+
+    async def xinfo_stream(self, key):
+        return {"length": len(self.entries), "entries-added": len(self.entries) + self.trimmed}
+
+    async def xrevrange(self, key, max="+", min="-", count=None):
+        return list(reversed(self.entries))[:count]
+
+    async def xrange(self, key, min="-", max="+", count=None):
+        from backend.app.services.order_events import _id_key
+        if min.startswith("("):
+            after = _id_key(min[1:])
+            rows = [e for e in self.entries if _id_key(e[0]) > after]
+        else:
+            rows = list(self.entries)
+        return rows[:count]
+
+
+@pytest.mark.asyncio
+async def test_order_event_stream_replays_then_follows_hub():
+    """Last-Event-ID replays missed entries; live events come from the hub for the right scope only."""
+    import json
+    from backend.app.services.order_events import OrderEventHub, seller_scope, stream_order_events
+
+    def entry(event_id, order_id):
+        return (event_id, {"data": json.dumps({"type": "order.created", "order_id": order_id})})
+
+    redis = _FakeStreamRedis([entry("1-0", 1), entry("2-0", 2), entry("3-0", 3)])
+    hub = OrderEventHub()
+    stream = stream_order_events(redis, seller_scope(5), "orders:events:5", "1-0", hub=hub)
+    assert (await stream.__anext__()).startswith("retry:")
+    assert (await stream.__anext__()).startswith("id: 2-0\n")
+    assert (await stream.__anext__()).startswith("id: 3-0\n")
+
+    def message(event_id, scope, order_id):
+        return json.dumps({"ids": {scope: event_id}, "event": {"type": "order.status", "order_id": order_id}})
+
+    hub.dispatch(message("4-0", seller_scope(6), 40))   # other seller
+    hub.dispatch(message("3-0", seller_scope(5), 3))    # already replayed
+    hub.dispatch(message("5-0", seller_scope(5), 50))
+    chunk = await stream.__anext__()
+    assert chunk.startswith("id: 5-0\nevent: order.status\n") and '"order_id": 50' in chunk
+    await stream.aclose()
+    assert not hub._subscriptions
+
+    # Resuming from an id older than the trimmed stream asks the client to resync
+    stream = stream_order_events(redis, seller_scope(5), "orders:events:5", "0-5", hub=hub)
+    await stream.__anext__()
+    assert (await stream.__anext__()).startswith("event: resync")
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_order_event_stream_from_empty_stream_resyncs_only_after_trimming():
+    """A client that connected to an empty stream replays on reconnect without a spurious resync."""
+    import asyncio
+    import json
+    from backend.app.services.order_events import OrderEventHub, seller_scope, stream_order_events
+
+    def entry(event_id, order_id):
+        return (event_id, {"data": json.dumps({"type": "order.created", "order_id": order_id})})
+
+    redis = _FakeStreamRedis([])
+    hub = OrderEventHub()
+    stream = stream_order_events(redis, seller_scope(5), "orders:events:5", hub=hub)
+    assert (await stream.__anext__()).startswith("retry:")
+
+    pending = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0.01)  # waiting for live events from "0-0"
+    # Events arrive while the listener is reconnecting, then every subscription replays
+    redis.entries += [entry("7-0", 7), entry("8-0", 8)]
+    hub.mark_all_stale()
+    assert (await pending).startswith("id: 7-0\n")
+    assert (await stream.__anext__()).startswith("id: 8-0\n")
+    await stream.aclose()
+
+    # Trimmed while the client was away: it did miss events and must refetch
+    redis = _FakeStreamRedis([])
+    stream = stream_order_events(redis, seller_scope(5), "orders:events:5", hub=hub)
+    await stream.__anext__()
+    pending = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0.01)
+    redis.entries, redis.trimmed = [entry("1009-0", 1009)], 1008
+    hub.mark_all_stale()
+    assert (await pending).startswith("event: resync")
+    assert (await stream.__anext__()).startswith("id: 1009-0\n")
+    await stream.aclose()
+
+
 # ============================================
 # PRODUCT COST/MARKUP SCHEMA
 # ============================================
@@ -111,3 +111,105 @@ async def test_upload_banner_invalid_file(
         assert response.status_code == 400
     finally:
         app.dependency_overrides.pop(require_seller_token, None)
+
+
+@pytest.mark.asyncio
+async def test_upload_banner_pool_saturated(
+    client: AsyncClient,
+    test_seller: Seller,
+    tmp_path,
+    monkeypatch,
+):
+    """Пул конвертации занят — 429 с Retry-After, файл не сохраняется."""
+    from backend.app.core.image_pool import get_image_pool
+
+    monkeypatch.setattr("backend.app.api.seller_web.uploads.UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(get_image_pool(), "max_pending", 0)
+
+    async def override_seller_token():
+        return test_seller.seller_id
+
+    app.dependency_overrides[require_seller_token] = override_seller_token
+    try:
+        response = await client.post(
+            "/seller-web/upload-banner",
+            files={"file": ("banner.png", _make_png_bytes(), "image/png")},
+        )
+        assert response.status_code == 429
+        assert response.headers.get("retry-after") == "5"
+        assert not any(tmp_path.rglob("*.webp"))
+    finally:
+        app.dependency_overrides.pop(require_seller_token, None)
+
+
+@pytest.mark.asyncio
+async def test_upload_product_photo_variants_deduplicated(
+    client: AsyncClient,
+    test_seller: Seller,
+    tmp_path,
+    monkeypatch,
+):
+    """Фото товара: набор размеров под хэшем содержимого; повторная загрузка тех же байт — тот же photo_id."""
+    from backend.app.services import product_images
+
+    monkeypatch.setattr("backend.app.api.seller_web.uploads.UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(product_images, "UPLOAD_DIR", tmp_path)
+    convert_calls = []
+    pool = product_images.get_image_pool()
+    original_convert = pool.convert_variants
+
+    async def counting_convert(*args, **kwargs):
+        convert_calls.append(1)
+        return await original_convert(*args, **kwargs)
+
+    monkeypatch.setattr(pool, "convert_variants", counting_convert)
+
+    async def override_seller_token():
+        return test_seller.seller_id
+
+    app.dependency_overrides[require_seller_token] = override_seller_token
+    try:
+        png = _make_png_bytes(1600, 1000)
+        first = await client.post(
+            "/seller-web/upload-photo",
+            files={"file": ("photo.png", png, "image/png")},
+        )
+        assert first.status_code == 200
+        data = first.json()
+        digest = product_images.photo_digest(png)
+        assert data["photo_id"] == f"/static/uploads/products/{digest}/1200.webp"
+        # A 1000 px square source: the 1200 file is 1000 px wide and is listed as such
+        assert set(data["photo_variants"]["webp"]) == {"160", "400", "800", "1000"}
+        assert data["photo_variants"]["webp"]["400"].endswith(f"{digest}/400.webp")
+        assert data["photo_variants"]["webp"]["1000"].endswith(f"{digest}/1200.webp")
+        assert ("avif" in data["photo_variants"]) == product_images.avif_enabled()
+
+        stored = tmp_path / "uploads" / "products" / digest
+        assert Image.open(stored / "160.webp").size == (160, 160)
+        assert Image.open(stored / "1200.webp").size == (1000, 1000)
+        assert not list(stored.glob("*.tmp"))
+
+        second = await client.post(
+            "/seller-web/upload-photo",
+            files={"file": ("again.png", png, "image/png")},
+        )
+        assert second.status_code == 200
+        assert second.json()["photo_id"] == data["photo_id"]
+        assert len(convert_calls) == 1
+
+        # An interrupted write (files but no manifest) is converted again, not reused
+        (stored / product_images.MANIFEST_NAME).unlink()
+        (stored / "160.webp").unlink()
+        third = await client.post(
+            "/seller-web/upload-photo",
+            files={"file": ("again.png", png, "image/png")},
+        )
+        assert third.status_code == 200
+        assert len(convert_calls) == 2
+        assert (stored / "160.webp").exists()
+
+        # Старые photo_id (uuid.webp, file_id Telegram) вариантов не имеют
+        assert product_images.photo_variants("/static/uploads/products/abc.webp") is None
+        assert product_images.photo_variants(None) is None
+    finally:
+        app.dependency_overrides.pop(require_seller_token, None)
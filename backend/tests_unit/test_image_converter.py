@@ -10,7 +10,9 @@ from PIL import Image
 
 from backend.app.core.image_convert import (
     validate_image_content,
+    avif_supported,
     convert_image_to_webp,
+    convert_image_variants,
     crop_to_square,
 )
 
@@ -150,3 +152,64 @@ def test_convert_image_to_webp_force_square_already_square():
     out = convert_image_to_webp(png, max_side_px=1200, force_square=True)
     img = Image.open(io.BytesIO(out))
     assert img.size == (500, 500)
+
+
+def test_convert_image_variants_sizes_without_upscaling():
+    """Every width gets a square WebP; widths above the source keep the source size."""
+    png = _png_bytes(1000, 700)
+    out = convert_image_variants(png, (160, 400, 1200), force_square=True, avif=avif_supported())
+    sizes = {name: Image.open(io.BytesIO(data)).size for name, data in out.items()}
+    assert sizes["160.webp"] == (160, 160)
+    assert sizes["400.webp"] == (400, 400)
+    assert sizes["1200.webp"] == (700, 700)
+    if avif_supported():
+        assert sizes["400.avif"] == (400, 400)
+    else:
+        assert not any(name.endswith(".avif") for name in out)
+    with pytest.raises(ValueError):
+        convert_image_variants(b"not an image" * 10, (160,))
+
+
+# --- ImagePool (process pool off the event loop) ---
+
+
+def _slow_identity(value, delay):
+    import time
+    time.sleep(delay)
+    return value
+
+
+@pytest.mark.asyncio
+async def test_image_pool_converts_in_worker_process():
+    """Conversion runs in the pool and returns the same WebP as inline conversion."""
+    from backend.app.core.image_pool import ImagePool
+
+    pool = ImagePool(workers=1, max_pending=2, timeout=30)
+    try:
+        out = await pool.convert_to_webp(_png_bytes(2400, 1600), max_side_px=1200, force_square=True)
+        assert Image.open(io.BytesIO(out)).size == (1200, 1200)
+        with pytest.raises(ValueError):
+            await pool.convert_to_webp(b"not an image" * 10, max_side_px=1200)
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_image_pool_backpressure_and_timeout():
+    """Beyond max_pending calls are rejected; a timed-out job still counts until it ends."""
+    import asyncio
+    from backend.app.core.image_pool import ImagePool, ImagePoolBusy, ImagePoolError
+
+    pool = ImagePool(workers=0, max_pending=1, timeout=0.05)
+    try:
+        with pytest.raises(ImagePoolError):
+            await pool.run(_slow_identity, 1, 0.3)
+        assert pool.saturated
+        with pytest.raises(ImagePoolBusy):
+            await pool.run(_slow_identity, 2, 0)
+        await asyncio.sleep(0.4)
+        assert pool.pending == 0
+        pool.timeout = 5
+        assert await pool.run(_slow_identity, 3, 0) == 3
+    finally:
+        pool.shutdown()
@@ -262,6 +262,18 @@ class ApiClient {
     return url;
   }
 
+  /** srcset из вариантов фото товара ({ "160": path, ... } → "url 160w, ..."), undefined если вариантов нет */
+  getProductImageSrcSet(variants: Record<string, string> | null | undefined): string | undefined {
+    if (!variants) return undefined;
+    const parts = Object.entries(variants)
+      .map(([width, path]) => {
+        const url = this.getProductImageUrl(path);
+        return url ? `${url} ${width}w` : null;
+      })
+      .filter((part): part is string => part !== null);
+    return parts.length ? parts.join(', ') : undefined;
+  }
+
   private async fetch<T>(endpoint: string, options?: RequestInit): Promise<T> {
     const url = `${this.getBaseUrl()}${endpoint}`;
     console.log('[API] Fetching:', url);
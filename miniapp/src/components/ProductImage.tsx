@@ -1,4 +1,6 @@
 import { useState } from 'react';
+import { api } from '../api/client';
+import type { PhotoVariants } from '../types';
 
 interface ProductImageProps {
   src: string | null;
@@ -6,8 +8,15 @@ interface ProductImageProps {
   className?: string;
   placeholderClassName?: string;
   placeholderIconClassName?: string;
+  /** Размеры фото (photo_variants с бэкенда): браузер выберет подходящий по sizes */
+  variants?: PhotoVariants | null;
+  /** Ширина картинки на экране для выбора варианта, например "50vw" */
+  sizes?: string;
 }
 
+/** sizes для сеток товаров: 2 колонки, с 700px — 3, с 1024px — 4 */
+export const PRODUCT_GRID_SIZES = '(min-width: 1024px) 25vw, (min-width: 700px) 33vw, 50vw';
+
 /** Показывает фото товара или плейсхолдер, если src пустой или картинка не загрузилась */
 export function ProductImage({
   src,
@@ -15,6 +24,8 @@ export function ProductImage({
   className,
   placeholderClassName,
   placeholderIconClassName,
+  variants,
+  sizes = '100vw',
 }: ProductImageProps) {
   const [failed, setFailed] = useState(false);
   const showPlaceholder = !src || failed;
@@ -27,12 +38,25 @@ export function ProductImage({
     );
   }
 
-  return (
+  const webpSrcSet = api.getProductImageSrcSet(variants?.webp);
+  const avifSrcSet = api.getProductImageSrcSet(variants?.avif);
+  const img = (
     <img
       src={src}
+      srcSet={webpSrcSet}
+      sizes={webpSrcSet ? sizes : undefined}
       alt={alt}
       className={className}
       onError={() => setFailed(true)}
     />
   );
+  if (!avifSrcSet) return img;
+
+  // display: contents — разметка и стили остаются как у одиночного <img>
+  return (
+    <picture style={{ display: 'contents' }}>
+      <source type="image/avif" srcSet={avifSrcSet} sizes={sizes} />
+      {img}
+    </picture>
+  );
 }
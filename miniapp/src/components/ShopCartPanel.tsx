@@ -237,6 +237,8 @@ export function ShopCartPanel() {
               <div className="shop-cart-panel__item-image" style={{ cursor: 'pointer' }} onClick={() => handleCartItemClick(item)}>
                 <ProductImage
                   src={api.getProductImageUrl(item.photo_id ?? null)}
+                  variants={item.photo_variants}
+                  sizes="64px"
                   alt={item.name}
                   className="shop-cart-panel__item-img"
                   placeholderClassName="shop-cart-panel__item-img-placeholder"
@@ -316,6 +318,8 @@ export function ShopCartPanel() {
                             <div className="shop-cart-panel__addon-card-image">
                               <ProductImage
                                 src={imageUrl}
+                                variants={p.photo_variants?.[0]}
+                                sizes="120px"
                                 alt={p.name}
                                 className="shop-cart-panel__addon-card-img"
                                 placeholderClassName="shop-cart-panel__addon-card-img-placeholder"
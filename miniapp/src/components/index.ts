@@ -6,7 +6,7 @@ export { LocationSetup } from './LocationSetup';
 export { TopNav } from './TopNav';
 export { LiquidGlassCard } from './LiquidGlassCard';
 export { MainLayout } from './MainLayout';
-export { ProductImage } from './ProductImage';
+export { ProductImage, PRODUCT_GRID_SIZES } from './ProductImage';
 export { TelegramAuth } from './TelegramAuth';
 export { ProtectedRoute, RequireAuth } from './ProtectedRoute';
 export { HeartIcon } from './HeartIcon';
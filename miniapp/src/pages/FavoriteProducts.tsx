@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import type { FavoriteProduct } from '../types';
 import { api } from '../api/client';
-import { Loader, EmptyState, ProductImage, HeartIcon } from '../components';
+import { Loader, EmptyState, ProductImage, PRODUCT_GRID_SIZES, HeartIcon } from '../components';
 import { useTelegramWebApp } from '../hooks/useTelegramWebApp';
 import { isBrowser } from '../utils/environment';
 import { formatPrice } from '../utils/formatters';
@@ -105,6 +105,8 @@ export function FavoriteProducts() {
               <div className="favorite-product-card__image-wrap">
                 <ProductImage
                   src={imageUrl}
+                  variants={product.photo_variants}
+                  sizes={PRODUCT_GRID_SIZES}
                   alt={product.name}
                   className="favorite-product-card__image"
                   placeholderClassName="favorite-product-card__image-placeholder"
@@ -5,7 +5,7 @@ import { api } from '../api/client';
 import { useTelegramWebApp } from '../hooks/useTelegramWebApp';
 import { isBrowser, isTelegram } from '../utils/environment';
 import { useShopCart } from '../contexts/ShopCartContext';
-import { Loader, EmptyState, ProductImage, ProductModal, LiquidGlassCard, showBrowserToast } from '../components';
+import { Loader, EmptyState, ProductImage, PRODUCT_GRID_SIZES, ProductModal, LiquidGlassCard, showBrowserToast } from '../components';
 import { FloatingCartBar } from '../components/FloatingCartBar';
 import { AboutUsModal } from '../components/AboutUsModal';
 import { ShopCartPanel } from '../components/ShopCartPanel';
@@ -817,6 +817,8 @@ export function ShopDetails() {
                   <div className="shop-details__product-card-image-wrap">
                     <ProductImage
                       src={imageUrl}
+                      variants={product.photo_variants?.[0]}
+                      sizes={PRODUCT_GRID_SIZES}
                       alt={product.name}
                       className="shop-details__product-card-image"
                       placeholderClassName="shop-details__product-card-image-placeholder"
@@ -921,6 +923,8 @@ export function ShopDetails() {
                             <div className="shop-details__addon-card-image-wrap">
                               <ProductImage
                                 src={imageUrl}
+                                variants={product.photo_variants?.[0]}
+                                sizes="150px"
                                 alt={product.name}
                                 className="shop-details__addon-card-image"
                                 placeholderClassName="shop-details__addon-card-image-placeholder"
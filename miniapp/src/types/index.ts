@@ -54,6 +54,12 @@ export interface CompositionItem {
   unit: string | null;
 }
 
+/** Размеры фото товара для srcset: { webp: { "160": url, ..., "1200": url }, avif?: {...} } */
+export interface PhotoVariants {
+  webp: Record<string, string>;
+  avif?: Record<string, string>;
+}
+
 export interface Product {
   id: number;
   name: string;
@@ -62,6 +68,8 @@ export interface Product {
   photo_id: string | null;
   /** До 3 фото (пути /static/...). Для отображения использовать первый или карусель */
   photo_ids?: string[] | null;
+  /** Варианты размеров для каждого photo_ids (null — фото без вариантов) */
+  photo_variants?: (PhotoVariants | null)[] | null;
   quantity?: number;
   is_preorder?: boolean;
   composition?: CompositionItem[] | null;
@@ -83,6 +91,7 @@ export interface CartItemEntry {
   is_preorder?: boolean;
   preorder_delivery_date?: string | null;
   photo_id?: string | null;
+  photo_variants?: PhotoVariants | null;
   reserved_at?: string | null;
 }
 
@@ -140,6 +149,7 @@ export interface FavoriteProduct {
   price: number;
   photo_id: string | null;
   photo_ids?: string[] | null;
+  photo_variants?: PhotoVariants | null;
   quantity?: number;
   is_preorder?: boolean;
   composition?: CompositionItem[] | null;